@@ -0,0 +1,53 @@
+"""Add enrichment and aggregation work queues.
+
+Revision ID: 033
+Revises: 032
+Create Date: 2025-01-20
+
+Ingestion queues the keys of each flow batch it writes for enrichment,
+and enrichment queues the minutes it enriched for aggregation, so neither
+stage scans flow_records for unenriched / unprocessed rows. The queues
+are UNLOGGED: they are emptied on crash recovery and refilled by the
+workers' periodic sweep of flow_records.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "033"
+down_revision = "032"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE UNLOGGED TABLE enrichment_queue (
+            id BIGSERIAL PRIMARY KEY,
+            flow_ids UUID[] NOT NULL,
+            timestamps TIMESTAMPTZ[] NOT NULL,
+            queued_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+    op.execute("""
+        CREATE UNLOGGED TABLE aggregation_queue (
+            minute TIMESTAMPTZ PRIMARY KEY,
+            queued_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+    # Every row is deleted soon after insert; vacuum aggressively
+    for table in ("enrichment_queue", "aggregation_queue"):
+        op.execute(f"""
+            ALTER TABLE {table} SET (
+                autovacuum_vacuum_scale_factor = 0.0,
+                autovacuum_vacuum_threshold = 1000,
+                autovacuum_vacuum_cost_delay = 0
+            )
+        """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS aggregation_queue")
+    op.execute("DROP TABLE IF EXISTS enrichment_queue")
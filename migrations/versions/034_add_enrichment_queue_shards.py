@@ -0,0 +1,29 @@
+"""Shard the enrichment queue.
+
+Revision ID: 034
+Revises: 033
+Create Date: 2025-01-21
+
+Ingestion splits each batch into one enrichment queue entry per shard,
+keyed by a hash of the flow's IP pair. Each enrichment worker claims
+only the shards it owns, so parallel workers do not contend for the
+same IPs' assets.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "034"
+down_revision = "033"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE enrichment_queue ADD COLUMN shard SMALLINT NOT NULL DEFAULT 0")
+    op.execute("CREATE INDEX ix_enrichment_queue_shard ON enrichment_queue (shard, id)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_enrichment_queue_shard")
+    op.execute("ALTER TABLE enrichment_queue DROP COLUMN IF EXISTS shard")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Microbenchmark the enrichment caches.
+
+Compares lookups/sec through MemoryCache (an asyncio.Lock and
+datetime.utcnow() per call, awaited once per IP as the DNS resolver used
+to) and LocalCache, per key and through get_many/set_many once per batch.
+
+Each batch looks up the unique IPs of an enrichment batch, drawn with a
+skewed distribution from four times as many IPs as the cache holds, so
+lookups exercise hits, misses and LRU eviction; misses are then stored.
+
+Usage:
+    python scripts/benchmark_cache.py [--batches 2000] [--batch-size 500] [--cache-size 10000]
+
+No external services are required.
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from flowlens.enrichment.cache import LocalCache, MemoryCache
+
+
+def make_batches(count: int, batch_size: int, key_space: int) -> list[list[str]]:
+    """Generate batches of unique IPs with a skewed popularity."""
+    rng = random.Random(42)
+    batches = []
+    for _ in range(count):
+        ips = {
+            f"10.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}"
+            for n in (int(key_space * rng.random() ** 3) for _ in range(batch_size))
+        }
+        batches.append(list(ips))
+    return batches
+
+
+async def run_memory_cache(batches: list[list[str]], cache_size: int) -> tuple[float, float]:
+    """Look up and fill MemoryCache one awaited call per IP."""
+    cache: MemoryCache[str, str] = MemoryCache(max_size=cache_size, name="bench")
+    hits = lookups = 0
+
+    start = time.perf_counter()
+    for batch in batches:
+        for ip in batch:
+            lookups += 1
+            if await cache.get(ip) is None:
+                await cache.set(ip, "host.example.com")
+            else:
+                hits += 1
+    return time.perf_counter() - start, hits / lookups
+
+
+def run_local_cache(batches: list[list[str]], cache_size: int) -> tuple[float, float]:
+    """Look up and fill LocalCache one call per IP."""
+    cache: LocalCache[str, str] = LocalCache(max_size=cache_size, name="bench")
+    hits = lookups = 0
+
+    start = time.perf_counter()
+    for batch in batches:
+        for ip in batch:
+            lookups += 1
+            if cache.get(ip) is None:
+                cache.set(ip, "host.example.com")
+            else:
+                hits += 1
+    return time.perf_counter() - start, hits / lookups
+
+
+def run_local_cache_batched(batches: list[list[str]], cache_size: int) -> tuple[float, float]:
+    """Look up and fill LocalCache once per batch."""
+    cache: LocalCache[str, str] = LocalCache(max_size=cache_size, name="bench")
+    hits = lookups = 0
+
+    start = time.perf_counter()
+    for batch in batches:
+        found = cache.get_many(batch)
+        cache.set_many({ip: "host.example.com" for ip in batch if ip not in found})
+        lookups += len(batch)
+        hits += len(found)
+    return time.perf_counter() - start, hits / lookups
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmark the enrichment caches")
+    parser.add_argument("--batches", type=int, default=2000, help="Batches looked up")
+    parser.add_argument("--batch-size", type=int, default=500, help="IPs drawn per batch")
+    parser.add_argument("--cache-size", type=int, default=10000, help="Maximum cache entries")
+    args = parser.parse_args()
+
+    batches = make_batches(args.batches, args.batch_size, args.cache_size * 4)
+    total = sum(len(batch) for batch in batches)
+    print(f"{total:,} lookups in {len(batches):,} batches, cache size {args.cache_size:,}")
+    print(f"{'cache':>22} {'lookups/sec':>14} {'ns/lookup':>10} {'hit rate':>9}")
+
+    results = {
+        "MemoryCache": asyncio.run(run_memory_cache(batches, args.cache_size)),
+        "LocalCache": run_local_cache(batches, args.cache_size),
+        "LocalCache (get_many)": run_local_cache_batched(batches, args.cache_size),
+    }
+    for name, (elapsed, hit_rate) in results.items():
+        print(
+            f"{name:>22} {total / elapsed:>14,.0f} {elapsed / total * 1e9:>10.0f} "
+            f"{hit_rate:>9.1%}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Microbenchmark the UDP datagram hot path.
+
+Measures packets/sec through FlowProtocol.datagram_received against the
+previous per-packet behaviour (create_task(queue.put(...)), a labelled
+Prometheus inc() and a debug log call per datagram).
+
+Usage:
+    python scripts/benchmark_datagram.py [--packets 200000] [--exporters 50]
+
+No external services are required.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from flowlens.common.config import IngestionSettings, LoggingSettings
+from flowlens.common.logging import get_logger, setup_logging
+from flowlens.common.metrics import FLOWS_RECEIVED
+from flowlens.ingestion.backpressure import BackpressureQueue
+from flowlens.ingestion.server import FlowProtocol
+
+logger = get_logger(__name__)
+
+
+class LegacyFlowProtocol(FlowProtocol):
+    """FlowProtocol with the original per-datagram task creation."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # References to in-flight put tasks, so they are not collected early
+        self._puts: set[asyncio.Task[None]] = set()
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        exporter_ip = addr[0]
+        logger.debug(
+            "Received packet",
+            protocol=self._protocol_name,
+            exporter=exporter_ip,
+            size=len(data),
+        )
+        FLOWS_RECEIVED.labels(
+            protocol=self._protocol_name,
+            exporter=exporter_ip,
+        ).inc()
+        task = asyncio.create_task(self._queue.put((data, exporter_ip, self._protocol_name)))
+        self._puts.add(task)
+        task.add_done_callback(self._puts.discard)
+
+    async def close(self) -> None:
+        """Cancel and await put tasks that have not finished."""
+        for task in self._puts:
+            task.cancel()
+        await asyncio.gather(*self._puts, return_exceptions=True)
+
+
+def make_queue(packets: int) -> BackpressureQueue[tuple[bytes, str, str]]:
+    """Create a queue large enough that no packet is sampled or dropped."""
+    size = max(packets + 1, 1000)
+    return BackpressureQueue(
+        IngestionSettings(
+            queue_max_size=size * 3,
+            sample_threshold=size,
+            drop_threshold=size * 2,
+        )
+    )
+
+
+async def run_protocol(
+    protocol_cls: type[FlowProtocol],
+    packets: int,
+    exporters: int,
+) -> float:
+    """Deliver packets to a protocol handler and return packets/sec.
+
+    Timing includes yielding to the event loop until every packet has
+    reached the queue, so scheduled tasks are accounted for.
+    """
+    queue = make_queue(packets)
+    protocol = protocol_cls(queue, "netflow")
+    payload = bytes(1400)
+    addrs = [(f"10.0.{i // 256}.{i % 256}", 2055) for i in range(exporters)]
+
+    start = time.perf_counter()
+    try:
+        for i in range(packets):
+            protocol.datagram_received(payload, addrs[i % exporters])
+            # Yield periodically like a real event loop between reads
+            if i % 1000 == 999:
+                await asyncio.sleep(0)
+        while queue.size < packets:
+            await asyncio.sleep(0)
+        protocol.flush_metrics()
+        elapsed = time.perf_counter() - start
+    finally:
+        if isinstance(protocol, LegacyFlowProtocol):
+            await protocol.close()
+
+    return packets / elapsed
+
+
+async def run_benchmark(packets: int, exporters: int) -> None:
+    """Run both implementations and print packets/sec."""
+    legacy = await run_protocol(LegacyFlowProtocol, packets, exporters)
+    current = await run_protocol(FlowProtocol, packets, exporters)
+
+    print(f"{'path':>10} {'packets/sec':>14}")
+    print(f"{'legacy':>10} {legacy:>14,.0f}")
+    print(f"{'current':>10} {current:>14,.0f}")
+    print(f"speedup: {current / legacy:.1f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark datagram_received hot path")
+    parser.add_argument("--packets", type=int, default=200_000, help="Packets to deliver")
+    parser.add_argument("--exporters", type=int, default=50, help="Distinct exporter IPs")
+    args = parser.parse_args()
+
+    # Debug calls are filtered, as in production, rather than printed
+    setup_logging(LoggingSettings(level="INFO", format="console"))
+
+    asyncio.run(run_benchmark(args.packets, args.exporters))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
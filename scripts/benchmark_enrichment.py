@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Benchmark enrichment write-back paths.
+
+Compares flows/sec written back to flow_records by the per-flow path
+(a SAVEPOINT and an ORM UPDATE per flow, as the worker used to do) and
+the set-based UPDATE ... FROM unnest() the worker now issues per batch.
+Enrichment data is precomputed, so only the write-back is measured.
+
+Usage:
+    python scripts/benchmark_enrichment.py [--batch-sizes 100 500 1000] [--batches 5]
+
+Requires database to be running and configured via environment variables.
+Benchmark rows are written with flow_source='benchmark' and deleted afterwards.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime
+from ipaddress import IPv4Address
+from pathlib import Path
+from typing import Any
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from flowlens.ingestion.parsers.base import FlowRecord
+
+
+def make_records(count: int) -> list[FlowRecord]:
+    """Generate synthetic unenriched flow records."""
+    now = datetime.utcnow()
+    exporter = IPv4Address("10.255.0.1")
+    return [
+        FlowRecord(
+            timestamp=now,
+            src_ip=IPv4Address(0x0A000000 | random.getrandbits(24)),
+            dst_ip=IPv4Address(0x0A000000 | random.getrandbits(24)),
+            src_port=random.randint(1024, 65535),
+            dst_port=random.choice((22, 53, 80, 443, 5432)),
+            protocol=6,
+            bytes_count=random.randint(64, 1_000_000),
+            packets_count=random.randint(1, 1000),
+            exporter_ip=exporter,
+            flow_source="benchmark",
+            extended_fields={"vlan": 10},
+        )
+        for _ in range(count)
+    ]
+
+
+def make_enrichment() -> dict[str, Any]:
+    """Enrichment data of typical size."""
+    return {
+        "src_hostname": "app-01.example.internal",
+        "dst_hostname": "db-01.example.internal",
+        "src_asset_id": "5f0c6a3e-2d0b-4b7e-9f4a-1c2d3e4f5a6b",
+        "dst_asset_id": "7a1b2c3d-4e5f-4a6b-8c7d-9e0f1a2b3c4d",
+        "service_name": "https",
+        "service_category": "web",
+        "is_encrypted": True,
+        "enriched_at": datetime.utcnow().isoformat(),
+        "external_flow_discarded": False,
+    }
+
+
+async def write_per_flow(session: Any, flows: list[Any]) -> None:
+    """Previous write-back: one savepoint and UPDATE per flow."""
+    from sqlalchemy import update
+
+    from flowlens.models.flow import FlowRecord as FlowRecordModel
+
+    for flow in flows:
+        async with session.begin_nested():
+            await session.execute(
+                update(FlowRecordModel)
+                .where(
+                    FlowRecordModel.id == flow.id,
+                    FlowRecordModel.timestamp == flow.timestamp,
+                )
+                .values(
+                    is_enriched=True,
+                    extended_fields={**(flow.extended_fields or {}), "enrichment": make_enrichment()},
+                )
+            )
+
+
+async def write_bulk(session: Any, flows: list[Any]) -> None:
+    """Current write-back: one set-based UPDATE per batch."""
+    from flowlens.enrichment.worker import BULK_ENRICH_SQL
+
+    await session.execute(
+        BULK_ENRICH_SQL,
+        {
+            "ids": [flow.id for flow in flows],
+            "timestamps": [flow.timestamp for flow in flows],
+            "extended_fields": [
+                json.dumps({**(flow.extended_fields or {}), "enrichment": make_enrichment()})
+                for flow in flows
+            ],
+        },
+    )
+
+
+async def run_benchmark(batch_sizes: list[int], batches: int) -> None:
+    """Run both write-back paths at each batch size and print flows/sec."""
+    from sqlalchemy import select, text
+
+    from flowlens.common.config import get_settings
+    from flowlens.common.database import close_database, get_session, init_database
+    from flowlens.ingestion.parsers.batch import FlowBatch
+    from flowlens.ingestion.router import PostgreSQLRouter
+    from flowlens.models.flow import FlowRecord as FlowRecordModel
+
+    await init_database(get_settings())
+
+    print(f"{'batch':>8} {'method':>9} {'flows/sec':>12} {'ms/batch':>10}")
+
+    try:
+        router = PostgreSQLRouter()
+        await router._insert_batch(FlowBatch.from_records(make_records(max(batch_sizes))))
+
+        for batch_size in batch_sizes:
+            for method, write in (("per-flow", write_per_flow), ("bulk", write_bulk)):
+                elapsed = 0.0
+                # Run 0 warms connection and statement caches and is not timed
+                for run in range(batches + 1):
+                    async with get_session() as session:
+                        await session.execute(
+                            text(
+                                "UPDATE flow_records SET is_enriched = false "
+                                "WHERE flow_source = 'benchmark'"
+                            )
+                        )
+
+                    async with get_session() as session:
+                        result = await session.execute(
+                            select(
+                                FlowRecordModel.id,
+                                FlowRecordModel.timestamp,
+                                FlowRecordModel.extended_fields,
+                            )
+                            .where(FlowRecordModel.flow_source == "benchmark")
+                            .limit(batch_size)
+                        )
+                        flows = result.all()
+
+                        start = time.perf_counter()
+                        await write(session, flows)
+                        await session.commit()
+                        if run:
+                            elapsed += time.perf_counter() - start
+
+                flows_per_sec = batch_size * batches / elapsed
+                ms_per_batch = elapsed / batches * 1000
+                print(f"{batch_size:>8} {method:>9} {flows_per_sec:>12,.0f} {ms_per_batch:>10.1f}")
+
+    finally:
+        async with get_session() as session:
+            await session.execute(
+                text("DELETE FROM flow_records WHERE flow_source = 'benchmark'")
+            )
+        await close_database()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark enrichment write-back paths")
+    parser.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=[100, 500, 1000],
+        help="Flows enriched per batch",
+    )
+    parser.add_argument(
+        "--batches",
+        type=int,
+        default=5,
+        help="Timed batches per size and method",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.batch_sizes, args.batches))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""Microbenchmark NetFlow v9, IPFIX and sFlow data record parsing.
+
+Builds synthetic template-based packets (a typical 5-tuple plus counters
+and timestamps template, with enough records to fill a 1500-byte MTU)
+and measures records/sec through each parser once the template is cached.
+sFlow datagrams carry raw Ethernet/IPv4/TCP header samples, as most
+switches export them.
+
+Peak allocated bytes per datagram are measured with tracemalloc in a
+separate pass so tracing does not skew the throughput numbers.
+
+Usage:
+    python scripts/benchmark_parsers.py [--packets 20000]
+
+No external services are required.
+"""
+
+import argparse
+import struct
+import sys
+import time
+import tracemalloc
+from ipaddress import IPv4Address
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from flowlens.common.config import LoggingSettings
+from flowlens.common.logging import setup_logging
+from flowlens.ingestion.parsers.base import FlowParser
+from flowlens.ingestion.parsers.ipfix import IPFIXParser
+from flowlens.ingestion.parsers.netflow_v9 import NetFlowV9Parser
+from flowlens.ingestion.parsers.sflow import SFlowParser
+
+TEMPLATE_ID = 256
+UNIX_SECS = 1_700_000_000
+
+# (NetFlow v9 field type / IPFIX element ID, length)
+TEMPLATE_FIELDS = [
+    (8, 4),    # source IPv4 address
+    (12, 4),   # destination IPv4 address
+    (7, 2),    # source port
+    (11, 2),   # destination port
+    (4, 1),    # protocol
+    (6, 1),    # TCP flags
+    (5, 1),    # TOS
+    (10, 4),   # input interface
+    (14, 4),   # output interface
+    (1, 8),    # bytes
+    (2, 8),    # packets
+    (22, 4),   # first switched (sysUptime ms)
+    (21, 4),   # last switched (sysUptime ms)
+]
+RECORD_FORMAT = struct.Struct("!IIHHBBBIIQQII")
+RECORDS_PER_PACKET = 1400 // RECORD_FORMAT.size
+
+
+def _fields_body() -> bytes:
+    return b"".join(struct.pack("!HH", t, n) for t, n in TEMPLATE_FIELDS)
+
+
+def _records(seed: int) -> bytes:
+    base = int(IPv4Address("10.0.0.0"))
+    return b"".join(
+        RECORD_FORMAT.pack(
+            base + ((seed + i) & 0xFFFF),
+            base + 0x10000 + i,
+            1024 + i, 443, 6, 0x18, 0, 1, 2,
+            1500 * (i + 1), i + 1, 90_000, 95_000,
+        )
+        for i in range(RECORDS_PER_PACKET)
+    )
+
+
+def netflow_v9_packets(count: int) -> tuple[bytes, list[bytes]]:
+    """Build a NetFlow v9 template packet and `count` data packets."""
+    def header(flowsets: int) -> bytes:
+        return struct.pack("!HHIIII", 9, flowsets, 100_000, UNIX_SECS, 1, 0)
+
+    template = struct.pack("!HH", TEMPLATE_ID, len(TEMPLATE_FIELDS)) + _fields_body()
+    template_packet = header(1) + struct.pack("!HH", 0, len(template) + 4) + template
+
+    data_packets = []
+    for n in range(count):
+        records = _records(n)
+        data_packets.append(
+            header(1) + struct.pack("!HH", TEMPLATE_ID, len(records) + 4) + records
+        )
+    return template_packet, data_packets
+
+
+def ipfix_packets(count: int) -> tuple[bytes, list[bytes]]:
+    """Build an IPFIX template message and `count` data messages.
+
+    IPFIX uses flowStart/EndSysUpTime (IEs 22/21) for the same timestamps,
+    so the v9 field list is reused unchanged.
+    """
+    def message(body: bytes) -> bytes:
+        return struct.pack("!HHIII", 10, 16 + len(body), UNIX_SECS, 1, 0) + body
+
+    template = struct.pack("!HH", TEMPLATE_ID, len(TEMPLATE_FIELDS)) + _fields_body()
+    template_packet = message(struct.pack("!HH", 2, len(template) + 4) + template)
+
+    data_packets = []
+    for n in range(count):
+        records = _records(n)
+        data_packets.append(
+            message(struct.pack("!HH", TEMPLATE_ID, len(records) + 4) + records)
+        )
+    return template_packet, data_packets
+
+
+# Ethernet/IPv4/TCP header as sampled by the switch (128-byte snap length)
+SFLOW_HEADER_BYTES = 128
+SFLOW_SAMPLES_PER_DATAGRAM = 7
+
+
+def _sflow_raw_sample(seed: int) -> bytes:
+    ip = struct.pack(
+        "!BBHHHBBHII",
+        0x45, 0, 1500, 0, 0, 64, 6, 0,
+        int(IPv4Address("10.0.0.0")) + (seed & 0xFFFF),
+        int(IPv4Address("10.1.0.0")) + seed % 251,
+    )
+    tcp = struct.pack("!HHIIBBHHH", 1024 + seed % 50000, 443, 0, 0, 0x50, 0x18, 0, 0, 0)
+    frame = bytes(12) + struct.pack("!H", 0x0800) + ip + tcp
+    frame += bytes(SFLOW_HEADER_BYTES - len(frame))
+
+    raw = struct.pack("!IIII", 1, 1514, 4, len(frame)) + frame
+    record = struct.pack("!II", 1, len(raw)) + raw
+    body = struct.pack("!8I", seed, 3, 512, seed * 512, 0, 1, 2, 1) + record
+    return struct.pack("!II", 1, len(body)) + body
+
+
+def sflow_packets(count: int) -> tuple[bytes, list[bytes]]:
+    """Build `count` sFlow v5 datagrams.
+
+    sFlow has no templates, so the first datagram doubles as the warm-up
+    packet.
+    """
+    data_packets = []
+    for n in range(count):
+        samples = b"".join(
+            _sflow_raw_sample(n * SFLOW_SAMPLES_PER_DATAGRAM + i)
+            for i in range(SFLOW_SAMPLES_PER_DATAGRAM)
+        )
+        data_packets.append(
+            struct.pack("!II4sIIII", 5, 1, IPv4Address("192.0.2.1").packed,
+                        0, n, 100_000, SFLOW_SAMPLES_PER_DATAGRAM)
+            + samples
+        )
+    return data_packets[0], data_packets
+
+
+def run(
+    parser: FlowParser,
+    template_packet: bytes,
+    data_packets: list[bytes],
+    records_per_packet: int,
+) -> tuple[float, float]:
+    """Parse all data packets.
+
+    Returns:
+        Tuple of (records/sec, peak allocated bytes per datagram).
+    """
+    exporter_ip = IPv4Address("192.0.2.1")
+    parser.parse(template_packet, exporter_ip)
+
+    parsed = 0
+    start = time.perf_counter()
+    for packet in data_packets:
+        parsed += len(parser.parse(packet, exporter_ip))
+    elapsed = time.perf_counter() - start
+
+    expected = len(data_packets) * records_per_packet
+    if parsed != expected:
+        raise RuntimeError(f"parsed {parsed} records, expected {expected}")
+
+    sampled = data_packets[:1000]
+    peak_total = 0
+    tracemalloc.start()
+    for packet in sampled:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        parser.parse(packet, exporter_ip)
+        peak_total += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    return parsed / elapsed, peak_total / len(sampled)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark template-based flow parsers")
+    parser.add_argument("--packets", type=int, default=20000, help="Data packets per protocol")
+    args = parser.parse_args()
+
+    setup_logging(LoggingSettings(level="INFO", format="console"))
+
+    print(f"v9/IPFIX: {RECORDS_PER_PACKET} records/packet ({RECORD_FORMAT.size}-byte records)")
+    print(f"sFlow: {SFLOW_SAMPLES_PER_DATAGRAM} samples/datagram ({SFLOW_HEADER_BYTES}-byte headers)")
+    print(f"{'protocol':<12} {'records/sec':>12} {'peak B/datagram':>16}")
+    for name, flow_parser, build, per_packet in (
+        ("netflow_v9", NetFlowV9Parser(), netflow_v9_packets, RECORDS_PER_PACKET),
+        ("ipfix", IPFIXParser(), ipfix_packets, RECORDS_PER_PACKET),
+        ("sflow", SFlowParser(), sflow_packets, SFLOW_SAMPLES_PER_DATAGRAM),
+    ):
+        template_packet, data_packets = build(args.packets)
+        rate, peak = run(flow_parser, template_packet, data_packets, per_packet)
+        print(f"{name:<12} {rate:>12,.0f} {peak:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Benchmark PostgreSQLRouter write paths.
+
+Compares rows/sec of the binary COPY writer against the multi-row
+parameterised INSERT fallback at several batch sizes.
+
+Usage:
+    python scripts/benchmark_router.py [--batch-sizes 1000 2500 5000 10000] [--batches 5]
+
+Requires database to be running and configured via environment variables.
+Benchmark rows are written with flow_source='benchmark' and deleted afterwards.
+
+Note: the INSERT path binds 21 parameters per row, so batches larger than
+~1560 rows exceed PostgreSQL's 32767 bind parameter limit and are reported
+as failed.
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime
+from ipaddress import IPv4Address
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from flowlens.ingestion.parsers.base import FlowRecord
+
+
+def make_records(count: int) -> list[FlowRecord]:
+    """Generate synthetic flow records."""
+    now = datetime.utcnow()
+    exporter = IPv4Address("10.255.0.1")
+    return [
+        FlowRecord(
+            timestamp=now,
+            src_ip=IPv4Address(0x0A000000 | random.getrandbits(24)),
+            dst_ip=IPv4Address(0x0A000000 | random.getrandbits(24)),
+            src_port=random.randint(1024, 65535),
+            dst_port=random.choice((22, 53, 80, 443, 5432)),
+            protocol=6,
+            bytes_count=random.randint(64, 1_000_000),
+            packets_count=random.randint(1, 1000),
+            exporter_ip=exporter,
+            flow_start=now,
+            flow_end=now,
+            flow_duration_ms=0,
+            tcp_flags=0x18,
+            flow_source="benchmark",
+        )
+        for _ in range(count)
+    ]
+
+
+async def run_benchmark(batch_sizes: list[int], batches: int) -> None:
+    """Run both write paths at each batch size and print rows/sec."""
+    from sqlalchemy import text
+
+    from flowlens.common.config import get_settings
+    from flowlens.common.database import close_database, get_session, init_database
+    from flowlens.ingestion.parsers.batch import FlowBatch
+    from flowlens.ingestion.router import PostgreSQLRouter
+
+    await init_database(get_settings())
+
+    print(f"{'batch':>8} {'method':>8} {'rows/sec':>12} {'ms/batch':>10}")
+
+    try:
+        for batch_size in batch_sizes:
+            batch = FlowBatch.from_records(make_records(batch_size))
+
+            for method, use_copy in (("insert", False), ("copy", True)):
+                router = PostgreSQLRouter(batch_size=batch_size, use_copy=use_copy)
+                try:
+                    # Warm up connection and statement caches
+                    await router._insert_batch(batch)
+
+                    start = time.perf_counter()
+                    for _ in range(batches):
+                        await router._insert_batch(batch)
+                    elapsed = time.perf_counter() - start
+                except Exception as e:
+                    print(f"{batch_size:>8} {method:>8} {'failed':>12}  ({type(e).__name__})")
+                    continue
+
+                rows_per_sec = batch_size * batches / elapsed
+                ms_per_batch = elapsed / batches * 1000
+                print(f"{batch_size:>8} {method:>8} {rows_per_sec:>12,.0f} {ms_per_batch:>10.1f}")
+
+    finally:
+        async with get_session() as session:
+            await session.execute(
+                text("DELETE FROM flow_records WHERE flow_source = 'benchmark'")
+            )
+        await close_database()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark flow router write paths")
+    parser.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 2500, 5000, 10000],
+        help="Batch sizes to benchmark",
+    )
+    parser.add_argument(
+        "--batches",
+        type=int,
+        default=5,
+        help="Timed batches per size and method",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.batch_sizes, args.batches))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,6 +13,7 @@ from sqlalchemy import String, cast, func, or_, select
 from sqlalchemy.orm import selectinload
 
 from flowlens.api.dependencies import AdminUser, AnalystUser, DbSession, Pagination, Sorting, ViewerUser
+from flowlens.common.asset_cache import publish_asset_changes
 from flowlens.models.asset import Asset, AssetType, Service
 from flowlens.models.dependency import Dependency
 from flowlens.schemas.asset import (
@@ -642,6 +643,7 @@ async def bulk_update_assets(
             error_details.append(f"Asset {asset.id}: {str(e)}")
 
     await db.flush()
+    await publish_asset_changes(db, found_ids)
 
     return BulkUpdateResult(
         updated=updated,
@@ -672,6 +674,7 @@ async def bulk_delete_assets(
         deleted += 1
 
     await db.flush()
+    await publish_asset_changes(db, [asset.id for asset in assets])
 
     return {"deleted": deleted, "not_found": len(ids) - deleted}
 
@@ -868,6 +871,7 @@ async def update_asset(
             setattr(asset, field, value)
 
     await db.flush()
+    await publish_asset_changes(db, [asset.id])
     await db.refresh(asset)
 
     return AssetResponse(
@@ -934,6 +938,7 @@ async def patch_asset(
             setattr(asset, field, value)
 
     await db.flush()
+    await publish_asset_changes(db, [asset.id])
     await db.refresh(asset)
 
     return AssetResponse(
@@ -991,6 +996,7 @@ async def delete_asset(
 
     asset.soft_delete()
     await db.flush()
+    await publish_asset_changes(db, [asset_id])
 
 
 @router.get("/{asset_id}/services", response_model=list[ServiceResponse])
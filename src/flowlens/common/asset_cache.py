@@ -0,0 +1,260 @@
+"""Bounded IP to asset ID cache shared by enrichment and resolution.
+
+AssetCorrelator (enrichment) and AssetMapper (resolution) both map flow
+IPs to asset IDs. They share one size-bounded LRU cache per process, with
+a TTL so entries are eventually re-read even if an invalidation is lost.
+
+Code that deletes or changes assets calls publish_asset_changes() inside
+its transaction. That sends a PostgreSQL NOTIFY on ASSET_CHANGES_CHANNEL,
+delivered only if the transaction commits, and every process with an
+AssetInvalidationListener subscribed drops the affected entries.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from flowlens.common.config import get_settings
+from flowlens.common.logging import get_logger
+from flowlens.common.metrics import (
+    ASSET_CACHE_INVALIDATIONS,
+    ASSET_CACHE_LOOKUPS,
+    ASSET_CACHE_SIZE,
+)
+from flowlens.common.notify import NotificationListener
+
+logger = get_logger(__name__)
+
+# NOTIFY channel for asset changes; payload is {"ids": [asset UUID strings]}
+ASSET_CHANGES_CHANNEL = "flowlens_asset_changes"
+
+# Asset IDs per notification, keeping payloads under PostgreSQL's 8000 byte limit
+_IDS_PER_NOTIFICATION = 100
+
+_NOTIFY_SQL = text("SELECT pg_notify(:channel, :payload)")
+
+
+class AssetIdCache:
+    """LRU cache of IP address to asset ID with a TTL.
+
+    Not thread-safe; each process uses it from its event loop only.
+    Entries are also indexed by asset ID so they can be invalidated
+    when an asset changes.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 100000,
+        ttl_seconds: float = 3600.0,
+        name: str = "assets",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize asset ID cache.
+
+        Args:
+            max_size: Maximum number of entries.
+            ttl_seconds: Seconds an entry stays valid.
+            name: Cache name for metrics.
+            clock: Monotonic time source.
+        """
+        self._max_size = max_size
+        self._ttl = ttl_seconds
+        self._name = name
+        self._clock = clock
+
+        # IP -> (asset ID, expiry), least recently used first
+        self._entries: OrderedDict[str, tuple[UUID, float]] = OrderedDict()
+        # Asset ID -> IPs cached for it
+        self._ips_by_asset: dict[UUID, set[str]] = {}
+
+        self._hits = 0
+        self._misses = 0
+        self._invalidated = 0
+
+        self._hit_counter = ASSET_CACHE_LOOKUPS.labels(cache=name, result="hit")
+        self._miss_counter = ASSET_CACHE_LOOKUPS.labels(cache=name, result="miss")
+        self._size_gauge = ASSET_CACHE_SIZE.labels(cache=name)
+        self._invalidation_counter = ASSET_CACHE_INVALIDATIONS.labels(cache=name)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, ip: str) -> UUID | None:
+        """Get the asset ID for an IP.
+
+        Args:
+            ip: IP address string.
+
+        Returns:
+            Asset ID, or None if not cached or expired.
+        """
+        entry = self._entries.get(ip)
+        if entry is None:
+            self._misses += 1
+            self._miss_counter.inc()
+            return None
+
+        asset_id, expires_at = entry
+        if self._clock() >= expires_at:
+            self._remove(ip)
+            self._misses += 1
+            self._miss_counter.inc()
+            return None
+
+        self._entries.move_to_end(ip)
+        self._hits += 1
+        self._hit_counter.inc()
+        return asset_id
+
+    def set(self, ip: str, asset_id: UUID) -> None:
+        """Cache the asset ID for an IP, evicting the least recently used.
+
+        Args:
+            ip: IP address string.
+            asset_id: Asset ID.
+        """
+        if ip in self._entries:
+            self._remove(ip)
+
+        while len(self._entries) >= self._max_size:
+            self._remove(next(iter(self._entries)))
+
+        self._entries[ip] = (asset_id, self._clock() + self._ttl)
+        self._ips_by_asset.setdefault(asset_id, set()).add(ip)
+        self._size_gauge.set(len(self._entries))
+
+    def invalidate_assets(self, asset_ids: Iterable[UUID]) -> int:
+        """Drop every entry pointing at the given assets.
+
+        Args:
+            asset_ids: IDs of changed or deleted assets.
+
+        Returns:
+            Number of entries dropped.
+        """
+        removed = 0
+        for asset_id in asset_ids:
+            for ip in self._ips_by_asset.get(asset_id, set()).copy():
+                self._remove(ip)
+                removed += 1
+
+        if removed:
+            self._invalidated += removed
+            self._invalidation_counter.inc(removed)
+            self._size_gauge.set(len(self._entries))
+        return removed
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+        self._ips_by_asset.clear()
+        self._size_gauge.set(0)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Get cache statistics."""
+        total = self._hits + self._misses
+        return {
+            "name": self._name,
+            "size": len(self._entries),
+            "max_size": self._max_size,
+            "hits": self._hits,
+            "misses": self._misses,
+            "invalidated": self._invalidated,
+            "hit_rate": round(self._hits / total * 100, 2) if total else 0.0,
+        }
+
+    def _remove(self, ip: str) -> None:
+        """Remove an entry and its asset index."""
+        asset_id, _ = self._entries.pop(ip)
+        ips = self._ips_by_asset.get(asset_id)
+        if ips is not None:
+            ips.discard(ip)
+            if not ips:
+                del self._ips_by_asset[asset_id]
+
+
+# Process-wide cache, created on first use
+_asset_cache: AssetIdCache | None = None
+
+
+def get_asset_cache() -> AssetIdCache:
+    """Get the process-wide IP to asset ID cache."""
+    global _asset_cache
+    if _asset_cache is None:
+        settings = get_settings().asset_cache
+        _asset_cache = AssetIdCache(
+            max_size=settings.max_size,
+            ttl_seconds=settings.ttl_seconds,
+        )
+    return _asset_cache
+
+
+async def publish_asset_changes(db: AsyncSession, asset_ids: Iterable[UUID]) -> None:
+    """Announce changed or deleted assets to every process's cache.
+
+    The notification is sent when db's transaction commits, and dropped
+    if it rolls back. This process's cache is invalidated immediately.
+
+    Args:
+        db: Session whose transaction changes the assets.
+        asset_ids: IDs of changed or deleted assets.
+    """
+    ids = list(asset_ids)
+    if not ids:
+        return
+
+    get_asset_cache().invalidate_assets(ids)
+
+    for start in range(0, len(ids), _IDS_PER_NOTIFICATION):
+        chunk = ids[start:start + _IDS_PER_NOTIFICATION]
+        await db.execute(
+            _NOTIFY_SQL,
+            {
+                "channel": ASSET_CHANGES_CHANNEL,
+                "payload": json.dumps({"ids": [str(asset_id) for asset_id in chunk]}),
+            },
+        )
+
+
+class AssetInvalidationListener:
+    """Applies asset change notifications to the process's cache."""
+
+    def __init__(self, cache: AssetIdCache | None = None) -> None:
+        """Initialize listener.
+
+        Args:
+            cache: Cache to invalidate. Defaults to the process-wide cache.
+        """
+        self._cache = cache if cache is not None else get_asset_cache()
+
+    def subscribe(self, listener: NotificationListener) -> None:
+        """Subscribe to asset changes.
+
+        The cache is cleared whenever the listener (re)connects, since
+        notifications sent while disconnected are lost.
+
+        Args:
+            listener: Process's notification listener.
+        """
+        listener.subscribe(ASSET_CHANGES_CHANNEL, self.handle_notification, self._cache.clear)
+
+    def handle_notification(self, payload: str) -> None:
+        """Invalidate the assets named in a notification payload.
+
+        Args:
+            payload: JSON payload from publish_asset_changes().
+        """
+        try:
+            asset_ids = [UUID(asset_id) for asset_id in json.loads(payload)["ids"]]
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring malformed asset change notification", error=str(e))
+            return
+
+        self._cache.invalidate_assets(asset_ids)
@@ -9,7 +9,7 @@ from ipaddress import IPv4Address
 from pathlib import Path
 from typing import Literal
 
-from pydantic import Field, PostgresDsn, RedisDsn, SecretStr, field_validator
+from pydantic import Field, PositiveInt, PostgresDsn, RedisDsn, SecretStr, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -79,6 +79,12 @@ class KafkaSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="KAFKA_")
 
     enabled: bool = False
+
+    # "file" uses an append-only file log under file_log_path instead of
+    # a Kafka cluster (single host only)
+    backend: Literal["kafka", "file"] = "kafka"
+    file_log_path: Path = Path("/var/lib/flowlens/stream")
+
     bootstrap_servers: str = "localhost:9092"
     topic_flows: str = "flowlens.flows.raw"
     topic_enriched: str = "flowlens.flows.enriched"
@@ -93,6 +99,10 @@ class KafkaSettings(BaseSettings):
     auto_offset_reset: Literal["earliest", "latest"] = "latest"
     max_poll_records: int = Field(default=500, ge=1)
 
+    # Ingestion streams flows instead of writing them to PostgreSQL once
+    # throughput reaches this many flows/sec (0 streams everything)
+    route_threshold: int = Field(default=10000, ge=0)
+
 
 class IngestionSettings(BaseSettings):
     """Flow Ingestion Service configuration."""
@@ -104,16 +114,75 @@ class IngestionSettings(BaseSettings):
     netflow_port: int = Field(default=2055, ge=1, le=65535)
     sflow_port: int = Field(default=6343, ge=1, le=65535)
 
+    # Worker processes (>1 binds listeners with SO_REUSEPORT in each worker)
+    worker_processes: int = Field(default=1, ge=1, le=64)
+    stats_interval_seconds: float = Field(default=10.0, ge=1.0)
+
+    # Receive path: "protocol" uses asyncio DatagramProtocol (one callback per
+    # datagram), "batch" drains a non-blocking socket in batches
+    receive_mode: Literal["protocol", "batch"] = "protocol"
+    receive_batch_size: int = Field(default=256, ge=1, le=4096)
+
+    # Parse worker processes per collector (0 parses in the event loop).
+    # Each exporter is pinned to one worker, which holds its templates.
+    parse_workers: int = Field(default=0, ge=0, le=64)
+
     # Batching
     batch_size: int = Field(default=1000, ge=100, le=10000)
     batch_timeout_ms: int = Field(default=1000, ge=100)
 
+    # Database writer tasks (0 writes inline, stalling parsing during each
+    # write) and the batches allowed queued or in flight before parsing waits
+    write_workers: int = Field(default=2, ge=0, le=16)
+    write_max_in_flight: int = Field(default=4, ge=1, le=64)
+
     # Backpressure
     queue_max_size: int = Field(default=100000, ge=1000)
     sample_threshold: int = Field(default=50000, ge=1000)
     drop_threshold: int = Field(default=80000, ge=1000)
     sample_rate: int = Field(default=10, ge=2)
 
+    # Dequeue weight and queue share per exporter IP (default 1), set as a
+    # JSON object mapping IP to weight
+    exporter_weights: dict[str, PositiveInt] = Field(default_factory=dict)
+
+    # Closed-loop tuning of the backpressure thresholds and batch size from
+    # measured throughput and batch write latency
+    adaptive_backpressure: bool = False
+    adaptive_interval_seconds: float = Field(default=10.0, ge=1.0)
+    adaptive_target_throughput: int = Field(default=50000, ge=1)
+    adaptive_target_latency_seconds: float = Field(default=0.5, gt=0)
+
+    # Interval for publishing batched hot-path metrics
+    metrics_interval_ms: int = Field(default=1000, ge=100)
+
+    # NetFlow v9/IPFIX template snapshot, reloaded at startup so data can be
+    # decoded before exporters re-send templates (None disables). Workers
+    # write "<path>.<worker_id>".
+    template_snapshot_path: Path | None = None
+    template_snapshot_interval_seconds: float = Field(default=60.0, ge=1.0)
+
+    # Data sets received before their template, held per exporter
+    template_pending_max_flowsets: int = Field(default=64, ge=0, le=10000)
+    template_pending_max_age_seconds: float = Field(default=60.0, ge=1.0)
+
+    # Write-ahead spool for flows the database cannot take (None disables).
+    # Batches are spooled when a write fails or exceeds the timeout, and
+    # replayed once the database recovers. Workers use "<path>/<worker_id>".
+    spool_path: Path | None = None
+    spool_segment_bytes: int = Field(default=64 * 1024 * 1024, ge=1024 * 1024)
+    spool_max_bytes: int = Field(default=1024 * 1024 * 1024, ge=1024 * 1024)
+    spool_write_timeout_seconds: float = Field(default=5.0, gt=0)
+    spool_drain_interval_seconds: float = Field(default=1.0, ge=0.1)
+
+    # In-collector aggregation: "off" stores every raw flow, "aggregate"
+    # writes only per-window flow_aggregates, "aggregate_sampled" also
+    # stores one in aggregation_raw_sample_rate raw flows
+    aggregation_mode: Literal["off", "aggregate", "aggregate_sampled"] = "off"
+    aggregation_max_buckets: int = Field(default=100000, ge=1000)
+    aggregation_flush_delay_seconds: float = Field(default=30.0, ge=0)
+    aggregation_raw_sample_rate: int = Field(default=100, ge=1)
+
     @field_validator("drop_threshold")
     @classmethod
     def validate_thresholds(cls, v: int, info) -> int:
@@ -134,12 +203,27 @@ class EnrichmentSettings(BaseSettings):
     poll_interval_ms: int = Field(default=100, ge=10)
     worker_count: int = Field(default=4, ge=1, le=32)
 
+    # Re-queue unenriched flows missing from the enrichment queue (after a
+    # PostgreSQL crash empties it, or when their enrichment failed)
+    queue_sweep_interval_seconds: int = Field(default=300, ge=10)
+
     # DNS resolver
     dns_timeout: float = Field(default=2.0, ge=0.1)
     dns_cache_ttl: int = Field(default=3600, ge=60)
+    dns_negative_cache_ttl: int = Field(default=900, ge=60)  # NXDOMAIN / no PTR record
+    dns_failure_cache_ttl: int = Field(default=60, ge=5)  # Timeouts and server errors
     dns_cache_size: int = Field(default=10000, ge=100)
+    dns_max_in_flight: int = Field(default=100, ge=1, le=1000)
+    dns_queue_size: int = Field(default=10000, ge=100)
     dns_servers: list[str] = Field(default_factory=list)
 
+    # Shared DNS cache behind each worker's in-process cache: Redis when
+    # enabled, otherwise a SQLite file shared by processes on this host
+    shared_cache_enabled: bool = True
+    shared_cache_path: Path = Path("/dev/shm/flowlens-enrichment-cache.db")
+    shared_cache_flush_interval_ms: int = Field(default=500, ge=10)
+    shared_cache_warm_size: int = Field(default=10000, ge=0)  # Hottest IPs preloaded at startup
+
     # GeoIP
     geoip_database_path: Path | None = None
 
@@ -157,6 +241,10 @@ class ResolutionSettings(BaseSettings):
     batch_size: int = Field(default=1000, ge=100)
     poll_interval_ms: int = Field(default=500, ge=100)
 
+    # Re-queue minutes with unaggregated flows missing from the aggregation
+    # queue (after a PostgreSQL crash empties it)
+    queue_sweep_interval_seconds: int = Field(default=300, ge=10)
+
     # Dependency detection
     detection_interval_minutes: int = Field(default=5, ge=1, le=60)
     stale_threshold_hours: int = Field(default=24, ge=1)
@@ -221,6 +309,18 @@ class ResolutionSettings(BaseSettings):
     )
 
 
+class AssetCacheSettings(BaseSettings):
+    """IP to asset ID cache shared by enrichment and resolution."""
+
+    model_config = SettingsConfigDict(env_prefix="ASSET_CACHE_")
+
+    max_size: int = Field(default=100000, ge=100)
+    ttl_seconds: int = Field(default=3600, ge=10)
+
+    # Drop entries when assets change in other processes (LISTEN/NOTIFY)
+    invalidation_enabled: bool = True
+
+
 class KubernetesSettings(BaseSettings):
     """Kubernetes discovery configuration."""
 
@@ -617,6 +717,7 @@ class Settings(BaseSettings):
     ingestion: IngestionSettings = Field(default_factory=IngestionSettings)
     enrichment: EnrichmentSettings = Field(default_factory=EnrichmentSettings)
     resolution: ResolutionSettings = Field(default_factory=ResolutionSettings)
+    asset_cache: AssetCacheSettings = Field(default_factory=AssetCacheSettings)
     kubernetes: KubernetesSettings = Field(default_factory=KubernetesSettings)
     vcenter: VCenterSettings = Field(default_factory=VCenterSettings)
     nutanix: NutanixSettings = Field(default_factory=NutanixSettings)
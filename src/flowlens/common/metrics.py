@@ -47,18 +47,91 @@ INGESTION_QUEUE_SIZE = Gauge(
     "Current size of the ingestion queue",
 )
 
+EXPORTER_QUEUE_SIZE = Gauge(
+    "flowlens_ingestion_exporter_queue_size",
+    "Current size of each exporter's ingestion sub-queue",
+    ["exporter"],
+)
+
+EXPORTER_PACKETS_DROPPED = Counter(
+    "flowlens_ingestion_exporter_dropped_total",
+    "Total packets sampled out or dropped by backpressure, per exporter",
+    ["exporter", "reason"],
+)
+
+INGESTION_ADAPTIVE_SETTING = Gauge(
+    "flowlens_ingestion_adaptive_setting",
+    "Current value of each setting tuned by adaptive backpressure",
+    ["setting"],
+)
+
 INGESTION_BATCH_SIZE = Histogram(
     "flowlens_ingestion_batch_size",
     "Size of ingestion batches",
     buckets=[10, 50, 100, 250, 500, 1000, 2500, 5000, 10000],
 )
 
+INGESTION_WRITES_IN_FLIGHT = Gauge(
+    "flowlens_ingestion_writes_in_flight",
+    "Flow batches queued for or being written by database writer tasks",
+)
+
 INGESTION_LATENCY = Histogram(
     "flowlens_ingestion_latency_seconds",
     "Time to process and store a batch of flows",
     buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5],
 )
 
+SPOOL_FLOWS = Gauge(
+    "flowlens_ingestion_spool_pending_flows",
+    "Flows in the write-ahead spool waiting for replay",
+)
+
+SPOOL_BYTES = Gauge(
+    "flowlens_ingestion_spool_bytes",
+    "Disk space used by write-ahead spool segments",
+)
+
+SPOOL_OLDEST_AGE = Gauge(
+    "flowlens_ingestion_spool_oldest_age_seconds",
+    "Age of the oldest flow batch waiting in the write-ahead spool",
+)
+
+SPOOL_FLOWS_TOTAL = Counter(
+    "flowlens_ingestion_spool_flows_total",
+    "Total flows passing through the write-ahead spool, by operation",
+    ["operation"],
+)
+
+FLOWS_AGGREGATED = Counter(
+    "flowlens_ingestion_flows_aggregated_total",
+    "Total flows folded into aggregates by the collector",
+)
+
+COLLECTOR_AGGREGATES = Counter(
+    "flowlens_ingestion_aggregates_total",
+    "Total flow aggregates flushed by the collector, by outcome",
+    ["outcome"],
+)
+
+TEMPLATES_CACHED = Gauge(
+    "flowlens_templates_cached",
+    "Number of cached NetFlow v9/IPFIX templates per exporter",
+    ["protocol", "exporter"],
+)
+
+TEMPLATE_EVICTIONS = Counter(
+    "flowlens_template_evictions_total",
+    "Total number of templates removed from the template cache",
+    ["protocol", "reason"],
+)
+
+TEMPLATE_PENDING_FLOWSETS = Counter(
+    "flowlens_template_pending_flowsets_total",
+    "Data sets held while waiting for their template, by outcome",
+    ["protocol", "outcome"],
+)
+
 # Enrichment metrics
 ENRICHMENT_PROCESSED = Counter(
     "flowlens_enrichment_processed_total",
@@ -71,6 +144,28 @@ ENRICHMENT_ERRORS = Counter(
     ["error_type"],
 )
 
+ENRICHMENT_WORKER_FLOWS = Counter(
+    "flowlens_enrichment_worker_flows_total",
+    "Flows enriched, by enrichment pool worker",
+    ["worker"],
+)
+
+ENRICHMENT_WORKER_LAG = Gauge(
+    "flowlens_enrichment_worker_lag_seconds",
+    "Age of the oldest queue entry in a worker's last claimed batch",
+    ["worker"],
+)
+
+ENRICHMENT_POOL_WORKERS = Gauge(
+    "flowlens_enrichment_pool_workers",
+    "Enrichment workers running in the pool",
+)
+
+ENRICHMENT_WORKER_RESTARTS = Counter(
+    "flowlens_enrichment_worker_restarts_total",
+    "Enrichment workers restarted after exiting unexpectedly",
+)
+
 DNS_LOOKUPS = Counter(
     "flowlens_dns_lookups_total",
     "Total number of DNS lookups performed",
@@ -87,6 +182,23 @@ DNS_CACHE_SIZE = Gauge(
     "Current size of DNS cache",
 )
 
+DNS_PENDING = Gauge(
+    "flowlens_dns_pending",
+    "IPs waiting for a background reverse DNS lookup",
+)
+
+ENRICHMENT_CACHE_LOOKUPS = Counter(
+    "flowlens_enrichment_cache_lookups_total",
+    "Enrichment cache lookups",
+    ["cache", "result"],
+)
+
+ENRICHMENT_CACHE_SIZE = Gauge(
+    "flowlens_enrichment_cache_size",
+    "Entries in an enrichment cache",
+    ["cache"],
+)
+
 GEOIP_LOOKUPS = Counter(
     "flowlens_geoip_lookups_total",
     "Total number of GeoIP lookups",
@@ -116,6 +228,24 @@ ASSETS_UPDATED = Counter(
     ["asset_type"],
 )
 
+ASSET_CACHE_LOOKUPS = Counter(
+    "flowlens_asset_cache_lookups_total",
+    "IP to asset ID cache lookups",
+    ["cache", "result"],
+)
+
+ASSET_CACHE_SIZE = Gauge(
+    "flowlens_asset_cache_size",
+    "Entries in the IP to asset ID cache",
+    ["cache"],
+)
+
+ASSET_CACHE_INVALIDATIONS = Counter(
+    "flowlens_asset_cache_invalidations_total",
+    "IP to asset ID cache entries dropped because their asset changed",
+    ["cache"],
+)
+
 AGGREGATION_WINDOW_DURATION = Histogram(
     "flowlens_aggregation_window_duration_seconds",
     "Time to process an aggregation window",
@@ -0,0 +1,149 @@
+"""PostgreSQL LISTEN/NOTIFY support.
+
+A process holds one NotificationListener, a dedicated connection that
+LISTENs on every channel its components subscribe to, and dispatches
+notification payloads to their callbacks.
+"""
+
+import asyncio
+import contextlib
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+from flowlens.common.database import get_engine
+from flowlens.common.logging import get_logger
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = get_logger(__name__)
+
+
+class NotificationListener:
+    """Dispatches PostgreSQL notifications to subscribed callbacks.
+
+    Reconnects if the connection drops. Notifications sent while
+    disconnected are lost, so subscribers also get an on_connect
+    callback on every (re)connect to resynchronise.
+    """
+
+    def __init__(self, check_interval: float = 5.0) -> None:
+        """Initialize listener.
+
+        Args:
+            check_interval: Seconds between connection health checks and
+                reconnect attempts.
+        """
+        self._check_interval = check_interval
+        self._callbacks: dict[str, list[Callable[[str], None]]] = {}
+        self._on_connect: list[Callable[[], None]] = []
+        self._task: asyncio.Task[None] | None = None
+
+    def subscribe(
+        self,
+        channel: str,
+        callback: Callable[[str], None],
+        on_connect: Callable[[], None] | None = None,
+    ) -> None:
+        """Subscribe to a channel. Call before start().
+
+        Args:
+            channel: Channel name.
+            callback: Called with each notification's payload.
+            on_connect: Called whenever the listener (re)connects.
+        """
+        self._callbacks.setdefault(channel, []).append(callback)
+        if on_connect is not None:
+            self._on_connect.append(on_connect)
+
+    async def start(self) -> None:
+        """Start listening in the background."""
+        if self._task is None and self._callbacks:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop listening and close the connection."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def dispatch(self, channel: str, payload: str) -> None:
+        """Pass a notification to the channel's subscribers.
+
+        Args:
+            channel: Channel notified.
+            payload: Notification payload.
+        """
+        for callback in self._callbacks.get(channel, []):
+            try:
+                callback(payload)
+            except Exception as e:
+                logger.error("Notification callback failed", channel=channel, error=str(e))
+
+    async def _run(self) -> None:
+        """Listen, reconnecting whenever the connection is lost."""
+        while True:
+            conn: AsyncConnection | None = None
+            try:
+                conn = await get_engine().connect()
+                raw_conn = await conn.get_raw_connection()
+                driver_conn = raw_conn.driver_connection
+
+                for channel in self._callbacks:
+                    await driver_conn.add_listener(channel, self._on_notification)
+                for on_connect in self._on_connect:
+                    on_connect()
+                logger.info("Listening for notifications", channels=list(self._callbacks))
+
+                while not driver_conn.is_closed():
+                    await asyncio.sleep(self._check_interval)
+
+                logger.warning("Notification listener connection lost")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Notification listener failed", error=str(e))
+            finally:
+                if conn is not None:
+                    with contextlib.suppress(Exception):
+                        await conn.invalidate()
+
+            await asyncio.sleep(self._check_interval)
+
+    def _on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:  # noqa: ARG002
+        """asyncpg notification callback."""
+        self.dispatch(channel, payload)
+
+
+class WorkSignal:
+    """Wakes idle workers when new work is announced.
+
+    Workers wait on the signal between empty polls instead of sleeping
+    for a fixed interval; subscribing set() to a channel wakes them as
+    soon as the channel is notified.
+    """
+
+    def __init__(self) -> None:
+        self._event = asyncio.Event()
+
+    def set(self, payload: str = "") -> None:  # noqa: ARG002
+        """Announce new work."""
+        self._event.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for new work.
+
+        Args:
+            timeout: Maximum seconds to wait.
+
+        Returns:
+            True if woken by set(), False on timeout.
+        """
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except TimeoutError:
+            return False
+        self._event.clear()
+        return True
@@ -0,0 +1,384 @@
+"""Append-only message log used to stream flows between services.
+
+Ingestion publishes encoded flow batches to a topic and enrichment
+consumes them. Two backends share one interface:
+
+- KafkaLog: Apache Kafka via aiokafka (the "kafka" optional dependency).
+- FileLog: one append-only file per topic with per-group offset files.
+  A stand-in for single-host deployments, development and tests. It
+  supports one active consumer per group and keeps every message.
+"""
+
+import asyncio
+import struct
+import zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any
+
+from flowlens.common.config import KafkaSettings
+from flowlens.common.logging import get_logger
+from flowlens.common.metrics import KAFKA_MESSAGES_CONSUMED, KAFKA_MESSAGES_PRODUCED
+
+logger = get_logger(__name__)
+
+# FileLog message frame: payload length, CRC32 of payload
+_FRAME = struct.Struct("!II")
+
+# How often FileLog consumers check for new messages while polling
+_FILE_POLL_INTERVAL = 0.05
+
+
+class LogConsumer(ABC):
+    """Reads messages from a topic on behalf of a consumer group."""
+
+    @abstractmethod
+    async def poll(self, max_records: int, timeout: float) -> list[bytes]:
+        """Fetch the next messages.
+
+        Args:
+            max_records: Maximum number of messages to return.
+            timeout: Seconds to wait when no messages are available.
+
+        Returns:
+            Message payloads in log order; empty if none arrived in time.
+        """
+        ...
+
+    @abstractmethod
+    async def commit(self) -> None:
+        """Record every message returned by poll() as processed."""
+        ...
+
+    @abstractmethod
+    async def seek_to_committed(self) -> None:
+        """Rewind to the last commit so uncommitted messages are polled again."""
+        ...
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Close the consumer. Uncommitted messages are delivered again."""
+        ...
+
+
+class FlowLog(ABC):
+    """Producer side of an append-only message log."""
+
+    @abstractmethod
+    async def publish(self, topic: str, value: bytes, key: bytes | None = None) -> None:
+        """Append a message to a topic.
+
+        Args:
+            topic: Topic name.
+            value: Message payload.
+            key: Partitioning key, if the backend supports one.
+        """
+        ...
+
+    @abstractmethod
+    async def flush(self) -> None:
+        """Wait until published messages are durable in the log."""
+        ...
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Flush and release resources."""
+        ...
+
+    @abstractmethod
+    def consumer(self, topic: str, group: str) -> LogConsumer:
+        """Create a consumer for a topic.
+
+        Args:
+            topic: Topic name.
+            group: Consumer group; committed offsets are shared per group.
+
+        Returns:
+            Consumer positioned at the group's committed offset.
+        """
+        ...
+
+
+class FileLog(FlowLog):
+    """File-backed log: <directory>/<topic>.log plus <topic>.<group>.offset."""
+
+    def __init__(self, directory: Path) -> None:
+        """Initialize file log.
+
+        Args:
+            directory: Directory holding topic and offset files.
+        """
+        self._directory = directory
+        self._files: dict[str, Any] = {}
+
+    def topic_path(self, topic: str) -> Path:
+        """Path of a topic's log file."""
+        return self._directory / f"{topic}.log"
+
+    async def publish(self, topic: str, value: bytes, key: bytes | None = None) -> None:  # noqa: ARG002
+        """Append a message to a topic file."""
+        f = self._files.get(topic)
+        if f is None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            f = self._files[topic] = self.topic_path(topic).open("ab")
+
+        f.write(_FRAME.pack(len(value), zlib.crc32(value)) + value)
+        KAFKA_MESSAGES_PRODUCED.labels(topic=topic).inc()
+
+    async def flush(self) -> None:
+        """Flush buffered writes to the topic files."""
+        for f in self._files.values():
+            f.flush()
+
+    async def close(self) -> None:
+        """Flush and close the topic files."""
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def consumer(self, topic: str, group: str) -> LogConsumer:
+        """Create a consumer reading a topic file."""
+        return FileLogConsumer(
+            self.topic_path(topic),
+            self._directory / f"{topic}.{group}.offset",
+            topic,
+            group,
+        )
+
+
+class FileLogConsumer(LogConsumer):
+    """Consumer for a FileLog topic."""
+
+    def __init__(self, path: Path, offset_path: Path, topic: str, group: str) -> None:
+        """Initialize consumer.
+
+        Args:
+            path: Topic log file.
+            offset_path: File holding the group's committed byte offset.
+            topic: Topic name (for metrics).
+            group: Consumer group (for metrics).
+        """
+        self._path = path
+        self._offset_path = offset_path
+        self._topic = topic
+        self._group = group
+
+        self._committed = int(offset_path.read_text()) if offset_path.is_file() else 0
+        self._position = self._committed
+        self._file: Any = None
+
+    async def poll(self, max_records: int, timeout: float) -> list[bytes]:
+        """Read messages after the current position, waiting up to timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        while True:
+            messages = self._read(max_records)
+            if messages or loop.time() >= deadline:
+                return messages
+            await asyncio.sleep(min(_FILE_POLL_INTERVAL, max(deadline - loop.time(), 0)))
+
+    async def commit(self) -> None:
+        """Persist the current position as the group's offset."""
+        if self._position == self._committed:
+            return
+
+        tmp_path = self._offset_path.with_name(self._offset_path.name + ".tmp")
+        tmp_path.write_text(str(self._position))
+        tmp_path.replace(self._offset_path)
+        self._committed = self._position
+
+    async def seek_to_committed(self) -> None:
+        """Move the read position back to the committed offset."""
+        self._position = self._committed
+
+    async def close(self) -> None:
+        """Close the topic file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read(self, max_records: int) -> list[bytes]:
+        """Read whole messages from the current position."""
+        if self._file is None:
+            if not self._path.is_file():
+                return []
+            self._file = self._path.open("rb")
+
+        f = self._file
+        f.seek(self._position)
+        messages: list[bytes] = []
+
+        while len(messages) < max_records:
+            header = f.read(_FRAME.size)
+            if len(header) < _FRAME.size:
+                break
+
+            length, crc = _FRAME.unpack(header)
+            value = f.read(length)
+            if len(value) < length:
+                # Message still being written
+                break
+
+            self._position += _FRAME.size + length
+            if zlib.crc32(value) != crc:
+                logger.error(
+                    "Skipping corrupt log message",
+                    path=str(self._path),
+                    offset=self._position - _FRAME.size - length,
+                )
+                continue
+            messages.append(value)
+
+        if messages:
+            KAFKA_MESSAGES_CONSUMED.labels(
+                topic=self._topic,
+                consumer_group=self._group,
+            ).inc(len(messages))
+        return messages
+
+
+class KafkaLog(FlowLog):
+    """Kafka-backed log.
+
+    Requires the aiokafka package (flowlens[kafka]).
+    """
+
+    def __init__(self, settings: KafkaSettings) -> None:
+        """Initialize Kafka log.
+
+        Args:
+            settings: Kafka settings.
+        """
+        self._settings = settings
+        self._producer: Any = None
+
+    async def _get_producer(self) -> Any:
+        """Get or start the producer."""
+        if self._producer is None:
+            from aiokafka import AIOKafkaProducer
+
+            compression = self._settings.compression
+            producer = AIOKafkaProducer(
+                bootstrap_servers=self._settings.bootstrap_servers,
+                max_batch_size=self._settings.batch_size,
+                linger_ms=self._settings.linger_ms,
+                compression_type=None if compression == "none" else compression,
+            )
+            await producer.start()
+            self._producer = producer
+
+        return self._producer
+
+    async def publish(self, topic: str, value: bytes, key: bytes | None = None) -> None:
+        """Send a message; delivery completes in the background."""
+        producer = await self._get_producer()
+        await producer.send(topic, value=value, key=key)
+        KAFKA_MESSAGES_PRODUCED.labels(topic=topic).inc()
+
+    async def flush(self) -> None:
+        """Wait for in-flight messages to be acknowledged."""
+        if self._producer is not None:
+            await self._producer.flush()
+
+    async def close(self) -> None:
+        """Flush and stop the producer."""
+        if self._producer is not None:
+            await self._producer.stop()
+            self._producer = None
+
+    def consumer(self, topic: str, group: str) -> LogConsumer:
+        """Create a Kafka consumer in a consumer group."""
+        return KafkaLogConsumer(self._settings, topic, group)
+
+
+class KafkaLogConsumer(LogConsumer):
+    """Kafka consumer with manual offset commits."""
+
+    def __init__(self, settings: KafkaSettings, topic: str, group: str) -> None:
+        """Initialize consumer.
+
+        Args:
+            settings: Kafka settings.
+            topic: Topic to subscribe to.
+            group: Consumer group ID.
+        """
+        self._settings = settings
+        self._topic = topic
+        self._group = group
+        self._consumer: Any = None
+
+    async def _get_consumer(self) -> Any:
+        """Get or start the consumer."""
+        if self._consumer is None:
+            from aiokafka import AIOKafkaConsumer
+
+            consumer = AIOKafkaConsumer(
+                self._topic,
+                bootstrap_servers=self._settings.bootstrap_servers,
+                group_id=self._group,
+                enable_auto_commit=False,
+                auto_offset_reset=self._settings.auto_offset_reset,
+                max_poll_records=self._settings.max_poll_records,
+            )
+            await consumer.start()
+            self._consumer = consumer
+
+        return self._consumer
+
+    async def poll(self, max_records: int, timeout: float) -> list[bytes]:
+        """Fetch messages from all assigned partitions."""
+        consumer = await self._get_consumer()
+        batches = await consumer.getmany(timeout_ms=int(timeout * 1000), max_records=max_records)
+        messages = [message.value for partition in batches.values() for message in partition]
+
+        if messages:
+            KAFKA_MESSAGES_CONSUMED.labels(
+                topic=self._topic,
+                consumer_group=self._group,
+            ).inc(len(messages))
+        return messages
+
+    async def commit(self) -> None:
+        """Commit the offsets of all fetched messages."""
+        if self._consumer is not None:
+            await self._consumer.commit()
+
+    async def seek_to_committed(self) -> None:
+        """Seek each assigned partition back to its committed offset.
+
+        Partitions the group never committed restart according to
+        auto_offset_reset, as they would for a new consumer.
+        """
+        if self._consumer is None:
+            return
+
+        consumer = self._consumer
+        for partition in consumer.assignment():
+            offset = await consumer.committed(partition)
+            if offset is not None:
+                consumer.seek(partition, offset)
+            elif self._settings.auto_offset_reset == "earliest":
+                await consumer.seek_to_beginning(partition)
+            else:
+                await consumer.seek_to_end(partition)
+
+    async def close(self) -> None:
+        """Stop the consumer."""
+        if self._consumer is not None:
+            await self._consumer.stop()
+            self._consumer = None
+
+
+def create_flow_log(settings: KafkaSettings) -> FlowLog:
+    """Create the configured log backend.
+
+    Args:
+        settings: Kafka settings.
+
+    Returns:
+        KafkaLog or FileLog, depending on settings.backend.
+    """
+    if settings.backend == "file":
+        return FileLog(settings.file_log_path)
+    return KafkaLog(settings)
@@ -0,0 +1,320 @@
+"""Work queues handing new flows from one pipeline stage to the next.
+
+Ingestion records the keys of every batch it writes in the
+enrichment_queue table, and enrichment records the minutes of the flows
+it enriched in aggregation_queue, each in the same transaction as the
+flows themselves. The next stage claims entries instead of scanning the
+partitioned flow_records table for is_enriched / is_processed flags, and
+idle workers are woken by a NOTIFY on the queue's channel.
+
+Enrichment queue entries are split into ENRICHMENT_SHARDS shards by a
+hash of each flow's IP pair, so both directions of a conversation land
+in the same shard. Each enrichment worker claims only its own shards,
+which keeps workers from contending for the same IPs' assets.
+
+Both tables are UNLOGGED, so they are emptied if PostgreSQL crashes.
+The sweep functions refill them from the flags on flow_records, and
+workers run them at startup and then at a low, fixed interval. The flow
+sweep also re-queues flows whose enrichment failed, since their queue
+entries were consumed.
+"""
+
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, NamedTuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Channels notified when a queue receives entries (empty payload)
+FLOWS_READY_CHANNEL = "flowlens_flows_ready"
+WINDOWS_READY_CHANNEL = "flowlens_windows_ready"
+
+# Enrichment queue shards; at least the maximum enrichment worker count,
+# so every worker owns a shard
+ENRICHMENT_SHARDS = 32
+
+# 64-bit finalizer constants (MurmurHash3 fmix64) for the shard hash
+_FMIX_1 = np.uint64(0xFF51AFD7ED558CCD)
+_FMIX_2 = np.uint64(0xC4CEB9FE1A85EC53)
+_FMIX_SHIFT = np.uint64(33)
+
+# Advisory locks keeping concurrent workers from sweeping at the same time
+_SWEEP_FLOWS_LOCK_ID = 0x466C0001
+_SWEEP_WINDOWS_LOCK_ID = 0x466C0002
+
+# asyncpg statements, for the raw connection ingestion COPYs on
+_ENQUEUE_FLOWS_SQL = (
+    "INSERT INTO enrichment_queue (shard, flow_ids, timestamps) VALUES ($1, $2, $3)"
+)
+_NOTIFY_FLOWS_SQL = f"SELECT pg_notify('{FLOWS_READY_CHANNEL}', '')"
+
+_NOTIFY_SQL = text("SELECT pg_notify(:channel, '')")
+
+_TRY_LOCK_SQL = text("SELECT pg_try_advisory_xact_lock(:lock_id)")
+
+# Oldest entries in the given shards that nobody else has claimed, up to
+# the first entry that reaches max_flows. Every candidate stays locked
+# until the transaction ends; only the returned ones are consumed.
+_CLAIM_FLOWS_SQL = text("""
+    SELECT id, flow_ids, timestamps, queued_at
+    FROM (
+        SELECT id, flow_ids, timestamps, queued_at,
+               sum(cardinality(flow_ids)) OVER (ORDER BY id)
+                   - cardinality(flow_ids) AS preceding
+        FROM (
+            SELECT id, flow_ids, timestamps, queued_at FROM enrichment_queue
+            WHERE shard = ANY(CAST(:shards AS smallint[]))
+            ORDER BY id
+            LIMIT :max_flows
+            FOR UPDATE SKIP LOCKED
+        ) AS candidates
+    ) AS claimable
+    WHERE preceding < :max_flows
+    ORDER BY id
+""")
+
+_DELETE_FLOWS_SQL = text("DELETE FROM enrichment_queue WHERE id = ANY(CAST(:ids AS bigint[]))")
+
+# Leave the flows after the first :count in an entry for the next claim
+_TRIM_FLOWS_SQL = text("""
+    UPDATE enrichment_queue
+    SET flow_ids = flow_ids[:count + 1:], timestamps = timestamps[:count + 1:]
+    WHERE id = :id
+""")
+
+# Unenriched flows ingested before :cutoff that are not queued (lost when
+# the queue was emptied, or consumed by a failed enrichment), in chunks
+# spread over the shards
+_SWEEP_FLOWS_SQL = text("""
+    WITH queued AS (
+        SELECT unnest(flow_ids) AS id FROM enrichment_queue
+    )
+    INSERT INTO enrichment_queue (shard, flow_ids, timestamps)
+    SELECT chunk % :shards, array_agg(id), array_agg(timestamp)
+    FROM (
+        SELECT f.id, f.timestamp,
+               (row_number() OVER (ORDER BY f.timestamp) - 1) / :chunk_size AS chunk
+        FROM flow_records f
+        WHERE f.is_enriched = false
+          AND f.ingested_at < :cutoff
+          AND NOT EXISTS (SELECT 1 FROM queued WHERE queued.id = f.id)
+    ) AS pending
+    GROUP BY chunk
+""")
+
+_ENQUEUE_WINDOWS_SQL = text("""
+    INSERT INTO aggregation_queue (minute)
+    SELECT DISTINCT date_trunc('minute', ts)
+    FROM unnest(CAST(:timestamps AS timestamptz[])) AS ts
+    ON CONFLICT DO NOTHING
+""")
+
+_CLAIM_WINDOWS_SQL = text("""
+    DELETE FROM aggregation_queue
+    WHERE minute IN (
+        SELECT minute FROM aggregation_queue
+        ORDER BY minute
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING minute
+""")
+
+# Minutes with enriched but unaggregated flows
+_SWEEP_WINDOWS_SQL = text("""
+    INSERT INTO aggregation_queue (minute)
+    SELECT DISTINCT date_trunc('minute', timestamp)
+    FROM flow_records
+    WHERE timestamp >= :cutoff AND is_enriched = true AND is_processed = false
+    ON CONFLICT DO NOTHING
+""")
+
+
+class QueuedFlows(NamedTuple):
+    """A claimed enrichment queue entry."""
+
+    flow_ids: list[UUID]
+    timestamps: list[datetime]
+    queued_at: datetime
+
+
+def flow_shards(src_ip: np.ndarray, dst_ip: np.ndarray) -> np.ndarray:
+    """Compute the enrichment queue shard of each flow.
+
+    The hash is symmetric in source and destination, so both directions
+    of a conversation share a shard.
+
+    Args:
+        src_ip: Packed source addresses, shape (n, 16) uint8.
+        dst_ip: Packed destination addresses, shape (n, 16) uint8.
+
+    Returns:
+        Shard per flow, in [0, ENRICHMENT_SHARDS).
+    """
+
+    def fmix(x: np.ndarray) -> np.ndarray:
+        x = x ^ (x >> _FMIX_SHIFT)
+        x = x * _FMIX_1
+        x = x ^ (x >> _FMIX_SHIFT)
+        x = x * _FMIX_2
+        return x ^ (x >> _FMIX_SHIFT)
+
+    def address_hash(packed: np.ndarray) -> np.ndarray:
+        halves = np.ascontiguousarray(packed).view("<u8")
+        return fmix(halves[:, 0] ^ fmix(halves[:, 1]))
+
+    combined = address_hash(src_ip) ^ address_hash(dst_ip)
+    return (combined % np.uint64(ENRICHMENT_SHARDS)).astype(np.int16)
+
+
+async def enqueue_flows(
+    conn: Any,
+    flow_ids: Sequence[UUID],
+    timestamps: Sequence[datetime],
+    shards: np.ndarray,
+) -> None:
+    """Queue newly written flows for enrichment, one entry per shard.
+
+    Args:
+        conn: asyncpg connection, inside the transaction writing the flows.
+        flow_ids: Flow IDs.
+        timestamps: Flow timestamps, aligned with flow_ids.
+        shards: Shard per flow from flow_shards(), aligned with flow_ids.
+    """
+    if not len(flow_ids):
+        return
+
+    entries: dict[int, tuple[list[UUID], list[datetime]]] = {}
+    for flow_id, timestamp, shard in zip(flow_ids, timestamps, shards.tolist(), strict=True):
+        ids, shard_timestamps = entries.setdefault(shard, ([], []))
+        ids.append(flow_id)
+        shard_timestamps.append(timestamp)
+
+    await conn.executemany(
+        _ENQUEUE_FLOWS_SQL,
+        [(shard, ids, shard_timestamps) for shard, (ids, shard_timestamps) in entries.items()],
+    )
+    await conn.execute(_NOTIFY_FLOWS_SQL)
+
+
+async def claim_flows(
+    db: AsyncSession,
+    shards: Sequence[int],
+    max_flows: int,
+) -> list[QueuedFlows]:
+    """Claim up to max_flows of the oldest queued flows in the given shards.
+
+    Whole entries are claimed in queue order; the entry that crosses
+    max_flows is split and its remaining flows stay queued in place.
+    Claims are made in db's transaction, so they return to the queue if
+    the transaction rolls back.
+
+    Args:
+        db: Database session.
+        shards: Shards to claim from.
+        max_flows: Maximum flows to claim.
+
+    Returns:
+        Claimed entries; empty if none are queued.
+    """
+    result = await db.execute(
+        _CLAIM_FLOWS_SQL, {"shards": list(shards), "max_flows": max_flows}
+    )
+
+    entries: list[QueuedFlows] = []
+    consumed: list[int] = []
+    remaining = max_flows
+    for row in result.all():
+        if len(row.flow_ids) > remaining:
+            await db.execute(_TRIM_FLOWS_SQL, {"id": row.id, "count": remaining})
+            entries.append(
+                QueuedFlows(
+                    list(row.flow_ids[:remaining]),
+                    list(row.timestamps[:remaining]),
+                    row.queued_at,
+                )
+            )
+            break
+        consumed.append(row.id)
+        entries.append(QueuedFlows(list(row.flow_ids), list(row.timestamps), row.queued_at))
+        remaining -= len(row.flow_ids)
+
+    if consumed:
+        await db.execute(_DELETE_FLOWS_SQL, {"ids": consumed})
+    return entries
+
+
+async def sweep_flows(db: AsyncSession, chunk_size: int, cutoff: datetime) -> int:
+    """Queue unenriched flows that are missing from the enrichment queue.
+
+    Args:
+        db: Database session.
+        chunk_size: Flows per queue entry.
+        cutoff: Only flows ingested before this are queued, leaving
+            newer ones to the transactions still writing or claiming them.
+
+    Returns:
+        Number of entries queued.
+    """
+    if not (await db.execute(_TRY_LOCK_SQL, {"lock_id": _SWEEP_FLOWS_LOCK_ID})).scalar():
+        return 0
+
+    result = await db.execute(
+        _SWEEP_FLOWS_SQL,
+        {"chunk_size": chunk_size, "shards": ENRICHMENT_SHARDS, "cutoff": cutoff},
+    )
+    if result.rowcount:
+        await db.execute(_NOTIFY_SQL, {"channel": FLOWS_READY_CHANNEL})
+    return result.rowcount
+
+
+async def enqueue_windows(db: AsyncSession, timestamps: Sequence[datetime]) -> None:
+    """Queue the minutes of newly enriched flows for aggregation.
+
+    Args:
+        db: Session whose transaction enriches the flows.
+        timestamps: Enriched flow timestamps.
+    """
+    if not timestamps:
+        return
+    await db.execute(_ENQUEUE_WINDOWS_SQL, {"timestamps": list(timestamps)})
+    await db.execute(_NOTIFY_SQL, {"channel": WINDOWS_READY_CHANNEL})
+
+
+async def claim_windows(db: AsyncSession, limit: int) -> list[datetime]:
+    """Claim the oldest queued minutes for aggregation.
+
+    Entries are deleted in db's transaction, so they are returned to
+    the queue if the transaction rolls back.
+
+    Args:
+        db: Database session.
+        limit: Maximum minutes to claim.
+
+    Returns:
+        Claimed minutes, oldest first.
+    """
+    result = await db.execute(_CLAIM_WINDOWS_SQL, {"limit": limit})
+    return sorted(minute for (minute,) in result.all())
+
+
+async def sweep_windows(db: AsyncSession, cutoff: datetime) -> int:
+    """Queue minutes since cutoff that have enriched, unaggregated flows.
+
+    Args:
+        db: Database session.
+        cutoff: Oldest flow timestamp to consider.
+
+    Returns:
+        Number of minutes queued.
+    """
+    if not (await db.execute(_TRY_LOCK_SQL, {"lock_id": _SWEEP_WINDOWS_LOCK_ID})).scalar():
+        return 0
+
+    result = await db.execute(_SWEEP_WINDOWS_SQL, {"cutoff": cutoff})
+    if result.rowcount:
+        await db.execute(_NOTIFY_SQL, {"channel": WINDOWS_READY_CHANNEL})
+    return result.rowcount
@@ -2,24 +2,54 @@
 
 Provides memory-based caching with TTL support, with optional
 Redis backend for distributed deployments.
+
+LocalCache is the synchronous variant for the enrichment hot path: it
+takes no lock, reads a monotonic integer clock once per batch, and
+reports per-cache metrics once per batch.
+
+TieredCache puts a LocalCache in front of a SharedStore (Redis, or a
+SQLite file when Redis is disabled) so that processes share what they
+have looked up and a restarted process does not start cold.
 """
 
 import asyncio
+import contextlib
+import math
+import sqlite3
+import time
 from abc import ABC, abstractmethod
-from collections import OrderedDict
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Any, Generic, TypeVar
 
-from flowlens.common.config import get_settings
+from flowlens.common.config import EnrichmentSettings, get_settings
 from flowlens.common.logging import get_logger
-from flowlens.common.metrics import DNS_CACHE_HITS, DNS_CACHE_SIZE
+from flowlens.common.metrics import (
+    DNS_CACHE_HITS,
+    DNS_CACHE_SIZE,
+    ENRICHMENT_CACHE_LOOKUPS,
+    ENRICHMENT_CACHE_SIZE,
+    REDIS_OPERATIONS,
+)
 
 logger = get_logger(__name__)
 
 K = TypeVar("K")
 V = TypeVar("V")
 
+# Keys whose hit counts Redis keeps for warm starts
+_REDIS_HOT_KEYS = 100_000
+
+# Shared store writes between removals of expired SQLite rows
+_SQLITE_PRUNE_EVERY = 100
+
+# Keys per SQLite IN (...) lookup, below SQLITE_MAX_VARIABLE_NUMBER
+_SQLITE_BATCH_SIZE = 500
+
 
 @dataclass
 class CacheEntry(Generic[V]):
@@ -192,6 +222,148 @@ class MemoryCache(BaseCache[K, V]):
         return removed
 
 
+class LocalCache(Generic[K, V]):
+    """In-memory LRU cache with TTL support, without locking.
+
+    Must only be used from one event loop thread; no method awaits, so
+    no other coroutine can interleave with an update. Expiry uses
+    integer nanoseconds from a monotonic clock, so wall clock changes do
+    not expire or extend entries.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        default_ttl: int = 3600,
+        name: str = "cache",
+        clock: Callable[[], int] = time.monotonic_ns,
+    ) -> None:
+        """Initialize local cache.
+
+        Args:
+            max_size: Maximum number of entries.
+            default_ttl: Default TTL in seconds.
+            name: Cache name for metrics.
+            clock: Monotonic clock returning integer nanoseconds.
+        """
+        self._max_size = max_size
+        self._default_ttl = default_ttl
+        self._name = name
+        self._clock = clock
+        self._data: OrderedDict[K, tuple[V, int]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+        self._hits_metric = ENRICHMENT_CACHE_LOOKUPS.labels(cache=name, result="hit")
+        self._misses_metric = ENRICHMENT_CACHE_LOOKUPS.labels(cache=name, result="miss")
+        self._size_metric = ENRICHMENT_CACHE_SIZE.labels(cache=name)
+
+    def get(self, key: K) -> V | None:
+        """Get a value, or None if missing or expired."""
+        return self.get_many((key,)).get(key)
+
+    def get_many(self, keys: Iterable[K]) -> dict[K, V]:
+        """Get the live values for several keys.
+
+        Hits are marked most recently used; expired entries are dropped.
+
+        Args:
+            keys: Keys to look up.
+
+        Returns:
+            Value per key found; missing and expired keys are left out.
+        """
+        now = self._clock()
+        data = self._data
+        found: dict[K, V] = {}
+        misses = 0
+
+        for key in keys:
+            entry = data.get(key)
+            if entry is None:
+                misses += 1
+            elif entry[1] <= now:
+                del data[key]
+                misses += 1
+            else:
+                data.move_to_end(key)
+                found[key] = entry[0]
+
+        self._hits += len(found)
+        self._misses += misses
+        if found:
+            self._hits_metric.inc(len(found))
+        if misses:
+            self._misses_metric.inc(misses)
+        return found
+
+    def set(self, key: K, value: V, ttl: int | None = None) -> None:
+        """Set a value, evicting the least recently used entries if full."""
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: Mapping[K, V], ttl: int | None = None) -> None:
+        """Set several values with the same TTL.
+
+        Args:
+            items: Value per key.
+            ttl: TTL in seconds; the cache default if not given.
+        """
+        expires_at = self._clock() + (ttl or self._default_ttl) * 1_000_000_000
+        data = self._data
+
+        for key, value in items.items():
+            data[key] = (value, expires_at)
+            data.move_to_end(key)
+
+        while len(data) > self._max_size:
+            data.popitem(last=False)
+        self._size_metric.set(len(data))
+
+    def delete(self, key: K) -> None:
+        """Delete an entry."""
+        self._data.pop(key, None)
+        self._size_metric.set(len(self._data))
+
+    def clear(self) -> None:
+        """Clear all entries."""
+        self._data.clear()
+        self._size_metric.set(0)
+
+    def size(self) -> int:
+        """Get current cache size."""
+        return len(self._data)
+
+    def cleanup_expired(self) -> int:
+        """Remove expired entries.
+
+        Returns number of entries removed.
+        """
+        now = self._clock()
+        expired = [key for key, (_, expires_at) in self._data.items() if expires_at <= now]
+        for key in expired:
+            del self._data[key]
+
+        if expired:
+            self._size_metric.set(len(self._data))
+            logger.debug("Cleaned up expired cache entries", cache=self._name, removed=len(expired))
+        return len(expired)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Get cache statistics."""
+        total = self._hits + self._misses
+        hit_rate = (self._hits / total * 100) if total > 0 else 0.0
+
+        return {
+            "name": self._name,
+            "size": len(self._data),
+            "max_size": self._max_size,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(hit_rate, 2),
+        }
+
+
 class RedisCache(BaseCache[str, str]):
     """Redis-backed cache for distributed deployments.
 
@@ -285,6 +457,472 @@ class RedisCache(BaseCache[str, str]):
             self._client = None
 
 
+class SharedStore(ABC):
+    """Cache store shared between processes.
+
+    Entries carry an absolute expiry in wall clock seconds, since
+    monotonic clocks are not comparable between processes. Hit counts
+    are kept per key so a starting process can load the hottest entries.
+    """
+
+    @abstractmethod
+    async def mget(self, keys: Sequence[str]) -> dict[str, tuple[str, float]]:
+        """Get the live (value, expires_at) entries for several keys at once."""
+        ...
+
+    @abstractmethod
+    async def mset(
+        self,
+        entries: Mapping[str, tuple[str, float]],
+        hits: Mapping[str, int],
+    ) -> None:
+        """Store (value, expires_at) entries and add to the keys' hit counts."""
+        ...
+
+    @abstractmethod
+    async def hottest(self, limit: int) -> dict[str, tuple[str, float]]:
+        """Get up to limit live entries, most hit first."""
+        ...
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Release connections."""
+        ...
+
+
+class RedisStore(SharedStore):
+    """Shared store in Redis.
+
+    Lookups are a single MGET; writes and hit counts go out in one
+    pipeline. Hit counts are kept in a sorted set trimmed to the
+    hottest keys.
+
+    Requires redis[hiredis] package.
+    """
+
+    def __init__(self, namespace: str, key_prefix: str = "flowlens:") -> None:
+        """Initialize Redis store.
+
+        Args:
+            namespace: Name separating this cache's keys from others.
+            key_prefix: Prefix for all keys.
+        """
+        self._prefix = f"{key_prefix}{namespace}:"
+        self._hits_key = f"{key_prefix}{namespace}-hits"
+        self._client: Any = None
+
+    async def _get_client(self) -> Any:
+        """Get or create Redis client."""
+        if self._client is None:
+            settings = get_settings()
+            if not settings.redis.enabled:
+                raise RuntimeError("Redis is not enabled")
+
+            import redis.asyncio as redis
+
+            self._client = redis.from_url(
+                settings.redis.url,
+                encoding="utf-8",
+                decode_responses=True,
+            )
+
+        return self._client
+
+    async def mget(self, keys: Sequence[str]) -> dict[str, tuple[str, float]]:
+        """Get live entries with one MGET."""
+        try:
+            client = await self._get_client()
+            values = await client.mget([f"{self._prefix}{key}" for key in keys])
+        except Exception:
+            REDIS_OPERATIONS.labels(operation="mget", status="error").inc()
+            raise
+        REDIS_OPERATIONS.labels(operation="mget", status="success").inc()
+
+        now = time.time()
+        entries: dict[str, tuple[str, float]] = {}
+        for key, stored in zip(keys, values, strict=True):
+            if stored is None:
+                continue
+            expires_at, _, value = stored.partition(":")
+            if float(expires_at) > now:
+                entries[key] = (value, float(expires_at))
+        return entries
+
+    async def mset(
+        self,
+        entries: Mapping[str, tuple[str, float]],
+        hits: Mapping[str, int],
+    ) -> None:
+        """Store entries and hit counts in one pipeline."""
+        now = time.time()
+        try:
+            client = await self._get_client()
+            pipe = client.pipeline(transaction=False)
+            for key, (value, expires_at) in entries.items():
+                ttl = math.ceil(expires_at - now)
+                if ttl > 0:
+                    pipe.set(f"{self._prefix}{key}", f"{expires_at:.0f}:{value}", ex=ttl)
+            for key, count in hits.items():
+                pipe.zincrby(self._hits_key, count, key)
+            if hits:
+                pipe.zremrangebyrank(self._hits_key, 0, -_REDIS_HOT_KEYS - 1)
+            await pipe.execute()
+        except Exception:
+            REDIS_OPERATIONS.labels(operation="mset", status="error").inc()
+            raise
+        REDIS_OPERATIONS.labels(operation="mset", status="success").inc()
+
+    async def hottest(self, limit: int) -> dict[str, tuple[str, float]]:
+        """Get the live entries with the highest hit counts."""
+        try:
+            client = await self._get_client()
+            keys = await client.zrevrange(self._hits_key, 0, limit - 1)
+        except Exception:
+            REDIS_OPERATIONS.labels(operation="zrevrange", status="error").inc()
+            raise
+        REDIS_OPERATIONS.labels(operation="zrevrange", status="success").inc()
+        return await self.mget(keys) if keys else {}
+
+    async def close(self) -> None:
+        """Close Redis connection."""
+        if self._client:
+            await self._client.close()
+            self._client = None
+
+
+class SQLiteStore(SharedStore):
+    """Shared store in a SQLite file, for hosts without Redis.
+
+    Kept in /dev/shm by default, so processes on the host share it
+    through memory and it survives process restarts but not reboots.
+    Queries run on a dedicated thread so they never block the event
+    loop, and the file uses WAL so readers do not wait for writers.
+    """
+
+    def __init__(self, path: Path, namespace: str) -> None:
+        """Initialize SQLite store.
+
+        Args:
+            path: Database file, created if missing.
+            namespace: Name separating this cache's keys from others.
+        """
+        self._path = path
+        self._namespace = namespace
+        self._conn: sqlite3.Connection | None = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-cache")
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the table on first use."""
+        if self._conn is None:
+            conn = sqlite3.connect(self._path, timeout=1.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0, "
+                "PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+            )
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a query on the store's thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _mget(self, keys: Sequence[str]) -> dict[str, tuple[str, float]]:
+        conn = self._connect()
+        now = time.time()
+        entries: dict[str, tuple[str, float]] = {}
+        for i in range(0, len(keys), _SQLITE_BATCH_SIZE):
+            chunk = keys[i : i + _SQLITE_BATCH_SIZE]
+            rows = conn.execute(
+                "SELECT key, value, expires_at FROM cache_entries "
+                f"WHERE namespace = ? AND key IN ({', '.join('?' * len(chunk))}) "
+                "AND expires_at > ?",
+                (self._namespace, *chunk, now),
+            )
+            for key, value, expires_at in rows:
+                entries[key] = (value, expires_at)
+        return entries
+
+    def _mset(
+        self,
+        entries: Mapping[str, tuple[str, float]],
+        hits: Mapping[str, int],
+    ) -> None:
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO cache_entries (namespace, key, value, expires_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (namespace, key) DO UPDATE "
+                "SET value = excluded.value, expires_at = excluded.expires_at",
+                [(self._namespace, key, value, exp) for key, (value, exp) in entries.items()],
+            )
+            conn.executemany(
+                "UPDATE cache_entries SET hits = hits + ? WHERE namespace = ? AND key = ?",
+                [(count, self._namespace, key) for key, count in hits.items()],
+            )
+
+            self._writes += 1
+            if self._writes % _SQLITE_PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+
+    def _hottest(self, limit: int) -> dict[str, tuple[str, float]]:
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT key, value, expires_at FROM cache_entries "
+            "WHERE namespace = ? AND expires_at > ? ORDER BY hits DESC LIMIT ?",
+            (self._namespace, time.time(), limit),
+        )
+        return {key: (value, expires_at) for key, value, expires_at in rows}
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def mget(self, keys: Sequence[str]) -> dict[str, tuple[str, float]]:
+        """Get live entries."""
+        return await self._run(self._mget, keys)
+
+    async def mset(
+        self,
+        entries: Mapping[str, tuple[str, float]],
+        hits: Mapping[str, int],
+    ) -> None:
+        """Store entries and hit counts in one transaction."""
+        await self._run(self._mset, entries, hits)
+
+    async def hottest(self, limit: int) -> dict[str, tuple[str, float]]:
+        """Get the live entries with the highest hit counts."""
+        return await self._run(self._hottest, limit)
+
+    async def close(self) -> None:
+        """Close the database."""
+        if self._conn is not None:
+            await self._run(self._close)
+        self._executor.shutdown(wait=False)
+
+
+class TieredCache:
+    """LocalCache in front of an optional SharedStore.
+
+    get_many() answers from the local cache and fetches every miss from
+    the shared store in one round trip. set() only writes the local
+    cache; entries and hit counts are written behind to the shared store
+    every flush_interval by a background task, so lookups never wait on
+    a write. warm() preloads the entries looked up most across all
+    processes. Shared store failures are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        store: SharedStore | None = None,
+        max_size: int = 10000,
+        default_ttl: int = 3600,
+        name: str = "cache",
+        flush_interval: float = 0.5,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Initialize tiered cache.
+
+        Args:
+            store: Shared store; only the local cache is used if None.
+            max_size: Maximum number of local entries.
+            default_ttl: Default TTL in seconds.
+            name: Cache name for metrics; the shared store reports as
+                "<name>_shared".
+            flush_interval: Seconds between writes to the shared store.
+            clock: Wall clock returning seconds, for shared expiry times.
+        """
+        self._local: LocalCache[str, str] = LocalCache(
+            max_size=max_size, default_ttl=default_ttl, name=name
+        )
+        self._store = store
+        self._default_ttl = default_ttl
+        self._name = name
+        self._flush_interval = flush_interval
+        self._clock = clock
+
+        # Written behind to the shared store
+        self._writes: dict[str, tuple[str, float]] = {}
+        self._hits: Counter[str] = Counter()
+        self._flush_task: asyncio.Task[None] | None = None
+
+        self._shared_hits_metric = ENRICHMENT_CACHE_LOOKUPS.labels(
+            cache=f"{name}_shared", result="hit"
+        )
+        self._shared_misses_metric = ENRICHMENT_CACHE_LOOKUPS.labels(
+            cache=f"{name}_shared", result="miss"
+        )
+
+    async def get(self, key: str) -> str | None:
+        """Get a value, or None if missing or expired."""
+        return (await self.get_many((key,))).get(key)
+
+    async def get_many(self, keys: Sequence[str]) -> dict[str, str]:
+        """Get the live values for several keys.
+
+        Args:
+            keys: Keys to look up.
+
+        Returns:
+            Value per key found; missing and expired keys are left out.
+        """
+        found = self._local.get_many(keys)
+        if self._store is None:
+            return found
+
+        misses = [key for key in keys if key not in found]
+        if misses:
+            try:
+                entries = await self._store.mget(misses)
+            except Exception as e:
+                logger.warning("Shared cache lookup failed", cache=self._name, error=str(e))
+                entries = {}
+
+            self._promote(entries)
+            found.update((key, value) for key, (value, _) in entries.items())
+            if entries:
+                self._shared_hits_metric.inc(len(entries))
+            if len(misses) > len(entries):
+                self._shared_misses_metric.inc(len(misses) - len(entries))
+
+        if found:
+            self._hits.update(found.keys())
+            self._schedule_flush()
+        return found
+
+    def set(self, key: str, value: str, ttl: int | None = None) -> None:
+        """Set a value locally and queue it for the shared store."""
+        ttl = ttl or self._default_ttl
+        self._local.set(key, value, ttl=ttl)
+
+        if self._store is not None:
+            self._writes[key] = (value, self._clock() + ttl)
+            self._schedule_flush()
+
+    def _promote(self, entries: Mapping[str, tuple[str, float]]) -> None:
+        """Copy shared entries into the local cache for their remaining TTL."""
+        now = self._clock()
+        for key, (value, expires_at) in entries.items():
+            ttl = int(expires_at - now)
+            if ttl > 0:
+                self._local.set(key, value, ttl=ttl)
+
+    def _schedule_flush(self) -> None:
+        """Start the write-behind task if it is not running."""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        """Flush every flush_interval until nothing is left to write."""
+        try:
+            while self._writes or self._hits:
+                await asyncio.sleep(self._flush_interval)
+                await self.flush()
+        finally:
+            self._flush_task = None
+
+    async def flush(self) -> None:
+        """Write buffered entries and hit counts to the shared store."""
+        if self._store is None or not (self._writes or self._hits):
+            return
+
+        writes, self._writes = self._writes, {}
+        hits, self._hits = self._hits, Counter()
+        try:
+            await self._store.mset(writes, hits)
+        except Exception as e:
+            logger.warning(
+                "Shared cache write failed", cache=self._name, entries=len(writes), error=str(e)
+            )
+
+    async def warm(self, limit: int) -> int:
+        """Preload the most looked-up entries from the shared store.
+
+        Args:
+            limit: Maximum entries to load.
+
+        Returns:
+            Number of entries loaded.
+        """
+        if self._store is None or limit <= 0:
+            return 0
+
+        try:
+            entries = await self._store.hottest(limit)
+        except Exception as e:
+            logger.warning("Shared cache warm start failed", cache=self._name, error=str(e))
+            return 0
+
+        # Load the hottest last so they are the last evicted
+        self._promote(dict(reversed(entries.items())))
+        logger.info("Warmed cache from shared store", cache=self._name, entries=len(entries))
+        return len(entries)
+
+    def cleanup_expired(self) -> int:
+        """Remove expired local entries.
+
+        Returns number of entries removed.
+        """
+        return self._local.cleanup_expired()
+
+    async def close(self) -> None:
+        """Stop the write-behind task, flush and close the shared store."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flush_task
+            self._flush_task = None
+
+        if self._store is not None:
+            await self.flush()
+            await self._store.close()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Get cache statistics."""
+        return {
+            **self._local.stats,
+            "shared": type(self._store).__name__ if self._store is not None else None,
+            "pending_writes": len(self._writes),
+        }
+
+
+def create_shared_store(
+    namespace: str,
+    settings: EnrichmentSettings | None = None,
+) -> SharedStore | None:
+    """Create the shared store for a cache.
+
+    Args:
+        namespace: Name separating the cache's keys from others.
+        settings: Enrichment settings. Uses global settings if not provided.
+
+    Returns:
+        Redis store if Redis is enabled, otherwise a SQLite store; None
+        if the shared cache is disabled or its directory does not exist.
+    """
+    if settings is None:
+        settings = get_settings().enrichment
+
+    if not settings.shared_cache_enabled:
+        return None
+    if get_settings().redis.enabled:
+        return RedisStore(namespace)
+    if not settings.shared_cache_path.parent.is_dir():
+        logger.warning(
+            "Shared cache directory does not exist, using local cache only",
+            path=str(settings.shared_cache_path.parent),
+        )
+        return None
+    return SQLiteStore(settings.shared_cache_path, namespace)
+
+
 def get_cache(
     cache_type: str = "memory",
     **kwargs: Any,
@@ -7,12 +7,14 @@ new assets when necessary.
 import hashlib
 from datetime import datetime
 from ipaddress import IPv4Address, IPv6Address
+from typing import Any
 from uuid import UUID
 
-from sqlalchemy import select, text, update
+from sqlalchemy import text, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from flowlens.common.asset_cache import AssetIdCache, get_asset_cache
 from flowlens.common.logging import get_logger
 from flowlens.common.metrics import ASSETS_DISCOVERED
 from flowlens.enrichment.resolvers.geoip import GeoIPResolver, PrivateIPClassifier
@@ -20,6 +22,39 @@ from flowlens.models.asset import Asset, AssetType
 
 logger = get_logger(__name__)
 
+# Live assets for a set of IPs
+_FIND_ASSETS_SQL = text("""
+    SELECT ip_address, id FROM assets
+    WHERE ip_address = ANY(CAST(:ips AS inet[])) AND deleted_at IS NULL
+""")
+
+# Transaction advisory locks for a set of lock IDs, taken in ascending order
+_ADVISORY_LOCKS_SQL = text("""
+    SELECT pg_advisory_xact_lock(lock_id)
+    FROM unnest(CAST(:lock_ids AS bigint[])) AS lock_id
+    ORDER BY lock_id
+""")
+
+
+# Hostnames for live assets created before their reverse lookup resolved;
+# names still derived from the IP are replaced as _create_assets would
+_BACKFILL_HOSTNAMES_SQL = text("""
+    UPDATE assets AS a
+    SET hostname = v.hostname,
+        fqdn = CASE WHEN strpos(v.hostname, '.') > 0 THEN v.hostname ELSE a.fqdn END,
+        name = CASE
+            WHEN a.name = translate(host(a.ip_address), '.:', '--')
+            THEN split_part(v.hostname, '.', 1)
+            ELSE a.name
+        END,
+        updated_at = now()
+    FROM unnest(
+        CAST(:ips AS inet[]),
+        CAST(:hostnames AS text[])
+    ) AS v(ip, hostname)
+    WHERE a.ip_address = v.ip AND a.hostname IS NULL AND a.deleted_at IS NULL
+""")
+
 
 def _ip_to_advisory_lock_id(ip_str: str) -> int:
     """Convert IP address to a consistent advisory lock ID.
@@ -41,17 +76,17 @@ class AssetCorrelator:
     def __init__(
         self,
         geoip_resolver: GeoIPResolver | None = None,
+        cache: AssetIdCache | None = None,
     ) -> None:
         """Initialize correlator.
 
         Args:
             geoip_resolver: GeoIP resolver for new assets.
+            cache: IP -> Asset ID cache. Defaults to the process-wide cache.
         """
         self._geoip = geoip_resolver
         self._classifier = PrivateIPClassifier()
-
-        # In-memory cache of IP -> Asset ID mappings
-        self._ip_cache: dict[str, UUID] = {}
+        self._cache = cache if cache is not None else get_asset_cache()
 
     async def correlate(
         self,
@@ -73,156 +108,184 @@ class AssetCorrelator:
             Asset ID.
         """
         ip_str = str(ip_address)
+        results = await self.correlate_batch(db, [(ip_str, hostname)])
+        return results[ip_str]
 
-        # Check cache first
-        if ip_str in self._ip_cache:
-            return self._ip_cache[ip_str]
+    def get_cached(self, ip_address: IPv4Address | IPv6Address | str) -> UUID | None:
+        """Get a cached asset ID without querying the database.
 
-        # Query database for existing asset
-        result = await db.execute(
-            select(Asset.id).where(
-                Asset.ip_address == ip_str,
-                Asset.deleted_at.is_(None),
-            )
-        )
-        asset_id = result.scalar_one_or_none()
+        Args:
+            ip_address: IP address to look up.
+
+        Returns:
+            Asset ID, or None if the IP is not cached.
+        """
+        return self._cache.get(str(ip_address))
+
+    async def correlate_batch(
+        self,
+        db: AsyncSession,
+        ip_addresses: list[tuple[str, str | None]],
+    ) -> dict[str, UUID]:
+        """Correlate multiple IP addresses to assets.
+
+        Uncached IPs are looked up with a single query. Assets for the
+        remaining IPs are created with a single multi-row INSERT, after
+        taking their advisory locks in sorted order so concurrent workers
+        cannot deadlock.
+
+        Args:
+            db: Database session.
+            ip_addresses: List of (ip, hostname) tuples.
+
+        Returns:
+            Dictionary mapping IPs to asset IDs.
+        """
+        results: dict[str, UUID] = {}
+        hostnames: dict[str, str | None] = {}
+
+        for ip_str, hostname in ip_addresses:
+            ip_str = str(ip_str)
+            cached = self._cache.get(ip_str)
+            if cached is not None:
+                results[ip_str] = cached
+            elif hostnames.get(ip_str) is None:
+                hostnames[ip_str] = hostname
+
+        if not hostnames:
+            return results
+
+        found = await self._find_assets(db, list(hostnames))
+
+        missing = sorted(ip for ip in hostnames if ip not in found)
+        if missing:
+            found.update(await self._create_assets(db, {ip: hostnames[ip] for ip in missing}))
+
+        for ip_str in hostnames:
+            asset_id = found.get(ip_str)
+            if asset_id is None:
+                raise RuntimeError(f"Failed to get or create asset for IP {ip_str}")
+            self._cache.set(ip_str, asset_id)
+            results[ip_str] = asset_id
+
+        return results
 
-        if asset_id:
-            self._ip_cache[ip_str] = asset_id
-            return asset_id
+    async def _find_assets(self, db: AsyncSession, ips: list[str]) -> dict[str, UUID]:
+        """Look up existing assets for IPs in one query.
 
-        # Asset doesn't exist - create it using INSERT ... ON CONFLICT DO NOTHING
-        # This handles race conditions without generating errors
-        asset_id = await self._upsert_asset(db, ip_str, hostname)
-        self._ip_cache[ip_str] = asset_id
-        return asset_id
+        Args:
+            db: Database session.
+            ips: IP address strings.
 
-    async def _upsert_asset(
+        Returns:
+            Asset ID per IP that has an asset.
+        """
+        result = await db.execute(_FIND_ASSETS_SQL, {"ips": ips})
+        return {str(ip_address): asset_id for ip_address, asset_id in result.all()}
+
+    async def _create_assets(
         self,
         db: AsyncSession,
-        ip_str: str,
-        hostname: str | None,
-    ) -> UUID:
-        """Create a new asset or return existing one using advisory locks.
+        hostnames: dict[str, str | None],
+    ) -> dict[str, UUID]:
+        """Create assets for IPs or return existing ones using advisory locks.
 
         Uses PostgreSQL advisory locks to prevent deadlocks when multiple
-        workers try to create the same asset simultaneously.
+        workers try to create the same assets simultaneously. All locks are
+        taken in one statement, in sorted order.
 
         Args:
             db: Database session.
-            ip_str: IP address string.
-            hostname: Optional hostname.
+            hostnames: Optional hostname per IP address string.
 
         Returns:
-            Asset ID (either newly created or existing).
+            Asset ID per IP (either newly created or existing).
         """
         import uuid
 
-        # Acquire advisory lock for this IP to prevent deadlocks
-        lock_id = _ip_to_advisory_lock_id(ip_str)
-        await db.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": lock_id})
-
-        # Now we have exclusive access for this IP - check if it exists
-        query_result = await db.execute(
-            select(Asset.id).where(
-                Asset.ip_address == ip_str,
-                Asset.deleted_at.is_(None),
-            )
+        # Acquire advisory locks for these IPs to prevent deadlocks
+        lock_ids = sorted({_ip_to_advisory_lock_id(ip_str) for ip_str in hostnames})
+        await db.execute(_ADVISORY_LOCKS_SQL, {"lock_ids": lock_ids})
+
+        # Now we have exclusive access for these IPs - check if any exist
+        results = await self._find_assets(db, list(hostnames))
+
+        rows: list[dict[str, Any]] = []
+        for ip_str, hostname in hostnames.items():
+            if ip_str in results:
+                continue
+
+            # Determine if internal or external
+            is_internal = self._classifier.is_private(ip_str)
+
+            # Generate name
+            if hostname:
+                name = hostname.split(".")[0]  # Use first part of hostname
+            else:
+                name = ip_str.replace(".", "-").replace(":", "-")
+
+            # Get GeoIP info for external IPs
+            country_code = None
+            city = None
+
+            if not is_internal and self._geoip and self._geoip.is_enabled:
+                geo_result = self._geoip.lookup(ip_str)
+                if geo_result:
+                    country_code = geo_result.country_code
+                    city = geo_result.city
+
+            rows.append({
+                "id": uuid.uuid4(),
+                "name": name,
+                "ip_address": ip_str,
+                "hostname": hostname,
+                "fqdn": hostname if hostname and "." in hostname else None,
+                # Default asset type - use UNKNOWN for all auto-discovered assets
+                "asset_type": AssetType.UNKNOWN.value,
+                "is_internal": is_internal,
+                "is_critical": False,
+                "country_code": country_code,
+                "city": city,
+            })
+
+        if not rows:
+            return results
+
+        # Insert the new assets
+        stmt = (
+            pg_insert(Asset)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["ip_address"])
+            .returning(Asset.ip_address, Asset.id)
         )
-        existing_id = query_result.scalar_one_or_none()
-        if existing_id:
-            return existing_id
-
-        # Asset doesn't exist - create it
-        # Determine if internal or external
-        is_internal = self._classifier.is_private(ip_str)
-
-        # Generate name
-        if hostname:
-            name = hostname.split(".")[0]  # Use first part of hostname
-        else:
-            name = ip_str.replace(".", "-").replace(":", "-")
-
-        # Default asset type - use UNKNOWN for all auto-discovered assets
-        asset_type = AssetType.UNKNOWN.value
-
-        # Get GeoIP info for external IPs
-        country_code = None
-        city = None
-
-        if not is_internal and self._geoip and self._geoip.is_enabled:
-            geo_result = self._geoip.lookup(ip_str)
-            if geo_result:
-                country_code = geo_result.country_code
-                city = geo_result.city
-
-        # Generate a new UUID for the insert
-        new_id = uuid.uuid4()
-
-        # Insert the new asset
-        stmt = pg_insert(Asset).values(
-            id=new_id,
-            name=name,
-            ip_address=ip_str,
-            hostname=hostname,
-            fqdn=hostname if hostname and "." in hostname else None,
-            asset_type=asset_type,
-            is_internal=is_internal,
-            is_critical=False,
-            country_code=country_code,
-            city=city,
-        ).on_conflict_do_nothing(index_elements=['ip_address'])
-
         result = await db.execute(stmt)
+        inserted = {str(ip_address): asset_id for ip_address, asset_id in result.all()}
 
-        # Check if we inserted a new row
-        if result.rowcount > 0:
+        if inserted:
             await db.flush()
+
+        for row in rows:
+            ip_str = row["ip_address"]
+            if ip_str not in inserted:
+                continue
+            is_internal = row["is_internal"]
             logger.info(
                 "Discovered new asset",
-                asset_id=str(new_id),
+                asset_id=str(inserted[ip_str]),
                 ip=ip_str,
-                hostname=hostname,
+                hostname=row["hostname"],
                 is_internal=is_internal,
             )
             ASSETS_DISCOVERED.labels(
                 asset_type="internal" if is_internal else "external"
             ).inc()
-            return new_id
-
-        # Conflict occurred (another transaction committed while we had the lock)
-        # This shouldn't happen with advisory locks, but handle it anyway
-        query_result = await db.execute(
-            select(Asset.id).where(
-                Asset.ip_address == ip_str,
-                Asset.deleted_at.is_(None),
-            )
-        )
-        existing_id = query_result.scalar_one_or_none()
-        if existing_id:
-            return existing_id
-
-        raise RuntimeError(f"Failed to get or create asset for IP {ip_str}")
-
-    async def correlate_batch(
-        self,
-        db: AsyncSession,
-        ip_addresses: list[tuple[str, str | None]],
-    ) -> dict[str, UUID]:
-        """Correlate multiple IP addresses to assets.
-
-        Args:
-            db: Database session.
-            ip_addresses: List of (ip, hostname) tuples.
+        results.update(inserted)
 
-        Returns:
-            Dictionary mapping IPs to asset IDs.
-        """
-        results = {}
-
-        for ip_str, hostname in ip_addresses:
-            asset_id = await self.correlate(db, ip_str, hostname)
-            results[ip_str] = asset_id
+        # Conflicts (another transaction committed while we had the locks)
+        # shouldn't happen with advisory locks, but handle them anyway
+        conflicted = [row["ip_address"] for row in rows if row["ip_address"] not in inserted]
+        if conflicted:
+            results.update(await self._find_assets(db, conflicted))
 
         return results
 
@@ -275,11 +338,35 @@ class AssetCorrelator:
             )
         )
 
+    async def backfill_hostnames(self, db: AsyncSession, hostnames: dict[str, str]) -> int:
+        """Set hostnames resolved after their assets were created.
+
+        Only assets without a hostname are updated.
+
+        Args:
+            db: Database session.
+            hostnames: Resolved hostname per IP address string.
+
+        Returns:
+            Number of assets updated.
+        """
+        if not hostnames:
+            return 0
+
+        result = await db.execute(
+            _BACKFILL_HOSTNAMES_SQL,
+            {
+                "ips": list(hostnames),
+                "hostnames": [hostname[:255] for hostname in hostnames.values()],
+            },
+        )
+        return result.rowcount
+
     def clear_cache(self) -> None:
         """Clear the IP cache."""
-        self._ip_cache.clear()
+        self._cache.clear()
 
     @property
     def cache_size(self) -> int:
         """Get cache size."""
-        return len(self._ip_cache)
+        return len(self._cache)
@@ -1,6 +1,6 @@
 """Enrichment Service entry point.
 
-Runs enrichment workers to process flow records.
+Runs a pool of enrichment workers to process flow records.
 """
 
 import asyncio
@@ -8,15 +8,46 @@ import signal
 import sys
 from typing import NoReturn
 
-from flowlens.common.config import get_settings
+from flowlens.common.asset_cache import AssetInvalidationListener
+from flowlens.common.config import Settings, get_settings
 from flowlens.common.database import close_database, init_database
 from flowlens.common.logging import get_logger, setup_logging
 from flowlens.common.metrics import set_app_info
+from flowlens.common.notify import NotificationListener
+from flowlens.common.stream import FlowLog, create_flow_log
+from flowlens.enrichment.pool import EnrichmentPool
+from flowlens.enrichment.stream import StreamEnrichmentWorker
 from flowlens.enrichment.worker import EnrichmentWorker
 
 logger = get_logger(__name__)
 
 
+def create_worker(settings: Settings, log: FlowLog | None, worker_id: int) -> EnrichmentWorker:
+    """Create the enrichment worker for a pool worker ID.
+
+    With streaming enabled, workers consume the flow topic and fall back
+    to the enrichment queue only while it is idle. Messages are keyed by
+    enrichment shard, so on Kafka each IP pair reaches a single consumer
+    in the group. The file log supports a single consumer per group, so
+    only worker 0 consumes it.
+
+    Args:
+        settings: Application settings.
+        log: Flow log, if streaming is enabled.
+        worker_id: Index of the worker in the pool.
+
+    Returns:
+        Worker to run.
+    """
+    if log is not None and (settings.kafka.backend != "file" or worker_id == 0):
+        return StreamEnrichmentWorker(
+            log.consumer(settings.kafka.topic_flows, settings.kafka.consumer_group),
+            settings.enrichment,
+            worker_id=worker_id,
+        )
+    return EnrichmentWorker(settings.enrichment, worker_id=worker_id)
+
+
 async def main() -> None:
     """Main entry point for enrichment service."""
     settings = get_settings()
@@ -40,11 +71,20 @@ async def main() -> None:
     # Initialize database
     await init_database(settings)
 
-    # Create workers
-    workers = [
-        EnrichmentWorker(settings.enrichment)
-        for _ in range(settings.enrichment.worker_count)
-    ]
+    # Create worker pool
+    log = create_flow_log(settings.kafka) if settings.kafka.enabled else None
+    pool = EnrichmentPool(
+        lambda worker_id: create_worker(settings, log, worker_id),
+        settings.enrichment.worker_count,
+    )
+
+    # Wake idle workers on new work, accept pool resizes, and drop cached
+    # asset IDs when assets change in other processes
+    listener = NotificationListener()
+    pool.subscribe(listener)
+    if settings.asset_cache.invalidation_enabled:
+        AssetInvalidationListener().subscribe(listener)
+    await listener.start()
 
     # Setup signal handlers
     loop = asyncio.get_event_loop()
@@ -58,36 +98,19 @@ async def main() -> None:
         loop.add_signal_handler(sig, lambda s=sig: signal_handler(s))
 
     try:
-        # Start all workers
-        worker_tasks = [
-            asyncio.create_task(worker.start())
-            for worker in workers
-        ]
+        await pool.start()
 
         # Wait for shutdown signal
         await stop_event.wait()
 
-        # Stop workers
-        logger.info("Stopping workers")
-        for worker in workers:
-            await worker.stop()
-
-        # Wait for tasks to complete
-        for task in worker_tasks:
-            task.cancel()
-            try:
-                await task
-            except asyncio.CancelledError:
-                pass
-
     except Exception as e:
         logger.error("Fatal error", error=str(e))
         raise
     finally:
-        # Cleanup
+        # Stop workers and clean up
         logger.info("Cleaning up")
-        for worker in workers:
-            await worker.cleanup()
+        await pool.stop()
+        await listener.stop()
         await close_database()
         logger.info("Shutdown complete")
 
@@ -0,0 +1,284 @@
+"""Supervised pool of enrichment workers.
+
+Runs EnrichmentSettings.worker_count workers as tasks in one process.
+The enrichment queue's shards (see flowlens.common.work_queue) are
+partitioned among the workers, worker i of n owning every shard s with
+s % n == i, so each conversation's flows are always enriched by the same
+worker and workers do not contend for the same assets.
+
+Workers that exit unexpectedly are restarted. The pool can be resized
+at runtime by notifying its channel with the new worker count:
+
+    SELECT pg_notify('flowlens_enrichment_pool', '{"worker_count": 8}');
+"""
+
+import asyncio
+import contextlib
+import json
+from collections.abc import Callable
+from typing import Any
+
+from flowlens.common.logging import get_logger
+from flowlens.common.metrics import (
+    ENRICHMENT_POOL_WORKERS,
+    ENRICHMENT_WORKER_LAG,
+    ENRICHMENT_WORKER_RESTARTS,
+)
+from flowlens.common.notify import NotificationListener
+from flowlens.common.work_queue import ENRICHMENT_SHARDS, FLOWS_READY_CHANNEL
+from flowlens.enrichment.worker import EnrichmentWorker
+
+logger = get_logger(__name__)
+
+# Channel for resizing running pools; payload {"worker_count": n}
+ENRICHMENT_POOL_CHANNEL = "flowlens_enrichment_pool"
+
+
+def shards_for_worker(worker_id: int, worker_count: int) -> list[int]:
+    """Get the enrichment queue shards a pool worker owns.
+
+    Args:
+        worker_id: Index of the worker.
+        worker_count: Workers in the pool.
+
+    Returns:
+        Shard numbers owned by the worker.
+    """
+    return [shard for shard in range(ENRICHMENT_SHARDS) if shard % worker_count == worker_id]
+
+
+class EnrichmentPool:
+    """Supervises a resizable pool of enrichment workers.
+
+    Starts the configured number of workers, assigns each its share of
+    the queue shards, restarts workers that exit unexpectedly, and grows
+    or shrinks the pool on resize(). Retired workers finish their current
+    batch before they are cleaned up.
+    """
+
+    def __init__(
+        self,
+        worker_factory: Callable[[int], EnrichmentWorker],
+        worker_count: int,
+        check_interval: float = 5.0,
+    ) -> None:
+        """Initialize pool.
+
+        Args:
+            worker_factory: Creates the worker for a worker ID.
+            worker_count: Initial number of workers.
+            check_interval: Seconds between worker health checks.
+        """
+        self._worker_factory = worker_factory
+        self._worker_count = self._clamp(worker_count)
+        self._check_interval = check_interval
+
+        self._workers: dict[int, EnrichmentWorker] = {}
+        self._tasks: dict[int, asyncio.Task[None]] = {}
+        self._retiring: list[tuple[EnrichmentWorker, asyncio.Task[None]]] = []
+        self._restarts = 0
+
+        self._monitor_task: asyncio.Task[None] | None = None
+        self._running = False
+
+    @property
+    def worker_count(self) -> int:
+        """Target number of workers."""
+        return self._worker_count
+
+    def subscribe(self, listener: NotificationListener) -> None:
+        """Wake workers on new flows and accept resize requests.
+
+        Args:
+            listener: Process's notification listener.
+        """
+        listener.subscribe(FLOWS_READY_CHANNEL, self._wake_workers, self._wake_workers)
+        listener.subscribe(ENRICHMENT_POOL_CHANNEL, self.handle_notification)
+
+    async def start(self) -> None:
+        """Start the workers."""
+        if self._running:
+            return
+
+        self._running = True
+        logger.info("Starting enrichment workers", worker_count=self._worker_count)
+        self._apply_worker_count()
+        self._monitor_task = asyncio.create_task(self._monitor())
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Stop all workers and clean them up.
+
+        Args:
+            timeout: Seconds to wait for workers to finish their current
+                batch before they are cancelled.
+        """
+        if not self._running:
+            return
+
+        self._running = False
+        logger.info("Stopping enrichment workers")
+
+        if self._monitor_task:
+            self._monitor_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._monitor_task
+            self._monitor_task = None
+
+        for worker_id in list(self._workers):
+            self._retire(worker_id)
+
+        for worker, _ in self._retiring:
+            await worker.stop()
+            worker.wake()
+
+        tasks = [task for _, task in self._retiring]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                logger.warning("Enrichment worker did not exit, cancelling")
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        await self._reap()
+
+        ENRICHMENT_POOL_WORKERS.set(0)
+        logger.info("Enrichment workers stopped")
+
+    def resize(self, worker_count: int) -> None:
+        """Change the number of workers.
+
+        Shards are reassigned immediately; retired workers exit after
+        their current batch and are cleaned up by the monitor.
+
+        Args:
+            worker_count: New number of workers, clamped to
+                [1, ENRICHMENT_SHARDS].
+        """
+        worker_count = self._clamp(worker_count)
+        if worker_count == self._worker_count:
+            return
+
+        logger.info(
+            "Resizing enrichment pool",
+            worker_count=worker_count,
+            previous=self._worker_count,
+        )
+        self._worker_count = worker_count
+        if self._running:
+            self._apply_worker_count()
+
+    def handle_notification(self, payload: str) -> None:
+        """Apply a resize request.
+
+        Args:
+            payload: JSON object with the new "worker_count".
+        """
+        try:
+            worker_count = int(json.loads(payload)["worker_count"])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Invalid enrichment pool notification", payload=payload, error=str(e))
+            return
+        self.resize(worker_count)
+
+    @staticmethod
+    def _clamp(worker_count: int) -> int:
+        """Limit a worker count so every worker owns at least one shard."""
+        return max(1, min(worker_count, ENRICHMENT_SHARDS))
+
+    def _apply_worker_count(self) -> None:
+        """Start or retire workers to match the target and reassign shards."""
+        for worker_id in [w for w in self._workers if w >= self._worker_count]:
+            self._retire(worker_id)
+
+        for worker_id in range(self._worker_count):
+            if worker_id in self._workers:
+                self._workers[worker_id].set_shards(
+                    shards_for_worker(worker_id, self._worker_count)
+                )
+            else:
+                self._spawn(worker_id)
+
+        ENRICHMENT_POOL_WORKERS.set(len(self._workers))
+
+    def _spawn(self, worker_id: int) -> None:
+        """Create and start (or restart) the worker for a worker ID."""
+        worker = self._worker_factory(worker_id)
+        worker.set_shards(shards_for_worker(worker_id, self._worker_count))
+        self._workers[worker_id] = worker
+        self._tasks[worker_id] = asyncio.create_task(worker.start())
+        logger.info("Enrichment worker started", worker_id=worker_id)
+
+    def _retire(self, worker_id: int) -> None:
+        """Take a worker's shards away and mark it for stopping."""
+        worker = self._workers.pop(worker_id)
+        task = self._tasks.pop(worker_id)
+        worker.set_shards([])
+        self._retiring.append((worker, task))
+        with contextlib.suppress(KeyError):
+            ENRICHMENT_WORKER_LAG.remove(str(worker_id))
+
+    async def _reap(self) -> None:
+        """Stop retired workers and clean up those that have exited."""
+        retiring = []
+        for worker, task in self._retiring:
+            if not task.done():
+                await worker.stop()
+                worker.wake()
+                retiring.append((worker, task))
+                continue
+            try:
+                await worker.cleanup()
+            except Exception as e:
+                logger.warning("Enrichment worker cleanup failed", error=str(e))
+        self._retiring = retiring
+
+    def _wake_workers(self, payload: str = "") -> None:  # noqa: ARG002
+        """Wake all idle workers."""
+        for worker in self._workers.values():
+            worker.wake()
+
+    async def _monitor(self) -> None:
+        """Restart workers that exited and clean up retired ones."""
+        while self._running:
+            try:
+                await asyncio.sleep(self._check_interval)
+
+                for worker_id, task in list(self._tasks.items()):
+                    if not task.done():
+                        continue
+
+                    error = None if task.cancelled() else task.exception()
+                    logger.error(
+                        "Enrichment worker exited, restarting",
+                        worker_id=worker_id,
+                        error=str(error) if error else None,
+                    )
+                    worker = self._workers.pop(worker_id)
+                    del self._tasks[worker_id]
+                    try:
+                        await worker.cleanup()
+                    except Exception as e:
+                        logger.warning("Enrichment worker cleanup failed", error=str(e))
+
+                    self._restarts += 1
+                    ENRICHMENT_WORKER_RESTARTS.inc()
+                    self._spawn(worker_id)
+
+                await self._reap()
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error("Enrichment pool monitor error", error=str(e))
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Get pool statistics."""
+        return {
+            "running": self._running,
+            "worker_count": self._worker_count,
+            "retiring": len(self._retiring),
+            "restarts": self._restarts,
+            "workers": {
+                worker_id: self._workers[worker_id].stats for worker_id in sorted(self._workers)
+            },
+        }
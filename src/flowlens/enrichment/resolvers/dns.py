@@ -1,9 +1,21 @@
 """DNS resolver for reverse hostname lookup.
 
-Provides async DNS resolution with caching and rate limiting.
+Enrichment never waits on DNS: lookup_batch() returns what is cached and
+queues the rest for a background task, which keeps up to
+dns_max_in_flight PTR queries outstanding and starts the next as soon as
+one completes. Results are cached with separate TTLs for hostnames,
+NXDOMAIN / no PTR record, and timeouts or errors, and newly resolved
+hostnames are passed to an on_resolved callback (used to backfill
+assets created before their lookup completed).
+
+The cache is shared with other enrichment processes through a
+TieredCache, and warm_start() preloads the most looked-up IPs so a
+restarted worker does not resolve its hot set again.
 """
 
 import asyncio
+import contextlib
+from collections.abc import Awaitable, Callable, Iterable
 from ipaddress import IPv4Address, IPv6Address
 from typing import Any
 
@@ -13,35 +25,56 @@ import dns.reversename
 
 from flowlens.common.config import EnrichmentSettings, get_settings
 from flowlens.common.logging import get_logger
-from flowlens.common.metrics import DNS_LOOKUPS
-from flowlens.enrichment.cache import MemoryCache, get_cache
+from flowlens.common.metrics import DNS_LOOKUPS, DNS_PENDING
+from flowlens.enrichment.cache import TieredCache, create_shared_store
 
 logger = get_logger(__name__)
 
+# Resolved hostnames handed to on_resolved at once
+_RESOLVED_FLUSH_SIZE = 500
+
 
 class DNSResolver:
     """Async DNS resolver with caching.
 
     Performs reverse DNS lookups to get hostnames from IP addresses.
-    Uses TTL-based caching to minimize DNS queries.
+    Uses TTL-based caching to minimize DNS queries; misses are resolved
+    in the background.
     """
 
-    def __init__(self, settings: EnrichmentSettings | None = None) -> None:
+    def __init__(
+        self,
+        settings: EnrichmentSettings | None = None,
+        on_resolved: Callable[[dict[str, str]], Awaitable[None]] | None = None,
+    ) -> None:
         """Initialize DNS resolver.
 
         Args:
             settings: Enrichment settings. Uses global settings if not provided.
+            on_resolved: Called with hostnames resolved in the background,
+                keyed by IP address string.
         """
         if settings is None:
             settings = get_settings().enrichment
 
         self._timeout = settings.dns_timeout
-        self._cache = get_cache(
-            cache_type="memory",
+        self._cache = TieredCache(
+            create_shared_store("dns", settings),
             max_size=settings.dns_cache_size,
             default_ttl=settings.dns_cache_ttl,
             name="dns",
+            flush_interval=settings.shared_cache_flush_interval_ms / 1000,
         )
+        self._warm_size = settings.shared_cache_warm_size
+
+        # Cache lifetime per lookup status
+        self._ttls = {
+            "success": settings.dns_cache_ttl,
+            "nxdomain": settings.dns_negative_cache_ttl,
+            "noanswer": settings.dns_negative_cache_ttl,
+            "timeout": settings.dns_failure_cache_ttl,
+            "error": settings.dns_failure_cache_ttl,
+        }
 
         # Create resolver
         self._resolver = dns.asyncresolver.Resolver()
@@ -52,18 +85,47 @@ class DNSResolver:
         if settings.dns_servers:
             self._resolver.nameservers = settings.dns_servers
 
-        # Semaphore to limit concurrent lookups
-        self._semaphore = asyncio.Semaphore(100)
+        # Background lookups: IPs waiting (insertion-ordered) and in flight
+        self._max_in_flight = settings.dns_max_in_flight
+        self._max_pending = settings.dns_queue_size
+        self._pending: dict[str, None] = {}
+        self._in_flight: set[str] = set()
+        self._queued = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._on_resolved = on_resolved
+        self._dropped = 0
+
+    async def lookup_batch(
+        self,
+        ip_addresses: Iterable[IPv4Address | IPv6Address | str],
+    ) -> dict[str, str | None]:
+        """Get cached hostnames without waiting for DNS.
+
+        IPs that are not cached are queued for background resolution and
+        reported as None.
+
+        Args:
+            ip_addresses: IP addresses to look up.
+
+        Returns:
+            Dictionary mapping IP strings to cached hostnames.
+        """
+        ip_strs = [str(ip) for ip in ip_addresses]
+        cached = await self._cache.get_many(ip_strs)
 
-        # Track in-flight lookups to prevent duplicate requests
-        self._in_flight: dict[str, asyncio.Future[str | None]] = {}
-        self._lock = asyncio.Lock()
+        hostnames: dict[str, str | None] = {}
+        for ip_str in ip_strs:
+            hostname = cached.get(ip_str)
+            if hostname is None:
+                self._queue(ip_str)
+            hostnames[ip_str] = hostname or None
+        return hostnames
 
     async def resolve(
         self,
         ip_address: IPv4Address | IPv6Address | str,
     ) -> str | None:
-        """Resolve IP address to hostname.
+        """Resolve IP address to hostname, waiting for DNS on a cache miss.
 
         Args:
             ip_address: IP address to resolve.
@@ -73,54 +135,118 @@ class DNSResolver:
         """
         ip_str = str(ip_address)
 
-        # Check cache first
         cached = await self._cache.get(ip_str)
         if cached is not None:
-            return cached if cached != "" else None
+            return cached or None
 
-        # Check for in-flight request
-        async with self._lock:
-            if ip_str in self._in_flight:
-                # Wait for existing request
-                return await self._in_flight[ip_str]
+        hostname, status = await self._do_lookup(ip_str)
 
-            # Create new future for this lookup
-            future: asyncio.Future[str | None] = asyncio.get_event_loop().create_future()
-            self._in_flight[ip_str] = future
+        # Cache result (empty string for negative cache)
+        self._cache.set(ip_str, hostname or "", ttl=self._ttls[status])
+        return hostname
 
-        try:
-            # Perform lookup with semaphore
-            async with self._semaphore:
-                hostname = await self._do_lookup(ip_str)
+    async def warm_start(self) -> int:
+        """Preload the most looked-up IPs from the shared cache.
 
-            # Cache result (empty string for negative cache)
-            await self._cache.set(ip_str, hostname or "")
+        Returns:
+            Number of cached results loaded.
+        """
+        return await self._cache.warm(self._warm_size)
 
-            # Complete the future
-            future.set_result(hostname)
-            return hostname
+    def _queue(self, ip_str: str) -> None:
+        """Queue an IP for background resolution."""
+        if ip_str in self._pending or ip_str in self._in_flight:
+            return
 
-        except Exception as e:
-            # Cache negative result
-            await self._cache.set(ip_str, "")
-            future.set_result(None)
-            logger.debug("DNS lookup failed", ip=ip_str, error=str(e))
-            return None
+        if len(self._pending) >= self._max_pending:
+            # Queued again the next time a flow mentions it
+            self._dropped += 1
+            return
+
+        self._pending[ip_str] = None
+        DNS_PENDING.set(len(self._pending))
+        self._queued.set()
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
 
+    async def _run(self) -> None:
+        """Resolve queued IPs, keeping up to max_in_flight lookups running."""
+        tasks: set[asyncio.Future[Any]] = set()
+        resolved: dict[str, str] = {}
+
+        try:
+            while True:
+                while self._pending and len(tasks) < self._max_in_flight:
+                    ip_str = next(iter(self._pending))
+                    del self._pending[ip_str]
+                    self._in_flight.add(ip_str)
+                    tasks.add(asyncio.ensure_future(self._resolve_queued(ip_str)))
+                DNS_PENDING.set(len(self._pending))
+                self._queued.clear()
+
+                if not tasks:
+                    await self._flush_resolved(resolved)
+                    if not self._pending:
+                        await self._queued.wait()
+                    continue
+
+                # Wake on a completed lookup or on newly queued IPs
+                waiter = asyncio.ensure_future(self._queued.wait())
+                try:
+                    done, _ = await asyncio.wait(
+                        {*tasks, waiter}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                finally:
+                    waiter.cancel()
+
+                for task in done & tasks:
+                    ip_str, hostname = task.result()
+                    self._in_flight.discard(ip_str)
+                    if hostname:
+                        resolved[ip_str] = hostname
+                tasks -= done
+
+                if len(resolved) >= _RESOLVED_FLUSH_SIZE:
+                    await self._flush_resolved(resolved)
         finally:
-            # Remove from in-flight
-            async with self._lock:
-                self._in_flight.pop(ip_str, None)
+            for task in tasks:
+                task.cancel()
 
-    async def _do_lookup(self, ip_str: str) -> str | None:
+    async def _resolve_queued(self, ip_str: str) -> tuple[str, str | None]:
+        """Resolve a queued IP.
+
+        Returns:
+            The IP and its hostname, if found.
+        """
+        try:
+            return ip_str, await self.resolve(ip_str)
+        except Exception as e:
+            logger.debug("DNS lookup failed", ip=ip_str, error=str(e))
+            return ip_str, None
+
+    async def _flush_resolved(self, resolved: dict[str, str]) -> None:
+        """Pass resolved hostnames to on_resolved and clear them."""
+        if not resolved:
+            return
+        if self._on_resolved is not None:
+            try:
+                await self._on_resolved(dict(resolved))
+            except Exception as e:
+                logger.warning("Resolved hostname callback failed", count=len(resolved), error=str(e))
+        resolved.clear()
+
+    async def _do_lookup(self, ip_str: str) -> tuple[str | None, str]:
         """Perform actual DNS lookup.
 
         Args:
             ip_str: IP address string.
 
         Returns:
-            Hostname if found.
+            Hostname if found, and the lookup status.
         """
+        status = "error"
+        hostname = None
         try:
             # Create reverse name
             rev_name = dns.reversename.from_address(ip_str)
@@ -131,59 +257,42 @@ class DNSResolver:
             if answers:
                 # Get first answer, strip trailing dot
                 hostname = str(answers[0]).rstrip(".")
-                DNS_LOOKUPS.labels(status="success").inc()
-                return hostname
-
-            DNS_LOOKUPS.labels(status="nxdomain").inc()
-            return None
+                status = "success"
+            else:
+                status = "nxdomain"
 
         except dns.asyncresolver.NXDOMAIN:
-            DNS_LOOKUPS.labels(status="nxdomain").inc()
-            return None
+            status = "nxdomain"
 
         except dns.asyncresolver.NoAnswer:
-            DNS_LOOKUPS.labels(status="noanswer").inc()
-            return None
+            status = "noanswer"
 
         except dns.exception.Timeout:
-            DNS_LOOKUPS.labels(status="timeout").inc()
-            return None
+            status = "timeout"
 
         except Exception as e:
-            DNS_LOOKUPS.labels(status="error").inc()
             logger.debug("DNS error", ip=ip_str, error=str(e))
-            return None
 
-    async def resolve_batch(
-        self,
-        ip_addresses: list[IPv4Address | IPv6Address | str],
-    ) -> dict[str, str | None]:
-        """Resolve multiple IP addresses concurrently.
-
-        Args:
-            ip_addresses: List of IP addresses to resolve.
-
-        Returns:
-            Dictionary mapping IP strings to hostnames.
-        """
-        tasks = [self.resolve(ip) for ip in ip_addresses]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        return {
-            str(ip): (
-                result if isinstance(result, (str, type(None))) else None
-            )
-            for ip, result in zip(ip_addresses, results)
-        }
+        DNS_LOOKUPS.labels(status=status).inc()
+        return hostname, status
 
     @property
     def cache_stats(self) -> dict[str, Any]:
         """Get cache statistics."""
-        if isinstance(self._cache, MemoryCache):
-            return self._cache.stats
-        return {"size": self._cache.size()}
+        return {
+            **self._cache.stats,
+            "pending": len(self._pending),
+            "in_flight": len(self._in_flight),
+            "dropped": self._dropped,
+        }
 
     async def cleanup(self) -> None:
-        """Cleanup expired cache entries."""
-        if isinstance(self._cache, MemoryCache):
-            await self._cache.cleanup_expired()
+        """Stop background lookups, flush the shared cache and remove expired entries."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+        await self._cache.close()
+        self._cache.cleanup_expired()
@@ -0,0 +1,168 @@
+"""Stream-fed enrichment worker.
+
+When ingestion streams flows to a log topic (see StreamRouter), the
+flows never reach flow_records on their own. StreamEnrichmentWorker
+consumes the encoded batches, enriches each flow, and writes them to
+flow_records already enriched with a single binary COPY. Offsets are
+committed after the database transaction, so delivery is at-least-once.
+
+Below the streaming threshold ingestion still writes to PostgreSQL, so
+the worker falls back to the enrichment queue while the stream is idle.
+"""
+
+import json
+from typing import TYPE_CHECKING, Any
+
+from flowlens.common.config import EnrichmentSettings
+from flowlens.common.database import get_session
+from flowlens.common.logging import get_logger
+from flowlens.common.metrics import ENRICHMENT_ERRORS
+from flowlens.common.stream import LogConsumer
+from flowlens.common.work_queue import enqueue_flows, enqueue_windows, flow_shards
+from flowlens.enrichment.worker import EnrichmentWorker
+from flowlens.ingestion.parsers.batch import FlowBatch, decode_batch
+from flowlens.ingestion.router import FLOW_RECORD_COLUMNS, batch_to_rows
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+logger = get_logger(__name__)
+
+# Columns written for streamed flows
+STREAM_RECORD_COLUMNS: tuple[str, ...] = (*FLOW_RECORD_COLUMNS, "is_enriched")
+
+_ID = FLOW_RECORD_COLUMNS.index("id")
+_TIMESTAMP = FLOW_RECORD_COLUMNS.index("timestamp")
+_SRC_IP = FLOW_RECORD_COLUMNS.index("src_ip")
+_DST_IP = FLOW_RECORD_COLUMNS.index("dst_ip")
+_DST_PORT = FLOW_RECORD_COLUMNS.index("dst_port")
+_PROTOCOL = FLOW_RECORD_COLUMNS.index("protocol")
+
+
+class StreamEnrichmentWorker(EnrichmentWorker):
+    """Enrichment worker that consumes flow batches from a log topic."""
+
+    def __init__(
+        self,
+        consumer: LogConsumer,
+        settings: EnrichmentSettings | None = None,
+        max_messages: int = 1,
+        worker_id: int = 0,
+    ) -> None:
+        """Initialize stream enrichment worker.
+
+        Args:
+            consumer: Consumer for the flow topic.
+            settings: Enrichment settings.
+            max_messages: Messages (ingestion batches) enriched per transaction.
+            worker_id: Index of this worker in the enrichment pool.
+        """
+        super().__init__(settings, worker_id)
+        self._consumer = consumer
+        self._max_messages = max_messages
+
+    async def _process_batch_internal(self) -> int:
+        """Enrich streamed flows, or queued flows if none are waiting.
+
+        Returns:
+            Number of flows processed.
+        """
+        processed = await self._consume_stream()
+        if processed:
+            return processed
+        return await super()._process_batch_internal()
+
+    async def _consume_stream(self) -> int:
+        """Enrich and store the next messages from the stream.
+
+        Returns:
+            Number of flows stored.
+        """
+        messages = await self._consumer.poll(self._max_messages, timeout=0)
+        if not messages:
+            return 0
+
+        batches: list[FlowBatch] = []
+        for message in messages:
+            try:
+                batches.append(decode_batch(message))
+            except (ValueError, TypeError) as e:
+                logger.error("Skipping undecodable flow message", error=str(e))
+                ENRICHMENT_ERRORS.labels(error_type="stream_decode").inc()
+
+        batch = FlowBatch.concat(batches)
+        if len(batch):
+            try:
+                await self._store_enriched(batch)
+            except BaseException:
+                # Poll these messages again rather than commit past them
+                await self._consumer.seek_to_committed()
+                raise
+
+        # Only after the flows are committed to the database
+        await self._consumer.commit()
+        return len(batch)
+
+    async def _store_enriched(self, batch: FlowBatch) -> None:
+        """Enrich a batch and COPY it into flow_records.
+
+        Enriched flows are queued for aggregation. Flows that fail
+        enrichment are stored unenriched and queued for the polling path
+        to retry.
+
+        Args:
+            batch: Flows to enrich and store.
+        """
+        rows = batch_to_rows(batch)
+        extended_fields = batch.extended_fields.tolist()
+
+        async with get_session() as db:
+            enrichments = await self._enrich_batch(
+                db,
+                [
+                    (str(row[_SRC_IP]), str(row[_DST_IP]), row[_DST_PORT], row[_PROTOCOL])
+                    for row in rows
+                ],
+            )
+
+            records: list[tuple[Any, ...]] = []
+            enriched: list[datetime] = []
+            failed: list[int] = []
+            for i, (row, extended, enrichment) in enumerate(
+                zip(rows, extended_fields, enrichments, strict=True)
+            ):
+                extended = dict(extended) if extended else {}
+                if enrichment is not None:
+                    extended["enrichment"] = enrichment
+                    enriched.append(row[_TIMESTAMP])
+                else:
+                    failed.append(i)
+
+                records.append((
+                    *row[:-1],
+                    json.dumps(extended) if extended else None,
+                    enrichment is not None,
+                ))
+
+            conn = await db.connection()
+            raw_conn = await conn.get_raw_connection()
+            await raw_conn.driver_connection.copy_records_to_table(
+                "flow_records",
+                records=records,
+                columns=STREAM_RECORD_COLUMNS,
+            )
+            await enqueue_windows(db, enriched)
+            await enqueue_flows(
+                raw_conn.driver_connection,
+                [rows[i][_ID] for i in failed],
+                [rows[i][_TIMESTAMP] for i in failed],
+                flow_shards(batch.src_ip[failed], batch.dst_ip[failed]),
+            )
+            await db.commit()
+
+        logger.debug("Stored streamed flows", count=len(batch))
+
+    async def cleanup(self) -> None:
+        """Cleanup resources and close the consumer."""
+        await super().cleanup()
+        await self._consumer.close()
@@ -1,32 +1,86 @@
 """Enrichment worker that processes flow records.
 
-Polls for unenriched flows, applies enrichments (DNS, GeoIP, protocol),
-and marks them as enriched.
+Claims batches of new flows from the enrichment queue (see
+flowlens.common.work_queue), applies enrichments (DNS, GeoIP, protocol),
+marks them as enriched and queues their minutes for aggregation.
+
+Enrichment for a batch is built in memory and written back with a single
+set-based UPDATE; flows whose enrichment fails are left out of it and
+stay unenriched until the next sweep queues them again.
+
+Batches never wait on DNS: hostnames not yet cached are left empty and
+backfilled onto the flows' assets once resolved.
 """
 
 import asyncio
+import json
 import random
-from datetime import datetime
+import time
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
 from typing import Any
+from uuid import UUID
 
-from sqlalchemy import select, update
+from sqlalchemy import Row, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from flowlens.common.config import EnrichmentSettings, get_settings
 from flowlens.common.database import get_session
 from flowlens.common.logging import get_logger
-from flowlens.common.metrics import ENRICHMENT_ERRORS, ENRICHMENT_PROCESSED
+from flowlens.common.metrics import (
+    ENRICHMENT_ERRORS,
+    ENRICHMENT_PROCESSED,
+    ENRICHMENT_WORKER_FLOWS,
+    ENRICHMENT_WORKER_LAG,
+)
+from flowlens.common.notify import WorkSignal
+from flowlens.common.work_queue import (
+    ENRICHMENT_SHARDS,
+    claim_flows,
+    enqueue_windows,
+    sweep_flows,
+)
 from flowlens.enrichment.correlator import AssetCorrelator
 from flowlens.enrichment.resolvers.dns import DNSResolver
 from flowlens.enrichment.resolvers.geoip import GeoIPResolver, PrivateIPClassifier
 from flowlens.enrichment.resolvers.protocol import ProtocolResolver
-from flowlens.models.flow import FlowRecord
 
 logger = get_logger(__name__)
 
 # Maximum retries for deadlock errors
 MAX_DEADLOCK_RETRIES = 3
 
+# Marks a batch of flows enriched in one statement; arrays are aligned by index
+BULK_ENRICH_SQL = text("""
+    UPDATE flow_records AS f
+    SET is_enriched = true,
+        extended_fields = CAST(v.extended_fields AS jsonb)
+    FROM unnest(
+        CAST(:ids AS uuid[]),
+        CAST(:timestamps AS timestamptz[]),
+        CAST(:extended_fields AS text[])
+    ) AS v(id, timestamp, extended_fields)
+    WHERE f.id = v.id AND f.timestamp = v.timestamp
+""")
+
+# Claimed flows still unenriched; the timestamp bounds let PostgreSQL
+# prune partitions. Rows are locked so a sweep-queued duplicate is skipped.
+QUEUED_FLOWS_SQL = text("""
+    SELECT f.id, f.timestamp, f.src_ip, f.dst_ip, f.dst_port, f.protocol, f.extended_fields
+    FROM flow_records AS f
+    JOIN unnest(
+        CAST(:ids AS uuid[]),
+        CAST(:timestamps AS timestamptz[])
+    ) AS q(id, timestamp) ON f.id = q.id AND f.timestamp = q.timestamp
+    WHERE f.timestamp BETWEEN :min_timestamp AND :max_timestamp
+      AND f.is_enriched = false
+    FOR UPDATE OF f SKIP LOCKED
+""").columns(extended_fields=JSONB)
+
+# (src_ip, dst_ip, dst_port, protocol) of a flow to enrich
+FlowKey = tuple[str, str, int, int]
+
 
 class EnrichmentWorker:
     """Worker that enriches flow records.
@@ -38,11 +92,12 @@ class EnrichmentWorker:
     - Asset correlation
     """
 
-    def __init__(self, settings: EnrichmentSettings | None = None) -> None:
+    def __init__(self, settings: EnrichmentSettings | None = None, worker_id: int = 0) -> None:
         """Initialize enrichment worker.
 
         Args:
             settings: Enrichment settings.
+            worker_id: Index of this worker in the enrichment pool.
         """
         all_settings = get_settings()
         if settings is None:
@@ -52,9 +107,19 @@ class EnrichmentWorker:
         self._resolution_settings = all_settings.resolution
         self._batch_size = settings.batch_size
         self._poll_interval = settings.poll_interval_ms / 1000
+        self._sweep_interval = settings.queue_sweep_interval_seconds
+        self._last_sweep = float("-inf")
+        self._work_signal = WorkSignal()
+
+        # Queue shards this worker claims from; all of them until the
+        # pool assigns a share (see EnrichmentPool)
+        self._worker_id = worker_id
+        self._shards = list(range(ENRICHMENT_SHARDS))
+        self._flows_metric = ENRICHMENT_WORKER_FLOWS.labels(worker=str(worker_id))
+        self._lag_metric = ENRICHMENT_WORKER_LAG.labels(worker=str(worker_id))
 
         # Initialize resolvers
-        self._dns_resolver = DNSResolver(settings)
+        self._dns_resolver = DNSResolver(settings, on_resolved=self._backfill_hostnames)
         self._geoip_resolver = GeoIPResolver(settings)
         self._protocol_resolver = ProtocolResolver()
         self._correlator = AssetCorrelator(self._geoip_resolver)
@@ -67,18 +132,23 @@ class EnrichmentWorker:
     async def start(self) -> None:
         """Start the enrichment worker."""
         self._running = True
-        logger.info("Enrichment worker started")
+        logger.info("Enrichment worker started", worker_id=self._worker_id)
+
+        await self._dns_resolver.warm_start()
 
         while self._running:
             try:
+                await self._maybe_sweep()
+
                 processed = await self._process_batch()
 
                 if processed == 0:
-                    # No work, wait before polling again
-                    await asyncio.sleep(self._poll_interval)
+                    # No work, wait for new flows to be announced
+                    await self._work_signal.wait(self._poll_interval)
                 else:
                     self._processed_count += processed
                     ENRICHMENT_PROCESSED.inc(processed)
+                    self._flows_metric.inc(processed)
 
             except asyncio.CancelledError:
                 break
@@ -89,6 +159,7 @@ class EnrichmentWorker:
 
         logger.info(
             "Enrichment worker stopped",
+            worker_id=self._worker_id,
             total_processed=self._processed_count,
         )
 
@@ -96,6 +167,38 @@ class EnrichmentWorker:
         """Stop the enrichment worker."""
         self._running = False
 
+    def wake(self) -> None:
+        """Wake the worker if it is waiting for new flows."""
+        self._work_signal.set()
+
+    def set_shards(self, shards: Sequence[int]) -> None:
+        """Set the enrichment queue shards this worker claims from.
+
+        Args:
+            shards: Shard numbers, in [0, ENRICHMENT_SHARDS).
+        """
+        self._shards = list(shards)
+
+    async def _maybe_sweep(self) -> None:
+        """Queue unenriched flows that are missing from the queue.
+
+        Runs at startup and then every queue_sweep_interval_seconds. It
+        recovers the queue after a PostgreSQL crash and retries flows
+        whose enrichment failed. Flows ingested within the last sweep
+        interval are left alone.
+        """
+        now = time.monotonic()
+        if now - self._last_sweep < self._sweep_interval:
+            return
+        self._last_sweep = now
+
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self._sweep_interval)
+        async with get_session() as db:
+            queued = await sweep_flows(db, self._batch_size, cutoff)
+
+        if queued:
+            logger.info("Queued unenriched flows", entries=queued)
+
     def _should_skip_external_flow(self, src_ip: str, dst_ip: str) -> bool:
         """Check if a flow should be skipped due to external IPs.
 
@@ -121,8 +224,8 @@ class EnrichmentWorker:
     async def _process_batch(self) -> int:
         """Process a batch of unenriched flows.
 
-        Uses FOR UPDATE SKIP LOCKED to prevent multiple workers from
-        grabbing the same rows, avoiding deadlocks.
+        Queue entries are claimed with FOR UPDATE SKIP LOCKED, so
+        concurrent workers never enrich the same flows.
 
         Returns:
             Number of flows processed.
@@ -154,137 +257,268 @@ class EnrichmentWorker:
         return 0
 
     async def _process_batch_internal(self) -> int:
-        """Internal batch processing with row locking.
+        """Enrich the next queued batch of flows.
 
         Returns:
             Number of flows processed.
         """
         async with get_session() as db:
-            # Fetch unenriched flows with FOR UPDATE SKIP LOCKED
-            # This prevents multiple workers from grabbing the same rows
-            result = await db.execute(
-                select(FlowRecord)
-                .where(FlowRecord.is_enriched == False)  # noqa: E712
-                .order_by(FlowRecord.timestamp)
-                .limit(self._batch_size)
-                .with_for_update(skip_locked=True)
-            )
-            flows = result.scalars().all()
+            flows = await self._claim_flows(db)
 
             if not flows:
                 return 0
 
             logger.debug("Processing enrichment batch", count=len(flows))
 
-            # Collect unique IPs for batch lookup
-            unique_ips = set()
-            for flow in flows:
-                unique_ips.add(str(flow.src_ip))
-                unique_ips.add(str(flow.dst_ip))
-
-            # Batch DNS lookups
-            hostnames = await self._dns_resolver.resolve_batch(list(unique_ips))
+            enrichments = await self._enrich_batch(
+                db,
+                [
+                    (str(flow.src_ip), str(flow.dst_ip), flow.dst_port, flow.protocol)
+                    for flow in flows
+                ],
+            )
 
-            # Process each flow
-            for flow in flows:
-                await self._enrich_flow(db, flow, hostnames)
+            # Serialize here so a flow that cannot be stored is skipped
+            # instead of failing the whole UPDATE
+            ids: list[UUID] = []
+            timestamps: list[datetime] = []
+            extended_fields: list[str] = []
+            for flow, enrichment in zip(flows, enrichments, strict=True):
+                if enrichment is None:
+                    continue
+                try:
+                    extended = json.dumps({**(flow.extended_fields or {}), "enrichment": enrichment})
+                except (TypeError, ValueError) as e:
+                    logger.warning("Failed to enrich flow", flow_id=str(flow.id), error=str(e))
+                    ENRICHMENT_ERRORS.labels(error_type="flow_enrichment").inc()
+                    continue
+                ids.append(flow.id)
+                timestamps.append(flow.timestamp)
+                extended_fields.append(extended)
+
+            if ids:
+                await db.execute(
+                    BULK_ENRICH_SQL,
+                    {"ids": ids, "timestamps": timestamps, "extended_fields": extended_fields},
+                )
+                await enqueue_windows(db, timestamps)
 
             await db.commit()
             return len(flows)
 
-    async def _enrich_flow(
+    async def _claim_flows(self, db: AsyncSession) -> Sequence[Row[Any]]:
+        """Claim queued flows that still need enrichment.
+
+        Claims up to batch_size flows from the owned shards. Entries whose
+        flows were all enriched already are consumed and skipped.
+
+        Args:
+            db: Database session.
+
+        Returns:
+            Claimed flows, or an empty list if the worker's shards are empty.
+        """
+        while self._shards and (entries := await claim_flows(db, self._shards, self._batch_size)):
+            oldest = min(entry.queued_at for entry in entries)
+            self._lag_metric.set(max((datetime.now(timezone.utc) - oldest).total_seconds(), 0.0))
+
+            flow_ids = [flow_id for entry in entries for flow_id in entry.flow_ids]
+            timestamps = [timestamp for entry in entries for timestamp in entry.timestamps]
+            result = await db.execute(
+                QUEUED_FLOWS_SQL,
+                {
+                    "ids": flow_ids,
+                    "timestamps": timestamps,
+                    "min_timestamp": min(timestamps),
+                    "max_timestamp": max(timestamps),
+                },
+            )
+            flows = result.all()
+            if flows:
+                return flows
+
+        self._lag_metric.set(0)
+        return []
+
+    async def _enrich_batch(
         self,
         db: AsyncSession,
-        flow: FlowRecord,
+        flows: Sequence[FlowKey],
+    ) -> list[dict[str, Any] | None]:
+        """Build enrichment data for a batch of flows.
+
+        Cached hostnames are looked up (misses are resolved in the
+        background, see DNSResolver) and assets correlated once per unique
+        IP; each flow's enrichment is then built without touching the
+        database.
+
+        Args:
+            db: Database session.
+            flows: (src_ip, dst_ip, dst_port, protocol) per flow.
+
+        Returns:
+            Enrichment data per flow, or None where enrichment failed.
+        """
+        unique_ips = {ip for src_ip, dst_ip, _, _ in flows for ip in (src_ip, dst_ip)}
+        hostnames = await self._dns_resolver.lookup_batch(unique_ips)
+
+        asset_ips = {
+            ip
+            for src_ip, dst_ip, _, _ in flows
+            if not self._should_skip_external_flow(src_ip, dst_ip)
+            for ip in (src_ip, dst_ip)
+        }
+        asset_ids = await self._correlate_ips(db, asset_ips, hostnames)
+
+        enrichments: list[dict[str, Any] | None] = []
+        for src_ip, dst_ip, dst_port, protocol in flows:
+            try:
+                enrichments.append(
+                    self._build_enrichment(
+                        src_ip, dst_ip, dst_port, protocol, hostnames, asset_ids
+                    )
+                )
+            except Exception as e:
+                logger.warning(
+                    "Failed to enrich flow",
+                    src_ip=src_ip,
+                    dst_ip=dst_ip,
+                    error=str(e),
+                )
+                ENRICHMENT_ERRORS.labels(error_type="flow_enrichment").inc()
+                enrichments.append(None)
+
+        return enrichments
+
+    async def _correlate_ips(
+        self,
+        db: AsyncSession,
+        ips: set[str],
         hostnames: dict[str, str | None],
-    ) -> bool:
-        """Enrich a single flow record.
+    ) -> dict[str, UUID]:
+        """Correlate IPs to assets.
 
-        Uses a savepoint so individual flow failures don't abort the batch.
-        Skips asset creation for flows with external IPs when
-        discard_external_flows is enabled.
+        Uncached IPs are correlated together in one savepoint (see
+        AssetCorrelator.correlate_batch). If that fails, each IP is retried
+        in its own savepoint, so one bad IP does not fail the batch.
 
         Args:
             db: Database session.
-            flow: Flow record to enrich.
+            ips: IP addresses to correlate.
             hostnames: Pre-resolved hostnames.
 
         Returns:
-            True if enrichment succeeded, False otherwise.
+            Asset ID per IP; IPs that failed to correlate are missing.
         """
+        asset_ids: dict[str, UUID] = {}
+        misses: list[str] = []
+        for ip in sorted(ips):
+            cached = self._correlator.get_cached(ip)
+            if cached is not None:
+                asset_ids[ip] = cached
+            else:
+                misses.append(ip)
+
+        if not misses:
+            return asset_ids
+
         try:
-            # Use savepoint to isolate this flow's operations
             async with db.begin_nested():
-                src_ip = str(flow.src_ip)
-                dst_ip = str(flow.dst_ip)
-
-                # Check if this flow should skip asset creation due to external IPs
-                skip_assets = self._should_skip_external_flow(src_ip, dst_ip)
-
-                # Get hostnames from batch results
-                src_hostname = hostnames.get(src_ip)
-                dst_hostname = hostnames.get(dst_ip)
-
-                # Correlate to assets only if not skipping external flows
-                src_asset_id = None
-                dst_asset_id = None
-                if not skip_assets:
-                    # IMPORTANT: Always acquire locks in sorted order to prevent deadlocks
-                    # If two workers process flows A→B and B→A simultaneously, they could
-                    # deadlock if locks are acquired in different orders. By always sorting,
-                    # both workers will acquire locks in the same order (A then B).
-                    if src_ip <= dst_ip:
-                        src_asset_id = await self._correlator.correlate(db, src_ip, src_hostname)
-                        dst_asset_id = await self._correlator.correlate(db, dst_ip, dst_hostname)
-                    else:
-                        dst_asset_id = await self._correlator.correlate(db, dst_ip, dst_hostname)
-                        src_asset_id = await self._correlator.correlate(db, src_ip, src_hostname)
-
-                # Get service info
-                service_info = self._protocol_resolver.resolve(flow.dst_port, flow.protocol)
-
-                # Build extended fields with enrichment data
-                extended = flow.extended_fields or {}
-                extended["enrichment"] = {
-                    "src_hostname": src_hostname,
-                    "dst_hostname": dst_hostname,
-                    "src_asset_id": str(src_asset_id) if src_asset_id else None,
-                    "dst_asset_id": str(dst_asset_id) if dst_asset_id else None,
-                    "service_name": service_info.name if service_info else None,
-                    "service_category": service_info.category if service_info else None,
-                    "is_encrypted": service_info.encrypted if service_info else None,
-                    "enriched_at": datetime.utcnow().isoformat(),
-                    "external_flow_discarded": skip_assets,
-                }
-
-                # Update flow record
-                await db.execute(
-                    update(FlowRecord)
-                    .where(
-                        FlowRecord.id == flow.id,
-                        FlowRecord.timestamp == flow.timestamp,
-                    )
-                    .values(
-                        is_enriched=True,
-                        extended_fields=extended,
+                asset_ids.update(
+                    await self._correlator.correlate_batch(
+                        db, [(ip, hostnames.get(ip)) for ip in misses]
                     )
                 )
-                return True
-
+            return asset_ids
         except Exception as e:
-            logger.warning(
-                "Failed to enrich flow",
-                flow_id=str(flow.id),
-                error=str(e),
-            )
-            ENRICHMENT_ERRORS.labels(error_type="flow_enrichment").inc()
-            return False
+            logger.warning("Batch asset correlation failed", ips=len(misses), error=str(e))
+
+        for ip in misses:
+            try:
+                async with db.begin_nested():
+                    asset_ids[ip] = await self._correlator.correlate(db, ip, hostnames.get(ip))
+            except Exception as e:
+                logger.warning("Failed to correlate asset", ip=ip, error=str(e))
+                ENRICHMENT_ERRORS.labels(error_type="asset_correlation").inc()
+
+        return asset_ids
+
+    async def _backfill_hostnames(self, hostnames: dict[str, str]) -> None:
+        """Set hostnames resolved in the background on their assets.
+
+        Args:
+            hostnames: Resolved hostname per IP address string.
+        """
+        async with get_session() as db:
+            updated = await self._correlator.backfill_hostnames(db, hostnames)
+
+        if updated:
+            logger.debug("Backfilled asset hostnames", count=updated)
+
+    def _build_enrichment(
+        self,
+        src_ip: str,
+        dst_ip: str,
+        dst_port: int,
+        protocol: int,
+        hostnames: dict[str, str | None],
+        asset_ids: dict[str, UUID],
+    ) -> dict[str, Any]:
+        """Build the enrichment data stored in a flow's extended fields.
+
+        Skips asset correlation for flows with external IPs when
+        discard_external_flows is enabled.
+
+        Args:
+            src_ip: Source IP address.
+            dst_ip: Destination IP address.
+            dst_port: Destination port.
+            protocol: IP protocol number.
+            hostnames: Pre-resolved hostnames.
+            asset_ids: Pre-correlated asset IDs.
+
+        Returns:
+            Enrichment data for extended_fields["enrichment"].
+
+        Raises:
+            KeyError: If an IP of the flow failed asset correlation.
+        """
+        # Check if this flow should skip asset creation due to external IPs
+        skip_assets = self._should_skip_external_flow(src_ip, dst_ip)
+
+        # Get hostnames from batch results
+        src_hostname = hostnames.get(src_ip)
+        dst_hostname = hostnames.get(dst_ip)
+
+        # Assets were correlated for the batch, unless skipping external flows
+        src_asset_id = None
+        dst_asset_id = None
+        if not skip_assets:
+            src_asset_id = asset_ids[src_ip]
+            dst_asset_id = asset_ids[dst_ip]
+
+        # Get service info
+        service_info = self._protocol_resolver.resolve(dst_port, protocol)
+
+        return {
+            "src_hostname": src_hostname,
+            "dst_hostname": dst_hostname,
+            "src_asset_id": str(src_asset_id) if src_asset_id else None,
+            "dst_asset_id": str(dst_asset_id) if dst_asset_id else None,
+            "service_name": service_info.name if service_info else None,
+            "service_category": service_info.category if service_info else None,
+            "is_encrypted": service_info.encrypted if service_info else None,
+            "enriched_at": datetime.utcnow().isoformat(),
+            "external_flow_discarded": skip_assets,
+        }
 
     @property
     def stats(self) -> dict[str, Any]:
         """Get worker statistics."""
         return {
             "running": self._running,
+            "worker_id": self._worker_id,
+            "shards": self._shards,
             "processed_count": self._processed_count,
             "dns_cache": self._dns_resolver.cache_stats,
             "geoip_enabled": self._geoip_resolver.is_enabled,
@@ -295,4 +529,3 @@ class EnrichmentWorker:
         """Cleanup resources."""
         await self._dns_resolver.cleanup()
         self._geoip_resolver.close()
-        self._correlator.clear_cache()
@@ -0,0 +1,359 @@
+"""Pre-storage flow aggregation in the collector.
+
+Instead of storing every raw flow and aggregating later in the
+resolution stage, FlowAggregationStage folds parsed flows into
+per-window AggregationKey buckets as they arrive, and a background task
+writes them to flow_aggregates once each window closes, so the packet
+loop never waits on the database. Direction is normalized with
+the same rule as normalize_flow_direction(), and windows have the same
+bounds as FlowAggregator.get_window_bounds().
+
+Optionally one in N raw flows is still stored, tagged with
+COLLECTOR_SAMPLE_FIELD so the resolution aggregator does not count them
+a second time.
+"""
+
+import asyncio
+import contextlib
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta, timezone
+from ipaddress import IPv4Address
+
+import numpy as np
+
+from flowlens.common.database import get_session
+from flowlens.common.logging import get_logger
+from flowlens.common.metrics import COLLECTOR_AGGREGATES, FLOWS_AGGREGATED
+from flowlens.ingestion.parsers.batch import FlowBatch, unpack_ips
+from flowlens.resolution.aggregator import (
+    COLLECTOR_SAMPLE_FIELD,
+    EPHEMERAL_PORT_THRESHOLD,
+    AggregationBucket,
+    AggregationKey,
+    FlowAggregator,
+)
+
+logger = get_logger(__name__)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MINUTE_US = 60 * 1_000_000
+_HOUR_US = 60 * _MINUTE_US
+
+WindowWriter = Callable[
+    [datetime, datetime, dict[AggregationKey, AggregationBucket]],
+    Awaitable[None],
+]
+
+
+def normalize_direction(batch: FlowBatch) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorized normalize_flow_direction().
+
+    Flows from a well-known port to an ephemeral port are responses and
+    are swapped so they point at the service.
+
+    Args:
+        batch: Flows to normalize.
+
+    Returns:
+        (client_ip, server_ip, service_port) columns.
+    """
+    swapped = (batch.dst_port >= EPHEMERAL_PORT_THRESHOLD) & (
+        batch.src_port < EPHEMERAL_PORT_THRESHOLD
+    )
+    swapped_ips = swapped[:, None]
+    return (
+        np.where(swapped_ips, batch.dst_ip, batch.src_ip),
+        np.where(swapped_ips, batch.src_ip, batch.dst_ip),
+        np.where(swapped, batch.src_port, batch.dst_port),
+    )
+
+
+def window_starts(timestamps: np.ndarray, window_minutes: int) -> np.ndarray:
+    """Vectorized FlowAggregator.get_window_bounds() window start.
+
+    Windows are aligned within each hour, as get_window_bounds() does.
+
+    Args:
+        timestamps: Timestamp column (epoch microseconds).
+        window_minutes: Window size in minutes.
+
+    Returns:
+        Window start of each flow in epoch microseconds.
+    """
+    hours = timestamps - timestamps % _HOUR_US
+    minutes = (timestamps % _HOUR_US) // _MINUTE_US
+    return hours + (minutes - minutes % window_minutes) * _MINUTE_US
+
+
+class FlowAggregationStage:
+    """Aggregates flows into bounded per-window buckets before storage.
+
+    Not thread-safe; add() and the background writer must share one
+    event loop. A window is detached from the open windows while it is
+    written, so flows added meanwhile start a new set of buckets that
+    the upsert merges.
+    """
+
+    def __init__(
+        self,
+        aggregator: FlowAggregator | None = None,
+        max_buckets: int = 100000,
+        flush_delay_seconds: float = 30.0,
+        raw_sample_rate: int | None = None,
+        write: WindowWriter | None = None,
+        clock: Callable[[], float] = time.time,
+        flush_interval: float = 1.0,
+    ) -> None:
+        """Initialize aggregation stage.
+
+        Args:
+            aggregator: Provides the window size and writes aggregates.
+            max_buckets: Bucket count above which the oldest windows are
+                written early. Early writes are merged by the upsert.
+            flush_delay_seconds: Time after a window ends to wait for late
+                flows before writing it.
+            raw_sample_rate: Also return one in this many raw flows for
+                storage. None stores aggregates only.
+            write: Writes one window's buckets. Defaults to
+                FlowAggregator.upsert_buckets() in a new session.
+            clock: Wall-clock time source.
+            flush_interval: Seconds between background checks for
+                windows to write.
+        """
+        self._aggregator = aggregator or FlowAggregator()
+        self._window_minutes = self._aggregator.window_size_minutes
+        self._max_buckets = max_buckets
+        self._flush_delay_us = int(flush_delay_seconds * 1_000_000)
+        self._raw_sample_rate = raw_sample_rate
+        self._write = write or self._write_window
+        self._clock = clock
+        self._flush_interval = flush_interval
+        self._task: asyncio.Task[None] | None = None
+
+        # Window start (epoch microseconds) -> buckets
+        self._windows: dict[int, dict[AggregationKey, AggregationBucket]] = {}
+        self._bucket_count = 0
+        self._sample_counter = 0
+
+    @property
+    def bucket_count(self) -> int:
+        """Number of buckets held across all open windows."""
+        return self._bucket_count
+
+    def add(self, batch: FlowBatch) -> FlowBatch:
+        """Fold a batch into the open windows.
+
+        Args:
+            batch: Parsed flows.
+
+        Returns:
+            Raw flows to store: the sampled, tagged flows, or an empty
+            batch when storing aggregates only.
+        """
+        count = len(batch)
+        if not count:
+            return batch
+
+        client_ip, server_ip, service_port = normalize_direction(batch)
+        windows = window_starts(batch.timestamp, self._window_minutes)
+
+        # Group rows by (window, client, server, port, protocol)
+        key_bytes = np.concatenate(
+            [
+                windows.astype("<i8").view(np.uint8).reshape(count, 8),
+                client_ip,
+                server_ip,
+                service_port.astype("<i8").view(np.uint8).reshape(count, 8),
+                batch.protocol.astype("<i8").view(np.uint8).reshape(count, 8),
+            ],
+            axis=1,
+        )
+        keys = np.ascontiguousarray(key_bytes).view(f"V{key_bytes.shape[1]}").ravel()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+
+        order = np.argsort(inverse, kind="stable")
+        starts = np.flatnonzero(np.r_[True, np.diff(inverse[order]) != 0])
+        bytes_sorted = batch.bytes_count[order]
+
+        bytes_total = np.add.reduceat(bytes_sorted, starts).tolist()
+        bytes_min = np.minimum.reduceat(bytes_sorted, starts).tolist()
+        bytes_max = np.maximum.reduceat(bytes_sorted, starts).tolist()
+        packets_total = np.add.reduceat(batch.packets_count[order], starts).tolist()
+        flows = np.diff(np.r_[starts, count]).tolist()
+
+        clients = unpack_ips(client_ip[first])
+        servers = unpack_ips(server_ip[first])
+        exporters = batch.exporter_ip[first].tolist()
+
+        group_buckets: list[AggregationBucket] = []
+        for group, row in enumerate(first.tolist()):
+            src_ip, dst_ip = str(clients[group]), str(servers[group])
+            key = AggregationKey(
+                src_ip=src_ip,
+                dst_ip=dst_ip,
+                dst_port=int(service_port[row]),
+                protocol=int(batch.protocol[row]),
+            )
+
+            buckets = self._windows.setdefault(int(windows[row]), {})
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = AggregationBucket()
+                self._bucket_count += 1
+
+            bucket.add_totals(
+                bytes_total=bytes_total[group],
+                packets_total=packets_total[group],
+                flows_count=flows[group],
+                bytes_min=bytes_min[group],
+                bytes_max=bytes_max[group],
+                src_ip=src_ip,
+                dst_ip=dst_ip,
+                exporter_ip=str(IPv4Address(exporters[group])),
+            )
+            group_buckets.append(bucket)
+
+        self._add_gateways(batch, inverse, group_buckets)
+        FLOWS_AGGREGATED.inc(count)
+
+        return self._sample(batch)
+
+    def start(self) -> None:
+        """Start writing closed windows in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the background writer and write every open window."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+        await self.flush(force=True)
+
+    async def _flush_loop(self) -> None:
+        """Write closed windows every flush_interval."""
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Flow aggregate flush failed", error=str(e))
+
+    async def flush(self, force: bool = False) -> int:
+        """Write windows that have closed, or all windows if forced.
+
+        When more than max_buckets buckets are held, the oldest windows
+        are written early as well.
+
+        Args:
+            force: Write every open window (e.g. on shutdown).
+
+        Returns:
+            Number of aggregates written.
+        """
+        if not self._windows:
+            return 0
+
+        now_us = int(self._clock() * 1_000_000)
+        window_us = self._window_minutes * _MINUTE_US
+        written = 0
+
+        for start in sorted(self._windows):
+            closed = start + window_us + self._flush_delay_us <= now_us
+            if not (force or closed or self._bucket_count > self._max_buckets):
+                break
+
+            buckets = self._windows.pop(start)
+            self._bucket_count -= len(buckets)
+            window_start = _EPOCH + timedelta(microseconds=start)
+
+            try:
+                window_end = window_start + timedelta(microseconds=window_us)
+                await self._write(window_start, window_end, buckets)
+            except asyncio.CancelledError:
+                self._restore(start, buckets)
+                raise
+            except Exception as e:
+                if self._bucket_count + len(buckets) <= self._max_buckets:
+                    logger.error("Failed to write flow aggregates, will retry", error=str(e))
+                    self._restore(start, buckets)
+                    break
+
+                # Over capacity with storage unavailable: drop the oldest window
+                logger.error(
+                    "Failed to write flow aggregates, dropping window",
+                    window_start=window_start.isoformat(),
+                    aggregates=len(buckets),
+                    error=str(e),
+                )
+                COLLECTOR_AGGREGATES.labels(outcome="dropped").inc(len(buckets))
+            else:
+                COLLECTOR_AGGREGATES.labels(outcome="written").inc(len(buckets))
+                written += len(buckets)
+
+        return written
+
+    def _restore(self, start: int, buckets: dict[AggregationKey, AggregationBucket]) -> None:
+        """Return an unwritten window, merging flows added while it was out."""
+        current = self._windows.setdefault(start, {})
+        for key, bucket in buckets.items():
+            existing = current.get(key)
+            if existing is None:
+                current[key] = bucket
+                self._bucket_count += 1
+            else:
+                existing.merge(bucket)
+
+    def _add_gateways(
+        self,
+        batch: FlowBatch,
+        groups: np.ndarray,
+        group_buckets: list[AggregationBucket],
+    ) -> None:
+        """Track next-hop gateway bytes, as FlowAggregator does."""
+        bytes_count = None
+        for row, fields in enumerate(batch.extended_fields.tolist()):
+            if not fields:
+                continue
+            gateway_ip = fields.get("next_hop")
+            if gateway_ip in (None, "", "0.0.0.0"):
+                continue
+
+            if bytes_count is None:
+                bytes_count = batch.bytes_count.tolist()
+            gateway_bytes = group_buckets[groups[row]].gateway_bytes
+            gateway_bytes[gateway_ip] = gateway_bytes.get(gateway_ip, 0) + bytes_count[row]
+
+    def _sample(self, batch: FlowBatch) -> FlowBatch:
+        """Select and tag the raw flows to store alongside the aggregates."""
+        rate = self._raw_sample_rate
+        if rate is None:
+            return batch.take(slice(0, 0))
+
+        count = len(batch)
+        selected = np.flatnonzero((self._sample_counter + np.arange(count)) % rate == 0)
+        self._sample_counter = (self._sample_counter + count) % rate
+
+        sampled = batch.take(selected)
+        tagged = np.empty(len(sampled), dtype=object)
+        tagged[:] = [
+            {**(fields or {}), COLLECTOR_SAMPLE_FIELD: rate}
+            for fields in sampled.extended_fields.tolist()
+        ]
+        sampled.extended_fields = tagged
+        return sampled
+
+    async def _write_window(
+        self,
+        window_start: datetime,
+        window_end: datetime,
+        buckets: dict[AggregationKey, AggregationBucket],
+    ) -> None:
+        """Upsert one window's aggregates."""
+        async with get_session() as db:
+            await self._aggregator.upsert_buckets(db, window_start, window_end, buckets)
@@ -5,14 +5,18 @@ strategies to handle traffic spikes.
 """
 
 import asyncio
-import random
-from dataclasses import dataclass
+import contextlib
+from collections import deque
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Generic, TypeVar
+from typing import Any, Generic, TypeVar
 
 from flowlens.common.config import IngestionSettings
 from flowlens.common.logging import get_logger
 from flowlens.common.metrics import (
+    EXPORTER_PACKETS_DROPPED,
+    EXPORTER_QUEUE_SIZE,
     FLOWS_DROPPED,
     FLOWS_SAMPLED,
     INGESTION_QUEUE_SIZE,
@@ -49,6 +53,13 @@ class BackpressureStats:
         return (self.queue_size / self.queue_max_size) * 100
 
 
+def _clamp_thresholds(sample_threshold: int, drop_threshold: int, max_size: int) -> tuple[int, int]:
+    """Keep 1 <= sample_threshold < drop_threshold <= max_size."""
+    drop_threshold = max(2, min(drop_threshold, max_size))
+    sample_threshold = max(1, min(sample_threshold, drop_threshold - 1))
+    return sample_threshold, drop_threshold
+
+
 class BackpressureQueue(Generic[T]):
     """Queue with backpressure support.
 
@@ -83,6 +94,11 @@ class BackpressureQueue(Generic[T]):
         self._total_dropped = 0
         self._sample_counter = 0
 
+        # Counts not yet published to Prometheus (see flush_metrics)
+        self._pending_sampled = 0
+        self._pending_backpressure_drops = 0
+        self._pending_queue_full_drops = 0
+
         # State
         self._state = BackpressureState.NORMAL
 
@@ -109,10 +125,29 @@ class BackpressureQueue(Generic[T]):
             sample_rate=self._sample_rate,
         )
 
+    @property
+    def thresholds(self) -> tuple[int, int]:
+        """Current (sample_threshold, drop_threshold)."""
+        return self._sample_threshold, self._drop_threshold
+
+    def set_thresholds(self, sample_threshold: int, drop_threshold: int) -> None:
+        """Change the thresholds at runtime (see AdaptiveBackpressure).
+
+        The drop threshold is capped at the queue size and the sample
+        threshold kept below it.
+
+        Args:
+            sample_threshold: New sample threshold.
+            drop_threshold: New drop threshold.
+        """
+        self._sample_threshold, self._drop_threshold = _clamp_thresholds(
+            sample_threshold, drop_threshold, self._max_size
+        )
+        self._update_state()
+
     def _update_state(self) -> None:
         """Update backpressure state based on queue size."""
-        queue_size = self.size
-        INGESTION_QUEUE_SIZE.set(queue_size)
+        queue_size = self._queue.qsize()
 
         old_state = self._state
 
@@ -133,8 +168,11 @@ class BackpressureQueue(Generic[T]):
                 drop_threshold=self._drop_threshold,
             )
 
-    async def put(self, item: T) -> bool:
-        """Add item to queue with backpressure handling.
+    def put_nowait(self, item: T) -> bool:
+        """Add item to queue with backpressure handling, without awaiting.
+
+        Safe to call directly from protocol callbacks. Prometheus counters
+        are accumulated locally and published by flush_metrics().
 
         Args:
             item: Item to add.
@@ -145,18 +183,18 @@ class BackpressureQueue(Generic[T]):
         self._total_received += 1
         self._update_state()
 
-        if self._state == BackpressureState.DROPPING:
+        if self._state is BackpressureState.DROPPING:
             # Drop the item
             self._total_dropped += 1
-            FLOWS_DROPPED.labels(reason="backpressure_drop").inc()
+            self._pending_backpressure_drops += 1
             return False
 
-        if self._state == BackpressureState.SAMPLING:
+        if self._state is BackpressureState.SAMPLING:
             # Sample: keep 1 in N items
             self._sample_counter += 1
             if self._sample_counter < self._sample_rate:
                 self._total_sampled += 1
-                FLOWS_SAMPLED.inc()
+                self._pending_sampled += 1
                 return False
             self._sample_counter = 0
 
@@ -165,11 +203,22 @@ class BackpressureQueue(Generic[T]):
             return True
         except asyncio.QueueFull:
             self._total_dropped += 1
-            FLOWS_DROPPED.labels(reason="queue_full").inc()
+            self._pending_queue_full_drops += 1
             return False
 
-    async def put_batch(self, items: list[T]) -> tuple[int, int]:
-        """Add batch of items with backpressure handling.
+    async def put(self, item: T) -> bool:
+        """Add item to queue with backpressure handling.
+
+        Args:
+            item: Item to add.
+
+        Returns:
+            True if item was added, False if dropped/sampled.
+        """
+        return self.put_nowait(item)
+
+    def put_batch_nowait(self, items: list[T]) -> tuple[int, int]:
+        """Add batch of items with backpressure handling, without awaiting.
 
         Args:
             items: List of items to add.
@@ -178,15 +227,24 @@ class BackpressureQueue(Generic[T]):
             Tuple of (added_count, dropped_count).
         """
         added = 0
-        dropped = 0
+        put_nowait = self.put_nowait
 
         for item in items:
-            if await self.put(item):
+            if put_nowait(item):
                 added += 1
-            else:
-                dropped += 1
 
-        return added, dropped
+        return added, len(items) - added
+
+    async def put_batch(self, items: list[T]) -> tuple[int, int]:
+        """Add batch of items with backpressure handling.
+
+        Args:
+            items: List of items to add.
+
+        Returns:
+            Tuple of (added_count, dropped_count).
+        """
+        return self.put_batch_nowait(items)
 
     async def get(self) -> T:
         """Get next item from queue.
@@ -243,34 +301,448 @@ class BackpressureQueue(Generic[T]):
         except asyncio.QueueEmpty:
             return None
 
+    def flush_metrics(self) -> None:
+        """Publish counters accumulated since the last flush to Prometheus."""
+        INGESTION_QUEUE_SIZE.set(self._queue.qsize())
+
+        if self._pending_sampled:
+            FLOWS_SAMPLED.inc(self._pending_sampled)
+            self._pending_sampled = 0
+
+        if self._pending_backpressure_drops:
+            FLOWS_DROPPED.labels(reason="backpressure_drop").inc(
+                self._pending_backpressure_drops
+            )
+            self._pending_backpressure_drops = 0
+
+        if self._pending_queue_full_drops:
+            FLOWS_DROPPED.labels(reason="queue_full").inc(self._pending_queue_full_drops)
+            self._pending_queue_full_drops = 0
+
+
+@dataclass(slots=True)
+class _ExporterQueue:
+    """One exporter's sub-queue in a FairBackpressureQueue."""
+
+    weight: int
+    # (item, sample factor) pairs, oldest first
+    items: deque[tuple[Any, int]] = field(default_factory=deque)
+    state: BackpressureState = BackpressureState.NORMAL
+    sample_counter: int = 0
+
+    # Counts not yet published to Prometheus, by reason
+    pending_drops: dict[str, int] = field(default_factory=dict)
+    # Reasons with a published drop counter series, removed on prune
+    drop_reasons: set[str] = field(default_factory=set)
+
+
+class FairBackpressureQueue(Generic[T]):
+    """Backpressure queue with a sub-queue per exporter.
+
+    Thresholds apply to the total queue size as in BackpressureQueue, but
+    once they are reached only exporters holding more than their weighted
+    share of the threshold are sampled or dropped, so one exporter's burst
+    does not cost every other exporter its flows. With a single exporter
+    this behaves exactly like BackpressureQueue.
+
+    get_batch() dequeues by weighted round robin: each active exporter in
+    turn yields up to its weight in items. get_sampled_batch() also returns
+    the sampling factor applied when each item was admitted (1, or
+    sample_rate if its exporter was being sampled), so flow sampling rates
+    can be scaled to keep byte counts statistically correct.
+    """
+
+    def __init__(
+        self,
+        settings: IngestionSettings | None = None,
+        key: Callable[[T], str] = str,
+        weights: Mapping[str, int] | None = None,
+    ) -> None:
+        """Initialize fair backpressure queue.
+
+        Args:
+            settings: Ingestion settings. Uses defaults if not provided.
+            key: Returns the exporter an item came from.
+            weights: Dequeue weight and queue share per exporter (default 1).
+                Defaults to settings.exporter_weights.
+        """
+        if settings is None:
+            from flowlens.common.config import get_settings
+            settings = get_settings().ingestion
+
+        self._key = key
+        self._weights = dict(settings.exporter_weights if weights is None else weights)
+        self._max_size = settings.queue_max_size
+        self._sample_threshold = settings.sample_threshold
+        self._drop_threshold = settings.drop_threshold
+        self._sample_rate = settings.sample_rate
+
+        self._exporters: dict[str, _ExporterQueue] = {}
+        self._size = 0
+        self._not_empty = asyncio.Event()
+
+        # Exporters with queued items in round-robin order, their total
+        # weight, and items taken from the head exporter this turn
+        self._active: deque[str] = deque()
+        self._active_weight = 0
+        self._served = 0
+
+        # Counters
+        self._total_received = 0
+        self._total_sampled = 0
+        self._total_dropped = 0
+
+    @property
+    def state(self) -> BackpressureState:
+        """Backpressure state of the queue as a whole."""
+        if self._size >= self._drop_threshold:
+            return BackpressureState.DROPPING
+        if self._size >= self._sample_threshold:
+            return BackpressureState.SAMPLING
+        return BackpressureState.NORMAL
+
+    @property
+    def size(self) -> int:
+        """Current queue size."""
+        return self._size
+
+    @property
+    def thresholds(self) -> tuple[int, int]:
+        """Current (sample_threshold, drop_threshold)."""
+        return self._sample_threshold, self._drop_threshold
+
+    def set_thresholds(self, sample_threshold: int, drop_threshold: int) -> None:
+        """Change the thresholds at runtime (see AdaptiveBackpressure).
+
+        The drop threshold is capped at the queue size and the sample
+        threshold kept below it. Exporter states are re-evaluated on
+        their next item.
+
+        Args:
+            sample_threshold: New sample threshold.
+            drop_threshold: New drop threshold.
+        """
+        self._sample_threshold, self._drop_threshold = _clamp_thresholds(
+            sample_threshold, drop_threshold, self._max_size
+        )
+
+    @property
+    def exporter_sizes(self) -> dict[str, int]:
+        """Current queue size per exporter."""
+        return {key: len(sub.items) for key, sub in self._exporters.items() if sub.items}
+
+    @property
+    def stats(self) -> BackpressureStats:
+        """Get current statistics."""
+        return BackpressureStats(
+            state=self.state,
+            queue_size=self._size,
+            queue_max_size=self._max_size,
+            total_received=self._total_received,
+            total_sampled=self._total_sampled,
+            total_dropped=self._total_dropped,
+            sample_rate=self._sample_rate,
+        )
+
+    def _exporter_state(self, key: str, sub: _ExporterQueue) -> BackpressureState:
+        """Update an exporter's backpressure state before admitting an item."""
+        state = BackpressureState.NORMAL
+
+        if self._size >= self._sample_threshold:
+            # The exporter's weighted share of the active exporters
+            active_weight = self._active_weight if sub.items else self._active_weight + sub.weight
+            share = sub.weight / active_weight
+            depth = len(sub.items)
+
+            if self._size >= self._drop_threshold and depth >= self._drop_threshold * share:
+                state = BackpressureState.DROPPING
+            elif depth >= self._sample_threshold * share:
+                state = BackpressureState.SAMPLING
+
+        if state is not sub.state:
+            logger.warning(
+                "Exporter backpressure state changed",
+                exporter=key,
+                old_state=sub.state.value,
+                new_state=state.value,
+                exporter_queue_size=len(sub.items),
+                queue_size=self._size,
+            )
+            sub.state = state
+
+        return state
+
+    def _drop(self, sub: _ExporterQueue, reason: str) -> None:
+        """Count an item that was not admitted."""
+        if reason == "sampled":
+            self._total_sampled += 1
+        else:
+            self._total_dropped += 1
+        sub.pending_drops[reason] = sub.pending_drops.get(reason, 0) + 1
+
+    def put_nowait(self, item: T) -> bool:
+        """Add item to its exporter's sub-queue with backpressure handling.
+
+        Safe to call directly from protocol callbacks. Prometheus counters
+        are accumulated locally and published by flush_metrics().
+
+        Args:
+            item: Item to add.
+
+        Returns:
+            True if item was added, False if dropped/sampled.
+        """
+        self._total_received += 1
+
+        key = self._key(item)
+        sub = self._exporters.get(key)
+        if sub is None:
+            sub = self._exporters[key] = _ExporterQueue(weight=self._weights.get(key, 1))
+
+        state = self._exporter_state(key, sub)
+
+        if state is BackpressureState.DROPPING:
+            self._drop(sub, "backpressure_drop")
+            return False
+
+        factor = 1
+        if state is BackpressureState.SAMPLING:
+            # Sample: keep 1 in N items from this exporter
+            sub.sample_counter += 1
+            if sub.sample_counter < self._sample_rate:
+                self._drop(sub, "sampled")
+                return False
+            sub.sample_counter = 0
+            factor = self._sample_rate
+
+        if self._size >= self._max_size:
+            self._drop(sub, "queue_full")
+            return False
+
+        if not sub.items:
+            self._active.append(key)
+            self._active_weight += sub.weight
+
+        sub.items.append((item, factor))
+        self._size += 1
+        self._not_empty.set()
+        return True
+
+    async def put(self, item: T) -> bool:
+        """Add item to queue with backpressure handling.
+
+        Args:
+            item: Item to add.
+
+        Returns:
+            True if item was added, False if dropped/sampled.
+        """
+        return self.put_nowait(item)
+
+    def put_batch_nowait(self, items: list[T]) -> tuple[int, int]:
+        """Add batch of items with backpressure handling, without awaiting.
+
+        Args:
+            items: List of items to add.
+
+        Returns:
+            Tuple of (added_count, dropped_count).
+        """
+        added = 0
+        put_nowait = self.put_nowait
+
+        for item in items:
+            if put_nowait(item):
+                added += 1
+
+        return added, len(items) - added
+
+    async def put_batch(self, items: list[T]) -> tuple[int, int]:
+        """Add batch of items with backpressure handling.
+
+        Args:
+            items: List of items to add.
+
+        Returns:
+            Tuple of (added_count, dropped_count).
+        """
+        return self.put_batch_nowait(items)
+
+    async def get(self) -> T:
+        """Get next item from queue.
+
+        Blocks until an item is available.
+        """
+        while not self._size:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+        ((item, _),) = self._take(1)
+        return item
+
+    async def get_batch(self, max_items: int, timeout: float = 0.1) -> list[T]:
+        """Get batch of items, fairly across exporters.
+
+        Args:
+            max_items: Maximum items to retrieve.
+            timeout: Timeout in seconds for first item.
+
+        Returns:
+            List of items (may be empty if timeout).
+        """
+        return [item for item, _ in await self.get_sampled_batch(max_items, timeout)]
+
+    async def get_sampled_batch(
+        self,
+        max_items: int,
+        timeout: float = 0.1,
+    ) -> list[tuple[T, int]]:
+        """Get batch of items with their sampling factors.
+
+        Args:
+            max_items: Maximum items to retrieve.
+            timeout: Timeout in seconds for first item.
+
+        Returns:
+            (item, sample factor) pairs (may be empty if timeout).
+        """
+        if not self._size:
+            self._not_empty.clear()
+            try:
+                await asyncio.wait_for(self._not_empty.wait(), timeout=timeout)
+            except TimeoutError:
+                return []
+
+        return self._take(max_items)
+
+    def get_nowait(self) -> T | None:
+        """Get item without blocking.
+
+        Returns:
+            Item if available, None otherwise.
+        """
+        if not self._size:
+            return None
+
+        ((item, _),) = self._take(1)
+        return item
+
+    def _take(self, max_items: int) -> list[tuple[T, int]]:
+        """Dequeue up to max_items by weighted round robin."""
+        items: list[tuple[T, int]] = []
+        active = self._active
+
+        while active and len(items) < max_items:
+            key = active[0]
+            sub = self._exporters[key]
+            queued = sub.items
+
+            count = min(sub.weight - self._served, max_items - len(items), len(queued))
+            items.extend(queued.popleft() for _ in range(count))
+            self._served += count
+
+            if not queued:
+                active.popleft()
+                self._active_weight -= sub.weight
+                self._served = 0
+            elif self._served >= sub.weight:
+                active.rotate(-1)
+                self._served = 0
+
+        self._size -= len(items)
+        return items
+
+    def flush_metrics(self) -> None:
+        """Publish counters accumulated since the last flush to Prometheus.
+
+        Exporters with nothing queued or pending are forgotten, so their
+        sub-queue state and per-exporter series do not accumulate.
+        """
+        INGESTION_QUEUE_SIZE.set(self._size)
+
+        sampled = 0
+        drops: dict[str, int] = {}
+        idle: list[str] = []
+
+        for key, sub in self._exporters.items():
+            for reason, count in sub.pending_drops.items():
+                EXPORTER_PACKETS_DROPPED.labels(exporter=key, reason=reason).inc(count)
+                sub.drop_reasons.add(reason)
+                if reason == "sampled":
+                    sampled += count
+                else:
+                    drops[reason] = drops.get(reason, 0) + count
+
+            if sub.items or sub.pending_drops:
+                EXPORTER_QUEUE_SIZE.labels(exporter=key).set(len(sub.items))
+                sub.pending_drops = {}
+            else:
+                idle.append(key)
+
+        for key in idle:
+            sub = self._exporters.pop(key)
+            with contextlib.suppress(KeyError):
+                EXPORTER_QUEUE_SIZE.remove(key)
+            for reason in sub.drop_reasons:
+                with contextlib.suppress(KeyError):
+                    EXPORTER_PACKETS_DROPPED.remove(key, reason)
+
+        if sampled:
+            FLOWS_SAMPLED.inc(sampled)
+        for reason, count in drops.items():
+            FLOWS_DROPPED.labels(reason=reason).inc(count)
+
 
 class AdaptiveBackpressure:
     """Adaptive backpressure that adjusts thresholds based on throughput.
 
-    Monitors processing rate and adjusts sampling/dropping thresholds
-    to maintain target throughput.
+    Monitors processing rate and batch write latency, and adjusts
+    sampling/dropping thresholds and the batch size to maintain target
+    throughput. FlowCollector feeds it once per adjustment interval and
+    applies its output to the queue and router.
     """
 
     def __init__(
         self,
         target_throughput: int = 50000,
         adjustment_interval: float = 10.0,
+        target_latency: float = 0.5,
+        min_batch_size: int = 100,
+        max_batch_size: int = 10000,
     ) -> None:
         """Initialize adaptive backpressure.
 
         Args:
             target_throughput: Target flows per second.
             adjustment_interval: Seconds between adjustments.
+            target_latency: Target seconds per batch write.
+            min_batch_size: Smallest batch size to adjust down to.
+            max_batch_size: Largest batch size to adjust up to.
         """
         self._target_throughput = target_throughput
         self._adjustment_interval = adjustment_interval
+        self._target_latency = target_latency
+        self._min_batch_size = min_batch_size
+        self._max_batch_size = max_batch_size
 
-        # Moving average of throughput
-        self._throughput_samples: list[float] = []
+        # Moving averages of throughput and write latency
         self._max_samples = 10
+        self._throughput_samples: deque[float] = deque(maxlen=self._max_samples)
+        self._latency_samples: deque[float] = deque(maxlen=self._max_samples)
 
-        # Current multiplier for thresholds
+        # Current multipliers for thresholds and batch size
         self._threshold_multiplier = 1.0
+        self._batch_multiplier = 1.0
+
+    @property
+    def adjustment_interval(self) -> float:
+        """Seconds between adjustments."""
+        return self._adjustment_interval
+
+    @property
+    def threshold_multiplier(self) -> float:
+        """Current threshold multiplier."""
+        return self._threshold_multiplier
 
     def record_throughput(self, flows_per_second: float) -> None:
         """Record throughput sample.
@@ -279,8 +751,14 @@ class AdaptiveBackpressure:
             flows_per_second: Current processing rate.
         """
         self._throughput_samples.append(flows_per_second)
-        if len(self._throughput_samples) > self._max_samples:
-            self._throughput_samples.pop(0)
+
+    def record_latency(self, seconds: float) -> None:
+        """Record batch write latency sample.
+
+        Args:
+            seconds: Time taken to write one batch.
+        """
+        self._latency_samples.append(seconds)
 
     @property
     def average_throughput(self) -> float:
@@ -289,12 +767,19 @@ class AdaptiveBackpressure:
             return 0.0
         return sum(self._throughput_samples) / len(self._throughput_samples)
 
+    @property
+    def average_latency(self) -> float:
+        """Get average batch write latency over recent samples."""
+        if not self._latency_samples:
+            return 0.0
+        return sum(self._latency_samples) / len(self._latency_samples)
+
     def get_adjusted_thresholds(
         self,
         base_sample_threshold: int,
         base_drop_threshold: int,
     ) -> tuple[int, int]:
-        """Get adjusted thresholds based on throughput.
+        """Get adjusted thresholds based on throughput and write latency.
 
         Args:
             base_sample_threshold: Base sample threshold.
@@ -311,12 +796,12 @@ class AdaptiveBackpressure:
         # Adjust multiplier based on how close we are to target
         ratio = avg / self._target_throughput
 
-        if ratio < 0.8:
+        if ratio > 1.2 or self.average_latency > self._target_latency:
+            # Over target, or storage is falling behind - be more aggressive
+            self._threshold_multiplier = max(0.5, self._threshold_multiplier * 0.95)
+        elif ratio < 0.8:
             # Under target - can be more lenient
             self._threshold_multiplier = min(1.5, self._threshold_multiplier * 1.05)
-        elif ratio > 1.2:
-            # Over target - need to be more aggressive
-            self._threshold_multiplier = max(0.5, self._threshold_multiplier * 0.95)
         else:
             # Close to target - stabilize
             self._threshold_multiplier = 1.0 + (self._threshold_multiplier - 1.0) * 0.9
@@ -325,3 +810,33 @@ class AdaptiveBackpressure:
             int(base_sample_threshold * self._threshold_multiplier),
             int(base_drop_threshold * self._threshold_multiplier),
         )
+
+    def get_adjusted_batch_size(self, base_batch_size: int, backlogged: bool) -> int:
+        """Get adjusted batch size based on write latency.
+
+        Slow writes shrink batches multiplicatively; a backlog with fast
+        writes grows them additively, so fewer round trips carry the
+        same flows. Otherwise the batch size drifts back to the base.
+
+        Args:
+            base_batch_size: Configured batch size.
+            backlogged: Whether items are queued beyond one batch.
+
+        Returns:
+            Adjusted batch size.
+        """
+        latency = self.average_latency
+
+        if latency > self._target_latency:
+            self._batch_multiplier *= 0.8
+        elif backlogged:
+            self._batch_multiplier += 0.1
+        else:
+            self._batch_multiplier = 1.0 + (self._batch_multiplier - 1.0) * 0.9
+
+        # Keep the multiplier within the range the bounds allow
+        self._batch_multiplier = min(
+            max(self._batch_multiplier, self._min_batch_size / base_batch_size),
+            self._max_batch_size / base_batch_size,
+        )
+        return int(base_batch_size * self._batch_multiplier)
@@ -0,0 +1 @@
+"""Ingestion benchmarks - synthetic and captured flow traffic replay."""
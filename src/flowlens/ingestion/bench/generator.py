@@ -0,0 +1,310 @@
+"""Synthetic flow datagram streams.
+
+Generates NetFlow v5, NetFlow v9, IPFIX and sFlow v5 datagrams for load
+testing. Each simulated exporter keeps its own sequence numbers and, for
+the template-based protocols, its own template state: templates are
+re-sent every template_interval data packets, as exporters refresh them,
+and with template_churn set every exporter moves to a new template ID
+after that many data packets, exercising template parsing, decoder
+compilation and cache eviction.
+"""
+
+import random
+import struct
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from ipaddress import IPv4Address
+
+# Protocol names, matching the collector's parser keys
+PROTOCOLS = ("netflow_v5", "netflow_v9", "ipfix", "sflow")
+
+# Listener each protocol is sent to
+LISTENERS = {
+    "netflow_v5": "netflow",
+    "netflow_v9": "netflow",
+    "ipfix": "netflow",
+    "sflow": "sflow",
+}
+
+# Records per datagram that fit a 1500-byte MTU
+DEFAULT_RECORDS_PER_PACKET = {
+    "netflow_v5": 30,
+    "netflow_v9": 29,
+    "ipfix": 29,
+    "sflow": 7,
+}
+
+FIRST_TEMPLATE_ID = 256
+
+_V5_HEADER = struct.Struct("!HHIIIIBBH")
+_V5_RECORD = struct.Struct("!IIIHHIIIIHHBBBBHHBBH")
+_V9_HEADER = struct.Struct("!HHIIII")
+_IPFIX_HEADER = struct.Struct("!HHIII")
+_SET_HEADER = struct.Struct("!HH")
+_SFLOW_HEADER = struct.Struct("!II4sIIII")
+_SFLOW_FLOW_SAMPLE = struct.Struct("!8I")
+_SFLOW_RAW_PACKET = struct.Struct("!IIII")
+_IPV4_HEADER = struct.Struct("!BBHHHBBHII")
+_TCP_HEADER = struct.Struct("!HHIIBBHHH")
+
+# (NetFlow v9 field type / IPFIX element ID, length); IPFIX uses
+# flowStart/EndSysUpTime (IEs 22/21), so one field list serves both
+TEMPLATE_FIELDS = (
+    (8, 4),    # source IPv4 address
+    (12, 4),   # destination IPv4 address
+    (7, 2),    # source port
+    (11, 2),   # destination port
+    (4, 1),    # protocol
+    (6, 1),    # TCP flags
+    (5, 1),    # TOS
+    (10, 4),   # input interface
+    (14, 4),   # output interface
+    (1, 8),    # bytes
+    (2, 8),    # packets
+    (22, 4),   # first switched (sysUptime ms)
+    (21, 4),   # last switched (sysUptime ms)
+)
+_TEMPLATE_RECORD = struct.Struct("!IIHHBBBIIQQII")
+
+# Sampled Ethernet/IPv4/TCP header length in sFlow raw packet records
+SFLOW_HEADER_BYTES = 128
+SFLOW_SAMPLING_RATE = 512
+
+_SRC_NET = int(IPv4Address("10.0.0.0"))
+_DST_NET = int(IPv4Address("10.128.0.0"))
+_SERVICE_PORTS = (443, 80, 53, 22, 5432, 8080, 3306, 123)
+
+
+@dataclass(slots=True)
+class _Flow:
+    """One synthetic flow."""
+
+    src_ip: int
+    dst_ip: int
+    src_port: int
+    dst_port: int
+    protocol: int
+    tcp_flags: int
+    packets: int
+    bytes: int
+
+
+@dataclass
+class _ExporterState:
+    """Per-exporter sequence and template state."""
+
+    sequence: int = 0
+    data_packets: int = 0
+    template_id: int = FIRST_TEMPLATE_ID
+    template_sent: bool = False
+    flows: list[_Flow] = field(default_factory=list)
+
+
+class StreamGenerator:
+    """Endless stream of synthetic datagrams for one protocol.
+
+    Datagrams rotate round-robin across exporters. Flows are drawn from
+    a fixed per-exporter pool so downstream aggregation sees realistic
+    repetition of 5-tuples.
+    """
+
+    def __init__(
+        self,
+        protocol: str,
+        exporters: int = 1,
+        records_per_packet: int | None = None,
+        template_interval: int = 20,
+        template_churn: int = 0,
+        flows_per_exporter: int = 1000,
+        seed: int = 0,
+    ) -> None:
+        """Initialize generator.
+
+        Args:
+            protocol: One of PROTOCOLS.
+            exporters: Number of simulated exporters.
+            records_per_packet: Flow records per datagram. Defaults to
+                what fits a 1500-byte MTU.
+            template_interval: Re-send the template every N data packets
+                per exporter (NetFlow v9 / IPFIX only).
+            template_churn: Move each exporter to a new template ID every N
+                data packets; 0 keeps one template ID.
+            flows_per_exporter: Size of each exporter's flow pool.
+            seed: Random seed, for reproducible streams.
+
+        Raises:
+            ValueError: If the protocol is unknown or a count is out of range.
+        """
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"unknown protocol {protocol!r}, expected one of {PROTOCOLS}")
+        if exporters < 1:
+            raise ValueError("exporters must be at least 1")
+
+        self.protocol = protocol
+        self.exporters = exporters
+        self.records_per_packet = records_per_packet or DEFAULT_RECORDS_PER_PACKET[protocol]
+        if protocol == "netflow_v5" and not 1 <= self.records_per_packet <= 30:
+            raise ValueError("netflow_v5 carries 1-30 records per packet")
+
+        self.template_interval = max(1, template_interval)
+        self.template_churn = template_churn
+
+        rng = random.Random(seed)
+        self._rng = rng
+        self._states = [
+            _ExporterState(flows=[_random_flow(rng) for _ in range(flows_per_exporter)])
+            for _ in range(exporters)
+        ]
+        self._boot_time = time.time()
+
+    @property
+    def listener(self) -> str:
+        """Collector listener this stream is sent to ("netflow" or "sflow")."""
+        return LISTENERS[self.protocol]
+
+    def datagrams(self) -> Iterator[tuple[int, bytes]]:
+        """Yield (exporter index, datagram) forever.
+
+        Template datagrams are yielded ahead of the data datagram that
+        needs them.
+        """
+        build = {
+            "netflow_v5": self._netflow_v5,
+            "netflow_v9": self._netflow_v9,
+            "ipfix": self._ipfix,
+            "sflow": self._sflow,
+        }[self.protocol]
+
+        while True:
+            for exporter, state in enumerate(self._states):
+                yield from build(exporter, state)
+
+    def _take_flows(self, state: _ExporterState) -> list[_Flow]:
+        """Pick this packet's flows from the exporter's pool."""
+        return self._rng.choices(state.flows, k=self.records_per_packet)
+
+    def _uptime_ms(self) -> int:
+        """Milliseconds since the simulated exporters booted."""
+        return int((time.time() - self._boot_time) * 1000) + 3_600_000
+
+    def _needs_template(self, state: _ExporterState) -> bool:
+        """Advance template state; True if a template must precede the next packet."""
+        if self.template_churn and state.data_packets and (
+            state.data_packets % self.template_churn == 0
+        ):
+            state.template_id += 1
+            if state.template_id > 0xFFFF:
+                state.template_id = FIRST_TEMPLATE_ID
+            state.template_sent = False
+
+        if not state.template_sent or state.data_packets % self.template_interval == 0:
+            state.template_sent = True
+            return True
+        return False
+
+    def _netflow_v5(self, exporter: int, state: _ExporterState) -> Iterator[tuple[int, bytes]]:
+        flows = self._take_flows(state)
+        uptime = self._uptime_ms()
+        now = time.time()
+        header = _V5_HEADER.pack(
+            5, len(flows), uptime, int(now), int((now % 1) * 1e9), state.sequence, 0, 0, 0,
+        )
+        records = b"".join(
+            _V5_RECORD.pack(
+                f.src_ip, f.dst_ip, 0, 1, 2, f.packets, f.bytes, uptime - 5_000, uptime,
+                f.src_port, f.dst_port, 0, f.tcp_flags, f.protocol, 0, 0, 0, 24, 24, 0,
+            )
+            for f in flows
+        )
+        state.sequence += len(flows)
+        state.data_packets += 1
+        yield exporter, header + records
+
+    def _template_records(self, flows: list[_Flow]) -> bytes:
+        uptime = self._uptime_ms()
+        return b"".join(
+            _TEMPLATE_RECORD.pack(
+                f.src_ip, f.dst_ip, f.src_port, f.dst_port, f.protocol, f.tcp_flags, 0,
+                1, 2, f.bytes, f.packets, uptime - 5_000, uptime,
+            )
+            for f in flows
+        )
+
+    def _template_body(self, template_id: int) -> bytes:
+        return _SET_HEADER.pack(template_id, len(TEMPLATE_FIELDS)) + b"".join(
+            _SET_HEADER.pack(field_type, length) for field_type, length in TEMPLATE_FIELDS
+        )
+
+    def _netflow_v9(self, exporter: int, state: _ExporterState) -> Iterator[tuple[int, bytes]]:
+        if self._needs_template(state):
+            body = self._template_body(state.template_id)
+            flowset = _SET_HEADER.pack(0, len(body) + 4) + body
+            yield exporter, self._v9_packet(state, flowset)
+
+        records = self._template_records(self._take_flows(state))
+        flowset = _SET_HEADER.pack(state.template_id, len(records) + 4) + records
+        state.data_packets += 1
+        yield exporter, self._v9_packet(state, flowset)
+
+    def _v9_packet(self, state: _ExporterState, flowset: bytes) -> bytes:
+        header = _V9_HEADER.pack(9, 1, self._uptime_ms(), int(time.time()), state.sequence, 0)
+        state.sequence += 1
+        return header + flowset
+
+    def _ipfix(self, exporter: int, state: _ExporterState) -> Iterator[tuple[int, bytes]]:
+        if self._needs_template(state):
+            body = self._template_body(state.template_id)
+            yield exporter, self._ipfix_message(state, _SET_HEADER.pack(2, len(body) + 4) + body, 0)
+
+        flows = self._take_flows(state)
+        records = self._template_records(flows)
+        data_set = _SET_HEADER.pack(state.template_id, len(records) + 4) + records
+        state.data_packets += 1
+        yield exporter, self._ipfix_message(state, data_set, len(flows))
+
+    def _ipfix_message(self, state: _ExporterState, body: bytes, records: int) -> bytes:
+        header = _IPFIX_HEADER.pack(10, 16 + len(body), int(time.time()), state.sequence, 0)
+        state.sequence += records
+        return header + body
+
+    def _sflow(self, exporter: int, state: _ExporterState) -> Iterator[tuple[int, bytes]]:
+        flows = self._take_flows(state)
+        samples = []
+        for f in flows:
+            ip = _IPV4_HEADER.pack(0x45, 0, 1500, 0, 0, 64, f.protocol, 0, f.src_ip, f.dst_ip)
+            tcp = _TCP_HEADER.pack(f.src_port, f.dst_port, 0, 0, 0x50, f.tcp_flags, 0, 0, 0)
+            frame = bytes(12) + b"\x08\x00" + ip + tcp
+            frame += bytes(SFLOW_HEADER_BYTES - len(frame))
+
+            raw = _SFLOW_RAW_PACKET.pack(1, 1514, 4, len(frame)) + frame
+            record = struct.pack("!II", 1, len(raw)) + raw
+            state.sequence += 1
+            body = _SFLOW_FLOW_SAMPLE.pack(
+                state.sequence, 1, SFLOW_SAMPLING_RATE, state.sequence * SFLOW_SAMPLING_RATE,
+                0, 1, 2, 1,
+            ) + record
+            samples.append(struct.pack("!II", 1, len(body)) + body)
+
+        agent = IPv4Address(int(IPv4Address("192.0.2.0")) + exporter % 256).packed
+        header = _SFLOW_HEADER.pack(
+            5, 1, agent, 0, state.data_packets, self._uptime_ms(), len(samples),
+        )
+        state.data_packets += 1
+        yield exporter, header + b"".join(samples)
+
+
+def _random_flow(rng: random.Random) -> _Flow:
+    """Draw one flow, mostly TCP to a handful of service ports."""
+    protocol = 6 if rng.random() < 0.8 else 17
+    packets = rng.randint(1, 200)
+    return _Flow(
+        src_ip=_SRC_NET + rng.getrandbits(16),
+        dst_ip=_DST_NET + rng.getrandbits(12),
+        src_port=rng.randint(1024, 65535),
+        dst_port=rng.choice(_SERVICE_PORTS),
+        protocol=protocol,
+        tcp_flags=0x1B if protocol == 6 else 0,
+        packets=packets,
+        bytes=packets * rng.randint(64, 1500),
+    )
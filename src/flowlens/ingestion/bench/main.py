@@ -0,0 +1,194 @@
+"""Ingestion benchmark entry point (flowlens-bench).
+
+Two modes, both driving an in-process FlowCollector on loopback:
+
+    flowlens-bench generate --protocol netflow_v9 --rate 20000 --duration 30
+    flowlens-bench replay capture.pcap --speed 1
+
+generate sends synthetic NetFlow v5/v9, IPFIX or sFlow datagrams at a
+fixed rate with configurable template churn; replay sends the UDP
+datagrams of pcap/pcapng captures, optionally at their captured pace.
+Flows go to a MemoryRouter by default, or to the configured PostgreSQL
+database with --router postgres (use a scratch database: the flows are
+written like any others).
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import NoReturn
+
+from flowlens.common.config import LoggingSettings, get_settings
+from flowlens.common.logging import get_logger, setup_logging
+from flowlens.ingestion.bench.generator import PROTOCOLS
+from flowlens.ingestion.bench.runner import BenchResult, free_udp_port, run_bench
+from flowlens.ingestion.bench.sender import CaptureSource, SyntheticSource
+from flowlens.ingestion.router import FlowRouter, MemoryRouter, PostgreSQLRouter
+
+logger = get_logger(__name__)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser."""
+    parser = argparse.ArgumentParser(
+        prog="flowlens-bench",
+        description="Benchmark flow ingestion with synthetic or captured traffic",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Send synthetic datagram streams")
+    generate.add_argument("--protocol", choices=PROTOCOLS, default="netflow_v9")
+    generate.add_argument("--exporters", type=int, default=4, help="Simulated exporters")
+    generate.add_argument(
+        "--records-per-packet", type=int, default=None,
+        help="Flow records per datagram (default: fill a 1500-byte MTU)",
+    )
+    generate.add_argument(
+        "--template-interval", type=int, default=20,
+        help="Re-send templates every N data packets per exporter",
+    )
+    generate.add_argument(
+        "--template-churn", type=int, default=0,
+        help="Switch each exporter to a new template ID every N data packets (0: never)",
+    )
+    generate.add_argument("--rate", type=float, default=10000, help="Datagrams/sec (0: unpaced)")
+    generate.add_argument("--duration", type=float, default=10.0, help="Seconds to send for")
+    generate.add_argument("--count", type=int, default=None, help="Datagrams to send")
+    generate.add_argument("--seed", type=int, default=0)
+
+    replay = commands.add_parser("replay", help="Replay UDP datagrams from pcap/pcapng files")
+    replay.add_argument("captures", nargs="+", type=Path)
+    replay.add_argument(
+        "--speed", type=float, default=0.0,
+        help="Replay speed relative to capture timestamps (1: real time, 0: unpaced)",
+    )
+    replay.add_argument("--rate", type=float, default=0.0, help="Datagrams/sec, overrides --speed")
+    replay.add_argument("--loops", type=int, default=1, help="Times to replay the captures")
+    replay.add_argument("--duration", type=float, default=None, help="Stop after N seconds")
+    replay.add_argument("--count", type=int, default=None, help="Stop after N datagrams")
+
+    for command in (generate, replay):
+        command.add_argument("--router", choices=("memory", "postgres"), default="memory")
+        command.add_argument(
+            "--receive-mode", choices=("protocol", "batch"), default=None,
+            help="Collector receive mode (default: INGESTION_RECEIVE_MODE)",
+        )
+        command.add_argument("--batch-size", type=int, default=None, help="Collector batch size")
+        command.add_argument(
+            "--parse-workers", type=int, default=None,
+            help="Parse worker processes (default: INGESTION_PARSE_WORKERS)",
+        )
+        command.add_argument(
+            "--drain-timeout", type=float, default=30.0,
+            help="Seconds to wait for the collector to catch up after sending",
+        )
+        command.add_argument("--json", action="store_true", help="Print the result as JSON")
+        command.add_argument(
+            "--log-level", default="WARNING",
+            choices=("DEBUG", "INFO", "WARNING", "ERROR"),
+        )
+
+    return parser
+
+
+async def main(args: argparse.Namespace) -> BenchResult:
+    """Run one benchmark.
+
+    Args:
+        args: Parsed command line.
+
+    Returns:
+        Benchmark result.
+    """
+    settings = get_settings()
+    setup_logging(LoggingSettings(level=args.log_level, format="console"))
+
+    # Loopback listeners on free ports, so a local collector is not disturbed
+    overrides: dict[str, object] = {
+        "bind_address": "127.0.0.1",
+        "netflow_port": free_udp_port("127.0.0.1"),
+        "sflow_port": free_udp_port("127.0.0.1"),
+        "worker_processes": 1,
+        "template_snapshot_path": None,
+        "spool_path": None,
+    }
+    if args.receive_mode is not None:
+        overrides["receive_mode"] = args.receive_mode
+    if args.batch_size is not None:
+        overrides["batch_size"] = args.batch_size
+    if args.parse_workers is not None:
+        overrides["parse_workers"] = args.parse_workers
+    ingestion = settings.ingestion.model_validate(
+        {**settings.ingestion.model_dump(), **overrides}
+    )
+
+    source: SyntheticSource | CaptureSource
+    if args.command == "generate":
+        source = SyntheticSource(
+            protocol=args.protocol,
+            exporters=args.exporters,
+            records_per_packet=args.records_per_packet,
+            template_interval=args.template_interval,
+            template_churn=args.template_churn,
+            seed=args.seed,
+        )
+        speed = 0.0
+    else:
+        missing = [str(path) for path in args.captures if not path.is_file()]
+        if missing:
+            raise FileNotFoundError(f"capture not found: {', '.join(missing)}")
+        source = CaptureSource(paths=tuple(args.captures), loops=args.loops)
+        speed = args.speed
+
+    router: FlowRouter
+    if args.router == "postgres":
+        from flowlens.common.database import close_database, init_database
+
+        await init_database(settings)
+        router = PostgreSQLRouter(
+            batch_size=ingestion.batch_size,
+            writers=ingestion.write_workers,
+            max_in_flight=ingestion.write_max_in_flight,
+        )
+    else:
+        router = MemoryRouter()
+
+    try:
+        return await run_bench(
+            source,
+            ingestion,
+            router,
+            rate=args.rate,
+            speed=speed,
+            duration=args.duration,
+            count=args.count,
+            drain_timeout=args.drain_timeout,
+        )
+    finally:
+        if args.router == "postgres":
+            await close_database()
+
+
+def run() -> NoReturn:
+    """Run the benchmark command."""
+    args = build_parser().parse_args()
+
+    try:
+        result = asyncio.run(main(args))
+    except KeyboardInterrupt:
+        sys.exit(130)
+    except Exception as e:
+        logger.error("Benchmark failed", error=str(e))
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(result.as_dict(), indent=2))
+    else:
+        print(result.format())
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,255 @@
+"""Read flow export datagrams out of packet captures.
+
+Supports classic libpcap files (either byte order, micro- or nanosecond
+timestamps) and pcapng, over Ethernet (with 802.1Q tags), Linux cooked
+(SLL), BSD loopback and raw IP link types. Only unfragmented UDP over
+IPv4 or IPv6 is extracted; everything else is skipped.
+"""
+
+import struct
+from collections.abc import Iterator
+from dataclasses import dataclass
+from ipaddress import IPv4Address, IPv6Address
+from pathlib import Path
+from typing import BinaryIO
+
+# Link-layer header types (tcpdump.org/linktypes.html)
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+
+_PCAP_MAGIC_US = 0xA1B2C3D4
+_PCAP_MAGIC_NS = 0xA1B23C4D
+_PCAPNG_SECTION_HEADER = 0x0A0D0D0A
+_PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+_PCAPNG_INTERFACE_DESCRIPTION = 1
+_PCAPNG_ENHANCED_PACKET = 6
+_PCAPNG_OPTION_TSRESOL = 9
+
+_ETHERTYPE_IPV4 = 0x0800
+_ETHERTYPE_IPV6 = 0x86DD
+_ETHERTYPE_VLAN = (0x8100, 0x88A8)
+_IPPROTO_UDP = 17
+
+
+@dataclass(frozen=True, slots=True)
+class CapturedDatagram:
+    """A UDP payload taken from a capture."""
+
+    timestamp: float
+    src_ip: IPv4Address | IPv6Address
+    dst_port: int
+    payload: bytes
+
+
+def read_capture(path: Path) -> Iterator[CapturedDatagram]:
+    """Yield the UDP datagrams in a pcap or pcapng file.
+
+    Args:
+        path: Capture file.
+
+    Yields:
+        Captured datagrams in file order.
+
+    Raises:
+        ValueError: If the file is not a pcap or pcapng capture.
+    """
+    with path.open("rb") as f:
+        magic = f.read(4)
+        f.seek(0)
+        if len(magic) < 4:
+            raise ValueError(f"{path}: not a packet capture")
+
+        if struct.unpack("<I", magic)[0] == _PCAPNG_SECTION_HEADER:
+            yield from _read_pcapng(f, path)
+        else:
+            yield from _read_pcap(f, path)
+
+
+def _read_pcap(f: BinaryIO, path: Path) -> Iterator[CapturedDatagram]:
+    """Read a classic libpcap file."""
+    header = f.read(24)
+    if len(header) < 24:
+        raise ValueError(f"{path}: truncated pcap header")
+
+    for endian in ("<", ">"):
+        magic = struct.unpack(f"{endian}I", header[:4])[0]
+        if magic in (_PCAP_MAGIC_US, _PCAP_MAGIC_NS):
+            break
+    else:
+        raise ValueError(f"{path}: not a packet capture")
+
+    divisor = 1e9 if magic == _PCAP_MAGIC_NS else 1e6
+    linktype = struct.unpack(f"{endian}I", header[20:24])[0] & 0x0FFFFFFF
+    record_header = struct.Struct(f"{endian}IIII")
+
+    while True:
+        raw = f.read(record_header.size)
+        if len(raw) < record_header.size:
+            return
+
+        seconds, fraction, captured, _ = record_header.unpack(raw)
+        frame = f.read(captured)
+        if len(frame) < captured:
+            return
+
+        datagram = _decode_frame(frame, linktype, seconds + fraction / divisor)
+        if datagram is not None:
+            yield datagram
+
+
+def _read_pcapng(f: BinaryIO, path: Path) -> Iterator[CapturedDatagram]:
+    """Read a pcapng file, section by section."""
+    endian = "<"
+    # (linktype, seconds per timestamp unit) per interface in this section
+    interfaces: list[tuple[int, float]] = []
+
+    while True:
+        head = f.read(8)
+        if len(head) < 8:
+            return
+
+        block_type = struct.unpack(f"{endian}I", head[:4])[0]
+        if block_type == _PCAPNG_SECTION_HEADER:
+            # Byte order is only known once the section header is read
+            byte_order = f.read(4)
+            if struct.unpack("<I", byte_order)[0] == _PCAPNG_BYTE_ORDER_MAGIC:
+                endian = "<"
+            elif struct.unpack(">I", byte_order)[0] == _PCAPNG_BYTE_ORDER_MAGIC:
+                endian = ">"
+            else:
+                raise ValueError(f"{path}: bad pcapng byte-order magic")
+            length = struct.unpack(f"{endian}I", head[4:8])[0]
+            f.seek(length - 12, 1)
+            interfaces = []
+            continue
+
+        length = struct.unpack(f"{endian}I", head[4:8])[0]
+        if length < 12:
+            raise ValueError(f"{path}: bad pcapng block length {length}")
+        body = f.read(length - 8)
+        if len(body) < length - 8:
+            return
+        body = body[:-4]  # trailing block length
+
+        if block_type == _PCAPNG_INTERFACE_DESCRIPTION:
+            linktype = struct.unpack(f"{endian}H", body[:2])[0]
+            interfaces.append((linktype, _pcapng_resolution(body[8:], endian)))
+
+        elif block_type == _PCAPNG_ENHANCED_PACKET:
+            interface, ts_high, ts_low, captured = struct.unpack(f"{endian}IIII", body[:16])
+            if interface >= len(interfaces):
+                continue
+            linktype, resolution = interfaces[interface]
+            timestamp = ((ts_high << 32) | ts_low) * resolution
+            datagram = _decode_frame(body[20:20 + captured], linktype, timestamp)
+            if datagram is not None:
+                yield datagram
+
+
+def _pcapng_resolution(options: bytes, endian: str) -> float:
+    """Seconds per timestamp unit from an interface's if_tsresol option."""
+    offset = 0
+    while offset + 4 <= len(options):
+        code, length = struct.unpack_from(f"{endian}HH", options, offset)
+        if code == 0:
+            break
+        if code == _PCAPNG_OPTION_TSRESOL and length >= 1:
+            value = options[offset + 4]
+            if value & 0x80:
+                return 2.0 ** -(value & 0x7F)
+            return 10.0 ** -value
+        offset += 4 + length + (-length % 4)
+    return 1e-6
+
+
+def _decode_frame(frame: bytes, linktype: int, timestamp: float) -> CapturedDatagram | None:
+    """Strip link, IP and UDP headers from a captured frame."""
+    if linktype == LINKTYPE_ETHERNET:
+        if len(frame) < 14:
+            return None
+        ether_type = struct.unpack_from("!H", frame, 12)[0]
+        offset = 14
+        while ether_type in _ETHERTYPE_VLAN and len(frame) >= offset + 4:
+            ether_type = struct.unpack_from("!H", frame, offset + 2)[0]
+            offset += 4
+    elif linktype == LINKTYPE_LINUX_SLL:
+        if len(frame) < 16:
+            return None
+        ether_type = struct.unpack_from("!H", frame, 14)[0]
+        offset = 16
+    elif linktype == LINKTYPE_NULL:
+        if len(frame) < 4:
+            return None
+        # Address family in host byte order of the capturing machine
+        family = struct.unpack_from("<I", frame)[0]
+        if family > 0xFF:
+            family = struct.unpack_from(">I", frame)[0]
+        ether_type = _ETHERTYPE_IPV4 if family == 2 else _ETHERTYPE_IPV6
+        offset = 4
+    elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        if not frame:
+            return None
+        ether_type = _ETHERTYPE_IPV4 if frame[0] >> 4 == 4 else _ETHERTYPE_IPV6
+        offset = 0
+    else:
+        return None
+
+    if ether_type == _ETHERTYPE_IPV4:
+        return _decode_ipv4(frame, offset, timestamp)
+    if ether_type == _ETHERTYPE_IPV6:
+        return _decode_ipv6(frame, offset, timestamp)
+    return None
+
+
+def _decode_ipv4(frame: bytes, offset: int, timestamp: float) -> CapturedDatagram | None:
+    """Extract the UDP payload of an IPv4 packet."""
+    if len(frame) < offset + 20:
+        return None
+
+    ihl = (frame[offset] & 0x0F) * 4
+    total_length, fragment = struct.unpack_from("!H2xH", frame, offset + 2)
+    # Skip fragments: only the first carries the UDP header
+    if frame[offset + 9] != _IPPROTO_UDP or fragment & 0x3FFF:
+        return None
+
+    src_ip = IPv4Address(frame[offset + 12:offset + 16])
+    end = min(offset + total_length, len(frame))
+    return _decode_udp(frame, offset + ihl, end, src_ip, timestamp)
+
+
+def _decode_ipv6(frame: bytes, offset: int, timestamp: float) -> CapturedDatagram | None:
+    """Extract the UDP payload of an IPv6 packet without extension headers."""
+    if len(frame) < offset + 40 or frame[offset + 6] != _IPPROTO_UDP:
+        return None
+
+    payload_length = struct.unpack_from("!H", frame, offset + 4)[0]
+    src_ip = IPv6Address(frame[offset + 8:offset + 24])
+    end = min(offset + 40 + payload_length, len(frame))
+    return _decode_udp(frame, offset + 40, end, src_ip, timestamp)
+
+
+def _decode_udp(
+    frame: bytes,
+    offset: int,
+    end: int,
+    src_ip: IPv4Address | IPv6Address,
+    timestamp: float,
+) -> CapturedDatagram | None:
+    """Extract a UDP payload, dropping datagrams cut short by the snap length."""
+    if end < offset + 8:
+        return None
+
+    dst_port, length = struct.unpack_from("!2xHH", frame, offset)
+    if length < 8 or offset + length > end:
+        return None
+
+    return CapturedDatagram(
+        timestamp=timestamp,
+        src_ip=src_ip,
+        dst_port=dst_port,
+        payload=frame[offset + 8:offset + length],
+    )
@@ -0,0 +1,403 @@
+"""Run a FlowCollector under benchmark load.
+
+Starts an instrumented collector on loopback, drives it from a sender
+process, waits for the queue to drain and reports throughput, loss and
+per-stage latency percentiles.
+"""
+
+import asyncio
+import multiprocessing
+import random
+import socket
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from flowlens.common.config import IngestionSettings
+from flowlens.common.logging import get_logger
+from flowlens.ingestion.bench.sender import CaptureSource, SyntheticSource, send_datagrams
+from flowlens.ingestion.parsers.base import FlowRecord
+from flowlens.ingestion.parsers.batch import FlowBatch
+from flowlens.ingestion.parsing import Packet
+from flowlens.ingestion.router import FlowRouter
+from flowlens.ingestion.server import FlowCollector
+
+logger = get_logger(__name__)
+
+# Percentiles reported for each stage
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class LatencyRecorder:
+    """Reservoir of latency samples for one stage.
+
+    Keeps a uniform random sample of at most max_samples durations, so
+    percentiles stay cheap to compute on long runs.
+    """
+
+    def __init__(self, max_samples: int = 100_000) -> None:
+        """Initialize recorder.
+
+        Args:
+            max_samples: Reservoir size.
+        """
+        self._max_samples = max_samples
+        self._samples: list[float] = []
+        self._rng = random.Random(0)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Record one duration."""
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+        if len(self._samples) < self._max_samples:
+            self._samples.append(seconds)
+        else:
+            slot = self._rng.randrange(self.count)
+            if slot < self._max_samples:
+                self._samples[slot] = seconds
+
+    def percentiles(self, percentiles: tuple[float, ...] = PERCENTILES) -> dict[float, float]:
+        """Nearest-rank percentiles of the recorded durations, in seconds."""
+        if not self._samples:
+            return dict.fromkeys(percentiles, 0.0)
+
+        ordered = sorted(self._samples)
+        last = len(ordered) - 1
+        return {p: ordered[min(last, int(p / 100 * len(ordered)))] for p in percentiles}
+
+    def summary(self) -> dict[str, float]:
+        """Count, mean, max and percentiles in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": (self.total / self.count) * 1000 if self.count else 0.0,
+            **{f"p{p:g}_ms": value * 1000 for p, value in self.percentiles().items()},
+            "max_ms": self.max * 1000,
+        }
+
+
+class TimingRouter(FlowRouter):
+    """Wraps a router and times every batch handed to it."""
+
+    def __init__(self, router: FlowRouter) -> None:
+        """Initialize timing wrapper.
+
+        Args:
+            router: Router that stores the flows.
+        """
+        self._router = router
+        self.route_latency = LatencyRecorder()
+        self.write_latency = LatencyRecorder()
+        self.flows_routed = 0
+        self._write_latencies: list[float] = []
+
+    async def route(self, records: list[FlowRecord]) -> int:
+        """Route records through the wrapped router."""
+        return await self.route_batch(FlowBatch.from_records(records))
+
+    async def route_batch(self, batch: FlowBatch) -> int:
+        """Route a batch through the wrapped router and time it."""
+        start = time.perf_counter()
+        stored = await self._router.route_batch(batch)
+        self.route_latency.record(time.perf_counter() - start)
+        self.flows_routed += len(batch)
+        self._collect_write_latencies()
+        return stored
+
+    def set_batch_size(self, batch_size: int) -> None:
+        """Forward batch size changes."""
+        self._router.set_batch_size(batch_size)
+
+    def take_write_latencies(self) -> list[float]:
+        """Hand on write latencies, keeping a copy for the report."""
+        self._collect_write_latencies()
+        latencies, self._write_latencies = self._write_latencies, []
+        return latencies
+
+    async def flush(self) -> None:
+        """Flush the wrapped router."""
+        await self._router.flush()
+        self._collect_write_latencies()
+
+    async def close(self) -> None:
+        """Close the wrapped router."""
+        await self._router.close()
+
+    def _collect_write_latencies(self) -> None:
+        """Move the wrapped router's write latencies into the recorder."""
+        for latency in self._router.take_write_latencies():
+            self.write_latency.record(latency)
+            self._write_latencies.append(latency)
+        # Nobody takes them when adaptive backpressure is off
+        del self._write_latencies[:-100]
+
+
+class BenchCollector(FlowCollector):
+    """FlowCollector that times packet parsing.
+
+    Parse latency is per packet, or per dequeued batch when packets are
+    parsed by a parse pool.
+    """
+
+    def __init__(self, settings: IngestionSettings, router: TimingRouter) -> None:
+        """Initialize instrumented collector.
+
+        Args:
+            settings: Ingestion settings.
+            router: Timing router wrapping the storage router.
+        """
+        super().__init__(settings, router=router)
+        self.parse_latency = LatencyRecorder()
+        self.flows_parsed = 0
+        self.parse_errors = 0
+
+    def _parse_packet(self, data: bytes, exporter_ip: str, protocol: str) -> FlowBatch:
+        """Parse a packet, recording its parse time and flow count."""
+        start = time.perf_counter()
+        try:
+            batch = super()._parse_packet(data, exporter_ip, protocol)
+        except Exception:
+            self.parse_errors += 1
+            raise
+        finally:
+            self.parse_latency.record(time.perf_counter() - start)
+        self.flows_parsed += len(batch)
+        return batch
+
+    async def _parse_packets(self, packets: list[tuple[Packet, int]]) -> FlowBatch:
+        """Parse a dequeued batch, timing the whole batch in pool mode."""
+        if self._parse_pool is None:
+            return await super()._parse_packets(packets)
+
+        start = time.perf_counter()
+        batch, _, errors = await self._parse_pool.parse(packets)
+        self.parse_latency.record(time.perf_counter() - start)
+        self.flows_parsed += len(batch)
+        self.parse_errors += sum(errors.values())
+        return batch
+
+
+@dataclass
+class BenchResult:
+    """Outcome of a benchmark run."""
+
+    sent: int
+    send_seconds: float
+    send_errors: int
+    exporters: int
+    received: int
+    sampled: int
+    dropped: int
+    parse_errors: int
+    flows_parsed: int
+    flows_routed: int
+    elapsed_seconds: float
+    drain_seconds: float
+    stages: dict[str, LatencyRecorder] = field(default_factory=dict)
+
+    @property
+    def send_rate(self) -> float:
+        """Datagrams/sec offered by the sender."""
+        return self.sent / self.send_seconds if self.send_seconds else 0.0
+
+    @property
+    def packets_per_second(self) -> float:
+        """Datagrams/sec parsed by the collector.
+
+        Datagrams skipped while sampling are not counted; the parsed ones
+        stand in for them through their scaled sampling rate.
+        """
+        parsed = self.received - self.sampled - self.dropped
+        return parsed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def flows_per_second(self) -> float:
+        """Flows/sec handed to the router."""
+        return self.flows_routed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def socket_lost(self) -> int:
+        """Datagrams sent that never reached the queue (kernel buffer overruns)."""
+        return max(0, self.sent - self.received)
+
+    @property
+    def drop_rate(self) -> float:
+        """Fraction of sent datagrams lost in the socket or dropped by backpressure.
+
+        Sampled-out datagrams are reported separately, not as drops.
+        """
+        if not self.sent:
+            return 0.0
+        return (self.socket_lost + self.dropped) / self.sent
+
+    def as_dict(self) -> dict[str, Any]:
+        """Result as JSON-serializable dictionary."""
+        return {
+            "sent": self.sent,
+            "send_seconds": self.send_seconds,
+            "send_rate": self.send_rate,
+            "send_errors": self.send_errors,
+            "exporters": self.exporters,
+            "received": self.received,
+            "sampled": self.sampled,
+            "dropped": self.dropped,
+            "socket_lost": self.socket_lost,
+            "drop_rate": self.drop_rate,
+            "parse_errors": self.parse_errors,
+            "flows_parsed": self.flows_parsed,
+            "flows_routed": self.flows_routed,
+            "elapsed_seconds": self.elapsed_seconds,
+            "drain_seconds": self.drain_seconds,
+            "packets_per_second": self.packets_per_second,
+            "flows_per_second": self.flows_per_second,
+            "stages": {name: stage.summary() for name, stage in self.stages.items()},
+        }
+
+    def format(self) -> str:
+        """Human-readable report."""
+        lines = [
+            f"sent          {self.sent:>12,} datagrams in {self.send_seconds:.2f}s "
+            f"({self.send_rate:,.0f}/s, {self.exporters} exporters, {self.send_errors} send errors)",
+            f"received      {self.received:>12,} "
+            f"(socket lost {self.socket_lost:,}, sampled {self.sampled:,}, dropped {self.dropped:,})",
+            f"drop rate     {self.drop_rate:>12.2%}",
+            f"packets/s     {self.packets_per_second:>12,.0f}",
+            f"flows/s       {self.flows_per_second:>12,.0f} "
+            f"({self.flows_routed:,} flows, {self.parse_errors:,} parse errors)",
+            f"drain         {self.drain_seconds:>12.2f}s after the sender finished",
+            "",
+            f"{'stage':<8} {'count':>10} {'mean ms':>9}"
+            + "".join(f" {f'p{p:g} ms':>9}" for p in PERCENTILES)
+            + f" {'max ms':>9}",
+        ]
+        for name, stage in self.stages.items():
+            summary = stage.summary()
+            lines.append(
+                f"{name:<8} {stage.count:>10,} {summary['mean_ms']:>9.3f}"
+                + "".join(f" {summary[f'p{p:g}_ms']:>9.3f}" for p in PERCENTILES)
+                + f" {summary['max_ms']:>9.3f}"
+            )
+        return "\n".join(lines)
+
+
+def free_udp_port(host: str) -> int:
+    """Find a UDP port that is currently free on host."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+async def run_bench(
+    source: SyntheticSource | CaptureSource,
+    settings: IngestionSettings,
+    router: FlowRouter,
+    rate: float = 0.0,
+    speed: float = 0.0,
+    duration: float | None = None,
+    count: int | None = None,
+    drain_timeout: float = 30.0,
+) -> BenchResult:
+    """Drive a collector with a datagram source and measure it.
+
+    Args:
+        source: Datagrams to send.
+        settings: Ingestion settings for the collector; its bind address
+            and ports are where the sender aims.
+        router: Storage router under test.
+        rate: Sender packets/sec; 0 for unpaced.
+        speed: Capture replay speed; 0 for unpaced. Ignored when rate is set.
+        duration: Stop sending after this many seconds.
+        count: Stop sending after this many datagrams.
+        drain_timeout: Longest wait for the collector to catch up after
+            the sender finishes.
+
+    Returns:
+        Benchmark result.
+    """
+    timing_router = TimingRouter(router)
+    collector = BenchCollector(settings, timing_router)
+
+    host = str(settings.bind_address)
+    if host == "0.0.0.0":
+        host = "127.0.0.1"
+    ports = {"netflow": settings.netflow_port, "sflow": settings.sflow_port}
+
+    context = multiprocessing.get_context("spawn")
+    receiver, conn = context.Pipe(duplex=False)
+    process = context.Process(
+        target=send_datagrams,
+        args=(source, host, ports, rate, speed, duration, count, conn),
+        name="flowlens-bench-sender",
+    )
+
+    loop = asyncio.get_running_loop()
+    await collector.start()
+    try:
+        process.start()
+        conn.close()
+
+        await loop.run_in_executor(None, process.join)
+        sent_at = time.perf_counter()
+        if not receiver.poll():
+            raise RuntimeError(f"sender process failed with exit code {process.exitcode}")
+        totals = receiver.recv()
+
+        await _wait_for_drain(collector, settings, drain_timeout)
+        finished_at = time.perf_counter()
+    finally:
+        if process.is_alive():
+            process.terminate()
+        receiver.close()
+        stats = collector.stats
+        await collector.stop()
+
+    return BenchResult(
+        sent=totals["sent"],
+        send_seconds=totals["send_seconds"],
+        send_errors=totals["send_errors"],
+        exporters=totals["exporters"],
+        received=stats["total_received"],
+        sampled=stats["total_sampled"],
+        dropped=stats["total_dropped"],
+        parse_errors=collector.parse_errors,
+        flows_parsed=collector.flows_parsed,
+        flows_routed=timing_router.flows_routed,
+        # Sender start-up (spawning, imports) is not part of the run
+        elapsed_seconds=totals["send_seconds"] + (finished_at - sent_at),
+        drain_seconds=finished_at - sent_at,
+        stages={
+            "parse": collector.parse_latency,
+            "route": timing_router.route_latency,
+            "write": timing_router.write_latency,
+        },
+    )
+
+
+async def _wait_for_drain(
+    collector: BenchCollector,
+    settings: IngestionSettings,
+    timeout: float,
+) -> None:
+    """Wait until the queue is empty and no datagrams are still arriving."""
+    # Datagrams may sit in the socket buffer for a moment after sending
+    settle = settings.batch_timeout_ms / 1000
+    deadline = time.monotonic() + timeout
+    last_received = -1
+    idle_since = time.monotonic()
+
+    while time.monotonic() < deadline:
+        stats = collector.stats
+        now = time.monotonic()
+        if stats["queue_size"] or stats["total_received"] != last_received:
+            last_received = stats["total_received"]
+            idle_since = now
+        elif now - idle_since >= settle:
+            return
+        await asyncio.sleep(0.05)
+
+    logger.warning("Collector did not drain before the timeout", timeout=timeout)
@@ -0,0 +1,176 @@
+"""Datagram sender process for benchmarks.
+
+Runs in its own process so generating and sending load does not compete
+with the collector under test for the event loop or the GIL. Each source
+exporter gets its own socket bound to a distinct loopback address
+(127.1.x.y), so the collector sees one exporter per simulated or captured
+exporter and keeps their templates apart. Where only 127.0.0.1 can be
+bound, all exporters share it.
+"""
+
+import itertools
+import socket
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from ipaddress import IPv4Address
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any
+
+from flowlens.ingestion.bench.generator import StreamGenerator
+from flowlens.ingestion.bench.pcap import read_capture
+
+_EXPORTER_BASE = int(IPv4Address("127.1.0.0"))
+_MAX_EXPORTER_ADDRESSES = 0xFFFE
+
+# sFlow v5 datagrams start with a 32-bit version; NetFlow v5 with a
+# 16-bit version followed by a non-zero record count
+_SFLOW_V5_PREFIX = b"\x00\x00\x00\x05"
+
+
+@dataclass(frozen=True)
+class SyntheticSource:
+    """Generated datagram stream (see StreamGenerator)."""
+
+    protocol: str
+    exporters: int = 1
+    records_per_packet: int | None = None
+    template_interval: int = 20
+    template_churn: int = 0
+    seed: int = 0
+
+    def datagrams(self) -> Iterator[tuple[float | None, Any, str, bytes]]:
+        """Yield (capture offset, exporter key, listener, payload)."""
+        generator = StreamGenerator(
+            self.protocol,
+            exporters=self.exporters,
+            records_per_packet=self.records_per_packet,
+            template_interval=self.template_interval,
+            template_churn=self.template_churn,
+            seed=self.seed,
+        )
+        listener = generator.listener
+        for exporter, payload in generator.datagrams():
+            yield None, exporter, listener, payload
+
+
+@dataclass(frozen=True)
+class CaptureSource:
+    """Datagrams replayed from pcap/pcapng files."""
+
+    paths: tuple[Path, ...]
+    loops: int = 1
+
+    def datagrams(self) -> Iterator[tuple[float | None, Any, str, bytes]]:
+        """Yield (capture offset, exporter key, listener, payload).
+
+        Offsets are relative to the first datagram and keep increasing
+        across files and loops, so replay pacing stays monotonic.
+        """
+        first: float | None = None
+        elapsed = 0.0
+        for _ in range(self.loops):
+            loop_start = elapsed
+            for path in self.paths:
+                for datagram in read_capture(path):
+                    if first is None:
+                        first = datagram.timestamp
+                    elapsed = max(elapsed, loop_start + datagram.timestamp - first)
+                    listener = "sflow" if datagram.payload[:4] == _SFLOW_V5_PREFIX else "netflow"
+                    yield elapsed, datagram.src_ip, listener, datagram.payload
+
+
+def send_datagrams(
+    source: SyntheticSource | CaptureSource,
+    host: str,
+    ports: dict[str, int],
+    rate: float,
+    speed: float,
+    duration: float | None,
+    count: int | None,
+    conn: Connection,
+) -> None:
+    """Process entry point: send datagrams and report totals on conn.
+
+    Args:
+        source: Datagrams to send.
+        host: Collector address.
+        ports: UDP port per listener ("netflow", "sflow").
+        rate: Packets/sec to send at; 0 disables rate pacing.
+        speed: Replay speed relative to capture timestamps (1.0 is real
+            time); 0 sends as fast as possible. Ignored when rate is set.
+        duration: Stop after this many seconds.
+        count: Stop after this many datagrams.
+        conn: Pipe end that receives the totals dict.
+    """
+    sockets: dict[Any, socket.socket] = {}
+    shared: socket.socket | None = None
+
+    def exporter_socket(exporter: Any) -> socket.socket:
+        nonlocal shared
+        sock = sockets.get(exporter)
+        if sock is not None:
+            return sock
+        if shared is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            address = IPv4Address(_EXPORTER_BASE + 1 + len(sockets) % _MAX_EXPORTER_ADDRESSES)
+            try:
+                sock.bind((str(address), 0))
+            except OSError:
+                # Only 127.0.0.1 is usable here; every exporter shares it
+                sock.close()
+                shared = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                sock = shared
+        else:
+            sock = shared
+        sockets[exporter] = sock
+        return sock
+
+    sent = 0
+    sent_bytes = 0
+    errors = 0
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+
+    try:
+        datagrams = source.datagrams()
+        if count is not None:
+            datagrams = itertools.islice(datagrams, count)
+
+        for offset, exporter, listener, payload in datagrams:
+            now = time.perf_counter()
+            if deadline is not None and now >= deadline:
+                break
+
+            if rate > 0:
+                due = start + sent / rate
+            elif speed > 0 and offset is not None:
+                due = start + offset / speed
+            else:
+                due = now
+            if due - now > 0.001:
+                time.sleep(due - now)
+
+            try:
+                exporter_socket(exporter).sendto(payload, (host, ports[listener]))
+            except OSError:
+                # ENOBUFS and friends: count and keep going
+                errors += 1
+                continue
+            sent += 1
+            sent_bytes += len(payload)
+
+        elapsed = time.perf_counter() - start
+    finally:
+        for sock in {id(s): s for s in sockets.values()}.values():
+            sock.close()
+
+    conn.send({
+        "sent": sent,
+        "sent_bytes": sent_bytes,
+        "send_errors": errors,
+        "send_seconds": elapsed,
+        "exporters": len(sockets),
+    })
+    conn.close()
@@ -8,11 +8,12 @@ import signal
 import sys
 from typing import NoReturn
 
-from flowlens.common.config import get_settings
+from flowlens.common.config import Settings, get_settings
 from flowlens.common.database import close_database, init_database
 from flowlens.common.logging import get_logger, setup_logging
 from flowlens.common.metrics import set_app_info
 from flowlens.ingestion.server import FlowCollector
+from flowlens.ingestion.supervisor import CollectorSupervisor
 
 logger = get_logger(__name__)
 
@@ -34,14 +35,9 @@ async def main() -> None:
         "Starting Flow Ingestion Service",
         version=settings.app_version,
         environment=settings.environment,
+        worker_processes=settings.ingestion.worker_processes,
     )
 
-    # Initialize database
-    await init_database(settings)
-
-    # Create collector
-    collector = FlowCollector(settings.ingestion)
-
     # Setup signal handlers
     loop = asyncio.get_event_loop()
     stop_event = asyncio.Event()
@@ -53,6 +49,25 @@ async def main() -> None:
     for sig in (signal.SIGTERM, signal.SIGINT):
         loop.add_signal_handler(sig, lambda s=sig: signal_handler(s))
 
+    if settings.ingestion.worker_processes > 1:
+        await run_supervised(settings, stop_event)
+    else:
+        await run_single(settings, stop_event)
+
+
+async def run_single(settings: Settings, stop_event: asyncio.Event) -> None:
+    """Run a single collector in this process.
+
+    Args:
+        settings: Application settings.
+        stop_event: Event set when the service should shut down.
+    """
+    # Initialize database
+    await init_database(settings)
+
+    # Create collector
+    collector = FlowCollector(settings.ingestion, kafka_settings=settings.kafka)
+
     try:
         # Start collector
         await collector.start()
@@ -71,6 +86,37 @@ async def main() -> None:
         logger.info("Shutdown complete")
 
 
+async def run_supervised(settings: Settings, stop_event: asyncio.Event) -> None:
+    """Run collector worker processes under a supervisor.
+
+    Each worker binds the listener ports with SO_REUSEPORT and owns its
+    own parsers, template caches, and database router.
+
+    Args:
+        settings: Application settings.
+        stop_event: Event set when the service should shut down.
+    """
+    supervisor = CollectorSupervisor(settings.ingestion)
+
+    try:
+        await supervisor.start()
+        await stop_event.wait()
+
+    except Exception as e:
+        logger.error("Fatal error", error=str(e))
+        raise
+    finally:
+        logger.info("Shutting down")
+        await supervisor.stop()
+        stats = supervisor.stats
+        logger.info(
+            "Shutdown complete",
+            total_received=stats["total_received"],
+            total_dropped=stats["total_dropped"],
+            worker_restarts=stats["worker_restarts"],
+        )
+
+
 def run() -> NoReturn:
     """Run the ingestion service."""
     try:
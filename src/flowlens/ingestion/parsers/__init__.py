@@ -8,6 +8,7 @@ Supports:
 """
 
 from flowlens.ingestion.parsers.base import FlowParser, FlowRecord, ProtocolType, TCPFlags
+from flowlens.ingestion.parsers.batch import FlowBatch
 from flowlens.ingestion.parsers.ipfix import IPFIXParser, IPFIXTemplateCache
 from flowlens.ingestion.parsers.netflow_v5 import NetFlowV5Parser
 from flowlens.ingestion.parsers.netflow_v9 import NetFlowV9Parser, TemplateCache
@@ -16,6 +17,7 @@ from flowlens.ingestion.parsers.sflow import SFlowParser
 __all__ = [
     "FlowParser",
     "FlowRecord",
+    "FlowBatch",
     "ProtocolType",
     "TCPFlags",
     "NetFlowV5Parser",
@@ -9,7 +9,10 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from enum import IntEnum
 from ipaddress import IPv4Address, IPv6Address
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from flowlens.ingestion.parsers.batch import FlowBatch
 
 
 class ProtocolType(IntEnum):
@@ -186,7 +189,31 @@ class FlowParser(ABC):
         """
         ...
 
-    def validate_header(self, data: bytes, min_length: int) -> None:
+    def parse_batch(
+        self,
+        data: bytes,
+        exporter_ip: IPv4Address,
+    ) -> "FlowBatch":
+        """Parse raw packet data into a columnar flow batch.
+
+        The default implementation converts the output of parse().
+        Parsers that can decode straight into columns override this.
+
+        Args:
+            data: Raw UDP packet payload.
+            exporter_ip: IP address of the exporter.
+
+        Returns:
+            Batch of parsed flows.
+
+        Raises:
+            ValueError: If data is malformed.
+        """
+        from flowlens.ingestion.parsers.batch import FlowBatch
+
+        return FlowBatch.from_records(self.parse(data, exporter_ip))
+
+    def validate_header(self, data: bytes | memoryview, min_length: int) -> None:
         """Validate packet has minimum required length.
 
         Args:
@@ -0,0 +1,429 @@
+"""Columnar flow batch.
+
+FlowBatch holds many flows as parallel NumPy columns instead of one
+FlowRecord object per flow. Parsers can decode packets straight into
+columns, validation runs once per column, and routers write rows from
+the columns without building intermediate record objects. FlowRecord
+objects are only materialized for consumers that still need them.
+
+Column encoding:
+  - IP addresses: (n, 16) uint8 arrays in network byte order. IPv4
+    addresses are stored IPv4-mapped (::ffff:a.b.c.d), which never
+    appear as real IPv6 traffic, so the mapping is unambiguous.
+  - Exporter IPs: uint32.
+  - Timestamps: int64 microseconds since the Unix epoch (UTC).
+  - Integers: int64.
+  - Optional columns use NULL (the minimum int64) for None.
+  - flow_source and extended_fields: object arrays, since they are
+    strings and free-form dicts.
+  - record_id: optional (n, 16) uint8 array of flow_records UUIDs.
+    Assigned by with_record_ids() before a batch is first written, so a
+    batch replayed from the spool keeps the ids of its first attempt.
+
+encode_batch()/decode_batch() give batches a compact binary form for
+the write-ahead spool and the flow stream: the fixed-width columns as
+raw little-endian bytes, then the object columns as JSON.
+"""
+
+import json
+import os
+import struct
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, fields as dataclass_fields, replace
+from datetime import datetime, timedelta, timezone
+from ipaddress import IPv4Address, IPv6Address
+from typing import Any
+
+import numpy as np
+
+from flowlens.ingestion.parsers.base import FlowRecord
+
+# Marker for missing values in optional integer and timestamp columns
+NULL = np.iinfo(np.int64).min
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+_IPV4_MAPPED_PREFIX = bytes(10) + b"\xff\xff"
+_IPV4_MAPPED_PREFIX_ARRAY = np.frombuffer(_IPV4_MAPPED_PREFIX, dtype=np.uint8)
+
+# Encoded batch header: format version, row count
+BATCH_HEADER = struct.Struct("!BI")
+BATCH_FORMAT_VERSION = 1
+# Same as version 1, with the record_id column right after the header
+BATCH_FORMAT_VERSION_WITH_IDS = 2
+
+# Fixed-width columns as (name, dtype, values per row) in encoded order.
+# flow_source and extended_fields follow as JSON.
+_ENCODED_COLUMNS: tuple[tuple[str, np.dtype[Any], int], ...] = tuple(
+    (name, np.dtype(dtype), width)
+    for name, dtype, width in (
+        ("timestamp", "<i8", 1),
+        ("src_ip", "u1", 16),
+        ("dst_ip", "u1", 16),
+        ("src_port", "<i8", 1),
+        ("dst_port", "<i8", 1),
+        ("protocol", "<i8", 1),
+        ("bytes_count", "<i8", 1),
+        ("packets_count", "<i8", 1),
+        ("exporter_ip", "<u4", 1),
+        ("flow_start", "<i8", 1),
+        ("flow_end", "<i8", 1),
+        ("flow_duration_ms", "<i8", 1),
+        ("tcp_flags", "<i8", 1),
+        ("exporter_id", "<i8", 1),
+        ("sampling_rate", "<i8", 1),
+        ("input_interface", "<i8", 1),
+        ("output_interface", "<i8", 1),
+        ("tos", "<i8", 1),
+    )
+)
+
+
+def pack_ipv4(addresses: np.ndarray) -> np.ndarray:
+    """Pack integer IPv4 addresses into an IP column.
+
+    Args:
+        addresses: Integer IPv4 addresses.
+
+    Returns:
+        (n, 16) uint8 array of IPv4-mapped addresses.
+    """
+    packed = np.empty((len(addresses), 16), dtype=np.uint8)
+    packed[:, :12] = _IPV4_MAPPED_PREFIX_ARRAY
+    packed[:, 12:] = np.ascontiguousarray(addresses, dtype=">u4").view(np.uint8).reshape(-1, 4)
+    return packed
+
+
+def pack_ips(addresses: Sequence[IPv4Address | IPv6Address]) -> np.ndarray:
+    """Pack ipaddress objects into an IP column.
+
+    Args:
+        addresses: IPv4 or IPv6 addresses.
+
+    Returns:
+        (n, 16) uint8 array.
+    """
+    data = b"".join(
+        _IPV4_MAPPED_PREFIX + address.packed if address.version == 4 else address.packed
+        for address in addresses
+    )
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, 16).copy()
+
+
+def unpack_ips(packed: np.ndarray) -> list[IPv4Address | IPv6Address]:
+    """Convert an IP column back to ipaddress objects.
+
+    Args:
+        packed: (n, 16) uint8 array.
+
+    Returns:
+        IPv4Address for IPv4-mapped entries, IPv6Address otherwise.
+    """
+    is_ipv4 = (packed[:, :12] == _IPV4_MAPPED_PREFIX_ARRAY).all(axis=1).tolist()
+    ipv4_ints = np.ascontiguousarray(packed[:, 12:]).view(">u4").ravel().tolist()
+    data = packed.tobytes()
+
+    return [
+        IPv4Address(ipv4_ints[i]) if ipv4 else IPv6Address(data[i * 16:i * 16 + 16])
+        for i, ipv4 in enumerate(is_ipv4)
+    ]
+
+
+def datetime_to_us(value: datetime) -> int:
+    """Convert a datetime to epoch microseconds. Naive values are treated as UTC."""
+    epoch = _EPOCH_NAIVE if value.tzinfo is None else _EPOCH
+    return (value - epoch) // _MICROSECOND
+
+
+def us_to_datetimes(column: np.ndarray) -> list[datetime | None]:
+    """Convert a timestamp column to timezone-aware datetimes (None for NULL)."""
+    return [
+        None if value == NULL else _EPOCH + timedelta(microseconds=value)
+        for value in column.tolist()
+    ]
+
+
+def nullable_to_list(column: np.ndarray) -> list[int | None]:
+    """Convert an optional integer column to a list with None for NULL."""
+    return [None if value == NULL else value for value in column.tolist()]
+
+
+def _nullable(values: Iterable[int | None]) -> np.ndarray:
+    """Build an optional integer column from values that may be None."""
+    return np.fromiter((NULL if v is None else v for v in values), dtype=np.int64)
+
+
+def _nullable_us(values: Iterable[datetime | None]) -> np.ndarray:
+    """Build an optional timestamp column from datetimes that may be None."""
+    return np.fromiter(
+        (NULL if v is None else datetime_to_us(v) for v in values),
+        dtype=np.int64,
+    )
+
+
+def _object_column(values: Sequence[Any]) -> np.ndarray:
+    """Build an object column without NumPy unpacking nested values."""
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+@dataclass(slots=True)
+class FlowBatch:
+    """A batch of flows stored column-wise.
+
+    Every column has one entry per flow; see the module docstring for
+    how each column is encoded.
+    """
+
+    timestamp: np.ndarray
+    src_ip: np.ndarray
+    dst_ip: np.ndarray
+    src_port: np.ndarray
+    dst_port: np.ndarray
+    protocol: np.ndarray
+    bytes_count: np.ndarray
+    packets_count: np.ndarray
+    exporter_ip: np.ndarray
+    flow_start: np.ndarray
+    flow_end: np.ndarray
+    flow_duration_ms: np.ndarray
+    tcp_flags: np.ndarray
+    exporter_id: np.ndarray
+    sampling_rate: np.ndarray
+    input_interface: np.ndarray
+    output_interface: np.ndarray
+    tos: np.ndarray
+    flow_source: np.ndarray
+    extended_fields: np.ndarray
+    record_id: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @classmethod
+    def empty(cls) -> "FlowBatch":
+        """Create a batch with no flows."""
+        return cls.from_records([])
+
+    @classmethod
+    def from_records(cls, records: Sequence[FlowRecord]) -> "FlowBatch":
+        """Build a batch from flow records.
+
+        Args:
+            records: Flow records.
+
+        Returns:
+            Batch with one row per record.
+        """
+        def ints(name: str) -> np.ndarray:
+            return np.fromiter((getattr(r, name) for r in records), dtype=np.int64, count=len(records))
+
+        def nullable(name: str) -> np.ndarray:
+            return _nullable(getattr(r, name) for r in records)
+
+        return cls(
+            timestamp=np.fromiter(
+                (datetime_to_us(r.timestamp) for r in records), dtype=np.int64, count=len(records)
+            ),
+            src_ip=pack_ips([r.src_ip for r in records]),
+            dst_ip=pack_ips([r.dst_ip for r in records]),
+            src_port=ints("src_port"),
+            dst_port=ints("dst_port"),
+            protocol=ints("protocol"),
+            bytes_count=ints("bytes_count"),
+            packets_count=ints("packets_count"),
+            exporter_ip=np.fromiter(
+                (int(r.exporter_ip) for r in records), dtype=np.uint32, count=len(records)
+            ),
+            flow_start=_nullable_us(r.flow_start for r in records),
+            flow_end=_nullable_us(r.flow_end for r in records),
+            flow_duration_ms=nullable("flow_duration_ms"),
+            tcp_flags=nullable("tcp_flags"),
+            exporter_id=nullable("exporter_id"),
+            sampling_rate=ints("sampling_rate"),
+            input_interface=nullable("input_interface"),
+            output_interface=nullable("output_interface"),
+            tos=nullable("tos"),
+            flow_source=_object_column([r.flow_source for r in records]),
+            extended_fields=_object_column([r.extended_fields for r in records]),
+        )
+
+    @classmethod
+    def concat(cls, batches: Sequence["FlowBatch"]) -> "FlowBatch":
+        """Concatenate batches into one.
+
+        Args:
+            batches: Batches to join, in order.
+
+        Returns:
+            Combined batch.
+        """
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+
+        # Ids only survive when every part has them
+        record_ids = [batch.record_id for batch in batches if batch.record_id is not None]
+        has_ids = len(record_ids) == len(batches)
+
+        return cls(
+            **{
+                name: np.concatenate([getattr(batch, name) for batch in batches])
+                for name in _COLUMN_NAMES
+            },
+            record_id=np.concatenate(record_ids) if has_ids else None,
+        )
+
+    def take(self, index: np.ndarray | slice) -> "FlowBatch":
+        """Select rows by boolean mask, index array, or slice.
+
+        Args:
+            index: Row selector.
+
+        Returns:
+            Batch with the selected rows.
+        """
+        return FlowBatch(
+            **{name: getattr(self, name)[index] for name in _COLUMN_NAMES},
+            record_id=None if self.record_id is None else self.record_id[index],
+        )
+
+    def with_record_ids(self) -> "FlowBatch":
+        """Give every row a random (version 4) UUID for flow_records.id.
+
+        Returns:
+            This batch if it already has ids, otherwise a copy with ids.
+        """
+        if self.record_id is not None:
+            return self
+
+        ids = np.frombuffer(os.urandom(len(self) * 16), dtype=np.uint8).reshape(-1, 16).copy()
+        ids[:, 6] = (ids[:, 6] & 0x0F) | 0x40
+        ids[:, 8] = (ids[:, 8] & 0x3F) | 0x80
+        return replace(self, record_id=ids)
+
+    def valid_mask(self) -> np.ndarray:
+        """Check every row against FlowRecord's validation rules at once.
+
+        Returns:
+            Boolean array, True for valid rows.
+        """
+        return (
+            (self.src_port >= 0) & (self.src_port <= 65535)
+            & (self.dst_port >= 0) & (self.dst_port <= 65535)
+            & (self.protocol >= 0) & (self.protocol <= 255)
+            & (self.bytes_count >= 0)
+            & (self.packets_count >= 0)
+        )
+
+    def validate(self) -> "FlowBatch":
+        """Drop rows that would fail FlowRecord validation.
+
+        Returns:
+            This batch if every row is valid, otherwise a filtered copy.
+        """
+        mask = self.valid_mask()
+        if mask.all():
+            return self
+        return self.take(mask)
+
+    def to_records(self) -> list[FlowRecord]:
+        """Materialize legacy FlowRecord objects.
+
+        Returns:
+            One FlowRecord per row.
+        """
+        columns = (
+            us_to_datetimes(self.timestamp),
+            unpack_ips(self.src_ip),
+            unpack_ips(self.dst_ip),
+            self.src_port.tolist(),
+            self.dst_port.tolist(),
+            self.protocol.tolist(),
+            self.bytes_count.tolist(),
+            self.packets_count.tolist(),
+            [IPv4Address(ip) for ip in self.exporter_ip.tolist()],
+            us_to_datetimes(self.flow_start),
+            us_to_datetimes(self.flow_end),
+            nullable_to_list(self.flow_duration_ms),
+            nullable_to_list(self.tcp_flags),
+            nullable_to_list(self.exporter_id),
+            self.sampling_rate.tolist(),
+            nullable_to_list(self.input_interface),
+            nullable_to_list(self.output_interface),
+            nullable_to_list(self.tos),
+            self.flow_source.tolist(),
+            self.extended_fields.tolist(),
+        )
+        return [FlowRecord(*row) for row in zip(*columns, strict=True)]
+
+
+# Column names in FlowRecord field order
+_COLUMN_NAMES = tuple(f.name for f in dataclass_fields(FlowBatch) if f.name != "record_id")
+
+
+def encode_batch(batch: FlowBatch) -> bytes:
+    """Serialize a flow batch.
+
+    Args:
+        batch: Flows to encode.
+
+    Returns:
+        Header, record ids if the batch has them, fixed-width columns, then
+        the JSON-encoded object columns.
+    """
+    if batch.record_id is None:
+        parts = [BATCH_HEADER.pack(BATCH_FORMAT_VERSION, len(batch))]
+    else:
+        parts = [
+            BATCH_HEADER.pack(BATCH_FORMAT_VERSION_WITH_IDS, len(batch)),
+            np.ascontiguousarray(batch.record_id, dtype=np.uint8).tobytes(),
+        ]
+    for name, dtype, _ in _ENCODED_COLUMNS:
+        parts.append(np.ascontiguousarray(getattr(batch, name), dtype=dtype).tobytes())
+    parts.append(json.dumps(
+        [batch.flow_source.tolist(), batch.extended_fields.tolist()],
+        separators=(",", ":"),
+    ).encode())
+    return b"".join(parts)
+
+
+def decode_batch(payload: bytes) -> FlowBatch:
+    """Deserialize a flow batch written by encode_batch.
+
+    Args:
+        payload: Encoded batch.
+
+    Returns:
+        Decoded batch. Numeric columns are read-only views of the payload.
+
+    Raises:
+        ValueError: If the payload has an unknown format version.
+    """
+    version, count = BATCH_HEADER.unpack_from(payload)
+    if version not in (BATCH_FORMAT_VERSION, BATCH_FORMAT_VERSION_WITH_IDS):
+        raise ValueError(f"Unsupported flow batch format version: {version}")
+
+    offset = BATCH_HEADER.size
+    columns: dict[str, np.ndarray] = {}
+
+    if version == BATCH_FORMAT_VERSION_WITH_IDS:
+        record_id = np.frombuffer(payload, dtype=np.uint8, count=count * 16, offset=offset)
+        columns["record_id"] = record_id.reshape(count, 16)
+        offset += record_id.nbytes
+
+    for name, dtype, width in _ENCODED_COLUMNS:
+        column = np.frombuffer(payload, dtype=dtype, count=count * width, offset=offset)
+        columns[name] = column.reshape(count, width) if width > 1 else column
+        offset += column.nbytes
+
+    flow_source, extended_fields = json.loads(payload[offset:])
+    columns["flow_source"] = _object_column(flow_source)
+    columns["extended_fields"] = _object_column(extended_fields)
+
+    return FlowBatch(**columns)
@@ -27,6 +27,8 @@ from typing import Any
 
 from flowlens.common.logging import get_logger
 from flowlens.ingestion.parsers.base import FlowParser, FlowRecord
+from flowlens.ingestion.parsers.decoder import RecordDecoder
+from flowlens.ingestion.parsers.templates import PendingFlowsets, TemplateStore
 
 logger = get_logger(__name__)
 
@@ -39,6 +41,11 @@ SET_TEMPLATE = 2
 SET_OPTIONS_TEMPLATE = 3
 SET_DATA_MIN = 256
 
+_SET_HEADER = struct.Struct("!HH")
+_U16 = struct.Struct("!H")
+_U32 = struct.Struct("!I")
+_U64 = struct.Struct("!Q")
+
 # IPFIX Information Element IDs (IANA registry)
 IE_OCTET_DELTA_COUNT = 1
 IE_PACKET_DELTA_COUNT = 2
@@ -82,6 +89,14 @@ IE_OCTET_TOTAL_COUNT = 85
 IE_PACKET_TOTAL_COUNT = 86
 IE_FLOW_ID = 148
 
+# Address information elements, decoded to ipaddress objects
+IE_IPV4_ADDRESS_FIELDS = frozenset(
+    (IE_SOURCE_IPV4_ADDRESS, IE_DESTINATION_IPV4_ADDRESS, IE_IP_NEXT_HOP_IPV4_ADDRESS)
+)
+IE_IPV6_ADDRESS_FIELDS = frozenset(
+    (IE_SOURCE_IPV6_ADDRESS, IE_DESTINATION_IPV6_ADDRESS, IE_IP_NEXT_HOP_IPV6_ADDRESS)
+)
+
 
 @dataclass
 class IPFIXField:
@@ -102,9 +117,16 @@ class IPFIXTemplate:
     record_length: int = 0
     received_at: datetime = dataclass_field(default_factory=datetime.utcnow)
     has_variable_length: bool = False
+    decoder: RecordDecoder | None = dataclass_field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def __post_init__(self) -> None:
-        """Calculate record length from fields."""
+        """Calculate record length and compile the record decoder.
+
+        Only fixed-length templates get a decoder; records of templates with
+        variable-length fields are decoded field by field.
+        """
         self.record_length = 0
         self.has_variable_length = False
         for f in self.fields:
@@ -113,8 +135,19 @@ class IPFIXTemplate:
             else:
                 self.record_length += f.field_length
 
+        if not self.has_variable_length:
+            # Vendor-specific fields are skipped
+            self.decoder = RecordDecoder(
+                (
+                    (f.element_id, f.field_length, f.enterprise_number is not None)
+                    for f in self.fields
+                ),
+                IE_IPV4_ADDRESS_FIELDS,
+                IE_IPV6_ADDRESS_FIELDS,
+            )
 
-class IPFIXTemplateCache:
+
+class IPFIXTemplateCache(TemplateStore[IPFIXTemplate]):
     """Cache for IPFIX templates.
 
     Templates are keyed by (exporter_ip, observation_domain_id, template_id).
@@ -127,75 +160,45 @@ class IPFIXTemplateCache:
             ttl_seconds: Template expiration time in seconds.
             max_templates: Maximum number of templates to cache.
         """
-        self._ttl_seconds = ttl_seconds
-        self._max_templates = max_templates
-        self._templates: dict[tuple[str, int, int], IPFIXTemplate] = {}
-
-    def get(
-        self,
-        exporter_ip: str,
-        observation_domain_id: int,
-        template_id: int,
-    ) -> IPFIXTemplate | None:
-        """Get a template from cache."""
-        key = (exporter_ip, observation_domain_id, template_id)
-        template = self._templates.get(key)
-
-        if template is None:
-            return None
-
-        age = (datetime.utcnow() - template.received_at).total_seconds()
-        if age > self._ttl_seconds:
-            del self._templates[key]
-            return None
-
-        return template
+        super().__init__("ipfix", ttl_seconds, max_templates)
 
-    def set(
-        self,
-        exporter_ip: str,
-        observation_domain_id: int,
-        template: IPFIXTemplate,
-    ) -> None:
-        """Store a template in cache."""
-        if len(self._templates) >= self._max_templates:
-            oldest_key = min(
-                self._templates.keys(),
-                key=lambda k: self._templates[k].received_at,
-            )
-            del self._templates[oldest_key]
-
-        key = (exporter_ip, observation_domain_id, template.template_id)
-        self._templates[key] = template
+    def encode_template(self, template: IPFIXTemplate) -> Any:
+        """Convert a template to a JSON-serializable value for snapshots."""
+        return {
+            "template_id": template.template_id,
+            "fields": [
+                [f.element_id, f.field_length, f.enterprise_number] for f in template.fields
+            ],
+        }
 
-        logger.debug(
-            "Cached IPFIX template",
-            exporter=exporter_ip,
-            domain_id=observation_domain_id,
-            template_id=template.template_id,
-            fields=len(template.fields),
+    def decode_template(self, domain_id: int, data: Any) -> IPFIXTemplate:
+        """Rebuild a template from encode_template() output."""
+        return IPFIXTemplate(
+            template_id=data["template_id"],
+            observation_domain_id=domain_id,
+            fields=[
+                IPFIXField(element_id, length, enterprise_number)
+                for element_id, length, enterprise_number in data["fields"]
+            ],
         )
 
-    def clear(self) -> None:
-        """Clear all templates."""
-        self._templates.clear()
-
-    @property
-    def size(self) -> int:
-        """Get number of cached templates."""
-        return len(self._templates)
-
 
 class IPFIXParser(FlowParser):
     """Parser for IPFIX (NetFlow v10) packets."""
 
-    def __init__(self, template_cache: IPFIXTemplateCache | None = None) -> None:
+    def __init__(
+        self,
+        template_cache: IPFIXTemplateCache | None = None,
+        pending: PendingFlowsets | None = None,
+    ) -> None:
         """Initialize parser.
 
         Args:
             template_cache: Shared template cache instance.
+            pending: Buffer for data that arrives before its template.
         """
         self._template_cache = template_cache or IPFIXTemplateCache()
+        self._pending = pending or PendingFlowsets("ipfix")
 
     @property
     def protocol_name(self) -> str:
@@ -225,8 +228,11 @@ class IPFIXParser(FlowParser):
         """
         self.validate_header(data, IPFIX_HEADER_SIZE)
 
+        # Sets are passed on as zero-copy views of the message
+        view = memoryview(data)
+
         # Parse header
-        header = self._parse_header(data[:IPFIX_HEADER_SIZE])
+        header = self._parse_header(view)
 
         # Validate message length
         if header["length"] > len(data):
@@ -240,7 +246,7 @@ class IPFIXParser(FlowParser):
         offset = IPFIX_HEADER_SIZE
 
         while offset + 4 <= header["length"]:
-            set_id, set_length = struct.unpack("!HH", data[offset:offset + 4])
+            set_id, set_length = _SET_HEADER.unpack_from(view, offset)
 
             if set_length < 4:
                 logger.warning(
@@ -250,14 +256,21 @@ class IPFIXParser(FlowParser):
                 )
                 break
 
-            set_data = data[offset:offset + set_length]
+            set_data = view[offset:offset + set_length]
 
             if set_id == SET_TEMPLATE:
-                self._parse_template_set(
+                template_ids = self._parse_template_set(
                     set_data,
                     header["observation_domain_id"],
                     str(exporter_ip),
                 )
+                records.extend(
+                    self._replay_pending(
+                        template_ids,
+                        header["observation_domain_id"],
+                        exporter_ip,
+                    )
+                )
             elif set_id == SET_OPTIONS_TEMPLATE:
                 # Options templates not implemented yet
                 pass
@@ -274,11 +287,11 @@ class IPFIXParser(FlowParser):
 
         return records
 
-    def _parse_header(self, data: bytes) -> dict:
+    def _parse_header(self, data: bytes | memoryview) -> dict:
         """Parse IPFIX message header.
 
         Args:
-            data: 16 bytes of header data.
+            data: Message data starting with the 16-byte header.
 
         Returns:
             Dictionary with header fields.
@@ -292,7 +305,7 @@ class IPFIXParser(FlowParser):
             export_time,
             sequence_number,
             observation_domain_id,
-        ) = struct.unpack("!HHIII", data)
+        ) = struct.unpack_from("!HHIII", data)
 
         if version != IPFIX_VERSION:
             raise ValueError(f"ipfix: invalid version {version}")
@@ -310,23 +323,25 @@ class IPFIXParser(FlowParser):
 
     def _parse_template_set(
         self,
-        data: bytes,
+        data: bytes | memoryview,
         observation_domain_id: int,
         exporter_ip: str,
-    ) -> None:
+    ) -> list[int]:
         """Parse a template set.
 
         Args:
             data: Set data including header.
             observation_domain_id: Observation domain ID from message header.
             exporter_ip: Exporter IP address string.
+
+        Returns:
+            IDs of the templates cached.
         """
+        template_ids: list[int] = []
         offset = 4  # Skip set header
 
         while offset + 4 <= len(data):
-            template_id, field_count = struct.unpack(
-                "!HH", data[offset:offset + 4]
-            )
+            template_id, field_count = _SET_HEADER.unpack_from(data, offset)
             offset += 4
 
             if template_id < 256:
@@ -341,9 +356,7 @@ class IPFIXParser(FlowParser):
                 if offset + 4 > len(data):
                     break
 
-                element_id, field_length = struct.unpack(
-                    "!HH", data[offset:offset + 4]
-                )
+                element_id, field_length = _SET_HEADER.unpack_from(data, offset)
                 offset += 4
 
                 # Check for enterprise field (bit 15 set)
@@ -351,7 +364,7 @@ class IPFIXParser(FlowParser):
                 if element_id & 0x8000:
                     element_id &= 0x7FFF
                     if offset + 4 <= len(data):
-                        enterprise_number = struct.unpack("!I", data[offset:offset + 4])[0]
+                        enterprise_number = _U32.unpack_from(data, offset)[0]
                         offset += 4
 
                 fields.append(IPFIXField(element_id, field_length, enterprise_number))
@@ -363,10 +376,36 @@ class IPFIXParser(FlowParser):
             )
 
             self._template_cache.set(exporter_ip, observation_domain_id, template)
+            template_ids.append(template_id)
+
+        return template_ids
+
+    def _replay_pending(
+        self,
+        template_ids: list[int],
+        observation_domain_id: int,
+        exporter_ip: IPv4Address,
+    ) -> list[FlowRecord]:
+        """Decode data sets that were waiting for newly cached templates.
+
+        Args:
+            template_ids: IDs of the templates just cached.
+            observation_domain_id: Observation domain ID from message header.
+            exporter_ip: Exporter IP address.
+
+        Returns:
+            Flow records from the buffered data sets.
+        """
+        records: list[FlowRecord] = []
+        for template_id in template_ids:
+            pending = self._pending.pop(str(exporter_ip), observation_domain_id, template_id)
+            for data, header in pending:
+                records.extend(self._parse_data_set(data, template_id, header, exporter_ip))
+        return records
 
     def _parse_data_set(
         self,
-        data: bytes,
+        data: bytes | memoryview,
         template_id: int,
         header: dict,
         exporter_ip: IPv4Address,
@@ -374,7 +413,8 @@ class IPFIXParser(FlowParser):
         """Parse a data set.
 
         Args:
-            data: Set data including header.
+            data: Set data including header; copied only if it has to be
+                buffered until its template arrives.
             template_id: Template ID (same as set_id).
             header: Parsed message header.
             exporter_ip: Exporter IP address.
@@ -395,17 +435,24 @@ class IPFIXParser(FlowParser):
                 domain_id=header["observation_domain_id"],
                 template_id=template_id,
             )
+            self._pending.add(
+                str(exporter_ip),
+                header["observation_domain_id"],
+                template_id,
+                bytes(data),
+                header,
+            )
             return []
 
         records: list[FlowRecord] = []
         offset = 4  # Skip set header
-        set_length = struct.unpack("!H", data[2:4])[0]
+        set_length = _SET_HEADER.unpack_from(data)[1]
 
         if template.has_variable_length:
             # Variable-length records need special handling
             while offset < set_length:
                 record, bytes_consumed = self._parse_variable_record(
-                    data[offset:set_length],
+                    memoryview(data)[offset:set_length],
                     template,
                     header,
                     exporter_ip,
@@ -415,14 +462,12 @@ class IPFIXParser(FlowParser):
                 if bytes_consumed == 0:
                     break
                 offset += bytes_consumed
-        else:
-            # Fixed-length records
-            while offset + template.record_length <= set_length:
-                record_data = data[offset:offset + template.record_length]
-                record = self._parse_record(record_data, template, header, exporter_ip)
+        elif template.decoder is not None:
+            # Fixed-length records; trailing padding is ignored by the decoder
+            for fields in template.decoder.iter_decode(data, offset, set_length):
+                record = self._build_flow_record(fields, header, exporter_ip)
                 if record:
                     records.append(record)
-                offset += template.record_length
 
         return records
 
@@ -444,28 +489,16 @@ class IPFIXParser(FlowParser):
         Returns:
             Parsed FlowRecord or None if required fields missing.
         """
-        fields: dict[int, Any] = {}
-        offset = 0
-
-        for field in template.fields:
-            if field.enterprise_number is not None:
-                # Skip vendor-specific fields for now
-                offset += field.field_length
-                continue
-
-            field_data = data[offset:offset + field.field_length]
-            fields[field.element_id] = self._decode_field(
-                field.element_id,
-                field.field_length,
-                field_data,
-            )
-            offset += field.field_length
+        if template.decoder is None:
+            record, _ = self._parse_variable_record(data, template, header, exporter_ip)
+            return record
 
+        fields = template.decoder.decode(data)
         return self._build_flow_record(fields, header, exporter_ip)
 
     def _parse_variable_record(
         self,
-        data: bytes,
+        data: bytes | memoryview,
         template: IPFIXTemplate,
         header: dict,
         exporter_ip: IPv4Address,
@@ -497,7 +530,7 @@ class IPFIXParser(FlowParser):
                 else:
                     if offset + 2 > len(data):
                         return None, 0
-                    actual_length = struct.unpack("!H", data[offset:offset + 2])[0]
+                    actual_length = _U16.unpack_from(data, offset)[0]
                     offset += 2
 
                 if offset + actual_length > len(data):
@@ -612,7 +645,7 @@ class IPFIXParser(FlowParser):
         self,
         element_id: int,
         field_length: int,
-        data: bytes,
+        data: bytes | memoryview,
     ) -> Any:
         """Decode a field value based on element ID and length.
 
@@ -627,23 +660,23 @@ class IPFIXParser(FlowParser):
         # IPv4 addresses
         if element_id in (IE_SOURCE_IPV4_ADDRESS, IE_DESTINATION_IPV4_ADDRESS, IE_IP_NEXT_HOP_IPV4_ADDRESS):
             if field_length == 4:
-                return IPv4Address(data)
+                return IPv4Address(_U32.unpack_from(data)[0])
             return None
 
         # IPv6 addresses
         if element_id in (IE_SOURCE_IPV6_ADDRESS, IE_DESTINATION_IPV6_ADDRESS, IE_IP_NEXT_HOP_IPV6_ADDRESS):
             if field_length == 16:
-                return IPv6Address(data)
+                return IPv6Address(bytes(data))
             return None
 
         # Numeric fields
         if field_length == 1:
             return data[0]
         elif field_length == 2:
-            return struct.unpack("!H", data)[0]
+            return _U16.unpack_from(data)[0]
         elif field_length == 4:
-            return struct.unpack("!I", data)[0]
+            return _U32.unpack_from(data)[0]
         elif field_length == 8:
-            return struct.unpack("!Q", data)[0]
+            return _U64.unpack_from(data)[0]
 
-        return data
+        return bytes(data)
@@ -41,13 +41,40 @@ import struct
 from datetime import datetime, timezone
 from ipaddress import IPv4Address
 
+import numpy as np
+
 from flowlens.ingestion.parsers.base import FlowParser, FlowRecord
+from flowlens.ingestion.parsers.batch import NULL, FlowBatch, pack_ipv4
 
 # NetFlow v5 constants
 NETFLOW_V5_HEADER_SIZE = 24
 NETFLOW_V5_RECORD_SIZE = 48
 NETFLOW_V5_VERSION = 5
 
+# Flow record layout for columnar decoding
+NETFLOW_V5_RECORD_DTYPE = np.dtype([
+    ("srcaddr", ">u4"),
+    ("dstaddr", ">u4"),
+    ("nexthop", ">u4"),
+    ("input", ">u2"),
+    ("output", ">u2"),
+    ("packets", ">u4"),
+    ("octets", ">u4"),
+    ("first", ">u4"),
+    ("last", ">u4"),
+    ("srcport", ">u2"),
+    ("dstport", ">u2"),
+    ("pad1", "u1"),
+    ("tcp_flags", "u1"),
+    ("prot", "u1"),
+    ("tos", "u1"),
+    ("src_as", ">u2"),
+    ("dst_as", ">u2"),
+    ("src_mask", "u1"),
+    ("dst_mask", "u1"),
+    ("pad2", ">u2"),
+])
+
 
 class NetFlowV5Parser(FlowParser):
     """Parser for NetFlow version 5 packets."""
@@ -73,18 +100,7 @@ class NetFlowV5Parser(FlowParser):
         Raises:
             ValueError: If packet is malformed.
         """
-        self.validate_header(data, NETFLOW_V5_HEADER_SIZE)
-
-        # Parse header
-        header = self._parse_header(data[:NETFLOW_V5_HEADER_SIZE])
-
-        # Validate packet size
-        expected_size = NETFLOW_V5_HEADER_SIZE + (header["count"] * NETFLOW_V5_RECORD_SIZE)
-        if len(data) < expected_size:
-            raise ValueError(
-                f"netflow_v5: packet truncated "
-                f"(got {len(data)}, expected {expected_size} bytes)"
-            )
+        header = self._parse_validated_header(data)
 
         # Parse flow records
         records = []
@@ -98,6 +114,117 @@ class NetFlowV5Parser(FlowParser):
 
         return records
 
+    def parse_batch(
+        self,
+        data: bytes,
+        exporter_ip: IPv4Address,
+    ) -> FlowBatch:
+        """Parse NetFlow v5 packet straight into a columnar batch.
+
+        All records are decoded at once with a NumPy structured dtype and
+        validated column-wise.
+
+        Args:
+            data: Raw UDP packet payload.
+            exporter_ip: IP address of the exporter.
+
+        Returns:
+            Batch of parsed flows.
+
+        Raises:
+            ValueError: If packet is malformed.
+        """
+        header = self._parse_validated_header(data)
+        count = header["count"]
+
+        rec = np.frombuffer(
+            data,
+            dtype=NETFLOW_V5_RECORD_DTYPE,
+            count=count,
+            offset=NETFLOW_V5_HEADER_SIZE,
+        )
+
+        # first/last are in milliseconds since boot, relative to sys_uptime
+        sys_uptime = header["sys_uptime"]
+        base_us = header["unix_secs"] * 1_000_000 + header["unix_nsecs"] // 1000
+        first = rec["first"].astype(np.int64)
+        last = rec["last"].astype(np.int64)
+
+        flow_start = np.where(first <= sys_uptime, base_us - (sys_uptime - first) * 1000, base_us)
+        flow_end = np.where(last <= sys_uptime, base_us - (sys_uptime - last) * 1000, base_us)
+
+        protocol = rec["prot"].astype(np.int64)
+        next_hops = [str(IPv4Address(ip)) for ip in rec["nexthop"].tolist()]
+        flow_sequence = header["flow_sequence"]
+
+        return FlowBatch(
+            timestamp=flow_end,  # Use flow end as the primary timestamp
+            src_ip=pack_ipv4(rec["srcaddr"]),
+            dst_ip=pack_ipv4(rec["dstaddr"]),
+            src_port=rec["srcport"].astype(np.int64),
+            dst_port=rec["dstport"].astype(np.int64),
+            protocol=protocol,
+            bytes_count=rec["octets"].astype(np.int64),
+            packets_count=rec["packets"].astype(np.int64),
+            exporter_ip=np.full(count, int(exporter_ip), dtype=np.uint32),
+            flow_start=flow_start,
+            flow_end=flow_end.copy(),
+            flow_duration_ms=np.maximum(last - first, 0),
+            tcp_flags=np.where(protocol == 6, rec["tcp_flags"].astype(np.int64), NULL),
+            exporter_id=np.full(count, header["engine_id"], dtype=np.int64),
+            sampling_rate=np.full(count, header["sampling_rate"], dtype=np.int64),
+            input_interface=rec["input"].astype(np.int64),
+            output_interface=rec["output"].astype(np.int64),
+            tos=rec["tos"].astype(np.int64),
+            flow_source=np.full(count, "netflow_v5", dtype=object),
+            extended_fields=np.array(
+                [
+                    {
+                        "next_hop": next_hop,
+                        "src_as": src_as,
+                        "dst_as": dst_as,
+                        "src_mask": src_mask,
+                        "dst_mask": dst_mask,
+                        "flow_sequence": flow_sequence,
+                    }
+                    for next_hop, src_as, dst_as, src_mask, dst_mask in zip(
+                        next_hops,
+                        rec["src_as"].tolist(),
+                        rec["dst_as"].tolist(),
+                        rec["src_mask"].tolist(),
+                        rec["dst_mask"].tolist(),
+                        strict=True,
+                    )
+                ],
+                dtype=object,
+            ),
+        ).validate()
+
+    def _parse_validated_header(self, data: bytes) -> dict:
+        """Parse the header and check the packet holds every record it announces.
+
+        Args:
+            data: Raw UDP packet payload.
+
+        Returns:
+            Dictionary with header fields.
+
+        Raises:
+            ValueError: If packet is malformed.
+        """
+        self.validate_header(data, NETFLOW_V5_HEADER_SIZE)
+
+        header = self._parse_header(data[:NETFLOW_V5_HEADER_SIZE])
+
+        expected_size = NETFLOW_V5_HEADER_SIZE + (header["count"] * NETFLOW_V5_RECORD_SIZE)
+        if len(data) < expected_size:
+            raise ValueError(
+                f"netflow_v5: packet truncated "
+                f"(got {len(data)}, expected {expected_size} bytes)"
+            )
+
+        return header
+
     def _parse_header(self, data: bytes) -> dict:
         """Parse NetFlow v5 header.
 
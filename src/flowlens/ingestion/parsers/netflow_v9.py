@@ -29,11 +29,13 @@ Data FlowSet (flowset_id >= 256):
 import struct
 from dataclasses import dataclass, field as dataclass_field
 from datetime import datetime, timezone
-from ipaddress import IPv4Address, IPv6Address
+from ipaddress import IPv4Address
 from typing import Any
 
 from flowlens.common.logging import get_logger
 from flowlens.ingestion.parsers.base import FlowParser, FlowRecord
+from flowlens.ingestion.parsers.decoder import RecordDecoder
+from flowlens.ingestion.parsers.templates import PendingFlowsets, TemplateStore
 
 logger = get_logger(__name__)
 
@@ -82,6 +84,16 @@ NF9_FIELD_FLOW_SAMPLER_RANDOM_INTERVAL = 50
 NF9_FIELD_DIRECTION = 61
 NF9_FIELD_IPV6_NEXT_HOP = 62
 
+_FLOWSET_HEADER = struct.Struct("!HH")
+
+# Address field types, decoded to ipaddress objects
+NF9_IPV4_FIELDS = frozenset(
+    (NF9_FIELD_IPV4_SRC_ADDR, NF9_FIELD_IPV4_DST_ADDR, NF9_FIELD_IPV4_NEXT_HOP)
+)
+NF9_IPV6_FIELDS = frozenset(
+    (NF9_FIELD_IPV6_SRC_ADDR, NF9_FIELD_IPV6_DST_ADDR, NF9_FIELD_IPV6_NEXT_HOP)
+)
+
 
 @dataclass
 class TemplateField:
@@ -100,13 +112,19 @@ class Template:
     fields: list[TemplateField] = dataclass_field(default_factory=list)
     record_length: int = 0
     received_at: datetime = dataclass_field(default_factory=datetime.utcnow)
+    decoder: RecordDecoder = dataclass_field(init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
-        """Calculate record length from fields."""
+        """Calculate record length and compile the record decoder."""
         self.record_length = sum(f.field_length for f in self.fields)
+        self.decoder = RecordDecoder(
+            ((f.field_type, f.field_length, False) for f in self.fields),
+            NF9_IPV4_FIELDS,
+            NF9_IPV6_FIELDS,
+        )
 
 
-class TemplateCache:
+class TemplateCache(TemplateStore[Template]):
     """Cache for NetFlow v9 templates.
 
     Templates are keyed by (exporter_ip, source_id, template_id).
@@ -120,93 +138,40 @@ class TemplateCache:
             ttl_seconds: Template expiration time in seconds.
             max_templates: Maximum number of templates to cache.
         """
-        self._ttl_seconds = ttl_seconds
-        self._max_templates = max_templates
-        self._templates: dict[tuple[str, int, int], Template] = {}
-
-    def get(
-        self,
-        exporter_ip: str,
-        source_id: int,
-        template_id: int,
-    ) -> Template | None:
-        """Get a template from cache.
-
-        Args:
-            exporter_ip: Exporter IP address.
-            source_id: Source ID from header.
-            template_id: Template ID.
+        super().__init__("netflow_v9", ttl_seconds, max_templates)
 
-        Returns:
-            Template if found and not expired, None otherwise.
-        """
-        key = (exporter_ip, source_id, template_id)
-        template = self._templates.get(key)
-
-        if template is None:
-            return None
-
-        # Check expiration
-        age = (datetime.utcnow() - template.received_at).total_seconds()
-        if age > self._ttl_seconds:
-            del self._templates[key]
-            return None
-
-        return template
-
-    def set(
-        self,
-        exporter_ip: str,
-        source_id: int,
-        template: Template,
-    ) -> None:
-        """Store a template in cache.
+    def encode_template(self, template: Template) -> Any:
+        """Convert a template to a JSON-serializable value for snapshots."""
+        return {
+            "template_id": template.template_id,
+            "fields": [[f.field_type, f.field_length] for f in template.fields],
+        }
 
-        Args:
-            exporter_ip: Exporter IP address.
-            source_id: Source ID from header.
-            template: Template to store.
-        """
-        # Evict oldest if at capacity
-        if len(self._templates) >= self._max_templates:
-            oldest_key = min(
-                self._templates.keys(),
-                key=lambda k: self._templates[k].received_at,
-            )
-            del self._templates[oldest_key]
-
-        key = (exporter_ip, source_id, template.template_id)
-        self._templates[key] = template
-
-        logger.debug(
-            "Cached template",
-            exporter=exporter_ip,
-            source_id=source_id,
-            template_id=template.template_id,
-            fields=len(template.fields),
-            record_length=template.record_length,
+    def decode_template(self, domain_id: int, data: Any) -> Template:
+        """Rebuild a template from encode_template() output."""
+        return Template(
+            template_id=data["template_id"],
+            source_id=domain_id,
+            fields=[TemplateField(field_type, length) for field_type, length in data["fields"]],
         )
 
-    def clear(self) -> None:
-        """Clear all templates."""
-        self._templates.clear()
-
-    @property
-    def size(self) -> int:
-        """Get number of cached templates."""
-        return len(self._templates)
-
 
 class NetFlowV9Parser(FlowParser):
     """Parser for NetFlow version 9 packets."""
 
-    def __init__(self, template_cache: TemplateCache | None = None) -> None:
+    def __init__(
+        self,
+        template_cache: TemplateCache | None = None,
+        pending: PendingFlowsets | None = None,
+    ) -> None:
         """Initialize parser.
 
         Args:
             template_cache: Shared template cache instance.
+            pending: Buffer for data that arrives before its template.
         """
         self._template_cache = template_cache or TemplateCache()
+        self._pending = pending or PendingFlowsets("netflow_v9")
 
     @property
     def protocol_name(self) -> str:
@@ -236,17 +201,18 @@ class NetFlowV9Parser(FlowParser):
         """
         self.validate_header(data, NETFLOW_V9_HEADER_SIZE)
 
+        # FlowSets are passed on as zero-copy views of the packet
+        view = memoryview(data)
+
         # Parse header
-        header = self._parse_header(data[:NETFLOW_V9_HEADER_SIZE])
+        header = self._parse_header(view)
 
         # Parse FlowSets
         records: list[FlowRecord] = []
         offset = NETFLOW_V9_HEADER_SIZE
 
-        while offset + 4 <= len(data):
-            flowset_id, flowset_length = struct.unpack(
-                "!HH", data[offset:offset + 4]
-            )
+        while offset + 4 <= len(view):
+            flowset_id, flowset_length = _FLOWSET_HEADER.unpack_from(view, offset)
 
             if flowset_length < 4:
                 logger.warning(
@@ -256,14 +222,17 @@ class NetFlowV9Parser(FlowParser):
                 )
                 break
 
-            flowset_data = data[offset:offset + flowset_length]
+            flowset_data = view[offset:offset + flowset_length]
 
             if flowset_id == FLOWSET_TEMPLATE:
-                self._parse_template_flowset(
+                template_ids = self._parse_template_flowset(
                     flowset_data,
                     header["source_id"],
                     str(exporter_ip),
                 )
+                records.extend(
+                    self._replay_pending(template_ids, header["source_id"], exporter_ip)
+                )
             elif flowset_id == FLOWSET_OPTIONS_TEMPLATE:
                 # Options templates not implemented yet
                 pass
@@ -280,11 +249,11 @@ class NetFlowV9Parser(FlowParser):
 
         return records
 
-    def _parse_header(self, data: bytes) -> dict:
+    def _parse_header(self, data: bytes | memoryview) -> dict:
         """Parse NetFlow v9 header.
 
         Args:
-            data: 20 bytes of header data.
+            data: Packet data starting with the 20-byte header.
 
         Returns:
             Dictionary with header fields.
@@ -299,7 +268,7 @@ class NetFlowV9Parser(FlowParser):
             unix_secs,
             sequence_number,
             source_id,
-        ) = struct.unpack("!HHIIII", data)
+        ) = struct.unpack_from("!HHIIII", data)
 
         if version != NETFLOW_V9_VERSION:
             raise ValueError(f"netflow_v9: invalid version {version}")
@@ -318,23 +287,25 @@ class NetFlowV9Parser(FlowParser):
 
     def _parse_template_flowset(
         self,
-        data: bytes,
+        data: bytes | memoryview,
         source_id: int,
         exporter_ip: str,
-    ) -> None:
+    ) -> list[int]:
         """Parse a template FlowSet.
 
         Args:
             data: FlowSet data including header.
             source_id: Source ID from packet header.
             exporter_ip: Exporter IP address string.
+
+        Returns:
+            IDs of the templates cached.
         """
+        template_ids: list[int] = []
         offset = 4  # Skip flowset header
 
         while offset + 4 <= len(data):
-            template_id, field_count = struct.unpack(
-                "!HH", data[offset:offset + 4]
-            )
+            template_id, field_count = _FLOWSET_HEADER.unpack_from(data, offset)
             offset += 4
 
             # Need 4 bytes per field
@@ -348,9 +319,7 @@ class NetFlowV9Parser(FlowParser):
 
             fields: list[TemplateField] = []
             for _ in range(field_count):
-                field_type, field_length = struct.unpack(
-                    "!HH", data[offset:offset + 4]
-                )
+                field_type, field_length = _FLOWSET_HEADER.unpack_from(data, offset)
                 fields.append(TemplateField(field_type, field_length))
                 offset += 4
 
@@ -361,10 +330,35 @@ class NetFlowV9Parser(FlowParser):
             )
 
             self._template_cache.set(exporter_ip, source_id, template)
+            template_ids.append(template_id)
+
+        return template_ids
+
+    def _replay_pending(
+        self,
+        template_ids: list[int],
+        source_id: int,
+        exporter_ip: IPv4Address,
+    ) -> list[FlowRecord]:
+        """Decode data flowsets that were waiting for newly cached templates.
+
+        Args:
+            template_ids: IDs of the templates just cached.
+            source_id: Source ID from packet header.
+            exporter_ip: Exporter IP address.
+
+        Returns:
+            Flow records from the buffered flowsets.
+        """
+        records: list[FlowRecord] = []
+        for template_id in template_ids:
+            for data, header in self._pending.pop(str(exporter_ip), source_id, template_id):
+                records.extend(self._parse_data_flowset(data, template_id, header, exporter_ip))
+        return records
 
     def _parse_data_flowset(
         self,
-        data: bytes,
+        data: bytes | memoryview,
         template_id: int,
         header: dict,
         exporter_ip: IPv4Address,
@@ -372,7 +366,8 @@ class NetFlowV9Parser(FlowParser):
         """Parse a data FlowSet.
 
         Args:
-            data: FlowSet data including header.
+            data: FlowSet data including header; copied only if it has
+                to be buffered until its template arrives.
             template_id: Template ID (same as flowset_id).
             header: Parsed packet header.
             exporter_ip: Exporter IP address.
@@ -393,18 +388,23 @@ class NetFlowV9Parser(FlowParser):
                 source_id=header["source_id"],
                 template_id=template_id,
             )
+            self._pending.add(
+                str(exporter_ip),
+                header["source_id"],
+                template_id,
+                bytes(data),
+                header,
+            )
             return []
 
         records: list[FlowRecord] = []
-        offset = 4  # Skip flowset header
-        flowset_length = struct.unpack("!H", data[2:4])[0]
+        flowset_length = _FLOWSET_HEADER.unpack_from(data)[1]
 
-        while offset + template.record_length <= flowset_length:
-            record_data = data[offset:offset + template.record_length]
-            record = self._parse_record(record_data, template, header, exporter_ip)
+        # Skip flowset header; trailing padding is ignored by the decoder
+        for fields in template.decoder.iter_decode(data, 4, flowset_length):
+            record = self._build_flow_record(fields, header, exporter_ip)
             if record:
                 records.append(record)
-            offset += template.record_length
 
         return records
 
@@ -426,20 +426,25 @@ class NetFlowV9Parser(FlowParser):
         Returns:
             Parsed FlowRecord or None if required fields missing.
         """
-        # Extract fields from record
-        fields: dict[int, Any] = {}
-        offset = 0
-
-        for field in template.fields:
-            field_data = data[offset:offset + field.field_length]
-            fields[field.field_type] = self._decode_field(
-                field.field_type,
-                field.field_length,
-                field_data,
-            )
-            offset += field.field_length
+        fields = template.decoder.decode(data)
+        return self._build_flow_record(fields, header, exporter_ip)
+
+    def _build_flow_record(
+        self,
+        fields: dict[int, Any],
+        header: dict,
+        exporter_ip: IPv4Address,
+    ) -> FlowRecord | None:
+        """Build FlowRecord from decoded fields.
 
-        # Build FlowRecord from fields
+        Args:
+            fields: Dictionary of decoded field values.
+            header: Packet header.
+            exporter_ip: Exporter IP address.
+
+        Returns:
+            FlowRecord or None if required fields missing.
+        """
         try:
             src_ip = fields.get(NF9_FIELD_IPV4_SRC_ADDR) or fields.get(NF9_FIELD_IPV6_SRC_ADDR)
             dst_ip = fields.get(NF9_FIELD_IPV4_DST_ADDR) or fields.get(NF9_FIELD_IPV6_DST_ADDR)
@@ -455,18 +460,18 @@ class NetFlowV9Parser(FlowParser):
             packets_count = fields.get(NF9_FIELD_IN_PKTS, 0) + fields.get(NF9_FIELD_OUT_PKTS, 0)
 
             # Calculate timestamps
-            base_ts = header["base_timestamp"]
+            base_secs = header["unix_secs"]
             sys_uptime = header["sys_uptime"]
 
             first_switched = fields.get(NF9_FIELD_FIRST_SWITCHED, sys_uptime)
             last_switched = fields.get(NF9_FIELD_LAST_SWITCHED, sys_uptime)
 
             flow_start = datetime.fromtimestamp(
-                base_ts.timestamp() - (sys_uptime - first_switched) / 1000,
+                base_secs - (sys_uptime - first_switched) / 1000,
                 tz=timezone.utc,
             )
             flow_end = datetime.fromtimestamp(
-                base_ts.timestamp() - (sys_uptime - last_switched) / 1000,
+                base_secs - (sys_uptime - last_switched) / 1000,
                 tz=timezone.utc,
             )
 
@@ -507,44 +512,3 @@ class NetFlowV9Parser(FlowParser):
                 error=str(e),
             )
             return None
-
-    def _decode_field(
-        self,
-        field_type: int,
-        field_length: int,
-        data: bytes,
-    ) -> Any:
-        """Decode a field value based on type and length.
-
-        Args:
-            field_type: NetFlow v9 field type.
-            field_length: Field length in bytes.
-            data: Raw field data.
-
-        Returns:
-            Decoded value.
-        """
-        # IPv4 addresses
-        if field_type in (NF9_FIELD_IPV4_SRC_ADDR, NF9_FIELD_IPV4_DST_ADDR, NF9_FIELD_IPV4_NEXT_HOP):
-            if field_length == 4:
-                return IPv4Address(data)
-            return None
-
-        # IPv6 addresses
-        if field_type in (NF9_FIELD_IPV6_SRC_ADDR, NF9_FIELD_IPV6_DST_ADDR, NF9_FIELD_IPV6_NEXT_HOP):
-            if field_length == 16:
-                return IPv6Address(data)
-            return None
-
-        # Numeric fields
-        if field_length == 1:
-            return data[0]
-        elif field_length == 2:
-            return struct.unpack("!H", data)[0]
-        elif field_length == 4:
-            return struct.unpack("!I", data)[0]
-        elif field_length == 8:
-            return struct.unpack("!Q", data)[0]
-
-        # Variable length - return as bytes
-        return data
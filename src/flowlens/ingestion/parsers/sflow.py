@@ -61,6 +61,22 @@ FLOW_RECORD_EXTENDED_GATEWAY = 1003
 # Ethernet header size
 ETHERNET_HEADER_SIZE = 14
 
+# Precompiled layouts, all read with unpack_from() over one memoryview
+_U16 = struct.Struct("!H")
+_U32 = struct.Struct("!I")
+_FORMAT_LENGTH = struct.Struct("!II")
+_IPV6_ADDRESS = struct.Struct("!QQ")
+_HEADER_TAIL = struct.Struct("!IIII")
+_FLOW_SAMPLE = struct.Struct("!8I")
+_EXPANDED_FLOW_SAMPLE = struct.Struct("!11I")
+_RAW_PACKET = struct.Struct("!IIII")
+# version/IHL, TOS, protocol, source, destination
+_IPV4_HEADER = struct.Struct("!BB7xB2xII")
+# version/class/label, next header, source and destination as 64-bit halves
+_IPV6_HEADER = struct.Struct("!I2xBxQQQQ")
+_PORTS = struct.Struct("!HH")
+_IPV4_RECORD = struct.Struct("!8I")
+_IPV6_RECORD = struct.Struct("!IIQQQQIIII")
 
 @dataclass
 class SFlowHeader:
@@ -89,7 +105,13 @@ class FlowSample:
 
 
 class SFlowParser(FlowParser):
-    """Parser for sFlow version 5 datagrams."""
+    """Parser for sFlow version 5 datagrams.
+
+    The datagram is wrapped in a single memoryview and every structure is
+    read in place with unpack_from(). Nested samples and records are
+    passed as (offset, end) bounds rather than sliced, so no bytes are
+    copied between the socket buffer and the decoded values.
+    """
 
     @property
     def protocol_name(self) -> str:
@@ -114,49 +136,55 @@ class SFlowParser(FlowParser):
         """
         self.validate_header(data, SFLOW_HEADER_MIN_SIZE)
 
+        view = memoryview(data)
+        size = len(view)
+
         # Parse header
-        header, offset = self._parse_header(data)
+        header, offset = self._parse_header(view)
 
         # Parse samples
         records: list[FlowRecord] = []
 
         for _ in range(header.num_samples):
-            if offset + 8 > len(data):
+            if offset + 8 > size:
                 break
 
             # Sample header
-            sample_format, sample_length = struct.unpack(
-                "!II", data[offset:offset + 8]
-            )
+            sample_format, sample_length = _FORMAT_LENGTH.unpack_from(view, offset)
 
             # Extract enterprise and format
             enterprise = (sample_format >> 12) & 0xFFFFF
             fmt = sample_format & 0xFFF
 
-            sample_data = data[offset + 8:offset + 8 + sample_length]
+            sample_start = offset + 8
+            sample_end = min(sample_start + sample_length, size)
 
             if enterprise == 0:
                 if fmt == SAMPLE_FORMAT_FLOW:
                     new_records = self._parse_flow_sample(
-                        sample_data,
+                        view,
+                        sample_start,
+                        sample_end,
                         header,
                         exporter_ip,
                     )
                     records.extend(new_records)
                 elif fmt == SAMPLE_FORMAT_EXPANDED_FLOW:
                     new_records = self._parse_expanded_flow_sample(
-                        sample_data,
+                        view,
+                        sample_start,
+                        sample_end,
                         header,
                         exporter_ip,
                     )
                     records.extend(new_records)
                 # Counter samples are ignored for flow analysis
 
-            offset += 8 + sample_length
+            offset = sample_start + sample_length
 
         return records
 
-    def _parse_header(self, data: bytes) -> tuple[SFlowHeader, int]:
+    def _parse_header(self, data: memoryview) -> tuple[SFlowHeader, int]:
         """Parse sFlow datagram header.
 
         Args:
@@ -166,9 +194,9 @@ class SFlowParser(FlowParser):
             Tuple of (SFlowHeader, offset after header).
 
         Raises:
-            ValueError: If version is not 5.
+            ValueError: If version is not 5 or the header is truncated.
         """
-        version, agent_type = struct.unpack("!II", data[:8])
+        version, agent_type = _FORMAT_LENGTH.unpack_from(data, 0)
 
         if version != SFLOW_VERSION:
             raise ValueError(f"sflow: invalid version {version}")
@@ -176,11 +204,14 @@ class SFlowParser(FlowParser):
         offset = 8
 
         # Parse agent address
+        agent_address: IPv4Address | IPv6Address
         if agent_type == ADDRESS_TYPE_IPV4:
-            agent_address = IPv4Address(data[offset:offset + 4])
+            agent_address = IPv4Address(_U32.unpack_from(data, offset)[0])
             offset += 4
         elif agent_type == ADDRESS_TYPE_IPV6:
-            agent_address = IPv6Address(data[offset:offset + 16])
+            self.validate_header(data, SFLOW_HEADER_MIN_SIZE + 12)
+            high, low = _IPV6_ADDRESS.unpack_from(data, offset)
+            agent_address = IPv6Address((high << 64) | low)
             offset += 16
         else:
             raise ValueError(f"sflow: invalid agent address type {agent_type}")
@@ -191,8 +222,8 @@ class SFlowParser(FlowParser):
             sequence_number,
             uptime_ms,
             num_samples,
-        ) = struct.unpack("!IIII", data[offset:offset + 16])
-        offset += 16
+        ) = _HEADER_TAIL.unpack_from(data, offset)
+        offset += _HEADER_TAIL.size
 
         header = SFlowHeader(
             version=version,
@@ -207,21 +238,25 @@ class SFlowParser(FlowParser):
 
     def _parse_flow_sample(
         self,
-        data: bytes,
+        data: memoryview,
+        offset: int,
+        end: int,
         header: SFlowHeader,
         exporter_ip: IPv4Address,
     ) -> list[FlowRecord]:
         """Parse a flow sample.
 
         Args:
-            data: Sample data (without header).
+            data: Datagram buffer.
+            offset: Offset of the sample data (after the sample header).
+            end: Offset just past the sample data.
             header: Datagram header.
             exporter_ip: Exporter IP address.
 
         Returns:
             List of flow records.
         """
-        if len(data) < 32:
+        if end - offset < _FLOW_SAMPLE.size:
             return []
 
         (
@@ -233,7 +268,7 @@ class SFlowParser(FlowParser):
             input_if,
             output_if,
             num_records,
-        ) = struct.unpack("!IIIIIIII", data[:32])
+        ) = _FLOW_SAMPLE.unpack_from(data, offset)
 
         sample = FlowSample(
             sequence_number=sequence_number,
@@ -246,11 +281,15 @@ class SFlowParser(FlowParser):
             num_records=num_records,
         )
 
-        return self._parse_flow_records(data[32:], sample, header, exporter_ip)
+        return self._parse_flow_records(
+            data, offset + _FLOW_SAMPLE.size, end, sample, header, exporter_ip
+        )
 
     def _parse_expanded_flow_sample(
         self,
-        data: bytes,
+        data: memoryview,
+        offset: int,
+        end: int,
         header: SFlowHeader,
         exporter_ip: IPv4Address,
     ) -> list[FlowRecord]:
@@ -259,14 +298,16 @@ class SFlowParser(FlowParser):
         Expanded samples use 32-bit interface IDs.
 
         Args:
-            data: Sample data (without header).
+            data: Datagram buffer.
+            offset: Offset of the sample data (after the sample header).
+            end: Offset just past the sample data.
             header: Datagram header.
             exporter_ip: Exporter IP address.
 
         Returns:
             List of flow records.
         """
-        if len(data) < 44:
+        if end - offset < _EXPANDED_FLOW_SAMPLE.size:
             return []
 
         (
@@ -281,7 +322,7 @@ class SFlowParser(FlowParser):
             output_if_format,
             output_if_value,
             num_records,
-        ) = struct.unpack("!IIIIIIIIIII", data[:44])
+        ) = _EXPANDED_FLOW_SAMPLE.unpack_from(data, offset)
 
         sample = FlowSample(
             sequence_number=sequence_number,
@@ -294,11 +335,15 @@ class SFlowParser(FlowParser):
             num_records=num_records,
         )
 
-        return self._parse_flow_records(data[44:], sample, header, exporter_ip)
+        return self._parse_flow_records(
+            data, offset + _EXPANDED_FLOW_SAMPLE.size, end, sample, header, exporter_ip
+        )
 
     def _parse_flow_records(
         self,
-        data: bytes,
+        data: memoryview,
+        offset: int,
+        end: int,
         sample: FlowSample,
         header: SFlowHeader,
         exporter_ip: IPv4Address,
@@ -306,7 +351,9 @@ class SFlowParser(FlowParser):
         """Parse flow records from a sample.
 
         Args:
-            data: Flow records data.
+            data: Datagram buffer.
+            offset: Offset of the first flow record.
+            end: Offset just past the sample data.
             sample: Parent flow sample.
             header: Datagram header.
             exporter_ip: Exporter IP address.
@@ -315,51 +362,37 @@ class SFlowParser(FlowParser):
             List of flow records.
         """
         records: list[FlowRecord] = []
-        offset = 0
 
         for _ in range(sample.num_records):
-            if offset + 8 > len(data):
+            if offset + 8 > end:
                 break
 
-            record_format, record_length = struct.unpack(
-                "!II", data[offset:offset + 8]
-            )
+            record_format, record_length = _FORMAT_LENGTH.unpack_from(data, offset)
 
             enterprise = (record_format >> 12) & 0xFFFFF
             fmt = record_format & 0xFFF
 
-            record_data = data[offset + 8:offset + 8 + record_length]
+            record_start = offset + 8
+            record_end = min(record_start + record_length, end)
 
             if enterprise == 0:
+                record: FlowRecord | None = None
                 if fmt == FLOW_RECORD_RAW_PACKET:
                     record = self._parse_raw_packet_record(
-                        record_data,
-                        sample,
-                        header,
-                        exporter_ip,
+                        data, record_start, record_end, sample, header, exporter_ip
                     )
-                    if record:
-                        records.append(record)
                 elif fmt == FLOW_RECORD_IPV4:
                     record = self._parse_ipv4_record(
-                        record_data,
-                        sample,
-                        header,
-                        exporter_ip,
+                        data, record_start, record_end, sample, header, exporter_ip
                     )
-                    if record:
-                        records.append(record)
                 elif fmt == FLOW_RECORD_IPV6:
                     record = self._parse_ipv6_record(
-                        record_data,
-                        sample,
-                        header,
-                        exporter_ip,
+                        data, record_start, record_end, sample, header, exporter_ip
                     )
-                    if record:
-                        records.append(record)
+                if record:
+                    records.append(record)
 
-            offset += 8 + record_length
+            offset = record_start + record_length
             # Align to 4-byte boundary
             if record_length % 4:
                 offset += 4 - (record_length % 4)
@@ -368,7 +401,9 @@ class SFlowParser(FlowParser):
 
     def _parse_raw_packet_record(
         self,
-        data: bytes,
+        data: memoryview,
+        offset: int,
+        end: int,
         sample: FlowSample,
         header: SFlowHeader,
         exporter_ip: IPv4Address,
@@ -376,7 +411,9 @@ class SFlowParser(FlowParser):
         """Parse a raw packet header record.
 
         Args:
-            data: Record data.
+            data: Datagram buffer.
+            offset: Offset of the record data.
+            end: Offset just past the record data.
             sample: Parent flow sample.
             header: Datagram header.
             exporter_ip: Exporter IP address.
@@ -384,7 +421,7 @@ class SFlowParser(FlowParser):
         Returns:
             FlowRecord or None.
         """
-        if len(data) < 16:
+        if end - offset < _RAW_PACKET.size:
             return None
 
         (
@@ -392,26 +429,29 @@ class SFlowParser(FlowParser):
             frame_length,
             stripped,
             header_length,
-        ) = struct.unpack("!IIII", data[:16])
+        ) = _RAW_PACKET.unpack_from(data, offset)
 
-        packet_data = data[16:16 + header_length]
+        packet_start = offset + _RAW_PACKET.size
+        packet_end = min(packet_start + header_length, end)
 
         # Skip to IP header (assume Ethernet)
-        if protocol == 1 and len(packet_data) > ETHERNET_HEADER_SIZE:
+        if protocol == 1 and packet_end - packet_start > ETHERNET_HEADER_SIZE:
             # Check EtherType
-            ether_type = struct.unpack("!H", packet_data[12:14])[0]
+            ether_type = _U16.unpack_from(data, packet_start + 12)[0]
 
-            ip_offset = ETHERNET_HEADER_SIZE
+            ip_offset = packet_start + ETHERNET_HEADER_SIZE
 
             # Handle VLAN tags
             if ether_type == 0x8100:  # 802.1Q
-                if len(packet_data) > ip_offset + 4:
-                    ether_type = struct.unpack("!H", packet_data[ip_offset + 2:ip_offset + 4])[0]
+                if packet_end > ip_offset + 4:
+                    ether_type = _U16.unpack_from(data, ip_offset + 2)[0]
                     ip_offset += 4
 
             if ether_type == 0x0800:  # IPv4
                 return self._parse_ipv4_header(
-                    packet_data[ip_offset:],
+                    data,
+                    ip_offset,
+                    packet_end,
                     frame_length,
                     sample,
                     header,
@@ -419,7 +459,9 @@ class SFlowParser(FlowParser):
                 )
             elif ether_type == 0x86DD:  # IPv6
                 return self._parse_ipv6_header(
-                    packet_data[ip_offset:],
+                    data,
+                    ip_offset,
+                    packet_end,
                     frame_length,
                     sample,
                     header,
@@ -430,7 +472,9 @@ class SFlowParser(FlowParser):
 
     def _parse_ipv4_header(
         self,
-        data: bytes,
+        data: memoryview,
+        offset: int,
+        end: int,
         frame_length: int,
         sample: FlowSample,
         header: SFlowHeader,
@@ -439,7 +483,9 @@ class SFlowParser(FlowParser):
         """Parse IPv4 header from packet data.
 
         Args:
-            data: IP header data.
+            data: Datagram buffer.
+            offset: Offset of the IP header.
+            end: Offset just past the sampled packet header.
             frame_length: Original frame length.
             sample: Parent flow sample.
             header: Datagram header.
@@ -448,38 +494,29 @@ class SFlowParser(FlowParser):
         Returns:
             FlowRecord or None.
         """
-        if len(data) < 20:
+        if end - offset < _IPV4_HEADER.size:
             return None
 
-        version_ihl = data[0]
+        (
+            version_ihl,
+            tos,
+            protocol,
+            src_ip_raw,
+            dst_ip_raw,
+        ) = _IPV4_HEADER.unpack_from(data, offset)
         ihl = (version_ihl & 0x0F) * 4
-        tos = data[1]
-        total_length = struct.unpack("!H", data[2:4])[0]
-        protocol = data[9]
-        src_ip = IPv4Address(data[12:16])
-        dst_ip = IPv4Address(data[16:20])
-
-        src_port = 0
-        dst_port = 0
-        tcp_flags = None
-
-        # Parse transport layer
-        if len(data) >= ihl + 4:
-            transport_data = data[ihl:]
-
-            if protocol == ProtocolType.TCP and len(transport_data) >= 14:
-                src_port, dst_port = struct.unpack("!HH", transport_data[:4])
-                tcp_flags = transport_data[13]
-            elif protocol == ProtocolType.UDP and len(transport_data) >= 8:
-                src_port, dst_port = struct.unpack("!HH", transport_data[:4])
+
+        src_port, dst_port, tcp_flags = self._parse_transport(
+            data, offset + ihl, end, protocol
+        )
 
         # Estimate bytes from sampling
         estimated_bytes = frame_length * sample.sampling_rate
 
         return FlowRecord(
             timestamp=datetime.now(timezone.utc),
-            src_ip=src_ip,
-            dst_ip=dst_ip,
+            src_ip=IPv4Address(src_ip_raw),
+            dst_ip=IPv4Address(dst_ip_raw),
             src_port=src_port,
             dst_port=dst_port,
             protocol=protocol,
@@ -503,7 +540,9 @@ class SFlowParser(FlowParser):
 
     def _parse_ipv6_header(
         self,
-        data: bytes,
+        data: memoryview,
+        offset: int,
+        end: int,
         frame_length: int,
         sample: FlowSample,
         header: SFlowHeader,
@@ -512,7 +551,9 @@ class SFlowParser(FlowParser):
         """Parse IPv6 header from packet data.
 
         Args:
-            data: IP header data.
+            data: Datagram buffer.
+            offset: Offset of the IP header.
+            end: Offset just past the sampled packet header.
             frame_length: Original frame length.
             sample: Parent flow sample.
             header: Datagram header.
@@ -521,37 +562,33 @@ class SFlowParser(FlowParser):
         Returns:
             FlowRecord or None.
         """
-        if len(data) < 40:
+        # IPv6 header is 40 bytes
+        if end - offset < _IPV6_HEADER.size:
             return None
 
-        # IPv6 header is 40 bytes
-        version_tc_fl = struct.unpack("!I", data[:4])[0]
+        (
+            version_tc_fl,
+            next_header,
+            src_hi,
+            src_lo,
+            dst_hi,
+            dst_lo,
+        ) = _IPV6_HEADER.unpack_from(data, offset)
         traffic_class = (version_tc_fl >> 20) & 0xFF
-        next_header = data[6]
-        src_ip = IPv6Address(data[8:24])
-        dst_ip = IPv6Address(data[24:40])
 
         protocol = next_header
-        src_port = 0
-        dst_port = 0
-        tcp_flags = None
 
         # Parse transport layer (simplified - ignores extension headers)
-        if len(data) >= 44:
-            transport_data = data[40:]
-
-            if protocol == ProtocolType.TCP and len(transport_data) >= 14:
-                src_port, dst_port = struct.unpack("!HH", transport_data[:4])
-                tcp_flags = transport_data[13]
-            elif protocol == ProtocolType.UDP and len(transport_data) >= 8:
-                src_port, dst_port = struct.unpack("!HH", transport_data[:4])
+        src_port, dst_port, tcp_flags = self._parse_transport(
+            data, offset + _IPV6_HEADER.size, end, protocol
+        )
 
         estimated_bytes = frame_length * sample.sampling_rate
 
         return FlowRecord(
             timestamp=datetime.now(timezone.utc),
-            src_ip=src_ip,
-            dst_ip=dst_ip,
+            src_ip=IPv6Address((src_hi << 64) | src_lo),
+            dst_ip=IPv6Address((dst_hi << 64) | dst_lo),
             src_port=src_port,
             dst_port=dst_port,
             protocol=protocol,
@@ -573,9 +610,41 @@ class SFlowParser(FlowParser):
             },
         )
 
+    def _parse_transport(
+        self,
+        data: memoryview,
+        offset: int,
+        end: int,
+        protocol: int,
+    ) -> tuple[int, int, int | None]:
+        """Read ports and TCP flags from a sampled transport header.
+
+        Args:
+            data: Datagram buffer.
+            offset: Offset of the transport header.
+            end: Offset just past the sampled packet header.
+            protocol: IP protocol number.
+
+        Returns:
+            Tuple of (src_port, dst_port, tcp_flags); zeros and None when
+            the header is missing or truncated.
+        """
+        available = end - offset
+
+        if protocol == ProtocolType.TCP and available >= 14:
+            src_port, dst_port = _PORTS.unpack_from(data, offset)
+            return src_port, dst_port, data[offset + 13]
+        if protocol == ProtocolType.UDP and available >= 8:
+            src_port, dst_port = _PORTS.unpack_from(data, offset)
+            return src_port, dst_port, None
+
+        return 0, 0, None
+
     def _parse_ipv4_record(
         self,
-        data: bytes,
+        data: memoryview,
+        offset: int,
+        end: int,
         sample: FlowSample,
         header: SFlowHeader,
         exporter_ip: IPv4Address,
@@ -585,7 +654,9 @@ class SFlowParser(FlowParser):
         This is a decoded IPv4 header from sFlow.
 
         Args:
-            data: Record data.
+            data: Datagram buffer.
+            offset: Offset of the record data.
+            end: Offset just past the record data.
             sample: Parent flow sample.
             header: Datagram header.
             exporter_ip: Exporter IP address.
@@ -593,7 +664,7 @@ class SFlowParser(FlowParser):
         Returns:
             FlowRecord or None.
         """
-        if len(data) < 32:
+        if end - offset < _IPV4_RECORD.size:
             return None
 
         (
@@ -605,17 +676,14 @@ class SFlowParser(FlowParser):
             dst_port,
             tcp_flags,
             tos,
-        ) = struct.unpack("!IIIIIIII", data[:32])
-
-        src_ip = IPv4Address(src_ip_raw)
-        dst_ip = IPv4Address(dst_ip_raw)
+        ) = _IPV4_RECORD.unpack_from(data, offset)
 
         estimated_bytes = length * sample.sampling_rate
 
         return FlowRecord(
             timestamp=datetime.now(timezone.utc),
-            src_ip=src_ip,
-            dst_ip=dst_ip,
+            src_ip=IPv4Address(src_ip_raw),
+            dst_ip=IPv4Address(dst_ip_raw),
             src_port=src_port,
             dst_port=dst_port,
             protocol=protocol,
@@ -637,7 +705,9 @@ class SFlowParser(FlowParser):
 
     def _parse_ipv6_record(
         self,
-        data: bytes,
+        data: memoryview,
+        offset: int,
+        end: int,
         sample: FlowSample,
         header: SFlowHeader,
         exporter_ip: IPv4Address,
@@ -645,7 +715,9 @@ class SFlowParser(FlowParser):
         """Parse a sampled IPv6 record.
 
         Args:
-            data: Record data.
+            data: Datagram buffer.
+            offset: Offset of the record data.
+            end: Offset just past the record data.
             sample: Parent flow sample.
             header: Datagram header.
             exporter_ip: Exporter IP address.
@@ -653,24 +725,28 @@ class SFlowParser(FlowParser):
         Returns:
             FlowRecord or None.
         """
-        if len(data) < 64:
+        if end - offset < _IPV6_RECORD.size:
             return None
 
-        length = struct.unpack("!I", data[:4])[0]
-        protocol = struct.unpack("!I", data[4:8])[0]
-        src_ip = IPv6Address(data[8:24])
-        dst_ip = IPv6Address(data[24:40])
-        src_port = struct.unpack("!I", data[40:44])[0]
-        dst_port = struct.unpack("!I", data[44:48])[0]
-        tcp_flags = struct.unpack("!I", data[48:52])[0]
-        priority = struct.unpack("!I", data[52:56])[0]
+        (
+            length,
+            protocol,
+            src_hi,
+            src_lo,
+            dst_hi,
+            dst_lo,
+            src_port,
+            dst_port,
+            tcp_flags,
+            priority,
+        ) = _IPV6_RECORD.unpack_from(data, offset)
 
         estimated_bytes = length * sample.sampling_rate
 
         return FlowRecord(
             timestamp=datetime.now(timezone.utc),
-            src_ip=src_ip,
-            dst_ip=dst_ip,
+            src_ip=IPv6Address((src_hi << 64) | src_lo),
+            dst_ip=IPv6Address((dst_hi << 64) | dst_lo),
             src_port=src_port,
             dst_port=dst_port,
             protocol=protocol,
@@ -0,0 +1,440 @@
+"""Template store for template-based protocols.
+
+NetFlow v9 and IPFIX exporters send templates separately from the data
+records they describe and re-send them periodically. TemplateStore keeps
+the templates for both parsers in an LRU-ordered dict, so lookups,
+inserts, and evictions are O(1), and expires them against a monotonic
+clock.
+
+Templates can be snapshotted to a local JSON file and reloaded after a
+restart, and data sets that arrive before their template are held in a
+bounded PendingFlowsets buffer until the template shows up.
+"""
+
+import contextlib
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from collections.abc import Callable, Mapping
+from pathlib import Path
+from typing import Any, Generic, Protocol, TypeVar
+
+from flowlens.common.logging import get_logger
+from flowlens.common.metrics import (
+    TEMPLATE_EVICTIONS,
+    TEMPLATE_PENDING_FLOWSETS,
+    TEMPLATES_CACHED,
+)
+
+logger = get_logger(__name__)
+
+
+class _Template(Protocol):
+    """Attributes the store needs from a template."""
+
+    template_id: int
+
+    @property
+    def fields(self) -> list: ...
+
+
+T = TypeVar("T", bound=_Template)
+
+# Exporter IP, domain ID (v9 source ID or IPFIX observation domain ID), template ID
+TemplateKey = tuple[str, int, int]
+
+
+class TemplateStore(ABC, Generic[T]):
+    """LRU template cache with TTL expiry.
+
+    Templates are keyed by (exporter_ip, domain_id, template_id), where
+    domain_id is the NetFlow v9 source ID or the IPFIX observation domain
+    ID. A lookup refreshes a template's LRU position; storing a template
+    restarts its TTL. When full, the least recently used template is
+    evicted. Per-exporter template counts are published as a gauge.
+    """
+
+    def __init__(
+        self,
+        protocol_name: str,
+        ttl_seconds: int = 3600,
+        max_templates: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize template store.
+
+        Args:
+            protocol_name: Protocol label for logs and metrics.
+            ttl_seconds: Template expiration time in seconds.
+            max_templates: Maximum number of templates to cache.
+            clock: Monotonic time source, in seconds.
+        """
+        self._protocol_name = protocol_name
+        self._ttl_seconds = ttl_seconds
+        self._max_templates = max_templates
+        self._clock = clock
+
+        # Least recently used first; values are (template, expires_at)
+        self._templates: OrderedDict[TemplateKey, tuple[T, float]] = OrderedDict()
+        self._exporter_counts: dict[str, int] = {}
+
+    def get(
+        self,
+        exporter_ip: str,
+        domain_id: int,
+        template_id: int,
+    ) -> T | None:
+        """Get a template from the store.
+
+        Args:
+            exporter_ip: Exporter IP address.
+            domain_id: Source ID (v9) or observation domain ID (IPFIX).
+            template_id: Template ID.
+
+        Returns:
+            Template if found and not expired, None otherwise.
+        """
+        key = (exporter_ip, domain_id, template_id)
+        entry = self._templates.get(key)
+
+        if entry is None:
+            return None
+
+        template, expires_at = entry
+        if self._clock() > expires_at:
+            self._remove(key, "expired")
+            return None
+
+        self._templates.move_to_end(key)
+        return template
+
+    def set(
+        self,
+        exporter_ip: str,
+        domain_id: int,
+        template: T,
+    ) -> None:
+        """Store a template.
+
+        Args:
+            exporter_ip: Exporter IP address.
+            domain_id: Source ID (v9) or observation domain ID (IPFIX).
+            template: Template to store.
+        """
+        key = (exporter_ip, domain_id, template.template_id)
+        self._store(key, template, self._clock() + self._ttl_seconds)
+
+        logger.debug(
+            "Cached template",
+            protocol=self._protocol_name,
+            exporter=exporter_ip,
+            domain_id=domain_id,
+            template_id=template.template_id,
+            fields=len(template.fields),
+        )
+
+    def dump(self) -> list[dict[str, Any]]:
+        """Export unexpired templates for a snapshot.
+
+        Returns:
+            JSON-serializable entries, least recently used first.
+        """
+        now = self._clock()
+        return [
+            {
+                "exporter_ip": exporter_ip,
+                "domain_id": domain_id,
+                "ttl": expires_at - now,
+                "template": self.encode_template(template),
+            }
+            for (exporter_ip, domain_id, _), (template, expires_at) in self._templates.items()
+            if expires_at > now
+        ]
+
+    def load(self, entries: list[dict[str, Any]], elapsed: float = 0.0) -> int:
+        """Import templates from a snapshot.
+
+        Args:
+            entries: Entries produced by dump().
+            elapsed: Seconds since the snapshot was taken, deducted from
+                each template's remaining TTL.
+
+        Returns:
+            Number of templates loaded.
+        """
+        now = self._clock()
+        loaded = 0
+
+        for entry in entries:
+            ttl = entry["ttl"] - elapsed
+            if ttl <= 0:
+                continue
+
+            template = self.decode_template(entry["domain_id"], entry["template"])
+            key = (entry["exporter_ip"], entry["domain_id"], template.template_id)
+            self._store(key, template, now + ttl)
+            loaded += 1
+
+        return loaded
+
+    @abstractmethod
+    def encode_template(self, template: T) -> Any:
+        """Convert a template to a JSON-serializable value for snapshots."""
+        ...
+
+    @abstractmethod
+    def decode_template(self, domain_id: int, data: Any) -> T:
+        """Rebuild a template from encode_template() output."""
+        ...
+
+    def clear(self) -> None:
+        """Clear all templates."""
+        for exporter_ip in self._exporter_counts:
+            self._remove_gauge(exporter_ip)
+        self._templates.clear()
+        self._exporter_counts.clear()
+
+    @property
+    def size(self) -> int:
+        """Get number of cached templates."""
+        return len(self._templates)
+
+    @property
+    def exporter_counts(self) -> dict[str, int]:
+        """Get number of cached templates per exporter IP."""
+        return dict(self._exporter_counts)
+
+    def _store(self, key: TemplateKey, template: T, expires_at: float) -> None:
+        """Insert or replace a template, evicting the LRU entry when full."""
+        if key in self._templates:
+            self._templates[key] = (template, expires_at)
+            self._templates.move_to_end(key)
+            return
+
+        if len(self._templates) >= self._max_templates:
+            self._remove(next(iter(self._templates)), "capacity")
+
+        self._templates[key] = (template, expires_at)
+        self._adjust_count(key[0], 1)
+
+    def _remove(self, key: TemplateKey, reason: str) -> None:
+        """Drop a template and update counts and metrics."""
+        del self._templates[key]
+        self._adjust_count(key[0], -1)
+        TEMPLATE_EVICTIONS.labels(protocol=self._protocol_name, reason=reason).inc()
+
+    def _adjust_count(self, exporter_ip: str, delta: int) -> None:
+        """Update an exporter's template count and its gauge."""
+        count = self._exporter_counts.get(exporter_ip, 0) + delta
+
+        if count > 0:
+            self._exporter_counts[exporter_ip] = count
+            TEMPLATES_CACHED.labels(protocol=self._protocol_name, exporter=exporter_ip).set(count)
+        else:
+            # Drop the series so departed exporters do not linger
+            self._exporter_counts.pop(exporter_ip, None)
+            self._remove_gauge(exporter_ip)
+
+    def _remove_gauge(self, exporter_ip: str) -> None:
+        """Remove an exporter's template gauge series if present."""
+        with contextlib.suppress(KeyError):
+            TEMPLATES_CACHED.remove(self._protocol_name, exporter_ip)
+
+
+class PendingFlowsets:
+    """Bounded buffer for data sets whose template has not arrived yet.
+
+    Data sets are held per exporter, oldest first. When an exporter's
+    buffer is full its oldest data set is dropped, and data sets older
+    than max_age_seconds are discarded instead of replayed.
+    """
+
+    def __init__(
+        self,
+        protocol_name: str,
+        max_per_exporter: int = 64,
+        max_age_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize pending buffer.
+
+        Args:
+            protocol_name: Protocol label for metrics.
+            max_per_exporter: Maximum data sets held per exporter. 0 disables
+                buffering.
+            max_age_seconds: How long a data set waits for its template.
+            clock: Monotonic time source, in seconds.
+        """
+        self._protocol_name = protocol_name
+        self._max_per_exporter = max_per_exporter
+        self._max_age_seconds = max_age_seconds
+        self._clock = clock
+
+        # Per exporter: (key, data, context, added_at), oldest first
+        self._pending: dict[str, deque[tuple[TemplateKey, bytes, Any, float]]] = {}
+
+    def add(
+        self,
+        exporter_ip: str,
+        domain_id: int,
+        template_id: int,
+        data: bytes,
+        context: Any,
+    ) -> None:
+        """Hold a data set until its template arrives.
+
+        Args:
+            exporter_ip: Exporter IP address.
+            domain_id: Source ID (v9) or observation domain ID (IPFIX).
+            template_id: Template the data set refers to.
+            data: Data set bytes, including the set header.
+            context: Parser state needed to decode it later (packet header).
+        """
+        if self._max_per_exporter <= 0:
+            self._count("dropped")
+            return
+
+        now = self._clock()
+        queue = self._pending.get(exporter_ip)
+        if queue is None:
+            queue = self._pending[exporter_ip] = deque()
+
+        self._discard_expired(queue, now)
+        if len(queue) >= self._max_per_exporter:
+            queue.popleft()
+            self._count("dropped")
+
+        queue.append(((exporter_ip, domain_id, template_id), data, context, now))
+        self._count("buffered")
+
+    def pop(
+        self,
+        exporter_ip: str,
+        domain_id: int,
+        template_id: int,
+    ) -> list[tuple[bytes, Any]]:
+        """Take the buffered data sets for a template that just arrived.
+
+        Args:
+            exporter_ip: Exporter IP address.
+            domain_id: Source ID (v9) or observation domain ID (IPFIX).
+            template_id: Template ID.
+
+        Returns:
+            (data, context) pairs in arrival order.
+        """
+        queue = self._pending.get(exporter_ip)
+        if not queue:
+            return []
+
+        self._discard_expired(queue, self._clock())
+
+        key = (exporter_ip, domain_id, template_id)
+        matched = [(data, context) for k, data, context, _ in queue if k == key]
+        if matched:
+            remaining = deque(entry for entry in queue if entry[0] != key)
+            self._pending[exporter_ip] = remaining
+            queue = remaining
+            self._count("replayed", len(matched))
+
+        if not queue:
+            del self._pending[exporter_ip]
+
+        return matched
+
+    @property
+    def size(self) -> int:
+        """Get number of buffered data sets."""
+        return sum(len(queue) for queue in self._pending.values())
+
+    def _discard_expired(
+        self,
+        queue: deque[tuple[TemplateKey, bytes, Any, float]],
+        now: float,
+    ) -> None:
+        """Drop data sets that have waited too long, oldest first."""
+        cutoff = now - self._max_age_seconds
+        expired = 0
+        while queue and queue[0][3] < cutoff:
+            queue.popleft()
+            expired += 1
+        if expired:
+            self._count("expired", expired)
+
+    def _count(self, outcome: str, amount: int = 1) -> None:
+        """Count a pending data set outcome."""
+        TEMPLATE_PENDING_FLOWSETS.labels(protocol=self._protocol_name, outcome=outcome).inc(amount)
+
+
+# Snapshot file format version
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_templates(stores: Mapping[str, TemplateStore[Any]]) -> dict[str, Any]:
+    """Capture template stores as a JSON-serializable snapshot.
+
+    Args:
+        stores: Template stores keyed by protocol name.
+
+    Returns:
+        Snapshot for write_template_snapshot().
+    """
+    return {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "stores": {name: store.dump() for name, store in stores.items()},
+    }
+
+
+def write_template_snapshot(path: Path, snapshot: dict[str, Any]) -> None:
+    """Write a snapshot file.
+
+    The file is written to a temporary path and renamed into place, so a
+    crash mid-write never leaves a truncated snapshot. Safe to call from
+    an executor thread, since it does not touch the template stores.
+
+    Args:
+        path: Snapshot file path.
+        snapshot: Snapshot from snapshot_templates().
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(snapshot))
+    tmp_path.replace(path)
+
+
+def load_template_snapshot(path: Path, stores: Mapping[str, TemplateStore[Any]]) -> int:
+    """Load templates from a snapshot file into template stores.
+
+    Wall-clock time since the snapshot was written is deducted from each
+    template's remaining TTL. Stores missing from the snapshot, and
+    snapshot sections without a matching store, are skipped.
+
+    Args:
+        path: Snapshot file path.
+        stores: Template stores keyed by protocol name.
+
+    Returns:
+        Number of templates loaded.
+
+    Raises:
+        ValueError: If the snapshot is malformed or has an unknown version.
+    """
+    try:
+        payload = json.loads(path.read_text())
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid template snapshot {path}: {e}") from e
+
+    if payload.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported template snapshot version: {payload.get('version')}")
+
+    elapsed = max(0.0, time.time() - payload["saved_at"])
+
+    loaded = 0
+    for name, entries in payload["stores"].items():
+        store = stores.get(name)
+        if store is not None:
+            loaded += store.load(entries, elapsed)
+
+    return loaded
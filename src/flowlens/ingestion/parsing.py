@@ -0,0 +1,304 @@
+"""Packet parsing stage.
+
+Dispatches raw datagrams to the protocol parsers, either in the event
+loop or, with ParsePool, in worker processes so CPU-bound decoding does
+not hold up UDP reads.
+
+Each exporter is pinned to one pool worker, so its NetFlow v9/IPFIX
+templates always land in the same worker's template caches. Workers
+return flows as encoded columnar batches (see encode_batch) rather than
+pickled FlowRecord objects.
+"""
+
+import asyncio
+import multiprocessing
+import time
+import zlib
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from ipaddress import IPv4Address
+from pathlib import Path
+from typing import Any
+
+from flowlens.common.config import IngestionSettings
+from flowlens.common.logging import get_logger
+from flowlens.ingestion.parsers.base import FlowParser
+from flowlens.ingestion.parsers.batch import FlowBatch, decode_batch, encode_batch
+from flowlens.ingestion.parsers.ipfix import IPFIXParser
+from flowlens.ingestion.parsers.netflow_v5 import NetFlowV5Parser
+from flowlens.ingestion.parsers.netflow_v9 import NetFlowV9Parser
+from flowlens.ingestion.parsers.sflow import SFlowParser
+from flowlens.ingestion.parsers.templates import (
+    SNAPSHOT_VERSION,
+    PendingFlowsets,
+    TemplateStore,
+    load_template_snapshot,
+    snapshot_templates,
+)
+
+logger = get_logger(__name__)
+
+# (data, exporter_ip, listener protocol) as queued by the listeners
+Packet = tuple[bytes, str, str]
+
+
+def create_parsers(
+    settings: IngestionSettings,
+) -> tuple[dict[str, FlowParser], dict[str, TemplateStore[Any]]]:
+    """Create one parser per flow protocol.
+
+    Args:
+        settings: Ingestion settings (early data set buffering).
+
+    Returns:
+        Tuple of (parsers by protocol, template stores by protocol).
+    """
+    def pending(protocol_name: str) -> PendingFlowsets:
+        return PendingFlowsets(
+            protocol_name,
+            max_per_exporter=settings.template_pending_max_flowsets,
+            max_age_seconds=settings.template_pending_max_age_seconds,
+        )
+
+    netflow_v9 = NetFlowV9Parser(pending=pending("netflow_v9"))
+    ipfix = IPFIXParser(pending=pending("ipfix"))
+    parsers: dict[str, FlowParser] = {
+        "netflow_v5": NetFlowV5Parser(),
+        "netflow_v9": netflow_v9,
+        "ipfix": ipfix,
+        "sflow": SFlowParser(),
+    }
+    template_stores: dict[str, TemplateStore[Any]] = {
+        "netflow_v9": netflow_v9.template_cache,
+        "ipfix": ipfix.template_cache,
+    }
+    return parsers, template_stores
+
+
+def parse_packet(
+    parsers: dict[str, FlowParser],
+    data: bytes,
+    exporter_ip: str,
+    protocol: str,
+) -> tuple[str, FlowBatch]:
+    """Parse a single packet with the parser for its flow version.
+
+    Args:
+        parsers: Parsers by protocol, from create_parsers().
+        data: Raw packet data.
+        exporter_ip: IP of the exporter.
+        protocol: Protocol name from listener ("netflow" or "sflow").
+
+    Returns:
+        Tuple of (parser protocol name, batch of parsed flows).
+
+    Raises:
+        ValueError: If the packet is too short or its version unsupported.
+    """
+    if len(data) < 2:
+        raise ValueError("Packet too short")
+
+    # Route sFlow directly to sFlow parser
+    if protocol == "sflow":
+        parser = parsers.get("sflow")
+        if parser:
+            return "sflow", parser.parse_batch(data, IPv4Address(exporter_ip))
+        raise ValueError("sFlow parser not available")
+
+    # For NetFlow/IPFIX, detect version from first 2 bytes
+    version = int.from_bytes(data[0:2], byteorder="big")
+    name = {5: "netflow_v5", 9: "netflow_v9", 10: "ipfix"}.get(version)
+
+    parser = parsers.get(name) if name else None
+    if parser:
+        return name, parser.parse_batch(data, IPv4Address(exporter_ip))  # type: ignore[return-value]
+
+    raise ValueError(f"Unsupported flow version: {version}")
+
+
+# Per-process parser state in pool workers, set by _init_worker
+_worker_parsers: dict[str, FlowParser] = {}
+_worker_stores: dict[str, TemplateStore[Any]] = {}
+
+
+def _init_worker(settings: IngestionSettings, snapshot_paths: list[Path]) -> None:
+    """Pool worker initializer: build parsers and load template snapshots."""
+    global _worker_parsers, _worker_stores
+    _worker_parsers, _worker_stores = create_parsers(settings)
+
+    for path in snapshot_paths:
+        try:
+            load_template_snapshot(path, _worker_stores)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Failed to load template snapshot", path=str(path), error=str(e))
+
+
+def _parse_in_worker(
+    packets: list[tuple[bytes, str, str, int]],
+) -> tuple[bytes, dict[str, int], dict[tuple[str, str], int]]:
+    """Parse packets in a pool worker.
+
+    Args:
+        packets: (data, exporter_ip, protocol, sample_factor) tuples.
+
+    Returns:
+        Tuple of (encoded batch, flows parsed per protocol, errors per
+        (protocol, error type)).
+    """
+    batches: list[FlowBatch] = []
+    parsed: dict[str, int] = {}
+    errors: dict[tuple[str, str], int] = {}
+
+    for data, exporter_ip, protocol, sample_factor in packets:
+        try:
+            name, batch = parse_packet(_worker_parsers, data, exporter_ip, protocol)
+        except Exception as e:
+            key = (protocol, type(e).__name__)
+            errors[key] = errors.get(key, 0) + 1
+            continue
+
+        if sample_factor > 1:
+            batch.sampling_rate *= sample_factor
+        parsed[name] = parsed.get(name, 0) + len(batch)
+        batches.append(batch)
+
+    return encode_batch(FlowBatch.concat(batches)), parsed, errors
+
+
+def _snapshot_in_worker() -> dict[str, Any]:
+    """Snapshot a pool worker's template stores."""
+    return snapshot_templates(_worker_stores)
+
+
+class ParsePool:
+    """Parses packet batches in worker processes.
+
+    Each worker is a single-process executor, so packets from one
+    exporter are always parsed by the same process, in arrival order.
+    """
+
+    def __init__(self, workers: int, settings: IngestionSettings) -> None:
+        """Initialize parse pool.
+
+        Args:
+            workers: Number of worker processes.
+            settings: Ingestion settings passed to each worker's parsers.
+        """
+        self._workers = workers
+        self._settings = settings
+        self._snapshot_paths: list[Path] = []
+        self._context = multiprocessing.get_context("spawn")
+        self._executors: list[ProcessPoolExecutor] = []
+
+    @property
+    def workers(self) -> int:
+        """Number of worker processes."""
+        return self._workers
+
+    def start(self, snapshot_paths: Sequence[Path] = ()) -> None:
+        """Start the worker processes.
+
+        Args:
+            snapshot_paths: Template snapshots each worker loads at startup.
+        """
+        self._snapshot_paths = list(snapshot_paths)
+        self._executors = [self._create_executor() for _ in range(self._workers)]
+        logger.info("Parse pool started", workers=self._workers)
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        for executor in self._executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+        self._executors.clear()
+
+    def worker_for(self, exporter_ip: str) -> int:
+        """Index of the worker that owns an exporter's template state."""
+        return zlib.crc32(exporter_ip.encode()) % self._workers
+
+    async def parse(
+        self,
+        packets: Sequence[tuple[Packet, int]],
+    ) -> tuple[FlowBatch, dict[str, int], dict[tuple[str, str], int]]:
+        """Parse dequeued packets across the workers.
+
+        Args:
+            packets: ((data, exporter_ip, protocol), sample_factor) pairs,
+                as returned by get_sampled_batch().
+
+        Returns:
+            Tuple of (parsed flows, flows parsed per protocol, errors per
+            (protocol, error type)).
+        """
+        groups: dict[int, list[tuple[bytes, str, str, int]]] = {}
+        for (data, exporter_ip, protocol), sample_factor in packets:
+            groups.setdefault(self.worker_for(exporter_ip), []).append(
+                (data, exporter_ip, protocol, sample_factor)
+            )
+
+        loop = asyncio.get_running_loop()
+        indexes = list(groups)
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(self._executors[index], _parse_in_worker, groups[index])
+                for index in indexes
+            ),
+            return_exceptions=True,
+        )
+
+        batches: list[FlowBatch] = []
+        parsed: dict[str, int] = {}
+        errors: dict[tuple[str, str], int] = {}
+        for index, result in zip(indexes, results, strict=True):
+            if isinstance(result, BaseException):
+                self._handle_failure(index, result)
+                for _, _, protocol, _ in groups[index]:
+                    key = (protocol, type(result).__name__)
+                    errors[key] = errors.get(key, 0) + 1
+                continue
+
+            payload, worker_parsed, worker_errors = result
+            batches.append(decode_batch(payload))
+            for name, count in worker_parsed.items():
+                parsed[name] = parsed.get(name, 0) + count
+            for key, count in worker_errors.items():
+                errors[key] = errors.get(key, 0) + count
+
+        return FlowBatch.concat(batches), parsed, errors
+
+    async def snapshot(self) -> dict[str, Any]:
+        """Snapshot and merge every worker's template stores.
+
+        Returns:
+            Snapshot for write_template_snapshot().
+        """
+        loop = asyncio.get_running_loop()
+        snapshots = await asyncio.gather(
+            *(loop.run_in_executor(executor, _snapshot_in_worker) for executor in self._executors)
+        )
+
+        stores: dict[str, list[dict[str, Any]]] = {}
+        for snapshot in snapshots:
+            for name, entries in snapshot["stores"].items():
+                stores.setdefault(name, []).extend(entries)
+
+        return {"version": SNAPSHOT_VERSION, "saved_at": time.time(), "stores": stores}
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        """Start one single-process worker."""
+        return ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(self._settings, self._snapshot_paths),
+        )
+
+    def _handle_failure(self, index: int, error: BaseException) -> None:
+        """Log a failed worker call, replacing the worker if it died."""
+        if isinstance(error, BrokenProcessPool):
+            # Templates held by the dead worker are relearned from exporter refreshes
+            logger.error("Parse worker died, restarting", worker=index)
+            self._executors[index].shutdown(wait=False, cancel_futures=True)
+            self._executors[index] = self._create_executor()
+        else:
+            logger.error("Parse worker failed", worker=index, error=str(error))
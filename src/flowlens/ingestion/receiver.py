@@ -0,0 +1,145 @@
+"""Batched UDP receive loop.
+
+An alternative to asyncio's DatagramProtocol, which costs one callback
+per datagram. BatchReceiver registers a non-blocking socket with the
+event loop and, each time it becomes readable, drains up to a batch of
+datagrams with recvfrom_into into a preallocated buffer before handing
+the whole batch to the backpressure queue.
+"""
+
+import asyncio
+import socket
+
+from flowlens.common.logging import get_logger
+from flowlens.common.metrics import FLOWS_RECEIVED
+from flowlens.ingestion.backpressure import FairBackpressureQueue
+
+logger = get_logger(__name__)
+
+# Largest possible UDP payload
+MAX_DATAGRAM_SIZE = 65535
+
+
+def create_udp_socket(local_addr: tuple[str, int], reuse_port: bool = False) -> socket.socket:
+    """Create a bound, non-blocking UDP socket.
+
+    Args:
+        local_addr: (host, port) to bind.
+        reuse_port: Set SO_REUSEPORT so several processes can share the port.
+
+    Returns:
+        Bound socket.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.setblocking(False)
+        sock.bind(local_addr)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def publish_received_counts(protocol_name: str, received: dict[str, int]) -> None:
+    """Publish per-exporter receive counts to Prometheus.
+
+    Args:
+        protocol_name: Listener protocol name.
+        received: Packets received per exporter IP.
+    """
+    for exporter_ip, count in received.items():
+        FLOWS_RECEIVED.labels(
+            protocol=protocol_name,
+            exporter=exporter_ip,
+        ).inc(count)
+
+
+class BatchReceiver:
+    """Drains a UDP socket in batches from an event loop reader callback."""
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        queue: FairBackpressureQueue[tuple[bytes, str, str]],
+        protocol_name: str,
+        batch_size: int = 256,
+    ) -> None:
+        """Initialize batch receiver.
+
+        Args:
+            sock: Bound non-blocking UDP socket. Owned by the receiver.
+            queue: Backpressure queue for received packets.
+            protocol_name: Name of the expected protocol (for logging).
+            batch_size: Maximum datagrams read per readiness callback.
+        """
+        self._sock = sock
+        self._queue = queue
+        self._protocol_name = protocol_name
+        self._batch_size = batch_size
+
+        # Receive buffer reused for every datagram; payloads are copied out
+        self._buffer = bytearray(MAX_DATAGRAM_SIZE)
+        self._view = memoryview(self._buffer)
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        # Packets received per exporter since the last metrics flush
+        self._received: dict[str, int] = {}
+
+    def start(self) -> None:
+        """Register the socket with the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self._sock.fileno(), self._on_readable)
+        logger.info(
+            "UDP batch receiver started",
+            protocol=self._protocol_name,
+            batch_size=self._batch_size,
+        )
+
+    def close(self) -> None:
+        """Unregister and close the socket."""
+        if self._loop is not None:
+            self._loop.remove_reader(self._sock.fileno())
+            self._loop = None
+        self._sock.close()
+        logger.info(
+            "UDP batch receiver stopped",
+            protocol=self._protocol_name,
+        )
+
+    def _on_readable(self) -> None:
+        """Read up to batch_size datagrams and enqueue them together."""
+        recvfrom_into = self._sock.recvfrom_into
+        buffer = self._buffer
+        view = self._view
+        protocol_name = self._protocol_name
+        received = self._received
+
+        batch: list[tuple[bytes, str, str]] = []
+        for _ in range(self._batch_size):
+            try:
+                nbytes, addr = recvfrom_into(buffer)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as e:
+                logger.error(
+                    "UDP error",
+                    protocol=protocol_name,
+                    error=str(e),
+                )
+                break
+
+            exporter_ip = addr[0]
+            received[exporter_ip] = received.get(exporter_ip, 0) + 1
+            batch.append((bytes(view[:nbytes]), exporter_ip, protocol_name))
+
+        if batch:
+            self._queue.put_batch_nowait(batch)
+
+    def flush_metrics(self) -> None:
+        """Publish per-exporter receive counts accumulated since the last flush."""
+        if self._received:
+            received, self._received = self._received, {}
+            publish_received_counts(self._protocol_name, received)
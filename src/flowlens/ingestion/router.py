@@ -1,27 +1,50 @@
 """Flow routing to storage backends.
 
 Supports direct PostgreSQL writes and optional Kafka routing
-for high-scale deployments.
+(StreamRouter) for high-scale deployments.
 """
 
 import asyncio
 import json
+import time
 import uuid
 from abc import ABC, abstractmethod
+from collections import deque
 from datetime import datetime
+from ipaddress import IPv4Address
 from typing import Any
 
-from flowlens.common.config import get_settings
-from flowlens.common.database import get_session
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from flowlens.common.database import get_engine, get_session
 from flowlens.common.logging import get_logger
 from flowlens.common.metrics import (
     INGESTION_BATCH_SIZE,
     INGESTION_LATENCY,
+    INGESTION_WRITES_IN_FLIGHT,
 )
+from flowlens.common.stream import FlowLog
+from flowlens.common.work_queue import enqueue_flows, flow_shards
 from flowlens.ingestion.parsers.base import FlowRecord
+from flowlens.ingestion.parsers.batch import (
+    FlowBatch,
+    encode_batch,
+    nullable_to_list,
+    unpack_ips,
+    us_to_datetimes,
+)
+from flowlens.ingestion.spool import FlowSpool, SpoolFullError
 
 logger = get_logger(__name__)
 
+# Batch write durations kept until take_write_latencies() is called
+_MAX_WRITE_LATENCIES = 100
+
+# PostgreSQL SQLSTATE for unique_violation
+_UNIQUE_VIOLATION = "23505"
+
 
 class FlowRouter(ABC):
     """Abstract base class for flow routing."""
@@ -38,6 +61,38 @@ class FlowRouter(ABC):
         """
         ...
 
+    async def route_batch(self, batch: FlowBatch) -> int:
+        """Route a columnar flow batch to storage.
+
+        The default implementation materializes FlowRecords and calls
+        route(). Routers that can write columns directly override this.
+
+        Args:
+            batch: Flows to store.
+
+        Returns:
+            Number of records successfully stored.
+        """
+        return await self.route(batch.to_records())
+
+    def set_batch_size(self, batch_size: int) -> None:  # noqa: ARG002
+        """Change the number of flows written per batch.
+
+        No-op for routers that do not batch.
+
+        Args:
+            batch_size: New batch size.
+        """
+        return None
+
+    def take_write_latencies(self) -> list[float]:
+        """Take the batch write durations recorded since the last call.
+
+        Returns:
+            Seconds per batch write; empty for routers that do not batch.
+        """
+        return []
+
     @abstractmethod
     async def flush(self) -> None:
         """Flush any buffered records."""
@@ -49,23 +104,265 @@ class FlowRouter(ABC):
         ...
 
 
+# Column order used for bulk writes into flow_records
+FLOW_RECORD_COLUMNS: tuple[str, ...] = (
+    "id",
+    "timestamp",
+    "src_ip",
+    "src_port",
+    "dst_ip",
+    "dst_port",
+    "protocol",
+    "bytes_count",
+    "packets_count",
+    "tcp_flags",
+    "flow_start",
+    "flow_end",
+    "flow_duration_ms",
+    "exporter_ip",
+    "exporter_id",
+    "sampling_rate",
+    "flow_source",
+    "input_interface",
+    "output_interface",
+    "tos",
+    "extended_fields",
+)
+
+_ID = FLOW_RECORD_COLUMNS.index("id")
+_TIMESTAMP = FLOW_RECORD_COLUMNS.index("timestamp")
+
+
+def record_to_row(record: FlowRecord) -> tuple[Any, ...]:
+    """Convert a flow record to a row tuple in FLOW_RECORD_COLUMNS order.
+
+    IP addresses are passed through as ipaddress objects, which asyncpg
+    encodes natively for INET columns.
+
+    Args:
+        record: Flow record to convert.
+
+    Returns:
+        Row tuple suitable for binary COPY.
+    """
+    return (
+        uuid.uuid4(),
+        record.timestamp,
+        record.src_ip,
+        record.src_port,
+        record.dst_ip,
+        record.dst_port,
+        record.protocol,
+        record.bytes_count,
+        record.packets_count,
+        record.tcp_flags,
+        record.flow_start,
+        record.flow_end,
+        record.flow_duration_ms,
+        record.exporter_ip,
+        record.exporter_id,
+        record.sampling_rate,
+        record.flow_source,
+        record.input_interface,
+        record.output_interface,
+        record.tos,
+        json.dumps(record.extended_fields) if record.extended_fields else None,
+    )
+
+
+def batch_to_rows(batch: FlowBatch) -> list[tuple[Any, ...]]:
+    """Convert a flow batch to row tuples in FLOW_RECORD_COLUMNS order.
+
+    Produces the same rows as record_to_row, converting one column at a
+    time instead of going through FlowRecord objects. Rows use the
+    batch's record ids when it has them, and fresh UUIDs otherwise.
+
+    Args:
+        batch: Flow batch to convert.
+
+    Returns:
+        Row tuples suitable for binary COPY.
+    """
+    exporters: dict[int, IPv4Address] = {}
+    exporter_ips = [
+        exporters.get(ip) or exporters.setdefault(ip, IPv4Address(ip))
+        for ip in batch.exporter_ip.tolist()
+    ]
+
+    if batch.record_id is None:
+        ids = [uuid.uuid4() for _ in range(len(batch))]
+    else:
+        data = batch.record_id.tobytes()
+        ids = [uuid.UUID(bytes=data[i:i + 16]) for i in range(0, len(data), 16)]
+
+    return list(zip(
+        ids,
+        us_to_datetimes(batch.timestamp),
+        unpack_ips(batch.src_ip),
+        batch.src_port.tolist(),
+        unpack_ips(batch.dst_ip),
+        batch.dst_port.tolist(),
+        batch.protocol.tolist(),
+        batch.bytes_count.tolist(),
+        batch.packets_count.tolist(),
+        nullable_to_list(batch.tcp_flags),
+        us_to_datetimes(batch.flow_start),
+        us_to_datetimes(batch.flow_end),
+        nullable_to_list(batch.flow_duration_ms),
+        exporter_ips,
+        nullable_to_list(batch.exporter_id),
+        batch.sampling_rate.tolist(),
+        batch.flow_source.tolist(),
+        nullable_to_list(batch.input_interface),
+        nullable_to_list(batch.output_interface),
+        nullable_to_list(batch.tos),
+        [json.dumps(fields) if fields else None for fields in batch.extended_fields.tolist()],
+        strict=True,
+    ))
+
+
+def _is_unique_violation(error: Exception) -> bool:
+    """Whether a database error is a unique constraint violation."""
+    if isinstance(error, IntegrityError):
+        return getattr(error.orig, "sqlstate", None) == _UNIQUE_VIOLATION
+    return getattr(error, "sqlstate", None) == _UNIQUE_VIOLATION
+
+
+class BatchBuffer:
+    """Accumulates flow batches and cuts them into fixed-size batches."""
+
+    def __init__(self, batch_size: int) -> None:
+        """Initialize buffer.
+
+        Args:
+            batch_size: Number of flows per output batch.
+        """
+        self._batch_size = batch_size
+        self._batches: list[FlowBatch] = []
+        self._buffered = 0
+
+    def __len__(self) -> int:
+        return self._buffered
+
+    @property
+    def batch_size(self) -> int:
+        """Number of flows per output batch."""
+        return self._batch_size
+
+    @batch_size.setter
+    def batch_size(self, batch_size: int) -> None:
+        """Change the output batch size; applies from the next add()."""
+        self._batch_size = batch_size
+
+    def add(self, batch: FlowBatch) -> list[FlowBatch]:
+        """Buffer a batch and take every full batch now available.
+
+        Args:
+            batch: Flows to buffer.
+
+        Returns:
+            Batches of exactly batch_size flows, oldest first.
+        """
+        if len(batch):
+            self._batches.append(batch)
+            self._buffered += len(batch)
+
+        full: list[FlowBatch] = []
+        while self._buffered >= self._batch_size:
+            pending = FlowBatch.concat(self._batches)
+            self._batches = [pending.take(slice(self._batch_size, None))]
+            self._buffered -= self._batch_size
+            full.append(pending.take(slice(0, self._batch_size)))
+
+        return full
+
+    def drain(self) -> FlowBatch:
+        """Take everything buffered, however many flows."""
+        pending = FlowBatch.concat(self._batches)
+        self._batches = []
+        self._buffered = 0
+        return pending
+
+
 class PostgreSQLRouter(FlowRouter):
     """Route flows directly to PostgreSQL.
 
-    Uses batch inserts with asyncpg COPY for optimal performance.
-    Suitable for <10k flows/sec.
+    Uses binary COPY over the raw asyncpg connection for batch writes.
+    Suitable for <10k flows/sec. Each batch is queued for enrichment in
+    the same transaction (see flowlens.common.work_queue).
+
+    With a spool, a batch whose write fails or times out is appended to
+    the spool instead of being lost, and later batches go straight to the
+    spool until replay_batch() succeeds (see SpoolDrainer). A timed-out
+    write may still have committed, so batches get their row ids before
+    the first attempt and keep them in the spool; replaying a batch that
+    is already stored fails on the primary key and counts as done.
+
+    With writers > 0, full batches are handed to that many writer tasks
+    instead of being written inline, so the caller can keep parsing while
+    writes run. Each write checks out its own pooled connection, and
+    route_batch() only waits once max_in_flight batches are queued or
+    being written.
     """
 
-    def __init__(self, batch_size: int = 1000) -> None:
+    def __init__(
+        self,
+        batch_size: int = 1000,
+        use_copy: bool = True,
+        spool: FlowSpool | None = None,
+        write_timeout: float | None = None,
+        writers: int = 0,
+        max_in_flight: int = 4,
+    ) -> None:
         """Initialize PostgreSQL router.
 
         Args:
             batch_size: Number of records per batch insert.
+            use_copy: Write batches with binary COPY. When False, falls back
+                to a multi-row parameterised INSERT.
+            spool: Write-ahead spool for batches the database cannot take.
+            write_timeout: Seconds before a write is abandoned and spooled.
+                Only applies with a spool.
+            writers: Concurrent writer tasks. 0 writes each full batch
+                inline in route_batch().
+            max_in_flight: Batches queued or being written before
+                route_batch() waits. Only applies with writers.
         """
-        self._batch_size = batch_size
-        self._buffer: list[FlowRecord] = []
+        self._use_copy = use_copy
+        self._spool = spool
+        self._write_timeout = write_timeout if spool is not None else None
+        self._spooling = False
+        self._buffer = BatchBuffer(batch_size)
+        self._write_latencies: deque[float] = deque(maxlen=_MAX_WRITE_LATENCIES)
         self._lock = asyncio.Lock()
 
+        # Writer pipeline, started on the first full batch
+        self._writers = writers
+        self._in_flight = asyncio.Semaphore(max(max_in_flight, 1))
+        self._pending: asyncio.Queue[FlowBatch] = asyncio.Queue()
+        self._writer_tasks: list[asyncio.Task[None]] = []
+        self._in_flight_count = 0
+
+    @property
+    def spooling(self) -> bool:
+        """Whether new batches are going to the spool instead of the database."""
+        return self._spooling
+
+    @property
+    def in_flight(self) -> int:
+        """Batches handed to writer tasks and not yet written."""
+        return self._in_flight_count
+
+    def set_batch_size(self, batch_size: int) -> None:
+        """Change the number of records per batch insert."""
+        self._buffer.batch_size = batch_size
+
+    def take_write_latencies(self) -> list[float]:
+        """Take the batch insert durations recorded since the last call."""
+        latencies = list(self._write_latencies)
+        self._write_latencies.clear()
+        return latencies
+
     async def route(self, records: list[FlowRecord]) -> int:
         """Route records to PostgreSQL.
 
@@ -75,135 +372,245 @@ class PostgreSQLRouter(FlowRouter):
         Returns:
             Number of records stored.
         """
-        async with self._lock:
-            self._buffer.extend(records)
+        return await self.route_batch(FlowBatch.from_records(records))
 
-            stored = 0
-            while len(self._buffer) >= self._batch_size:
-                batch = self._buffer[:self._batch_size]
-                self._buffer = self._buffer[self._batch_size:]
-                stored += await self._insert_batch(batch)
+    async def route_batch(self, batch: FlowBatch) -> int:
+        """Route a columnar batch to PostgreSQL.
+
+        Args:
+            batch: Flows to store.
+
+        Returns:
+            Number of records stored, or with writers the number handed
+            to the writer tasks.
+        """
+        if self._writers:
+            submitted = 0
+            for full in self._buffer.add(batch):
+                await self._submit(full)
+                submitted += len(full)
+            return submitted
 
+        async with self._lock:
+            stored = 0
+            for full in self._buffer.add(batch):
+                stored += await self._insert_batch(full)
             return stored
 
     async def flush(self) -> None:
-        """Flush remaining buffered records."""
+        """Flush remaining buffered records.
+
+        With writers, also waits for every batch in flight to be written.
+        """
+        if self._writers:
+            if len(self._buffer):
+                await self._submit(self._buffer.drain())
+            await self._pending.join()
+            return
+
         async with self._lock:
-            if self._buffer:
-                await self._insert_batch(self._buffer)
-                self._buffer = []
+            if len(self._buffer):
+                await self._insert_batch(self._buffer.drain())
 
     async def close(self) -> None:
         """Close router after flushing."""
         await self.flush()
 
-    async def _insert_batch(self, records: list[FlowRecord]) -> int:
-        """Insert batch of records using bulk insert.
+        for task in self._writer_tasks:
+            task.cancel()
+        await asyncio.gather(*self._writer_tasks, return_exceptions=True)
+        self._writer_tasks.clear()
+
+    async def _submit(self, batch: FlowBatch) -> None:
+        """Queue a batch for the writer tasks, waiting while too many are in flight."""
+        if not self._writer_tasks:
+            self._writer_tasks = [
+                asyncio.create_task(self._writer_loop()) for _ in range(self._writers)
+            ]
+
+        await self._in_flight.acquire()
+        self._in_flight_count += 1
+        INGESTION_WRITES_IN_FLIGHT.inc()
+        self._pending.put_nowait(batch)
+
+    async def _writer_loop(self) -> None:
+        """Write queued batches until cancelled."""
+        while True:
+            batch = await self._pending.get()
+            try:
+                await self._insert_batch(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Already logged by _write_batch; without a spool the batch is lost
+                pass
+            finally:
+                self._in_flight_count -= 1
+                INGESTION_WRITES_IN_FLIGHT.dec()
+                self._in_flight.release()
+                self._pending.task_done()
+
+    async def replay_batch(self, batch: FlowBatch) -> None:
+        """Write a spooled batch directly to the database.
+
+        A successful replay means the database is reachable again, so new
+        batches stop going to the spool.
+
+        Args:
+            batch: Flows to write.
+
+        Raises:
+            Exception: If the write fails; the caller keeps the batch spooled.
+        """
+        try:
+            await self._write_batch(batch)
+        except Exception as e:
+            if batch.record_id is None or not _is_unique_violation(e):
+                raise
+            # The first attempt committed after all (e.g. it timed out late)
+            logger.info("Spooled flow batch was already stored", count=len(batch))
+
+        if self._spooling:
+            logger.info("Database recovered, resuming direct writes")
+            self._spooling = False
+
+    async def _insert_batch(self, batch: FlowBatch) -> int:
+        """Insert batch of records, spooling it if the database cannot take it.
 
         Args:
-            records: Records to insert.
+            batch: Flows to insert.
 
         Returns:
-            Number of records inserted.
+            Number of records inserted or spooled.
         """
-        if not records:
+        if not len(batch):
             return 0
 
-        import time
-        start = time.perf_counter()
+        if self._spool is None:
+            return await self._write_batch(batch)
+
+        # Fixed before the first attempt so a replay can recognize its rows
+        batch = batch.with_record_ids()
+
+        if not self._spooling:
+            try:
+                return await self._write_batch(batch)
+            except Exception:
+                logger.warning("Database write failed, spooling flows", count=len(batch))
+                self._spooling = True
 
         try:
-            async with get_session() as session:
-                # Build INSERT statement with multiple value sets
-                # Using raw SQL for performance
-                values = []
-                params: dict[str, Any] = {}
-
-                for i, record in enumerate(records):
-                    record_id = uuid.uuid4()
-                    prefix = f"r{i}_"
-
-                    values.append(f"""(
-                        :{prefix}id,
-                        :{prefix}timestamp,
-                        :{prefix}src_ip,
-                        :{prefix}src_port,
-                        :{prefix}dst_ip,
-                        :{prefix}dst_port,
-                        :{prefix}protocol,
-                        :{prefix}bytes_count,
-                        :{prefix}packets_count,
-                        :{prefix}tcp_flags,
-                        :{prefix}flow_start,
-                        :{prefix}flow_end,
-                        :{prefix}flow_duration_ms,
-                        :{prefix}exporter_ip,
-                        :{prefix}exporter_id,
-                        :{prefix}sampling_rate,
-                        :{prefix}flow_source,
-                        :{prefix}input_interface,
-                        :{prefix}output_interface,
-                        :{prefix}tos,
-                        :{prefix}extended_fields
-                    )""")
-
-                    params[f"{prefix}id"] = record_id
-                    params[f"{prefix}timestamp"] = record.timestamp
-                    params[f"{prefix}src_ip"] = str(record.src_ip)
-                    params[f"{prefix}src_port"] = record.src_port
-                    params[f"{prefix}dst_ip"] = str(record.dst_ip)
-                    params[f"{prefix}dst_port"] = record.dst_port
-                    params[f"{prefix}protocol"] = record.protocol
-                    params[f"{prefix}bytes_count"] = record.bytes_count
-                    params[f"{prefix}packets_count"] = record.packets_count
-                    params[f"{prefix}tcp_flags"] = record.tcp_flags
-                    params[f"{prefix}flow_start"] = record.flow_start
-                    params[f"{prefix}flow_end"] = record.flow_end
-                    params[f"{prefix}flow_duration_ms"] = record.flow_duration_ms
-                    params[f"{prefix}exporter_ip"] = str(record.exporter_ip)
-                    params[f"{prefix}exporter_id"] = record.exporter_id
-                    params[f"{prefix}sampling_rate"] = record.sampling_rate
-                    params[f"{prefix}flow_source"] = record.flow_source
-                    params[f"{prefix}input_interface"] = record.input_interface
-                    params[f"{prefix}output_interface"] = record.output_interface
-                    params[f"{prefix}tos"] = record.tos
-                    params[f"{prefix}extended_fields"] = (
-                        json.dumps(record.extended_fields) if record.extended_fields else None
-                    )
+            self._spool.append(batch)
+        except (SpoolFullError, OSError) as e:
+            logger.error("Failed to spool flow batch", error=str(e), count=len(batch))
+            return 0
 
-                sql = f"""
-                    INSERT INTO flow_records (
-                        id, timestamp, src_ip, src_port, dst_ip, dst_port,
-                        protocol, bytes_count, packets_count, tcp_flags,
-                        flow_start, flow_end, flow_duration_ms,
-                        exporter_ip, exporter_id, sampling_rate, flow_source,
-                        input_interface, output_interface, tos, extended_fields
-                    ) VALUES {', '.join(values)}
-                """
+        return len(batch)
 
-                from sqlalchemy import text
-                await session.execute(text(sql), params)
+    async def _write_batch(self, batch: FlowBatch) -> int:
+        """Write a batch to the database using bulk insert.
+
+        Args:
+            batch: Flows to insert.
+
+        Returns:
+            Number of records inserted.
+        """
+        start = time.perf_counter()
+
+        try:
+            write = self._copy_batch(batch) if self._use_copy else self._insert_values_batch(batch)
+            if self._write_timeout is not None:
+                await asyncio.wait_for(write, self._write_timeout)
+            else:
+                await write
 
             duration = time.perf_counter() - start
             INGESTION_LATENCY.observe(duration)
-            INGESTION_BATCH_SIZE.observe(len(records))
+            INGESTION_BATCH_SIZE.observe(len(batch))
+            self._write_latencies.append(duration)
 
             logger.debug(
                 "Inserted flow batch",
-                count=len(records),
+                count=len(batch),
                 duration_ms=round(duration * 1000, 2),
+                method="copy" if self._use_copy else "insert",
             )
 
-            return len(records)
+            return len(batch)
 
         except Exception as e:
             logger.error(
                 "Failed to insert flow batch",
-                error=str(e),
-                count=len(records),
+                error=str(e) or type(e).__name__,
+                count=len(batch),
             )
             raise
 
+    async def _copy_batch(self, batch: FlowBatch) -> None:
+        """Write flows with binary COPY FROM STDIN.
+
+        Args:
+            batch: Flows to write.
+        """
+        rows = batch_to_rows(batch)
+
+        async with get_engine().connect() as conn:
+            raw_conn = await conn.get_raw_connection()
+            driver_conn = raw_conn.driver_connection
+            async with driver_conn.transaction():
+                await driver_conn.copy_records_to_table(
+                    "flow_records",
+                    records=rows,
+                    columns=FLOW_RECORD_COLUMNS,
+                )
+                await enqueue_flows(
+                    driver_conn,
+                    [row[_ID] for row in rows],
+                    [row[_TIMESTAMP] for row in rows],
+                    flow_shards(batch.src_ip, batch.dst_ip),
+                )
+
+    async def _insert_values_batch(self, batch: FlowBatch) -> None:
+        """Write flows with a single multi-row parameterised INSERT.
+
+        Kept as a fallback and as the baseline for router benchmarks.
+
+        Args:
+            batch: Flows to write.
+        """
+        rows = batch_to_rows(batch)
+
+        async with get_session() as session:
+            # Build INSERT statement with multiple value sets
+            values = []
+            params: dict[str, Any] = {}
+
+            for i, row in enumerate(rows):
+                prefix = f"r{i}_"
+                values.append(
+                    "(" + ", ".join(f":{prefix}{col}" for col in FLOW_RECORD_COLUMNS) + ")"
+                )
+
+                for col, value in zip(FLOW_RECORD_COLUMNS, row, strict=True):
+                    params[f"{prefix}{col}"] = value
+
+            sql = f"""
+                INSERT INTO flow_records ({', '.join(FLOW_RECORD_COLUMNS)})
+                VALUES {', '.join(values)}
+            """
+
+            await session.execute(text(sql), params)
+
+            conn = await session.connection()
+            raw_conn = await conn.get_raw_connection()
+            await enqueue_flows(
+                raw_conn.driver_connection,
+                [row[_ID] for row in rows],
+                [row[_TIMESTAMP] for row in rows],
+                flow_shards(batch.src_ip, batch.dst_ip),
+            )
+
 
 class MemoryRouter(FlowRouter):
     """In-memory router for testing.
@@ -236,6 +643,107 @@ class MemoryRouter(FlowRouter):
             self._records.clear()
 
 
+class StreamRouter(FlowRouter):
+    """Route flows to a log topic.
+
+    Each batch of batch_size flows is split by enrichment queue shard
+    (see flow_shards) and published as one encode_batch() message per
+    shard, keyed by the shard. Kafka then sends a shard to a single
+    partition, so the consumer that owns it is the only enrichment worker
+    handling those IP pairs.
+    """
+
+    def __init__(self, log: FlowLog, topic: str, batch_size: int = 1000) -> None:
+        """Initialize stream router.
+
+        Args:
+            log: Log to publish to.
+            topic: Topic for flow batches.
+            batch_size: Number of flows per message.
+        """
+        self._log = log
+        self._topic = topic
+        self._buffer = BatchBuffer(batch_size)
+        self._write_latencies: deque[float] = deque(maxlen=_MAX_WRITE_LATENCIES)
+        self._lock = asyncio.Lock()
+
+    def set_batch_size(self, batch_size: int) -> None:
+        """Change the number of flows per message."""
+        self._buffer.batch_size = batch_size
+
+    def take_write_latencies(self) -> list[float]:
+        """Take the publish durations recorded since the last call."""
+        latencies = list(self._write_latencies)
+        self._write_latencies.clear()
+        return latencies
+
+    async def route(self, records: list[FlowRecord]) -> int:
+        """Publish records to the log.
+
+        Args:
+            records: Flow records to publish.
+
+        Returns:
+            Number of records published.
+        """
+        return await self.route_batch(FlowBatch.from_records(records))
+
+    async def route_batch(self, batch: FlowBatch) -> int:
+        """Publish a columnar batch to the log.
+
+        Args:
+            batch: Flows to publish.
+
+        Returns:
+            Number of records published.
+        """
+        async with self._lock:
+            published = 0
+            for full in self._buffer.add(batch):
+                published += await self._publish(full)
+            return published
+
+    async def flush(self) -> None:
+        """Publish buffered flows and wait until the log has them."""
+        async with self._lock:
+            if len(self._buffer):
+                await self._publish(self._buffer.drain())
+            await self._log.flush()
+
+    async def close(self) -> None:
+        """Flush and close the log."""
+        await self.flush()
+        await self._log.close()
+
+    async def _publish(self, batch: FlowBatch) -> int:
+        """Encode and publish a batch as one message per shard.
+
+        Args:
+            batch: Flows to publish.
+
+        Returns:
+            Number of records published.
+        """
+        start = time.perf_counter()
+
+        shards = flow_shards(batch.src_ip, batch.dst_ip)
+        order = np.argsort(shards, kind="stable")
+        bounds = np.flatnonzero(np.diff(shards[order])) + 1
+        for rows in np.split(order, bounds):
+            if len(rows):
+                await self._log.publish(
+                    self._topic,
+                    encode_batch(batch.take(rows)),
+                    key=str(shards[rows[0]]).encode(),
+                )
+
+        duration = time.perf_counter() - start
+        INGESTION_LATENCY.observe(duration)
+        INGESTION_BATCH_SIZE.observe(len(batch))
+        self._write_latencies.append(duration)
+        return len(batch)
+
+
 class AdaptiveRouter(FlowRouter):
     """Adaptive router that switches between PostgreSQL and Kafka.
 
@@ -246,23 +754,29 @@ class AdaptiveRouter(FlowRouter):
         self,
         kafka_threshold: int = 10000,
         measurement_window: float = 10.0,
+        postgres_router: FlowRouter | None = None,
+        kafka_router: FlowRouter | None = None,
     ) -> None:
         """Initialize adaptive router.
 
         Args:
             kafka_threshold: Flows/sec threshold for Kafka routing.
             measurement_window: Window for throughput calculation.
+            postgres_router: Router for direct database writes. Creates a
+                PostgreSQLRouter if not provided.
+            kafka_router: Router used above the threshold, typically a
+                StreamRouter. Without one, all flows go to PostgreSQL.
         """
         self._kafka_threshold = kafka_threshold
         self._measurement_window = measurement_window
 
-        self._postgres_router = PostgreSQLRouter()
-        self._kafka_router: FlowRouter | None = None
+        self._postgres_router = postgres_router or PostgreSQLRouter()
+        self._kafka_router = kafka_router
 
         self._flow_count = 0
         self._window_start = datetime.utcnow()
         self._current_throughput = 0.0
-        self._use_kafka = False
+        self._use_kafka = kafka_router is not None and kafka_threshold == 0
 
         self._lock = asyncio.Lock()
 
@@ -285,8 +799,32 @@ class AdaptiveRouter(FlowRouter):
         Returns:
             Number of records routed.
         """
+        router = await self._select_router(len(records))
+        return await router.route(records)
+
+    async def route_batch(self, batch: FlowBatch) -> int:
+        """Route a columnar batch based on current throughput.
+
+        Args:
+            batch: Flows to route.
+
+        Returns:
+            Number of records routed.
+        """
+        router = await self._select_router(len(batch))
+        return await router.route_batch(batch)
+
+    async def _select_router(self, count: int) -> FlowRouter:
+        """Record routed flows and pick the backend for them.
+
+        Args:
+            count: Number of flows about to be routed.
+
+        Returns:
+            Router to use.
+        """
         async with self._lock:
-            self._flow_count += len(records)
+            self._flow_count += count
 
             # Check if measurement window elapsed
             now = datetime.utcnow()
@@ -311,9 +849,21 @@ class AdaptiveRouter(FlowRouter):
 
         # Route to appropriate backend
         if self._use_kafka and self._kafka_router:
-            return await self._kafka_router.route(records)
-        else:
-            return await self._postgres_router.route(records)
+            return self._kafka_router
+        return self._postgres_router
+
+    def set_batch_size(self, batch_size: int) -> None:
+        """Change the batch size of both routers."""
+        self._postgres_router.set_batch_size(batch_size)
+        if self._kafka_router:
+            self._kafka_router.set_batch_size(batch_size)
+
+    def take_write_latencies(self) -> list[float]:
+        """Take the batch write durations of both routers."""
+        latencies = self._postgres_router.take_write_latencies()
+        if self._kafka_router:
+            latencies += self._kafka_router.take_write_latencies()
+        return latencies
 
     async def flush(self) -> None:
         """Flush both routers."""
@@ -5,33 +5,55 @@ the appropriate parser and storage backend.
 """
 
 import asyncio
-from ipaddress import IPv4Address
+import time
+from operator import itemgetter
+from pathlib import Path
 from typing import Any
 
-from flowlens.common.config import IngestionSettings, get_settings
+from flowlens.common.config import IngestionSettings, KafkaSettings, get_settings
 from flowlens.common.logging import get_logger
 from flowlens.common.metrics import (
     FLOWS_PARSE_ERRORS,
     FLOWS_PARSED,
-    FLOWS_RECEIVED,
+    INGESTION_ADAPTIVE_SETTING,
 )
-from flowlens.ingestion.backpressure import BackpressureQueue
-from flowlens.ingestion.parsers.base import FlowParser, FlowRecord
-from flowlens.ingestion.parsers.ipfix import IPFIXParser
-from flowlens.ingestion.parsers.netflow_v5 import NetFlowV5Parser
-from flowlens.ingestion.parsers.netflow_v9 import NetFlowV9Parser
-from flowlens.ingestion.parsers.sflow import SFlowParser
-from flowlens.ingestion.router import FlowRouter, PostgreSQLRouter
+from flowlens.common.stream import create_flow_log
+from flowlens.ingestion.aggregation import FlowAggregationStage
+from flowlens.ingestion.backpressure import AdaptiveBackpressure, FairBackpressureQueue
+from flowlens.ingestion.parsers.batch import FlowBatch
+from flowlens.ingestion.parsers.templates import (
+    load_template_snapshot,
+    snapshot_templates,
+    write_template_snapshot,
+)
+from flowlens.ingestion.parsing import Packet, ParsePool, create_parsers, parse_packet
+from flowlens.ingestion.receiver import (
+    BatchReceiver,
+    create_udp_socket,
+    publish_received_counts,
+)
+from flowlens.ingestion.router import (
+    AdaptiveRouter,
+    FlowRouter,
+    PostgreSQLRouter,
+    StreamRouter,
+)
+from flowlens.ingestion.spool import FlowSpool, SpoolDrainer
 
 logger = get_logger(__name__)
 
 
 class FlowProtocol(asyncio.DatagramProtocol):
-    """UDP protocol handler for flow packets."""
+    """UDP protocol handler for flow packets.
+
+    datagram_received is the per-packet hot path: it enqueues synchronously
+    and only bumps a local per-exporter counter. Counters are published to
+    Prometheus by flush_metrics() on the collector's metrics interval.
+    """
 
     def __init__(
         self,
-        queue: BackpressureQueue[tuple[bytes, str]],
+        queue: FairBackpressureQueue[tuple[bytes, str, str]],
         protocol_name: str,
     ) -> None:
         """Initialize protocol handler.
@@ -44,6 +66,9 @@ class FlowProtocol(asyncio.DatagramProtocol):
         self._protocol_name = protocol_name
         self._transport: asyncio.DatagramTransport | None = None
 
+        # Packets received per exporter since the last metrics flush
+        self._received: dict[str, int] = {}
+
     def connection_made(self, transport: asyncio.DatagramTransport) -> None:  # type: ignore[override]
         """Called when transport is ready."""
         self._transport = transport
@@ -60,19 +85,17 @@ class FlowProtocol(asyncio.DatagramProtocol):
             addr: (host, port) tuple of sender.
         """
         exporter_ip = addr[0]
-        logger.debug(
-            "Received packet",
-            protocol=self._protocol_name,
-            exporter=exporter_ip,
-            size=len(data),
-        )
-        FLOWS_RECEIVED.labels(
-            protocol=self._protocol_name,
-            exporter=exporter_ip,
-        ).inc()
+        received = self._received
+        received[exporter_ip] = received.get(exporter_ip, 0) + 1
+
+        # Synchronous put; backpressure sampling/dropping is applied inline
+        self._queue.put_nowait((data, exporter_ip, self._protocol_name))
 
-        # Non-blocking put to queue (include protocol name for routing)
-        asyncio.create_task(self._queue.put((data, exporter_ip, self._protocol_name)))
+    def flush_metrics(self) -> None:
+        """Publish per-exporter receive counts accumulated since the last flush."""
+        if self._received:
+            received, self._received = self._received, {}
+            publish_received_counts(self._protocol_name, received)
 
     def error_received(self, exc: Exception) -> None:
         """Called when a send/receive operation fails."""
@@ -107,38 +130,131 @@ class FlowCollector:
         self,
         settings: IngestionSettings | None = None,
         router: FlowRouter | None = None,
+        worker_id: int | None = None,
+        kafka_settings: KafkaSettings | None = None,
     ) -> None:
         """Initialize flow collector.
 
         Args:
             settings: Ingestion settings.
-            router: Flow router. Creates PostgreSQLRouter if not provided.
+            router: Flow router. Creates PostgreSQLRouter if not provided,
+                with a write-ahead spool when spool_path is configured.
+            worker_id: Worker index when running under CollectorSupervisor.
+            kafka_settings: Stream settings. When enabled, the default router
+                streams flows to the log above kafka_settings.route_threshold.
         """
         self._settings = settings or get_settings().ingestion
-        self._router = router or PostgreSQLRouter(
-            batch_size=self._settings.batch_size,
-        )
 
-        # Packet queue (data, exporter_ip, protocol_name)
-        self._queue: BackpressureQueue[tuple[bytes, str, str]] = BackpressureQueue(
+        self._spool: FlowSpool | None = None
+        self._spool_drainer: SpoolDrainer | None = None
+
+        if router is None:
+            postgres_router = self._create_postgres_router(worker_id)
+            if self._spool is not None:
+                self._spool_drainer = SpoolDrainer(
+                    self._spool,
+                    postgres_router.replay_batch,
+                    interval=self._settings.spool_drain_interval_seconds,
+                )
+            router = postgres_router
+
+            if kafka_settings is not None and kafka_settings.enabled:
+                router = AdaptiveRouter(
+                    kafka_threshold=kafka_settings.route_threshold,
+                    postgres_router=postgres_router,
+                    kafka_router=StreamRouter(
+                        create_flow_log(kafka_settings),
+                        kafka_settings.topic_flows,
+                        batch_size=self._settings.batch_size,
+                    ),
+                )
+        self._router = router
+
+        # Optional aggregation between parsing and routing
+        self._aggregation: FlowAggregationStage | None = None
+        if self._settings.aggregation_mode != "off":
+            self._aggregation = FlowAggregationStage(
+                max_buckets=self._settings.aggregation_max_buckets,
+                flush_delay_seconds=self._settings.aggregation_flush_delay_seconds,
+                raw_sample_rate=(
+                    self._settings.aggregation_raw_sample_rate
+                    if self._settings.aggregation_mode == "aggregate_sampled"
+                    else None
+                ),
+            )
+
+        # Packet queue (data, exporter_ip, protocol_name), fair across exporters
+        self._queue: FairBackpressureQueue[Packet] = FairBackpressureQueue(
             self._settings,
+            key=itemgetter(1),
         )
 
-        # Parsers by protocol
-        self._parsers: dict[str, FlowParser] = {
-            "netflow_v5": NetFlowV5Parser(),
-            "netflow_v9": NetFlowV9Parser(),
-            "ipfix": IPFIXParser(),
-            "sflow": SFlowParser(),
-        }
+        # Closed-loop tuning of queue thresholds and batch size
+        self._batch_size = self._settings.batch_size
+        self._adaptive: AdaptiveBackpressure | None = None
+        if self._settings.adaptive_backpressure:
+            self._adaptive = AdaptiveBackpressure(
+                target_throughput=self._settings.adaptive_target_throughput,
+                adjustment_interval=self._settings.adaptive_interval_seconds,
+                target_latency=self._settings.adaptive_target_latency_seconds,
+            )
+        self._interval_flows = 0
+        self._interval_start = time.monotonic()
+
+        # Parsers by protocol, and the template caches to snapshot
+        self._parsers, self._template_stores = create_parsers(self._settings)
 
-        # Transports
+        # Optional parse worker processes; parsers above then stay unused
+        self._parse_pool: ParsePool | None = None
+        if self._settings.parse_workers > 0:
+            self._parse_pool = ParsePool(self._settings.parse_workers, self._settings)
+
+        # Each worker writes its own snapshot file
+        snapshot_path = self._settings.template_snapshot_path
+        if snapshot_path is not None and worker_id is not None:
+            snapshot_path = snapshot_path.with_name(f"{snapshot_path.name}.{worker_id}")
+        self._template_snapshot_path = snapshot_path
+
+        # Transports and their protocol handlers (receive_mode="protocol")
         self._transports: list[asyncio.DatagramTransport] = []
+        self._protocols: list[FlowProtocol] = []
 
-        # Processing task
+        # Batch receivers (receive_mode="batch")
+        self._receivers: list[BatchReceiver] = []
+
+        # Processing and metrics tasks
         self._processor_task: asyncio.Task[None] | None = None
+        self._metrics_task: asyncio.Task[None] | None = None
+        self._snapshot_task: asyncio.Task[None] | None = None
         self._running = False
 
+    def _create_postgres_router(self, worker_id: int | None) -> PostgreSQLRouter:
+        """Create the default router, with a spool if one is configured."""
+        spool_path = self._settings.spool_path
+        if spool_path is None:
+            return PostgreSQLRouter(
+                batch_size=self._settings.batch_size,
+                writers=self._settings.write_workers,
+                max_in_flight=self._settings.write_max_in_flight,
+            )
+
+        # Each worker spools to its own directory
+        if worker_id is not None:
+            spool_path = spool_path / str(worker_id)
+
+        self._spool = FlowSpool(
+            spool_path,
+            segment_bytes=self._settings.spool_segment_bytes,
+            max_bytes=self._settings.spool_max_bytes,
+        )
+        return PostgreSQLRouter(
+            batch_size=self._settings.batch_size,
+            spool=self._spool,
+            write_timeout=self._settings.spool_write_timeout_seconds,
+            writers=self._settings.write_workers,
+            max_in_flight=self._settings.write_max_in_flight,
+        )
+
     async def start(self) -> None:
         """Start the flow collector."""
         if self._running:
@@ -147,37 +263,56 @@ class FlowCollector:
         self._running = True
         logger.info("Starting flow collector")
 
-        # Start UDP listeners
-        loop = asyncio.get_event_loop()
+        if self._parse_pool is not None:
+            # Workers load the snapshots into their own template caches
+            snapshot_paths = (
+                self._snapshot_files() if self._template_snapshot_path is not None else []
+            )
+            self._parse_pool.start(snapshot_paths)
+        elif self._template_snapshot_path is not None:
+            self._load_templates()
+
+        if self._spool is not None:
+            self._spool.open()
+
+        # Multiple worker processes share the ports via SO_REUSEPORT. The kernel
+        # hashes each exporter's address tuple to a single socket, so an
+        # exporter's templates always reach the same worker's parsers.
+        reuse_port = self._settings.worker_processes > 1
 
         # NetFlow listener (handles v5, v9, IPFIX on same port)
-        netflow_transport, _ = await loop.create_datagram_endpoint(
-            lambda: FlowProtocol(self._queue, "netflow"),
-            local_addr=(str(self._settings.bind_address), self._settings.netflow_port),
-        )
-        self._transports.append(netflow_transport)
+        await self._start_listener("netflow", self._settings.netflow_port, reuse_port)
 
         logger.info(
             "NetFlow listener started",
             bind=str(self._settings.bind_address),
             port=self._settings.netflow_port,
+            receive_mode=self._settings.receive_mode,
         )
 
         # sFlow listener
-        sflow_transport, _ = await loop.create_datagram_endpoint(
-            lambda: FlowProtocol(self._queue, "sflow"),
-            local_addr=(str(self._settings.bind_address), self._settings.sflow_port),
-        )
-        self._transports.append(sflow_transport)
+        await self._start_listener("sflow", self._settings.sflow_port, reuse_port)
 
         logger.info(
             "sFlow listener started",
             bind=str(self._settings.bind_address),
             port=self._settings.sflow_port,
+            receive_mode=self._settings.receive_mode,
         )
 
-        # Start packet processor
+        # Start packet processor and metrics publisher
         self._processor_task = asyncio.create_task(self._process_packets())
+        self._metrics_task = asyncio.create_task(self._flush_metrics_loop())
+
+        if self._template_snapshot_path is not None:
+            self._snapshot_task = asyncio.create_task(self._snapshot_templates_loop())
+
+        if self._spool_drainer is not None:
+            self._spool_drainer.start()
+
+        # Write aggregation windows as they close
+        if self._aggregation is not None:
+            self._aggregation.start()
 
         logger.info("Flow collector started")
 
@@ -189,25 +324,80 @@ class FlowCollector:
         self._running = False
         logger.info("Stopping flow collector")
 
-        # Stop processor
-        if self._processor_task:
-            self._processor_task.cancel()
-            try:
-                await self._processor_task
-            except asyncio.CancelledError:
-                pass
+        # Stop processor, metrics publisher and template snapshots
+        for task in (self._processor_task, self._metrics_task, self._snapshot_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
 
-        # Close transports
+        # Close transports and receivers
         for transport in self._transports:
             transport.close()
         self._transports.clear()
 
-        # Flush router
+        for receiver in self._receivers:
+            receiver.close()
+
+        self._flush_metrics()
+        self._protocols.clear()
+        self._receivers.clear()
+
+        if self._spool_drainer is not None:
+            await self._spool_drainer.stop()
+
+        # Write open aggregation windows
+        if self._aggregation is not None:
+            await self._aggregation.stop()
+
+        # Flush router (into the spool if the database is still down)
         await self._router.flush()
         await self._router.close()
 
+        if self._spool is not None:
+            self._spool.publish_metrics()
+            self._spool.close()
+
+        if self._template_snapshot_path is not None:
+            await self._save_templates()
+
+        if self._parse_pool is not None:
+            self._parse_pool.close()
+
         logger.info("Flow collector stopped")
 
+    async def _start_listener(self, protocol_name: str, port: int, reuse_port: bool) -> None:
+        """Start a UDP listener in the configured receive mode.
+
+        Args:
+            protocol_name: Listener protocol name ("netflow" or "sflow").
+            port: UDP port to bind.
+            reuse_port: Bind with SO_REUSEPORT.
+        """
+        local_addr = (str(self._settings.bind_address), port)
+
+        if self._settings.receive_mode == "batch":
+            receiver = BatchReceiver(
+                create_udp_socket(local_addr, reuse_port=reuse_port),
+                self._queue,
+                protocol_name,
+                batch_size=self._settings.receive_batch_size,
+            )
+            receiver.start()
+            self._receivers.append(receiver)
+            return
+
+        loop = asyncio.get_event_loop()
+        transport, protocol = await loop.create_datagram_endpoint(
+            lambda: FlowProtocol(self._queue, protocol_name),
+            local_addr=local_addr,
+            reuse_port=reuse_port,
+        )
+        self._transports.append(transport)
+        self._protocols.append(protocol)
+
     async def _process_packets(self) -> None:
         """Process packets from the queue."""
         batch_timeout = self._settings.batch_timeout_ms / 1000
@@ -215,35 +405,25 @@ class FlowCollector:
         while self._running:
             try:
                 # Get batch of packets
-                packets = await self._queue.get_batch(
-                    max_items=self._settings.batch_size,
+                packets = await self._queue.get_sampled_batch(
+                    max_items=self._batch_size,
                     timeout=batch_timeout,
                 )
 
+                if self._adaptive is not None:
+                    self._adjust_backpressure()
+
                 if not packets:
                     continue
 
-                # Parse all packets
-                records: list[FlowRecord] = []
-                for data, exporter_ip, protocol in packets:
-                    try:
-                        parsed = self._parse_packet(data, exporter_ip, protocol)
-                        records.extend(parsed)
-                    except Exception as e:
-                        FLOWS_PARSE_ERRORS.labels(
-                            protocol=protocol,
-                            error_type=type(e).__name__,
-                        ).inc()
-                        logger.debug(
-                            "Failed to parse packet",
-                            exporter=exporter_ip,
-                            protocol=protocol,
-                            error=str(e),
-                        )
-
-                # Route to storage
-                if records:
-                    await self._router.route(records)
+                batch = await self._parse_packets(packets)
+
+                # Route to storage, or fold into aggregates first
+                self._interval_flows += len(batch)
+                if self._aggregation is not None:
+                    batch = self._aggregation.add(batch)
+                if len(batch):
+                    await self._router.route_batch(batch)
 
             except asyncio.CancelledError:
                 break
@@ -254,13 +434,192 @@ class FlowCollector:
                 )
                 await asyncio.sleep(1)
 
+    async def _parse_packets(self, packets: list[tuple[Packet, int]]) -> FlowBatch:
+        """Parse a dequeued batch, in the parse pool if one is configured.
+
+        Args:
+            packets: ((data, exporter_ip, protocol), sample_factor) pairs.
+
+        Returns:
+            All flows parsed from the packets.
+        """
+        if self._parse_pool is not None:
+            batch, parsed, errors = await self._parse_pool.parse(packets)
+            for name, count in parsed.items():
+                FLOWS_PARSED.labels(protocol=name).inc(count)
+            for (protocol, error_type), count in errors.items():
+                FLOWS_PARSE_ERRORS.labels(protocol=protocol, error_type=error_type).inc(count)
+            return batch
+
+        batches: list[FlowBatch] = []
+        for (data, exporter_ip, protocol), sample_factor in packets:
+            try:
+                parsed_batch = self._parse_packet(data, exporter_ip, protocol)
+                if sample_factor > 1:
+                    # Packet stood in for sample_factor packets
+                    parsed_batch.sampling_rate *= sample_factor
+                batches.append(parsed_batch)
+            except Exception as e:
+                FLOWS_PARSE_ERRORS.labels(
+                    protocol=protocol,
+                    error_type=type(e).__name__,
+                ).inc()
+                logger.debug(
+                    "Failed to parse packet",
+                    exporter=exporter_ip,
+                    protocol=protocol,
+                    error=str(e),
+                )
+
+        return FlowBatch.concat(batches)
+
+    def _adjust_backpressure(self) -> None:
+        """Feed measurements to AdaptiveBackpressure and apply its output.
+
+        Runs once per adjustment interval: records flow throughput and
+        batch write latency, then retunes the queue thresholds and the
+        dequeue and router batch size.
+        """
+        adaptive = self._adaptive
+        assert adaptive is not None
+
+        now = time.monotonic()
+        elapsed = now - self._interval_start
+        if elapsed < adaptive.adjustment_interval:
+            return
+
+        adaptive.record_throughput(self._interval_flows / elapsed)
+        for latency in self._router.take_write_latencies():
+            adaptive.record_latency(latency)
+        self._interval_flows = 0
+        self._interval_start = now
+
+        sample_threshold, drop_threshold = adaptive.get_adjusted_thresholds(
+            self._settings.sample_threshold,
+            self._settings.drop_threshold,
+        )
+        self._queue.set_thresholds(sample_threshold, drop_threshold)
+
+        batch_size = adaptive.get_adjusted_batch_size(
+            self._settings.batch_size,
+            backlogged=self._queue.size > self._batch_size,
+        )
+        if batch_size != self._batch_size:
+            self._batch_size = batch_size
+            self._router.set_batch_size(batch_size)
+
+        sample_threshold, drop_threshold = self._queue.thresholds
+        INGESTION_ADAPTIVE_SETTING.labels(setting="sample_threshold").set(sample_threshold)
+        INGESTION_ADAPTIVE_SETTING.labels(setting="drop_threshold").set(drop_threshold)
+        INGESTION_ADAPTIVE_SETTING.labels(setting="batch_size").set(batch_size)
+
+        logger.debug(
+            "Adjusted backpressure",
+            throughput=round(adaptive.average_throughput, 2),
+            write_latency_ms=round(adaptive.average_latency * 1000, 2),
+            sample_threshold=sample_threshold,
+            drop_threshold=drop_threshold,
+            batch_size=batch_size,
+        )
+
+    async def _flush_metrics_loop(self) -> None:
+        """Periodically publish batched hot-path counters."""
+        interval = self._settings.metrics_interval_ms / 1000
+
+        while self._running:
+            try:
+                await asyncio.sleep(interval)
+                self._flush_metrics()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error("Error flushing metrics", error=str(e))
+
+    def _flush_metrics(self) -> None:
+        """Publish counters accumulated by listeners and the queue."""
+        for protocol in self._protocols:
+            protocol.flush_metrics()
+        for receiver in self._receivers:
+            receiver.flush_metrics()
+        self._queue.flush_metrics()
+        if self._spool is not None:
+            self._spool.publish_metrics()
+
+    def _snapshot_files(self) -> list[Path]:
+        """List template snapshots written by any previous collector.
+
+        Snapshots from every worker are included, since the kernel may pin
+        an exporter to a different worker after a restart.
+        """
+        base = self._settings.template_snapshot_path
+        assert base is not None
+
+        worker_paths = sorted(
+            path for path in base.parent.glob(f"{base.name}.*")
+            if path.suffix[1:].isdigit()
+        )
+        return [path for path in (base, *worker_paths) if path.is_file()]
+
+    def _load_templates(self) -> None:
+        """Load template snapshots written by any previous collector."""
+        for path in self._snapshot_files():
+            try:
+                loaded = load_template_snapshot(path, self._template_stores)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning("Failed to load template snapshot", path=str(path), error=str(e))
+                continue
+
+            logger.info("Loaded template snapshot", path=str(path), templates=loaded)
+
+    async def _save_templates(self) -> None:
+        """Write the current template caches to the snapshot file."""
+        assert self._template_snapshot_path is not None
+        path = self._template_snapshot_path
+
+        # Capture on the event loop (or in the parse workers that own the
+        # caches); only serialization and I/O run in a thread
+        if self._parse_pool is not None:
+            snapshot = await self._parse_pool.snapshot()
+        else:
+            snapshot = snapshot_templates(self._template_stores)
+
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None,
+                write_template_snapshot,
+                path,
+                snapshot,
+            )
+        except OSError as e:
+            logger.error("Failed to save template snapshot", path=str(path), error=str(e))
+            return
+
+        logger.debug(
+            "Saved template snapshot",
+            path=str(path),
+            templates=sum(len(entries) for entries in snapshot["stores"].values()),
+        )
+
+    async def _snapshot_templates_loop(self) -> None:
+        """Periodically snapshot template caches."""
+        interval = self._settings.template_snapshot_interval_seconds
+
+        while self._running:
+            try:
+                await asyncio.sleep(interval)
+                await self._save_templates()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error("Error saving template snapshot", error=str(e))
+
     def _parse_packet(
         self,
         data: bytes,
         exporter_ip: str,
         protocol: str,
-    ) -> list[FlowRecord]:
-        """Parse a single packet.
+    ) -> FlowBatch:
+        """Parse a single packet in the event loop.
 
         Args:
             data: Raw packet data.
@@ -268,50 +627,19 @@ class FlowCollector:
             protocol: Protocol name from listener ("netflow" or "sflow").
 
         Returns:
-            List of parsed flow records.
+            Batch of parsed flows.
         """
-        if len(data) < 2:
-            raise ValueError("Packet too short")
-
-        # Route sFlow directly to sFlow parser
-        if protocol == "sflow":
-            parser = self._parsers.get("sflow")
-            if parser:
-                records = parser.parse(data, IPv4Address(exporter_ip))
-                FLOWS_PARSED.labels(protocol="sflow").inc(len(records))
-                return records
-            raise ValueError("sFlow parser not available")
-
-        # For NetFlow/IPFIX, detect version from first 2 bytes
-        version = int.from_bytes(data[0:2], byteorder="big")
-
-        if version == 5:
-            parser = self._parsers.get("netflow_v5")
-            if parser:
-                records = parser.parse(data, IPv4Address(exporter_ip))
-                FLOWS_PARSED.labels(protocol="netflow_v5").inc(len(records))
-                return records
-
-        if version == 9:
-            parser = self._parsers.get("netflow_v9")
-            if parser:
-                records = parser.parse(data, IPv4Address(exporter_ip))
-                FLOWS_PARSED.labels(protocol="netflow_v9").inc(len(records))
-                return records
-
-        if version == 10:
-            parser = self._parsers.get("ipfix")
-            if parser:
-                records = parser.parse(data, IPv4Address(exporter_ip))
-                FLOWS_PARSED.labels(protocol="ipfix").inc(len(records))
-                return records
-
-        raise ValueError(f"Unsupported flow version: {version}")
+        name, batch = parse_packet(self._parsers, data, exporter_ip, protocol)
+        FLOWS_PARSED.labels(protocol=name).inc(len(batch))
+        return batch
 
     @property
     def stats(self) -> dict[str, Any]:
         """Get collector statistics."""
         bp_stats = self._queue.stats
+        sample_threshold, drop_threshold = self._queue.thresholds
+        spool_stats = self._spool.stats if self._spool is not None else None
+        oldest = spool_stats.oldest_written_at if spool_stats else None
         return {
             "running": self._running,
             "queue_size": bp_stats.queue_size,
@@ -321,4 +649,16 @@ class FlowCollector:
             "total_received": bp_stats.total_received,
             "total_sampled": bp_stats.total_sampled,
             "total_dropped": bp_stats.total_dropped,
+            "spool_flows": spool_stats.flows if spool_stats else 0,
+            "spool_bytes": spool_stats.bytes if spool_stats else 0,
+            "spool_oldest_age_seconds": time.time() - oldest if oldest is not None else 0.0,
+            "spool_replay_rate": self._spool_drainer.replay_rate if self._spool_drainer else 0.0,
+            "aggregation_buckets": self._aggregation.bucket_count if self._aggregation else 0,
+            "sample_threshold": sample_threshold,
+            "drop_threshold": drop_threshold,
+            "batch_size": self._batch_size,
+            "adaptive_throughput": self._adaptive.average_throughput if self._adaptive else 0.0,
+            "adaptive_write_latency_seconds": (
+                self._adaptive.average_latency if self._adaptive else 0.0
+            ),
         }
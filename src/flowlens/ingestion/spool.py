@@ -0,0 +1,488 @@
+"""Disk-backed write-ahead spool for flow batches.
+
+When PostgreSQL is slow or unavailable, the router appends batches to
+the spool instead of losing them. A SpoolDrainer replays them into the
+database once it recovers.
+
+The spool is a directory of append-only segment files. Each segment is
+preallocated and memory-mapped, so an append copies the encoded batch
+into the page cache without a system call. Entries hold a batch in the
+encode_batch() format, framed as:
+
+    magic (4s) | payload length (I) | CRC32 of payload (I) | written at (d)
+
+followed by the payload. A zero-filled header marks the end of a
+segment's data. Replayed entries have their magic rewritten in place,
+and a segment is deleted once every entry in it has been replayed, so a
+restart resumes where the drainer stopped. A checksum mismatch (for
+example a write torn by a crash) ends the segment at that entry.
+"""
+
+import asyncio
+import contextlib
+import mmap
+import struct
+import time
+import zlib
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from flowlens.common.logging import get_logger
+from flowlens.common.metrics import (
+    SPOOL_BYTES,
+    SPOOL_FLOWS,
+    SPOOL_FLOWS_TOTAL,
+    SPOOL_OLDEST_AGE,
+)
+from flowlens.ingestion.parsers.batch import (
+    BATCH_HEADER,
+    FlowBatch,
+    decode_batch,
+    encode_batch,
+)
+
+logger = get_logger(__name__)
+
+_HEADER = struct.Struct("!4sIId")
+
+# Entry magic values
+_PENDING = b"FLS1"
+_REPLAYED = b"FLS0"
+
+_SEGMENT_SUFFIX = ".seg"
+
+# Seconds of recent replays averaged by SpoolDrainer.replay_rate
+_REPLAY_RATE_WINDOW = 10.0
+
+
+class SpoolFullError(Exception):
+    """Raised when an append would exceed the spool's size limit."""
+
+
+@dataclass(slots=True)
+class SpoolEntry:
+    """Location of a pending entry in the spool."""
+
+    segment: int
+    offset: int
+    length: int
+    flows: int
+    written_at: float
+
+
+@dataclass
+class SpoolStats:
+    """Statistics about spooled flows."""
+
+    segments: int
+    entries: int
+    flows: int
+    bytes: int
+    oldest_written_at: float | None
+
+
+class _Segment:
+    """A memory-mapped segment file."""
+
+    __slots__ = ("map", "number", "path", "pending", "size", "write_offset")
+
+    def __init__(self, number: int, path: Path, size: int) -> None:
+        self.number = number
+        self.path = path
+        self.size = size
+        self.write_offset = 0
+        self.pending = 0
+
+        with path.open("r+b") as f:
+            self.map = mmap.mmap(f.fileno(), size)
+
+    def close(self) -> None:
+        self.map.flush()
+        self.map.close()
+
+
+class FlowSpool:
+    """Append-only, memory-mapped segment spool for flow batches.
+
+    Not thread-safe; use from a single event loop.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        segment_bytes: int = 64 * 1024 * 1024,
+        max_bytes: int = 1024 * 1024 * 1024,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Initialize spool.
+
+        Args:
+            directory: Directory holding the segment files.
+            segment_bytes: Size of each preallocated segment. Batches larger
+                than this get a segment of their own.
+            max_bytes: Maximum total size of all segments.
+            clock: Wall-clock time source for entry ages.
+        """
+        self._directory = directory
+        self._segment_bytes = segment_bytes
+        self._max_bytes = max_bytes
+        self._clock = clock
+
+        self._segments: dict[int, _Segment] = {}
+        self._entries: deque[SpoolEntry] = deque()
+        self._active: _Segment | None = None
+        self._next_segment = 0
+        self._flows = 0
+        self._bytes = 0
+
+    @property
+    def empty(self) -> bool:
+        """Whether there are no entries waiting for replay."""
+        return not self._entries
+
+    @property
+    def stats(self) -> SpoolStats:
+        """Get current statistics."""
+        return SpoolStats(
+            segments=len(self._segments),
+            entries=len(self._entries),
+            flows=self._flows,
+            bytes=self._bytes,
+            oldest_written_at=self._entries[0].written_at if self._entries else None,
+        )
+
+    def open(self) -> None:
+        """Create the spool directory and index segments left by a previous run."""
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+        for path in sorted(self._directory.glob(f"*{_SEGMENT_SUFFIX}")):
+            if not path.stem.isdigit():
+                continue
+
+            number = int(path.stem)
+            self._next_segment = max(self._next_segment, number + 1)
+
+            size = path.stat().st_size
+            if size == 0:
+                path.unlink()
+                continue
+
+            segment = _Segment(number, path, size)
+            self._segments[number] = segment
+            self._bytes += size
+            self._index_segment(segment)
+
+            if not segment.pending:
+                self._remove_segment(segment)
+
+        if self._entries:
+            logger.info(
+                "Spool has flows to replay",
+                directory=str(self._directory),
+                entries=len(self._entries),
+                flows=self._flows,
+            )
+
+    def close(self) -> None:
+        """Flush and unmap all segments. Pending entries stay on disk."""
+        for segment in self._segments.values():
+            segment.close()
+        self._segments.clear()
+        self._entries.clear()
+        self._active = None
+        self._flows = 0
+        self._bytes = 0
+
+    def append(self, batch: FlowBatch) -> None:
+        """Append a batch to the spool.
+
+        Args:
+            batch: Flows to spool.
+
+        Raises:
+            SpoolFullError: If the spool has reached its size limit.
+        """
+        payload = encode_batch(batch)
+        length = _HEADER.size + len(payload)
+
+        segment = self._active
+        if segment is None or segment.write_offset + length > segment.size:
+            try:
+                segment = self._new_segment(length)
+            except SpoolFullError:
+                SPOOL_FLOWS_TOTAL.labels(operation="rejected").inc(len(batch))
+                raise
+
+        written_at = self._clock()
+        offset = segment.write_offset
+        _HEADER.pack_into(
+            segment.map, offset, _PENDING, len(payload), zlib.crc32(payload), written_at
+        )
+        segment.map[offset + _HEADER.size:offset + length] = payload
+        segment.write_offset += length
+        segment.pending += 1
+
+        self._entries.append(SpoolEntry(
+            segment=segment.number,
+            offset=offset,
+            length=len(payload),
+            flows=len(batch),
+            written_at=written_at,
+        ))
+        self._flows += len(batch)
+        SPOOL_FLOWS_TOTAL.labels(operation="written").inc(len(batch))
+
+    def peek(self) -> SpoolEntry | None:
+        """Get the oldest entry waiting for replay, if any."""
+        return self._entries[0] if self._entries else None
+
+    def read(self, entry: SpoolEntry) -> FlowBatch:
+        """Decode a spooled batch.
+
+        Args:
+            entry: Entry from peek().
+
+        Returns:
+            The spooled flows.
+
+        Raises:
+            ValueError: If the entry fails its checksum.
+        """
+        segment = self._segments[entry.segment]
+        start = entry.offset + _HEADER.size
+        payload = segment.map[start:start + entry.length]
+
+        _, _, crc, _ = _HEADER.unpack_from(segment.map, entry.offset)
+        if zlib.crc32(payload) != crc:
+            raise ValueError("Spool entry checksum mismatch")
+
+        return decode_batch(payload)
+
+    def ack(self, entry: SpoolEntry) -> None:
+        """Mark the oldest entry as replayed.
+
+        Args:
+            entry: Entry from peek().
+        """
+        self._release(entry, "replayed")
+
+    def discard(self, entry: SpoolEntry) -> None:
+        """Drop the oldest entry without replaying it (e.g. it is corrupt).
+
+        Args:
+            entry: Entry from peek().
+        """
+        self._release(entry, "discarded")
+
+    def publish_metrics(self) -> None:
+        """Publish spool depth and age gauges."""
+        SPOOL_FLOWS.set(self._flows)
+        SPOOL_BYTES.set(self._bytes)
+        SPOOL_OLDEST_AGE.set(
+            self._clock() - self._entries[0].written_at if self._entries else 0.0
+        )
+
+    def _release(self, entry: SpoolEntry, operation: str) -> None:
+        """Remove the oldest entry, deleting its segment once fully replayed."""
+        if not self._entries or self._entries[0] is not entry:
+            raise ValueError("Spool entries must be released in order")
+
+        self._entries.popleft()
+        self._flows -= entry.flows
+        SPOOL_FLOWS_TOTAL.labels(operation=operation).inc(entry.flows)
+
+        segment = self._segments[entry.segment]
+        segment.map[entry.offset:entry.offset + len(_REPLAYED)] = _REPLAYED
+        segment.pending -= 1
+
+        if not segment.pending and segment is not self._active:
+            self._remove_segment(segment)
+
+    def _new_segment(self, min_size: int) -> _Segment:
+        """Close the active segment for writing and start a new one."""
+        previous = self._active
+        if previous is not None:
+            self._active = None
+            previous.map.flush()
+            if not previous.pending:
+                self._remove_segment(previous)
+
+        size = max(self._segment_bytes, min_size)
+        if self._bytes + size > self._max_bytes:
+            raise SpoolFullError(
+                f"Spool would exceed {self._max_bytes} bytes in {self._directory}"
+            )
+
+        number = self._next_segment
+        path = self._directory / f"{number:012d}{_SEGMENT_SUFFIX}"
+        with path.open("wb") as f:
+            f.truncate(size)
+
+        segment = _Segment(number, path, size)
+        self._segments[number] = segment
+        self._active = segment
+        self._next_segment += 1
+        self._bytes += size
+        return segment
+
+    def _remove_segment(self, segment: _Segment) -> None:
+        """Unmap and delete a segment."""
+        del self._segments[segment.number]
+        segment.close()
+        segment.path.unlink(missing_ok=True)
+        self._bytes -= segment.size
+
+    def _index_segment(self, segment: _Segment) -> None:
+        """Queue the pending entries of an existing segment."""
+        offset = 0
+        while offset + _HEADER.size <= segment.size:
+            magic, length, crc, written_at = _HEADER.unpack_from(segment.map, offset)
+            if magic not in (_PENDING, _REPLAYED):
+                break
+
+            start = offset + _HEADER.size
+            end = start + length
+            if end > segment.size or zlib.crc32(segment.map[start:end]) != crc:
+                logger.warning(
+                    "Truncating corrupt spool segment",
+                    path=str(segment.path),
+                    offset=offset,
+                )
+                break
+
+            if magic == _PENDING:
+                _, flows = BATCH_HEADER.unpack_from(segment.map, start)
+                self._entries.append(SpoolEntry(segment.number, offset, length, flows, written_at))
+                self._flows += flows
+                segment.pending += 1
+
+            offset = end
+
+        segment.write_offset = offset
+
+
+class SpoolDrainer:
+    """Background task that replays spooled batches into storage.
+
+    Replays entries oldest first. A failed write leaves the entry in
+    place and retries after the drain interval, so the drainer also acts
+    as the health check that tells the router the database is back.
+    """
+
+    def __init__(
+        self,
+        spool: FlowSpool,
+        write: Callable[[FlowBatch], Awaitable[Any]],
+        interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize drainer.
+
+        Args:
+            spool: Spool to drain.
+            write: Writes a batch to storage, raising on failure.
+            interval: Seconds to wait when the spool is empty or a write fails.
+            clock: Monotonic time source for the replay rate.
+        """
+        self._spool = spool
+        self._write = write
+        self._interval = interval
+        self._clock = clock
+
+        self._task: asyncio.Task[None] | None = None
+        self._running = False
+
+        self._replayed = 0
+        # (replayed at, flows) for replays within the rate window, oldest first
+        self._recent: deque[tuple[float, int]] = deque()
+
+    @property
+    def replayed(self) -> int:
+        """Total flows replayed."""
+        return self._replayed
+
+    @property
+    def replay_rate(self) -> float:
+        """Flows replayed per second over the last few seconds."""
+        cutoff = self._clock() - _REPLAY_RATE_WINDOW
+        flows = sum(count for at, count in self._recent if at > cutoff)
+        return flows / _REPLAY_RATE_WINDOW
+
+    def start(self) -> None:
+        """Start draining in the background."""
+        if self._running:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._drain_loop())
+
+    async def stop(self) -> None:
+        """Stop draining. Unreplayed entries stay in the spool."""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def drain_once(self) -> int:
+        """Replay spooled entries until the spool is empty or a write fails.
+
+        Returns:
+            Number of flows replayed.
+        """
+        replayed = 0
+
+        while (entry := self._spool.peek()) is not None:
+            try:
+                batch = self._spool.read(entry)
+            except ValueError as e:
+                logger.error("Discarding corrupt spool entry", flows=entry.flows, error=str(e))
+                self._spool.discard(entry)
+                continue
+
+            try:
+                await self._write(batch)
+            except Exception as e:
+                logger.warning(
+                    "Spool replay failed, will retry",
+                    error=str(e),
+                    pending_flows=self._spool.stats.flows,
+                )
+                break
+
+            self._spool.ack(entry)
+            replayed += entry.flows
+            self._replayed += entry.flows
+            self._record_replay(entry.flows)
+
+        if replayed:
+            logger.info(
+                "Replayed spooled flows",
+                flows=replayed,
+                pending_flows=self._spool.stats.flows,
+            )
+
+        return replayed
+
+    def _record_replay(self, flows: int) -> None:
+        """Add replayed flows to the rate window, dropping expired ones."""
+        now = self._clock()
+        self._recent.append((now, flows))
+        cutoff = now - _REPLAY_RATE_WINDOW
+        while self._recent[0][0] <= cutoff:
+            self._recent.popleft()
+
+    async def _drain_loop(self) -> None:
+        """Drain the spool, sleeping while it is empty or storage is down."""
+        while self._running:
+            try:
+                await self.drain_once()
+                await asyncio.sleep(self._interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error("Error draining spool", error=str(e))
+                await asyncio.sleep(self._interval)
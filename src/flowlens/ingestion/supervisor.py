@@ -0,0 +1,277 @@
+"""Multi-process flow collection.
+
+Runs N collector worker processes that each bind the NetFlow/sFlow
+ports with SO_REUSEPORT. Each worker owns its own parsers, template
+caches, and router, so parsing scales across cores. The kernel pins
+each exporter to one worker by hashing its address tuple, which keeps
+NetFlow v9/IPFIX template state consistent within a worker.
+"""
+
+import asyncio
+import contextlib
+import multiprocessing
+import queue
+import signal
+from typing import TYPE_CHECKING, Any
+
+from flowlens.common.config import IngestionSettings, get_settings
+from flowlens.common.logging import get_logger
+
+if TYPE_CHECKING:
+    from multiprocessing.process import BaseProcess
+
+logger = get_logger(__name__)
+
+# Ordered from least to most severe
+_STATE_SEVERITY = ("normal", "sampling", "dropping")
+
+# Counters that are summed across workers
+_SUMMED_STATS = (
+    "queue_size",
+    "queue_max_size",
+    "total_received",
+    "total_sampled",
+    "total_dropped",
+    "spool_flows",
+    "spool_bytes",
+    "spool_replay_rate",
+    "aggregation_buckets",
+)
+
+
+def aggregate_stats(worker_stats: dict[int, dict[str, Any]]) -> dict[str, Any]:
+    """Aggregate FlowCollector.stats from several workers.
+
+    Counters are summed, queue utilization is recomputed from the summed
+    sizes, and the most severe backpressure state and oldest spooled
+    batch are reported.
+
+    Args:
+        worker_stats: Latest stats keyed by worker ID.
+
+    Returns:
+        Aggregated statistics in the FlowCollector.stats format, plus
+        per-worker stats under "workers".
+    """
+    totals: dict[str, Any] = dict.fromkeys(_SUMMED_STATS, 0)
+    state = "normal"
+    spool_age = 0.0
+
+    for stats in worker_stats.values():
+        for key in _SUMMED_STATS:
+            totals[key] += stats.get(key, 0)
+        spool_age = max(spool_age, stats.get("spool_oldest_age_seconds", 0.0))
+        worker_state = stats.get("backpressure_state", "normal")
+        if _STATE_SEVERITY.index(worker_state) > _STATE_SEVERITY.index(state):
+            state = worker_state
+
+    max_size = totals["queue_max_size"]
+    return {
+        "running": bool(worker_stats) and all(
+            stats.get("running", False) for stats in worker_stats.values()
+        ),
+        **totals,
+        "queue_utilization": (totals["queue_size"] / max_size) * 100 if max_size else 0.0,
+        "backpressure_state": state,
+        "spool_oldest_age_seconds": spool_age,
+        "workers": {worker_id: worker_stats[worker_id] for worker_id in sorted(worker_stats)},
+    }
+
+
+async def _worker_main(
+    worker_id: int,
+    stats_queue: "multiprocessing.Queue[tuple[int, dict[str, Any]]]",
+) -> None:
+    """Run a single collector worker until signalled to stop."""
+    from flowlens.common.database import close_database, init_database
+    from flowlens.common.logging import bind_context, setup_logging
+    from flowlens.ingestion.server import FlowCollector
+
+    settings = get_settings()
+    setup_logging(settings.logging)
+    bind_context(worker_id=worker_id)
+
+    await init_database(settings)
+    collector = FlowCollector(
+        settings.ingestion,
+        worker_id=worker_id,
+        kafka_settings=settings.kafka,
+    )
+
+    loop = asyncio.get_event_loop()
+    stop_event = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    interval = settings.ingestion.stats_interval_seconds
+
+    try:
+        await collector.start()
+
+        while not stop_event.is_set():
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(stop_event.wait(), timeout=interval)
+            stats_queue.put((worker_id, collector.stats))
+
+    finally:
+        await collector.stop()
+        await close_database()
+
+
+def run_worker(
+    worker_id: int,
+    stats_queue: "multiprocessing.Queue[tuple[int, dict[str, Any]]]",
+) -> None:
+    """Process entry point for a collector worker.
+
+    Args:
+        worker_id: Index of this worker.
+        stats_queue: Queue for reporting stats to the supervisor.
+    """
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
+    asyncio.run(_worker_main(worker_id, stats_queue))
+
+
+class CollectorSupervisor:
+    """Supervises a pool of collector worker processes.
+
+    Starts one process per configured worker, restarts workers that exit
+    unexpectedly, and aggregates their stats.
+    """
+
+    def __init__(self, settings: IngestionSettings | None = None) -> None:
+        """Initialize supervisor.
+
+        Args:
+            settings: Ingestion settings.
+        """
+        self._settings = settings or get_settings().ingestion
+        self._worker_count = self._settings.worker_processes
+
+        # Spawn so workers never inherit the parent's event loop or DB engine
+        self._context = multiprocessing.get_context("spawn")
+        self._stats_queue: multiprocessing.Queue[tuple[int, dict[str, Any]]] = (
+            self._context.Queue()
+        )
+
+        self._processes: dict[int, BaseProcess] = {}
+        self._worker_stats: dict[int, dict[str, Any]] = {}
+        self._restarts = 0
+
+        self._monitor_task: asyncio.Task[None] | None = None
+        self._running = False
+
+    async def start(self) -> None:
+        """Start all worker processes."""
+        if self._running:
+            return
+
+        self._running = True
+        logger.info("Starting collector workers", worker_count=self._worker_count)
+
+        for worker_id in range(self._worker_count):
+            self._spawn(worker_id)
+
+        self._monitor_task = asyncio.create_task(self._monitor())
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Stop all worker processes.
+
+        Args:
+            timeout: Seconds to wait for each worker to exit gracefully.
+        """
+        if not self._running:
+            return
+
+        self._running = False
+        logger.info("Stopping collector workers")
+
+        if self._monitor_task:
+            self._monitor_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._monitor_task
+
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+
+        loop = asyncio.get_event_loop()
+        for worker_id, process in self._processes.items():
+            await loop.run_in_executor(None, process.join, timeout)
+            if process.is_alive():
+                logger.warning("Worker did not exit, killing", worker_id=worker_id)
+                process.kill()
+                await loop.run_in_executor(None, process.join)
+
+        self._processes.clear()
+        self._drain_stats()
+        logger.info("Collector workers stopped")
+
+    def _spawn(self, worker_id: int) -> None:
+        """Start (or restart) the worker process for a worker ID."""
+        process = self._context.Process(
+            target=run_worker,
+            args=(worker_id, self._stats_queue),
+            name=f"flowlens-ingestion-{worker_id}",
+        )
+        process.start()
+        self._processes[worker_id] = process
+        logger.info("Collector worker started", worker_id=worker_id, pid=process.pid)
+
+    def _drain_stats(self) -> None:
+        """Collect all pending stats reports from workers."""
+        while True:
+            try:
+                worker_id, stats = self._stats_queue.get_nowait()
+            except queue.Empty:
+                break
+            self._worker_stats[worker_id] = stats
+
+    async def _monitor(self) -> None:
+        """Collect stats and restart workers that died."""
+        interval = self._settings.stats_interval_seconds
+
+        while self._running:
+            try:
+                await asyncio.sleep(interval)
+                self._drain_stats()
+
+                for worker_id, process in list(self._processes.items()):
+                    if not process.is_alive():
+                        logger.error(
+                            "Collector worker exited, restarting",
+                            worker_id=worker_id,
+                            exitcode=process.exitcode,
+                        )
+                        self._restarts += 1
+                        self._spawn(worker_id)
+
+                stats = self.stats
+                logger.info(
+                    "Collector stats",
+                    workers_alive=stats["workers_alive"],
+                    queue_size=stats["queue_size"],
+                    backpressure_state=stats["backpressure_state"],
+                    total_received=stats["total_received"],
+                    total_dropped=stats["total_dropped"],
+                    spool_flows=stats["spool_flows"],
+                )
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error("Error supervising workers", error=str(e))
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Get aggregated statistics across all workers."""
+        stats = aggregate_stats(self._worker_stats)
+        stats["worker_count"] = self._worker_count
+        stats["workers_alive"] = sum(1 for p in self._processes.values() if p.is_alive())
+        stats["worker_restarts"] = self._restarts
+        return stats
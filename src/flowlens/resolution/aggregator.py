@@ -9,14 +9,15 @@ from datetime import datetime, timedelta, timezone
 from typing import Any
 from uuid import UUID, uuid4
 
-from sqlalchemy import func, select, update
+from sqlalchemy import select, text, update
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from flowlens.common.config import ResolutionSettings, get_settings
 from flowlens.common.logging import get_logger
 from flowlens.common.metrics import AGGREGATION_WINDOW_DURATION
-from flowlens.models.flow import FlowAggregate, FlowRecord
+from flowlens.common.work_queue import claim_windows, enqueue_windows, sweep_windows
+from flowlens.models.flow import FlowRecord
 from flowlens.models.gateway import GatewayObservation
 
 logger = get_logger(__name__)
@@ -25,6 +26,71 @@ logger = get_logger(__name__)
 # Ephemeral port threshold - ports above this are typically ephemeral
 EPHEMERAL_PORT_THRESHOLD = 32768
 
+# Extended field marking raw flows stored as samples by the collector's
+# aggregation stage. Their traffic is already in flow_aggregates, so
+# aggregate_window() skips them.
+COLLECTOR_SAMPLE_FIELD = "collector_sample_rate"
+
+
+# Array parameters of UPSERT_AGGREGATES_SQL, one element per aggregate
+_UPSERT_COLUMNS = (
+    "ids", "src_ips", "dst_ips", "dst_ports", "protocols",
+    "bytes_total", "packets_total", "flows_count", "bytes_min", "bytes_max", "bytes_avg",
+    "unique_sources", "unique_destinations",
+    "src_asset_ids", "dst_asset_ids", "gateway_ips", "exporter_ips",
+)
+
+# Upsert a window's aggregates from parallel arrays. Merged rows add up
+# their counters. Asset and gateway columns keep their resolved values
+# when the new row has none, as buckets built by the collector never do.
+# Merging also marks the row unprocessed, so dependency resolution sees
+# the new traffic.
+UPSERT_AGGREGATES_SQL = text("""
+    INSERT INTO flow_aggregates (
+        id, window_start, window_end, window_size,
+        src_ip, dst_ip, dst_port, protocol,
+        bytes_total, packets_total, flows_count, bytes_min, bytes_max, bytes_avg,
+        unique_sources, unique_destinations,
+        src_asset_id, dst_asset_id, primary_gateway_ip, exporter_ip, is_processed
+    )
+    SELECT
+        id, CAST(:window_start AS timestamptz), CAST(:window_end AS timestamptz),
+        CAST(:window_size AS varchar),
+        src_ip, dst_ip, dst_port, protocol,
+        bytes_total, packets_total, flows_count, bytes_min, bytes_max, bytes_avg,
+        unique_sources, unique_destinations,
+        src_asset_id, dst_asset_id, primary_gateway_ip, exporter_ip, false
+    FROM unnest(
+        CAST(:ids AS uuid[]), CAST(:src_ips AS inet[]), CAST(:dst_ips AS inet[]),
+        CAST(:dst_ports AS integer[]), CAST(:protocols AS smallint[]),
+        CAST(:bytes_total AS bigint[]), CAST(:packets_total AS bigint[]),
+        CAST(:flows_count AS bigint[]), CAST(:bytes_min AS bigint[]),
+        CAST(:bytes_max AS bigint[]), CAST(:bytes_avg AS double precision[]),
+        CAST(:unique_sources AS integer[]), CAST(:unique_destinations AS integer[]),
+        CAST(:src_asset_ids AS uuid[]), CAST(:dst_asset_ids AS uuid[]),
+        CAST(:gateway_ips AS inet[]), CAST(:exporter_ips AS inet[])
+    ) AS t(
+        id, src_ip, dst_ip, dst_port, protocol,
+        bytes_total, packets_total, flows_count, bytes_min, bytes_max, bytes_avg,
+        unique_sources, unique_destinations,
+        src_asset_id, dst_asset_id, primary_gateway_ip, exporter_ip
+    )
+    ON CONFLICT (src_ip, dst_ip, dst_port, protocol, window_start, window_size)
+    DO UPDATE SET
+        bytes_total = flow_aggregates.bytes_total + EXCLUDED.bytes_total,
+        packets_total = flow_aggregates.packets_total + EXCLUDED.packets_total,
+        flows_count = flow_aggregates.flows_count + EXCLUDED.flows_count,
+        bytes_max = greatest(flow_aggregates.bytes_max, EXCLUDED.bytes_max),
+        bytes_min = least(flow_aggregates.bytes_min, EXCLUDED.bytes_min),
+        src_asset_id = COALESCE(EXCLUDED.src_asset_id, flow_aggregates.src_asset_id),
+        dst_asset_id = COALESCE(EXCLUDED.dst_asset_id, flow_aggregates.dst_asset_id),
+        primary_gateway_ip = COALESCE(
+            EXCLUDED.primary_gateway_ip, flow_aggregates.primary_gateway_ip
+        ),
+        exporter_ip = COALESCE(EXCLUDED.exporter_ip, flow_aggregates.exporter_ip),
+        is_processed = false
+""")
+
 
 def is_ephemeral_port(port: int) -> bool:
     """Check if a port is likely ephemeral (client-side).
@@ -139,6 +205,45 @@ class AggregationBucket:
         if exporter_ip:
             self.exporter_ip = exporter_ip
 
+    def add_totals(
+        self,
+        bytes_total: int,
+        packets_total: int,
+        flows_count: int,
+        bytes_min: int,
+        bytes_max: int,
+        src_ip: str,
+        dst_ip: str,
+        exporter_ip: str | None = None,
+    ) -> None:
+        """Add pre-summed statistics for several flows with the same key."""
+        self.bytes_total += bytes_total
+        self.packets_total += packets_total
+        self.flows_count += flows_count
+        self.bytes_min = min(self.bytes_min, bytes_min)
+        self.bytes_max = max(self.bytes_max, bytes_max)
+        self.unique_sources.add(src_ip)
+        self.unique_destinations.add(dst_ip)
+
+        if exporter_ip:
+            self.exporter_ip = exporter_ip
+
+    def merge(self, other: "AggregationBucket") -> None:
+        """Add another bucket for the same key and window."""
+        self.bytes_total += other.bytes_total
+        self.packets_total += other.packets_total
+        self.flows_count += other.flows_count
+        self.bytes_min = min(self.bytes_min, other.bytes_min)
+        self.bytes_max = max(self.bytes_max, other.bytes_max)
+        self.unique_sources |= other.unique_sources
+        self.unique_destinations |= other.unique_destinations
+
+        self.src_asset_id = self.src_asset_id or other.src_asset_id
+        self.dst_asset_id = self.dst_asset_id or other.dst_asset_id
+        for gateway_ip, gateway_bytes in other.gateway_bytes.items():
+            self.gateway_bytes[gateway_ip] = self.gateway_bytes.get(gateway_ip, 0) + gateway_bytes
+        self.exporter_ip = self.exporter_ip or other.exporter_ip
+
     @property
     def bytes_avg(self) -> float:
         """Average bytes per flow."""
@@ -174,6 +279,11 @@ class FlowAggregator:
         self._window_size_minutes = settings.window_size_minutes
         self._batch_size = settings.batch_size
 
+    @property
+    def window_size_minutes(self) -> int:
+        """Aggregation window size in minutes."""
+        return self._window_size_minutes
+
     def get_window_bounds(
         self,
         timestamp: datetime,
@@ -241,6 +351,10 @@ class FlowAggregator:
         buckets: dict[AggregationKey, AggregationBucket] = {}
 
         for flow in flows:
+            # Already counted by the collector's aggregation stage
+            if flow.extended_fields and COLLECTOR_SAMPLE_FIELD in flow.extended_fields:
+                continue
+
             # Normalize flow direction to always point towards the service
             # This handles response flows (server → client on ephemeral port)
             norm_src, norm_dst, norm_port, norm_proto, was_swapped = normalize_flow_direction(
@@ -295,17 +409,11 @@ class FlowAggregator:
             )
 
         # Upsert aggregates
-        window_size = f"{self._window_size_minutes}min"
+        await self.upsert_buckets(db, window_start, window_end, buckets)
 
-        for key, bucket in buckets.items():
-            await self._upsert_aggregate(
-                db,
-                window_start=window_start,
-                window_end=window_end,
-                window_size=window_size,
-                key=key,
-                bucket=bucket,
-            )
+        # The batch limit left flows behind; aggregate the window again
+        if len(flows) == self._batch_size:
+            await enqueue_windows(db, [window_start])
 
         # Mark flows as processed
         flow_ids = [(f.id, f.timestamp) for f in flows]
@@ -331,121 +439,96 @@ class FlowAggregator:
 
         return len(buckets)
 
-    async def _upsert_aggregate(
+    async def upsert_buckets(
         self,
         db: AsyncSession,
         window_start: datetime,
         window_end: datetime,
-        window_size: str,
-        key: AggregationKey,
-        bucket: AggregationBucket,
+        buckets: dict[AggregationKey, AggregationBucket],
     ) -> None:
-        """Upsert a flow aggregate.
+        """Upsert the aggregates for one window in a single statement.
 
         Args:
             db: Database session.
             window_start: Window start time.
             window_end: Window end time.
-            window_size: Window size string.
-            key: Aggregation key.
-            bucket: Aggregated data.
+            buckets: Aggregated data by key.
         """
-        # Build insert statement with ON CONFLICT UPDATE
-        stmt = insert(FlowAggregate).values(
-            id=uuid4(),
-            window_start=window_start,
-            window_end=window_end,
-            window_size=window_size,
-            src_ip=key.src_ip,
-            dst_ip=key.dst_ip,
-            dst_port=key.dst_port,
-            protocol=key.protocol,
-            bytes_total=bucket.bytes_total,
-            packets_total=bucket.packets_total,
-            flows_count=bucket.flows_count,
-            bytes_min=bucket.bytes_min if bucket.bytes_min != float("inf") else 0,
-            bytes_max=bucket.bytes_max,
-            bytes_avg=bucket.bytes_avg,
-            unique_sources=len(bucket.unique_sources),
-            unique_destinations=len(bucket.unique_destinations),
-            src_asset_id=bucket.src_asset_id,
-            dst_asset_id=bucket.dst_asset_id,
-            primary_gateway_ip=bucket.primary_gateway_ip,
-            exporter_ip=bucket.exporter_ip,
-        )
+        if not buckets:
+            return
 
-        # On conflict, update counters
-        stmt = stmt.on_conflict_do_update(
-            index_elements=[
-                "src_ip", "dst_ip", "dst_port", "protocol",
-                "window_start", "window_size",
-            ],
-            set_={
-                "bytes_total": FlowAggregate.bytes_total + bucket.bytes_total,
-                "packets_total": FlowAggregate.packets_total + bucket.packets_total,
-                "flows_count": FlowAggregate.flows_count + bucket.flows_count,
-                "bytes_max": func.greatest(FlowAggregate.bytes_max, bucket.bytes_max),
-                "bytes_min": func.least(FlowAggregate.bytes_min, bucket.bytes_min),
-                "src_asset_id": bucket.src_asset_id,
-                "dst_asset_id": bucket.dst_asset_id,
-                "primary_gateway_ip": bucket.primary_gateway_ip,
-                "exporter_ip": bucket.exporter_ip,
+        columns: dict[str, list[Any]] = {name: [] for name in _UPSERT_COLUMNS}
+        observations: list[dict[str, Any]] = []
+        for key, bucket in buckets.items():
+            columns["ids"].append(uuid4())
+            columns["src_ips"].append(key.src_ip)
+            columns["dst_ips"].append(key.dst_ip)
+            columns["dst_ports"].append(key.dst_port)
+            columns["protocols"].append(key.protocol)
+            columns["bytes_total"].append(bucket.bytes_total)
+            columns["packets_total"].append(bucket.packets_total)
+            columns["flows_count"].append(bucket.flows_count)
+            columns["bytes_min"].append(
+                bucket.bytes_min if bucket.bytes_min != float("inf") else 0
+            )
+            columns["bytes_max"].append(bucket.bytes_max)
+            columns["bytes_avg"].append(bucket.bytes_avg)
+            columns["unique_sources"].append(len(bucket.unique_sources))
+            columns["unique_destinations"].append(len(bucket.unique_destinations))
+            columns["src_asset_ids"].append(bucket.src_asset_id)
+            columns["dst_asset_ids"].append(bucket.dst_asset_id)
+            columns["gateway_ips"].append(bucket.primary_gateway_ip)
+            columns["exporter_ips"].append(bucket.exporter_ip)
+
+            # Gateway observations for later processing
+            for gateway_ip, gw_bytes in bucket.gateway_bytes.items():
+                observations.append({
+                    "id": uuid4(),
+                    "source_ip": key.src_ip,
+                    "gateway_ip": gateway_ip,
+                    "destination_ip": key.dst_ip,
+                    "observation_source": "next_hop",
+                    "exporter_ip": bucket.exporter_ip,
+                    "window_start": window_start,
+                    "window_end": window_end,
+                    "bytes_total": gw_bytes,
+                    "flows_count": bucket.flows_count,
+                })
+
+        await db.execute(
+            UPSERT_AGGREGATES_SQL,
+            {
+                "window_start": window_start,
+                "window_end": window_end,
+                "window_size": f"{self._window_size_minutes}min",
+                **columns,
             },
         )
 
-        await db.execute(stmt)
-
-        # Create gateway observations for later processing
-        for gateway_ip, gw_bytes in bucket.gateway_bytes.items():
-            observation = GatewayObservation(
-                id=uuid4(),
-                source_ip=key.src_ip,
-                gateway_ip=gateway_ip,
-                destination_ip=key.dst_ip,
-                observation_source="next_hop",
-                exporter_ip=bucket.exporter_ip,
-                window_start=window_start,
-                window_end=window_end,
-                bytes_total=gw_bytes,
-                flows_count=bucket.flows_count,
-            )
-            db.add(observation)
+        if observations:
+            await db.execute(insert(GatewayObservation), observations)
 
     async def get_pending_windows(
         self,
         db: AsyncSession,
-        lookback_hours: int = 1,
+        limit: int = 100,
     ) -> list[tuple[datetime, datetime]]:
-        """Get windows that have unprocessed flows.
+        """Claim windows that enrichment queued for aggregation.
+
+        Minutes are claimed from the aggregation queue in db's
+        transaction, so they return to the queue if it rolls back.
 
         Args:
             db: Database session.
-            lookback_hours: How far back to look.
+            limit: Maximum queued minutes to claim.
 
         Returns:
             List of (window_start, window_end) tuples.
         """
-        cutoff = datetime.now(timezone.utc) - timedelta(hours=lookback_hours)
-
-        # Find distinct windows with unprocessed flows
-        # Use a labeled column so ORDER BY can reference the same expression
-        window_col = func.date_trunc("minute", FlowRecord.timestamp).label("window_minute")
-        result = await db.execute(
-            select(window_col)
-            .where(
-                FlowRecord.timestamp >= cutoff,
-                FlowRecord.is_enriched == True,
-                FlowRecord.is_processed == False,
-            )
-            .distinct()
-            .order_by(window_col)
-            .limit(100)
-        )
-
         windows = []
         seen_windows = set()
 
-        for (ts,) in result.fetchall():
+        for ts in await claim_windows(db, limit):
             window_start, window_end = self.get_window_bounds(ts)
             window_key = window_start
 
@@ -454,3 +537,20 @@ class FlowAggregator:
                 windows.append((window_start, window_end))
 
         return windows
+
+    async def queue_pending_windows(
+        self,
+        db: AsyncSession,
+        lookback_hours: int = 1,
+    ) -> int:
+        """Queue recent windows with unprocessed flows missing from the queue.
+
+        Args:
+            db: Database session.
+            lookback_hours: How far back to look.
+
+        Returns:
+            Number of minutes queued.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=lookback_hours)
+        return await sweep_windows(db, cutoff)
@@ -14,6 +14,7 @@ from sqlalchemy import select, text, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from flowlens.common.asset_cache import AssetIdCache, get_asset_cache
 from flowlens.common.logging import get_logger
 from flowlens.common.metrics import ASSETS_DISCOVERED, ASSETS_UPDATED
 from flowlens.enrichment.resolvers.geoip import GeoIPResolver, PrivateIPClassifier
@@ -45,17 +46,17 @@ class AssetMapper:
     def __init__(
         self,
         geoip_resolver: GeoIPResolver | None = None,
+        cache: AssetIdCache | None = None,
     ) -> None:
         """Initialize asset mapper.
 
         Args:
             geoip_resolver: Optional GeoIP resolver for location data.
+            cache: IP -> Asset ID cache. Defaults to the process-wide cache.
         """
         self._geoip = geoip_resolver
         self._classifier = PrivateIPClassifier()
-
-        # Cache of IP -> Asset ID for efficiency
-        self._ip_cache: dict[str, UUID] = {}
+        self._cache = cache if cache is not None else get_asset_cache()
 
     async def get_or_create_asset(
         self,
@@ -77,8 +78,9 @@ class AssetMapper:
             Asset ID.
         """
         # Check cache first
-        if ip_str in self._ip_cache:
-            return self._ip_cache[ip_str]
+        cached = self._cache.get(ip_str)
+        if cached is not None:
+            return cached
 
         # Query database
         result = await db.execute(
@@ -90,12 +92,12 @@ class AssetMapper:
         asset_id = result.scalar_one_or_none()
 
         if asset_id:
-            self._ip_cache[ip_str] = asset_id
+            self._cache.set(ip_str, asset_id)
             return asset_id
 
         # Create new asset using upsert
         asset_id = await self._upsert_asset(db, ip_str, hostname)
-        self._ip_cache[ip_str] = asset_id
+        self._cache.set(ip_str, asset_id)
 
         return asset_id
 
@@ -376,8 +378,9 @@ class AssetMapper:
 
         # Check cache first
         for ip in ip_addresses:
-            if ip in self._ip_cache:
-                results[ip] = self._ip_cache[ip]
+            cached = self._cache.get(ip)
+            if cached is not None:
+                results[ip] = cached
             else:
                 uncached_ips.append(ip)
 
@@ -395,7 +398,7 @@ class AssetMapper:
 
         for ip, asset_id in result.fetchall():
             results[ip] = asset_id
-            self._ip_cache[ip] = asset_id
+            self._cache.set(ip, asset_id)
             uncached_ips.remove(ip)
 
         # Create assets for remaining IPs
@@ -407,9 +410,9 @@ class AssetMapper:
 
     def clear_cache(self) -> None:
         """Clear the IP cache."""
-        self._ip_cache.clear()
+        self._cache.clear()
 
     @property
     def cache_size(self) -> int:
         """Get cache size."""
-        return len(self._ip_cache)
+        return len(self._cache)
@@ -11,6 +11,7 @@ from uuid import UUID
 from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from flowlens.common.asset_cache import publish_asset_changes
 from flowlens.common.config import ResolutionSettings, get_settings
 from flowlens.common.logging import get_logger
 from flowlens.common.metrics import CHANGES_DETECTED
@@ -1400,6 +1401,7 @@ class ChangeDetector:
             .where(Asset.id.in_(stale_ids))
             .values(deleted_at=now)
         )
+        await publish_asset_changes(db, stale_ids)
 
         logger.info(
             "Cleaned up stale assets",
@@ -8,10 +8,12 @@ import signal
 import sys
 from typing import NoReturn
 
+from flowlens.common.asset_cache import AssetInvalidationListener
 from flowlens.common.config import get_settings
 from flowlens.common.database import close_database, init_database
 from flowlens.common.logging import get_logger, setup_logging
 from flowlens.common.metrics import set_app_info
+from flowlens.common.notify import NotificationListener
 from flowlens.resolution.worker import ResolutionWorker
 
 logger = get_logger(__name__)
@@ -46,6 +48,15 @@ async def main() -> None:
         for _ in range(settings.resolution.worker_count)
     ]
 
+    # Wake idle workers on new work, and drop cached asset IDs when
+    # assets change in other processes
+    listener = NotificationListener()
+    for worker in workers:
+        worker.subscribe(listener)
+    if settings.asset_cache.invalidation_enabled:
+        AssetInvalidationListener().subscribe(listener)
+    await listener.start()
+
     # Setup signal handlers
     loop = asyncio.get_event_loop()
     stop_event = asyncio.Event()
@@ -88,6 +99,7 @@ async def main() -> None:
         logger.info("Cleaning up")
         for worker in workers:
             await worker.cleanup()
+        await listener.stop()
         await close_database()
         logger.info("Shutdown complete")
 
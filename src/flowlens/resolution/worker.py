@@ -4,6 +4,7 @@ Builds dependency graph from aggregated flows.
 """
 
 import asyncio
+import time
 from datetime import datetime, timedelta
 from typing import Any
 
@@ -14,6 +15,8 @@ from flowlens.common.config import ResolutionSettings, get_settings
 from flowlens.common.database import get_session
 from flowlens.common.logging import get_logger
 from flowlens.common.metrics import RESOLUTION_ERRORS, RESOLUTION_PROCESSED
+from flowlens.common.notify import NotificationListener, WorkSignal
+from flowlens.common.work_queue import WINDOWS_READY_CHANNEL
 from flowlens.enrichment.resolvers.geoip import GeoIPResolver
 from flowlens.enrichment.resolvers.protocol import ProtocolResolver
 from flowlens.models.flow import FlowAggregate
@@ -48,6 +51,9 @@ class ResolutionWorker:
         self._batch_size = settings.batch_size
         self._poll_interval = settings.poll_interval_ms / 1000
         self._detection_interval = settings.detection_interval_minutes * 60
+        self._sweep_interval = settings.queue_sweep_interval_seconds
+        self._last_sweep = float("-inf")
+        self._work_signal = WorkSignal()
 
         # Initialize components
         geoip_resolver = GeoIPResolver(get_settings().enrichment)
@@ -77,6 +83,8 @@ class ResolutionWorker:
 
         while self._running:
             try:
+                await self._maybe_sweep()
+
                 # Process pending aggregation windows
                 processed = await self._process_aggregation()
 
@@ -93,8 +101,8 @@ class ResolutionWorker:
                 await self._maybe_run_detection()
 
                 if processed == 0:
-                    # No work, wait before polling again
-                    await asyncio.sleep(self._poll_interval)
+                    # No work, wait for enrichment to queue windows
+                    await self._work_signal.wait(self._poll_interval)
 
             except asyncio.CancelledError:
                 break
@@ -112,6 +120,31 @@ class ResolutionWorker:
         """Stop the resolution worker."""
         self._running = False
 
+    def subscribe(self, listener: NotificationListener) -> None:
+        """Wake the worker when enrichment queues new windows.
+
+        Args:
+            listener: Process's notification listener.
+        """
+        listener.subscribe(WINDOWS_READY_CHANNEL, self._work_signal.set, self._work_signal.set)
+
+    async def _maybe_sweep(self) -> None:
+        """Queue windows with unprocessed flows that are missing from the queue.
+
+        Runs at startup and then every queue_sweep_interval_seconds, to
+        recover the aggregation queue after a PostgreSQL crash.
+        """
+        now = time.monotonic()
+        if now - self._last_sweep < self._sweep_interval:
+            return
+        self._last_sweep = now
+
+        async with get_session() as db:
+            queued = await self._aggregator.queue_pending_windows(db)
+
+        if queued:
+            logger.info("Queued unaggregated windows", minutes=queued)
+
     async def _process_aggregation(self) -> int:
         """Process pending aggregation windows.
 
@@ -121,7 +154,7 @@ class ResolutionWorker:
         total_aggregates = 0
 
         async with get_session() as db:
-            # Get pending windows
+            # Claim queued windows
             windows = await self._aggregator.get_pending_windows(db)
 
             if not windows:
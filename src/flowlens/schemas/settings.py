@@ -597,6 +597,24 @@ SETTINGS_SECTIONS: list[SettingsSectionInfo] = [
                 default=3600,
                 min_value=60,
             ),
+            FieldMetadata(
+                name="dns_negative_cache_ttl",
+                label="DNS Negative Cache TTL",
+                description="Lifetime of cached NXDOMAIN / no-PTR results in seconds",
+                field_type=FieldType.INTEGER,
+                env_var="ENRICHMENT_DNS_NEGATIVE_CACHE_TTL",
+                default=900,
+                min_value=60,
+            ),
+            FieldMetadata(
+                name="dns_failure_cache_ttl",
+                label="DNS Failure Cache TTL",
+                description="Lifetime of cached DNS timeouts and errors in seconds",
+                field_type=FieldType.INTEGER,
+                env_var="ENRICHMENT_DNS_FAILURE_CACHE_TTL",
+                default=60,
+                min_value=5,
+            ),
             FieldMetadata(
                 name="dns_cache_size",
                 label="DNS Cache Size",
@@ -606,6 +624,25 @@ SETTINGS_SECTIONS: list[SettingsSectionInfo] = [
                 default=10000,
                 min_value=100,
             ),
+            FieldMetadata(
+                name="dns_max_in_flight",
+                label="DNS Max In Flight",
+                description="Maximum concurrent background reverse lookups",
+                field_type=FieldType.INTEGER,
+                env_var="ENRICHMENT_DNS_MAX_IN_FLIGHT",
+                default=100,
+                min_value=1,
+                max_value=1000,
+            ),
+            FieldMetadata(
+                name="dns_queue_size",
+                label="DNS Queue Size",
+                description="Maximum IPs waiting for a background reverse lookup",
+                field_type=FieldType.INTEGER,
+                env_var="ENRICHMENT_DNS_QUEUE_SIZE",
+                default=10000,
+                min_value=100,
+            ),
             FieldMetadata(
                 name="dns_servers",
                 label="DNS Servers",
@@ -614,6 +651,40 @@ SETTINGS_SECTIONS: list[SettingsSectionInfo] = [
                 env_var="ENRICHMENT_DNS_SERVERS",
                 required=False,
             ),
+            FieldMetadata(
+                name="shared_cache_enabled",
+                label="Shared DNS Cache",
+                description="Share cached DNS results between processes (Redis if enabled, else a local file)",
+                field_type=FieldType.BOOLEAN,
+                env_var="ENRICHMENT_SHARED_CACHE_ENABLED",
+                default=True,
+            ),
+            FieldMetadata(
+                name="shared_cache_path",
+                label="Shared DNS Cache Path",
+                description="SQLite file for the shared DNS cache when Redis is disabled",
+                field_type=FieldType.PATH,
+                env_var="ENRICHMENT_SHARED_CACHE_PATH",
+                default="/dev/shm/flowlens-enrichment-cache.db",
+            ),
+            FieldMetadata(
+                name="shared_cache_flush_interval_ms",
+                label="Shared DNS Cache Flush Interval (ms)",
+                description="How often cached DNS results are written to the shared cache",
+                field_type=FieldType.INTEGER,
+                env_var="ENRICHMENT_SHARED_CACHE_FLUSH_INTERVAL_MS",
+                default=500,
+                min_value=10,
+            ),
+            FieldMetadata(
+                name="shared_cache_warm_size",
+                label="Shared DNS Cache Warm Size",
+                description="Most looked-up IPs loaded from the shared cache at startup",
+                field_type=FieldType.INTEGER,
+                env_var="ENRICHMENT_SHARED_CACHE_WARM_SIZE",
+                default=10000,
+                min_value=0,
+            ),
             FieldMetadata(
                 name="geoip_database_path",
                 label="GeoIP Database Path",
@@ -2,6 +2,7 @@
 
 import asyncio
 from collections.abc import AsyncGenerator
+from pathlib import Path
 from typing import Any
 from uuid import uuid4
 
@@ -16,6 +17,7 @@ from sqlalchemy.orm import sessionmaker
 from flowlens.api.main import app
 from flowlens.common.config import Settings, get_settings
 from flowlens.common.database import get_db
+from flowlens.common.stream import FileLog
 from flowlens.models.base import Base
 
 
@@ -416,6 +418,18 @@ def sample_alert_data() -> dict:
     }
 
 
+# =============================================================================
+# Flow Stream Fixtures
+# =============================================================================
+
+@pytest_asyncio.fixture
+async def file_log(tmp_path: Path) -> AsyncGenerator[FileLog, None]:
+    """File-backed flow log, closed after the test."""
+    log = FileLog(tmp_path / "stream")
+    yield log
+    await log.close()
+
+
 # =============================================================================
 # Markers
 # =============================================================================
@@ -1,12 +1,14 @@
 """Unit tests for flow aggregator."""
 
 from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
 from uuid import uuid4
 
 import pytest
 
 from flowlens.resolution.aggregator import (
     EPHEMERAL_PORT_THRESHOLD,
+    UPSERT_AGGREGATES_SQL,
     AggregationBucket,
     AggregationKey,
     FlowAggregator,
@@ -337,6 +339,29 @@ class TestAggregationBucket:
 
         assert bucket.exporter_ip == "192.168.1.1"
 
+    def test_add_totals(self):
+        """Test adding pre-summed statistics."""
+        bucket = AggregationBucket()
+        bucket.add(bytes_count=500, packets_count=5, src_ip="a", dst_ip="b")
+        bucket.add_totals(
+            bytes_total=3000,
+            packets_total=30,
+            flows_count=4,
+            bytes_min=100,
+            bytes_max=2000,
+            src_ip="c",
+            dst_ip="b",
+            exporter_ip="192.168.1.1",
+        )
+
+        assert bucket.bytes_total == 3500
+        assert bucket.packets_total == 35
+        assert bucket.flows_count == 5
+        assert bucket.bytes_min == 100
+        assert bucket.bytes_max == 2000
+        assert bucket.unique_sources == {"a", "c"}
+        assert bucket.exporter_ip == "192.168.1.1"
+
 
 @pytest.mark.unit
 class TestFlowAggregator:
@@ -411,3 +436,73 @@ class TestFlowAggregator:
         assert end1 == start2
         assert start1 < start2
         assert end1 < end2
+
+    @pytest.mark.asyncio
+    async def test_get_pending_windows_claims_queued_minutes(self, aggregator: FlowAggregator):
+        """Test queued minutes are claimed and collapsed into their windows."""
+        if aggregator._window_size_minutes != 5:
+            pytest.skip("Test assumes 5-minute windows")
+
+        result = MagicMock()
+        result.all.return_value = [
+            (datetime(2025, 1, 15, 10, minute, tzinfo=timezone.utc),) for minute in (7, 1, 3)
+        ]
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=result)
+
+        windows = await aggregator.get_pending_windows(db, limit=50)
+
+        assert db.execute.await_args.args[1] == {"limit": 50}
+        assert windows == [
+            (
+                datetime(2025, 1, 15, 10, 0, tzinfo=timezone.utc),
+                datetime(2025, 1, 15, 10, 5, tzinfo=timezone.utc),
+            ),
+            (
+                datetime(2025, 1, 15, 10, 5, tzinfo=timezone.utc),
+                datetime(2025, 1, 15, 10, 10, tzinfo=timezone.utc),
+            ),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_upsert_buckets_single_statement(self, aggregator: FlowAggregator):
+        """Test a window's aggregates are upserted in one statement."""
+        asset_id = uuid4()
+        first = AggregationBucket()
+        first.add(
+            1000, 10, "192.168.1.10", "10.0.0.5", dst_asset_id=asset_id, gateway_ip="10.0.0.1"
+        )
+        second = AggregationBucket()
+        second.add(500, 5, "192.168.1.11", "10.0.0.5")
+        buckets = {
+            AggregationKey("192.168.1.10", "10.0.0.5", 443, 6): first,
+            AggregationKey("192.168.1.11", "10.0.0.5", 443, 6): second,
+        }
+        db = MagicMock()
+        db.execute = AsyncMock()
+        window_start = datetime(2025, 1, 15, 10, 0, tzinfo=timezone.utc)
+
+        await aggregator.upsert_buckets(
+            db, window_start, window_start + timedelta(minutes=5), buckets
+        )
+
+        (upsert, params), (_, rows) = (
+            call.args for call in db.execute.await_args_list
+        )
+        assert upsert is UPSERT_AGGREGATES_SQL
+        assert params["src_ips"] == ["192.168.1.10", "192.168.1.11"]
+        assert params["bytes_total"] == [1000, 500]
+        assert params["dst_asset_ids"] == [asset_id, None]
+        assert params["gateway_ips"] == ["10.0.0.1", None]
+        assert [row["gateway_ip"] for row in rows] == ["10.0.0.1"]
+
+    @pytest.mark.asyncio
+    async def test_upsert_buckets_empty(self, aggregator: FlowAggregator):
+        """Test an empty window writes nothing."""
+        db = MagicMock()
+        db.execute = AsyncMock()
+
+        now = datetime.now(timezone.utc)
+        await aggregator.upsert_buckets(db, now, now, {})
+
+        db.execute.assert_not_awaited()
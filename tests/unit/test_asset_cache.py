@@ -0,0 +1,136 @@
+"""Unit tests for the IP to asset ID cache."""
+
+import json
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from flowlens.common.asset_cache import (
+    ASSET_CHANGES_CHANNEL,
+    AssetIdCache,
+    AssetInvalidationListener,
+    publish_asset_changes,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestAssetIdCache:
+    """Test cases for AssetIdCache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the least recently used entry is evicted when full."""
+        cache = AssetIdCache(max_size=2)
+        ids = [uuid.uuid4() for _ in range(3)]
+
+        cache.set("10.0.0.1", ids[0])
+        cache.set("10.0.0.2", ids[1])
+        assert cache.get("10.0.0.1") == ids[0]
+        cache.set("10.0.0.3", ids[2])
+
+        assert len(cache) == 2
+        assert cache.get("10.0.0.2") is None
+        assert cache.get("10.0.0.1") == ids[0]
+        assert cache.get("10.0.0.3") == ids[2]
+
+    def test_entries_expire(self):
+        """Test entries are misses once their TTL has passed."""
+        clock = FakeClock()
+        cache = AssetIdCache(ttl_seconds=60, clock=clock)
+        asset_id = uuid.uuid4()
+        cache.set("10.0.0.1", asset_id)
+
+        clock.now = 59
+        assert cache.get("10.0.0.1") == asset_id
+        clock.now = 60
+        assert cache.get("10.0.0.1") is None
+        assert len(cache) == 0
+
+        stats = cache.stats
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_invalidate_assets(self):
+        """Test invalidating an asset drops every IP cached for it."""
+        cache = AssetIdCache()
+        changed, unchanged = uuid.uuid4(), uuid.uuid4()
+        cache.set("10.0.0.1", changed)
+        cache.set("10.0.0.2", changed)
+        cache.set("10.0.0.3", unchanged)
+
+        assert cache.invalidate_assets([changed, uuid.uuid4()]) == 2
+
+        assert cache.get("10.0.0.1") is None
+        assert cache.get("10.0.0.2") is None
+        assert cache.get("10.0.0.3") == unchanged
+        assert cache.stats["invalidated"] == 2
+
+    def test_reassigned_ip_not_invalidated_by_old_asset(self):
+        """Test an IP moved to another asset is unaffected by the old one."""
+        cache = AssetIdCache()
+        old, new = uuid.uuid4(), uuid.uuid4()
+        cache.set("10.0.0.1", old)
+        cache.set("10.0.0.1", new)
+
+        assert cache.invalidate_assets([old]) == 0
+        assert cache.get("10.0.0.1") == new
+
+
+class TestInvalidation:
+    """Test cases for publishing and applying asset changes."""
+
+    @pytest.mark.asyncio
+    async def test_publish_asset_changes(self):
+        """Test changes invalidate locally and are notified in chunks."""
+        cache = AssetIdCache()
+        asset_ids = [uuid.uuid4() for _ in range(250)]
+        cache.set("10.0.0.1", asset_ids[0])
+        db = MagicMock()
+        db.execute = AsyncMock()
+
+        with patch("flowlens.common.asset_cache.get_asset_cache", return_value=cache):
+            await publish_asset_changes(db, asset_ids)
+
+        assert cache.get("10.0.0.1") is None
+        assert db.execute.await_count == 3
+
+        notified: list[str] = []
+        for call in db.execute.await_args_list:
+            params = call.args[1]
+            assert params["channel"] == ASSET_CHANGES_CHANNEL
+            assert len(params["payload"]) < 8000
+            notified.extend(json.loads(params["payload"])["ids"])
+        assert notified == [str(asset_id) for asset_id in asset_ids]
+
+    @pytest.mark.asyncio
+    async def test_publish_nothing(self):
+        """Test no notification is sent without changed assets."""
+        db = MagicMock()
+        db.execute = AsyncMock()
+
+        await publish_asset_changes(db, [])
+
+        db.execute.assert_not_awaited()
+
+    def test_listener_applies_notification(self):
+        """Test a notification payload invalidates the listed assets."""
+        cache = AssetIdCache()
+        asset_id = uuid.uuid4()
+        cache.set("10.0.0.1", asset_id)
+        listener = AssetInvalidationListener(cache)
+
+        listener.handle_notification("not json")
+        listener.handle_notification(json.dumps({"ids": ["not-a-uuid"]}))
+        assert cache.get("10.0.0.1") == asset_id
+
+        listener.handle_notification(json.dumps({"ids": [str(asset_id)]}))
+        assert cache.get("10.0.0.1") is None
@@ -1,9 +1,17 @@
 """Unit tests for backpressure management."""
 
+import asyncio
+
 import pytest
 
 from flowlens.common.config import IngestionSettings
-from flowlens.ingestion.backpressure import BackpressureQueue, BackpressureState
+from flowlens.common.metrics import EXPORTER_PACKETS_DROPPED, EXPORTER_QUEUE_SIZE
+from flowlens.ingestion.backpressure import (
+    AdaptiveBackpressure,
+    BackpressureQueue,
+    BackpressureState,
+    FairBackpressureQueue,
+)
 
 
 class TestBackpressureQueue:
@@ -162,3 +170,308 @@ class TestBackpressureQueue:
         await queue.put(42)
         result = queue.get_nowait()
         assert result == 42
+
+    def test_put_nowait(self, queue: BackpressureQueue[int]):
+        """Test synchronous put applies backpressure like put."""
+        assert queue.put_nowait(1) is True
+        assert queue.size == 1
+        assert queue.stats.total_received == 1
+
+    def test_put_nowait_dropping(self, queue: BackpressureQueue[int]):
+        """Test synchronous put drops in dropping state."""
+        for i in range(12000):
+            queue.put_nowait(i)
+
+        assert queue.state == BackpressureState.DROPPING
+        assert queue.put_nowait(99999) is False
+
+    def test_flush_metrics(self, queue: BackpressureQueue[int]):
+        """Test batched counters are published and reset on flush."""
+        from flowlens.common.metrics import FLOWS_DROPPED, INGESTION_QUEUE_SIZE
+
+        for i in range(12000):
+            queue.put_nowait(i)
+
+        dropped = FLOWS_DROPPED.labels(reason="backpressure_drop")
+        before = dropped._value.get()
+        pending = queue._pending_backpressure_drops
+        assert pending > 0
+
+        queue.flush_metrics()
+
+        assert dropped._value.get() == before + pending
+        assert INGESTION_QUEUE_SIZE._value.get() == queue.size
+        assert queue._pending_backpressure_drops == 0
+
+    def test_put_batch_nowait(self, queue: BackpressureQueue[int]):
+        """Test synchronous batch put."""
+        added, dropped = queue.put_batch_nowait(list(range(10)))
+
+        assert added == 10
+        assert dropped == 0
+        assert queue.size == 10
+
+    def test_set_thresholds(self, queue: BackpressureQueue[int]):
+        """Test thresholds can be changed at runtime."""
+        for i in range(3000):
+            queue.put_nowait(i)
+        assert queue.state == BackpressureState.NORMAL
+
+        queue.set_thresholds(2000, 4000)
+
+        assert queue.thresholds == (2000, 4000)
+        assert queue.state == BackpressureState.SAMPLING
+
+    def test_set_thresholds_clamped(self, queue: BackpressureQueue[int]):
+        """Test thresholds stay ordered and within the queue size."""
+        queue.set_thresholds(20000, 15000)
+
+        assert queue.thresholds == (9999, 10000)
+
+
+def exporter_of(item: tuple[str, int]) -> str:
+    """Exporter key for (exporter, sequence) test items."""
+    return item[0]
+
+
+class TestFairBackpressureQueue:
+    """Test cases for FairBackpressureQueue."""
+
+    @pytest.fixture
+    def settings(self) -> IngestionSettings:
+        """Create test settings with valid thresholds."""
+        return IngestionSettings(
+            queue_max_size=10000,
+            sample_threshold=5000,
+            drop_threshold=8000,
+            sample_rate=2,
+        )
+
+    @pytest.fixture
+    def queue(self, settings: IngestionSettings) -> FairBackpressureQueue[tuple[str, int]]:
+        """Create queue keyed by exporter."""
+        return FairBackpressureQueue(settings, key=exporter_of)
+
+    @pytest.mark.asyncio
+    async def test_get_batch_round_robin(self, queue: FairBackpressureQueue[tuple[str, int]]):
+        """Test exporters are served in turn."""
+        for i in range(3):
+            queue.put_nowait(("a", i))
+        queue.put_nowait(("b", 0))
+
+        batch = await queue.get_batch(max_items=10)
+
+        assert batch == [("a", 0), ("b", 0), ("a", 1), ("a", 2)]
+        assert queue.size == 0
+
+    @pytest.mark.asyncio
+    async def test_weights(self, settings: IngestionSettings):
+        """Test weighted exporters get proportionally more per turn."""
+        queue = FairBackpressureQueue(settings, key=exporter_of, weights={"a": 3})
+        for i in range(6):
+            queue.put_nowait(("a", i))
+            queue.put_nowait(("b", i))
+
+        first = await queue.get_batch(max_items=2)
+        second = await queue.get_batch(max_items=6)
+
+        # The turn continues across calls
+        assert first + second == [
+            ("a", 0), ("a", 1), ("a", 2), ("b", 0), ("a", 3), ("a", 4), ("a", 5), ("b", 1),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_batch_timeout(self, queue: FairBackpressureQueue[tuple[str, int]]):
+        """Test empty batch on timeout."""
+        assert await queue.get_sampled_batch(max_items=10, timeout=0.01) == []
+
+    @pytest.mark.asyncio
+    async def test_get_batch_wakes_on_put(self, queue: FairBackpressureQueue[tuple[str, int]]):
+        """Test a waiting consumer wakes when an item arrives."""
+        waiter = asyncio.create_task(queue.get_batch(max_items=10, timeout=5))
+        await asyncio.sleep(0)
+        queue.put_nowait(("a", 0))
+
+        assert await asyncio.wait_for(waiter, timeout=1) == [("a", 0)]
+
+    def test_single_exporter_matches_global_queue(self, settings: IngestionSettings):
+        """Test one exporter sees the same decisions as BackpressureQueue."""
+        fair = FairBackpressureQueue(settings, key=exporter_of)
+        plain: BackpressureQueue[tuple[str, int]] = BackpressureQueue(settings)
+
+        for i in range(9000):
+            assert fair.put_nowait(("a", i)) == plain.put_nowait(("a", i))
+
+        assert fair.stats == plain.stats
+
+    def test_only_heavy_exporter_sampled(self, queue: FairBackpressureQueue[tuple[str, int]]):
+        """Test exporters under their share are not sampled under pressure."""
+        for i in range(6000):
+            queue.put_nowait(("chatty", i))
+        for i in range(100):
+            assert queue.put_nowait(("quiet", i)) is True
+
+        assert queue.state == BackpressureState.SAMPLING
+        assert queue.put_nowait(("chatty", -1)) is False
+        assert queue.stats.total_sampled > 0
+
+    def test_only_heavy_exporter_dropped(self, queue: FairBackpressureQueue[tuple[str, int]]):
+        """Test a flooding exporter is dropped while others are admitted."""
+        for i in range(20000):
+            queue.put_nowait(("chatty", i))
+
+        assert queue.state == BackpressureState.DROPPING
+        assert queue.put_nowait(("chatty", -1)) is False
+        assert queue.put_nowait(("quiet", 0)) is True
+        assert queue.exporter_sizes["quiet"] == 1
+
+    @pytest.mark.asyncio
+    async def test_sample_factor(self, queue: FairBackpressureQueue[tuple[str, int]]):
+        """Test items admitted while sampling carry the sample rate."""
+        for i in range(5002):
+            queue.put_nowait(("a", i))
+
+        items = await queue.get_sampled_batch(max_items=10000)
+
+        assert {factor for _, factor in items[:5000]} == {1}
+        assert items[-1] == (("a", 5001), 2)
+
+    def test_queue_full(self, queue: FairBackpressureQueue[tuple[str, int]]):
+        """Test the total size is capped."""
+        queue._max_size = 3
+        queue._sample_threshold = queue._drop_threshold = 100
+
+        results = [queue.put_nowait((exporter, 0)) for exporter in "abcd"]
+
+        assert results == [True, True, True, False]
+        assert queue.stats.total_dropped == 1
+
+    @pytest.mark.asyncio
+    async def test_get_and_get_nowait(self, queue: FairBackpressureQueue[tuple[str, int]]):
+        """Test single-item gets."""
+        assert queue.get_nowait() is None
+
+        queue.put_nowait(("a", 0))
+        queue.put_nowait(("b", 0))
+
+        assert await queue.get() == ("a", 0)
+        assert queue.get_nowait() == ("b", 0)
+        assert queue.get_nowait() is None
+
+    def test_flush_metrics(self, queue: FairBackpressureQueue[tuple[str, int]]):
+        """Test per-exporter metrics are published and idle exporters pruned."""
+        sampled = EXPORTER_PACKETS_DROPPED.labels(exporter="chatty", reason="sampled")
+        before = sampled._value.get()
+
+        for i in range(6000):
+            queue.put_nowait(("chatty", i))
+        queue.put_nowait(("quiet", 0))
+        queue.get_nowait()
+
+        queue.flush_metrics()
+
+        assert sampled._value.get() - before == queue.stats.total_sampled
+        assert EXPORTER_QUEUE_SIZE.labels(exporter="chatty")._value.get() == queue.size - 1
+
+        # "quiet" was served and has nothing pending, so it is pruned next flush
+        queue.get_nowait()
+        queue.flush_metrics()
+        assert "quiet" not in queue._exporters
+
+    def test_flush_metrics_prunes_drop_series(
+        self, queue: FairBackpressureQueue[tuple[str, int]]
+    ):
+        """Test a pruned exporter's drop counter series are removed."""
+        for i in range(6000):
+            queue.put_nowait(("burst", i))
+        queue.flush_metrics()
+        assert ("burst", "sampled") in EXPORTER_PACKETS_DROPPED._metrics
+
+        while queue.get_nowait() is not None:
+            pass
+        queue.flush_metrics()
+
+        assert "burst" not in queue._exporters
+        assert not any(key == "burst" for key, _ in EXPORTER_PACKETS_DROPPED._metrics)
+
+    def test_set_thresholds(self, queue: FairBackpressureQueue[tuple[str, int]]):
+        """Test lowered thresholds take effect on the next item."""
+        for i in range(3000):
+            queue.put_nowait(("a", i))
+
+        queue.set_thresholds(2000, 2500)
+
+        assert queue.thresholds == (2000, 2500)
+        assert queue.state == BackpressureState.DROPPING
+        assert queue.put_nowait(("a", -1)) is False
+
+
+class TestAdaptiveBackpressure:
+    """Test cases for AdaptiveBackpressure."""
+
+    def test_samples_bounded(self):
+        """Test only the most recent samples are averaged."""
+        adaptive = AdaptiveBackpressure()
+        for rate in range(100):
+            adaptive.record_throughput(rate)
+
+        assert adaptive.average_throughput == sum(range(90, 100)) / 10
+
+    def test_no_samples(self):
+        """Test base thresholds are used before any throughput is recorded."""
+        adaptive = AdaptiveBackpressure()
+
+        assert adaptive.get_adjusted_thresholds(5000, 8000) == (5000, 8000)
+        assert adaptive.average_latency == 0.0
+
+    def test_under_target_relaxes(self):
+        """Test low throughput raises thresholds, up to 1.5x."""
+        adaptive = AdaptiveBackpressure(target_throughput=10000)
+        adaptive.record_throughput(1000)
+
+        for _ in range(100):
+            thresholds = adaptive.get_adjusted_thresholds(5000, 8000)
+
+        assert thresholds == (7500, 12000)
+
+    def test_slow_writes_tighten(self):
+        """Test write latency over target lowers thresholds even under target."""
+        adaptive = AdaptiveBackpressure(target_throughput=10000, target_latency=0.1)
+        adaptive.record_throughput(1000)
+        adaptive.record_latency(0.5)
+
+        sample, drop = adaptive.get_adjusted_thresholds(5000, 8000)
+
+        assert sample < 5000
+        assert drop < 8000
+        assert adaptive.threshold_multiplier < 1.0
+
+    def test_batch_size_grows_with_backlog(self):
+        """Test a backlog with fast writes grows batches additively."""
+        adaptive = AdaptiveBackpressure(target_latency=0.5, max_batch_size=2000)
+        adaptive.record_latency(0.01)
+
+        sizes = [adaptive.get_adjusted_batch_size(1000, backlogged=True) for _ in range(15)]
+
+        assert sizes[:3] == [1100, 1200, 1300]
+        assert sizes[-1] == 2000
+
+    def test_batch_size_shrinks_on_slow_writes(self):
+        """Test slow writes shrink batches multiplicatively, to the minimum."""
+        adaptive = AdaptiveBackpressure(target_latency=0.1, min_batch_size=500)
+        adaptive.record_latency(1.0)
+
+        sizes = [adaptive.get_adjusted_batch_size(1000, backlogged=True) for _ in range(5)]
+
+        assert sizes == [800, 640, 512, 500, 500]
+
+    def test_batch_size_returns_to_base(self):
+        """Test the batch size drifts back without a backlog."""
+        adaptive = AdaptiveBackpressure()
+        for _ in range(5):
+            adaptive.get_adjusted_batch_size(1000, backlogged=True)
+
+        for _ in range(100):
+            size = adaptive.get_adjusted_batch_size(1000, backlogged=False)
+
+        assert size == 1000
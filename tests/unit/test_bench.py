@@ -0,0 +1,244 @@
+"""Unit tests for the ingestion benchmark tool."""
+
+import itertools
+import struct
+from ipaddress import IPv4Address, IPv6Address
+from pathlib import Path
+
+import pytest
+
+from flowlens.common.config import IngestionSettings
+from flowlens.ingestion.bench.generator import PROTOCOLS, StreamGenerator
+from flowlens.ingestion.bench.pcap import read_capture
+from flowlens.ingestion.bench.runner import LatencyRecorder, free_udp_port, run_bench
+from flowlens.ingestion.bench.sender import CaptureSource, SyntheticSource
+from flowlens.ingestion.parsers.ipfix import IPFIXParser
+from flowlens.ingestion.parsers.netflow_v5 import NetFlowV5Parser
+from flowlens.ingestion.parsers.netflow_v9 import NetFlowV9Parser
+from flowlens.ingestion.parsers.sflow import SFlowParser
+from flowlens.ingestion.router import MemoryRouter
+
+
+def udp_frame(payload: bytes, src: str = "192.0.2.10", dst_port: int = 2055) -> bytes:
+    """Build an Ethernet/IPv4/UDP frame."""
+    udp = struct.pack("!HHHH", 40000, dst_port, 8 + len(payload), 0) + payload
+    ip = struct.pack(
+        "!BBHHHBBH4s4s",
+        0x45, 0, 20 + len(udp), 0, 0, 64, 17, 0,
+        IPv4Address(src).packed, IPv4Address("192.0.2.1").packed,
+    )
+    return bytes(12) + b"\x08\x00" + ip + udp
+
+
+def write_pcap(path: Path, frames: list[tuple[float, bytes]]) -> None:
+    """Write a classic little-endian microsecond pcap."""
+    with path.open("wb") as f:
+        f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1))
+        for timestamp, frame in frames:
+            seconds, micros = int(timestamp), round((timestamp % 1) * 1e6)
+            f.write(struct.pack("<IIII", seconds, micros, len(frame), len(frame)) + frame)
+
+
+def write_pcapng(path: Path, frames: list[tuple[float, bytes]]) -> None:
+    """Write a pcapng file with nanosecond timestamps."""
+    def block(block_type: int, body: bytes) -> bytes:
+        body += bytes(-len(body) % 4)
+        length = len(body) + 12
+        return struct.pack("<II", block_type, length) + body + struct.pack("<I", length)
+
+    tsresol = struct.pack("<HHB3x", 9, 1, 9) + struct.pack("<HH", 0, 0)
+    with path.open("wb") as f:
+        f.write(block(0x0A0D0D0A, struct.pack("<IHHq", 0x1A2B3C4D, 1, 0, -1)))
+        f.write(block(1, struct.pack("<HHI", 1, 0, 65535) + tsresol))
+        for timestamp, frame in frames:
+            ts = round(timestamp * 1e9)
+            f.write(block(6, struct.pack("<IIIII", 0, ts >> 32, ts & 0xFFFFFFFF, len(frame), len(frame)) + frame))
+
+
+class TestStreamGenerator:
+    """Test cases for synthetic datagram streams."""
+
+    @pytest.mark.parametrize("protocol", PROTOCOLS)
+    def test_datagrams_parse(self, protocol: str):
+        """Test every protocol's datagrams decode to the expected flows."""
+        parser = {
+            "netflow_v5": NetFlowV5Parser,
+            "netflow_v9": NetFlowV9Parser,
+            "ipfix": IPFIXParser,
+            "sflow": SFlowParser,
+        }[protocol]()
+        generator = StreamGenerator(protocol, exporters=2, records_per_packet=5)
+
+        records = 0
+        for exporter, data in itertools.islice(generator.datagrams(), 20):
+            records += len(parser.parse(data, IPv4Address(f"127.1.0.{exporter + 1}")))
+
+        # Template datagrams (one per exporter up front) carry no flows
+        data_packets = 20 if protocol in ("netflow_v5", "sflow") else 18
+        assert records == data_packets * 5
+
+    def test_template_interval(self):
+        """Test templates are re-sent every template_interval data packets."""
+        generator = StreamGenerator("netflow_v9", template_interval=3)
+
+        flowset_ids = [
+            struct.unpack_from("!H", data, 20)[0]
+            for _, data in itertools.islice(generator.datagrams(), 8)
+        ]
+
+        assert flowset_ids == [0, 256, 256, 256, 0, 256, 256, 256]
+
+    def test_template_churn(self):
+        """Test churn moves exporters to new template IDs."""
+        generator = StreamGenerator("ipfix", template_interval=100, template_churn=2)
+        parser = IPFIXParser()
+
+        set_ids = []
+        for _, data in itertools.islice(generator.datagrams(), 9):
+            set_ids.append(struct.unpack_from("!H", data, 16)[0])
+            parser.parse(data, IPv4Address("127.1.0.1"))
+
+        assert set_ids == [2, 256, 256, 2, 257, 257, 2, 258, 258]
+        assert parser.template_cache.size == 3
+
+    def test_unknown_protocol(self):
+        """Test unknown protocols are rejected."""
+        with pytest.raises(ValueError, match="unknown protocol"):
+            StreamGenerator("netflow_v7")
+
+
+class TestReadCapture:
+    """Test cases for pcap/pcapng reading."""
+
+    def test_pcap(self, tmp_path: Path):
+        """Test UDP payloads, sources and timestamps are read from pcap."""
+        path = tmp_path / "flows.pcap"
+        write_pcap(path, [
+            (1000.5, udp_frame(b"first")),
+            (1001.25, udp_frame(b"second", src="192.0.2.20", dst_port=6343)),
+        ])
+
+        datagrams = list(read_capture(path))
+
+        assert [d.payload for d in datagrams] == [b"first", b"second"]
+        assert [d.timestamp for d in datagrams] == [1000.5, 1001.25]
+        assert datagrams[1].src_ip == IPv4Address("192.0.2.20")
+        assert datagrams[1].dst_port == 6343
+
+    def test_pcapng(self, tmp_path: Path):
+        """Test enhanced packet blocks are read with their timestamp resolution."""
+        path = tmp_path / "flows.pcapng"
+        write_pcapng(path, [(1000.000000001, udp_frame(b"abc")), (1002.0, udp_frame(b"de"))])
+
+        datagrams = list(read_capture(path))
+
+        assert [d.payload for d in datagrams] == [b"abc", b"de"]
+        assert datagrams[1].timestamp - datagrams[0].timestamp == pytest.approx(2.0)
+
+    def test_skips_non_udp_and_fragments(self, tmp_path: Path):
+        """Test TCP, ARP and non-first fragments are skipped."""
+        tcp = bytearray(udp_frame(b"tcp"))
+        tcp[14 + 9] = 6
+        fragment = bytearray(udp_frame(b"frag"))
+        fragment[14 + 6:14 + 8] = struct.pack("!H", 185)
+        arp = bytes(12) + b"\x08\x06" + bytes(28)
+        path = tmp_path / "mixed.pcap"
+        write_pcap(path, [(1.0, bytes(tcp)), (2.0, bytes(fragment)), (3.0, arp), (4.0, udp_frame(b"ok"))])
+
+        assert [d.payload for d in read_capture(path)] == [b"ok"]
+
+    def test_ipv6_vlan(self, tmp_path: Path):
+        """Test 802.1Q tagged IPv6 datagrams are read."""
+        payload = b"v6"
+        udp = struct.pack("!HHHH", 40000, 4739, 8 + len(payload), 0) + payload
+        ip = struct.pack("!IHBB", 6 << 28, len(udp), 17, 64)
+        ip += IPv6Address("2001:db8::1").packed + IPv6Address("2001:db8::2").packed
+        frame = bytes(12) + struct.pack("!HHH", 0x8100, 10, 0x86DD) + ip + udp
+        path = tmp_path / "v6.pcap"
+        write_pcap(path, [(1.0, frame)])
+
+        datagrams = list(read_capture(path))
+
+        assert [(d.src_ip, d.dst_port, d.payload) for d in datagrams] == [
+            (IPv6Address("2001:db8::1"), 4739, b"v6")
+        ]
+
+    def test_not_a_capture(self, tmp_path: Path):
+        """Test other files are rejected."""
+        path = tmp_path / "notes.txt"
+        path.write_bytes(b"not a capture at all, just text")
+
+        with pytest.raises(ValueError, match="not a packet capture"):
+            list(read_capture(path))
+
+
+class TestLatencyRecorder:
+    """Test cases for stage latency percentiles."""
+
+    def test_percentiles(self):
+        """Test nearest-rank percentiles over recorded samples."""
+        recorder = LatencyRecorder()
+        for ms in range(1, 101):
+            recorder.record(ms / 1000)
+
+        summary = recorder.summary()
+
+        assert summary["count"] == 100
+        assert summary["p50_ms"] == pytest.approx(51)
+        assert summary["p99_ms"] == pytest.approx(100)
+        assert summary["max_ms"] == pytest.approx(100)
+        assert summary["mean_ms"] == pytest.approx(50.5)
+
+    def test_reservoir_is_bounded(self):
+        """Test sample storage stays bounded while totals keep counting."""
+        recorder = LatencyRecorder(max_samples=10)
+        for _ in range(1000):
+            recorder.record(0.001)
+
+        assert recorder.count == 1000
+        assert len(recorder._samples) == 10
+
+    def test_empty(self):
+        """Test an unused stage reports zeros."""
+        assert LatencyRecorder().summary()["p99_ms"] == 0.0
+
+
+class TestRunBench:
+    """End-to-end benchmark runs against a collector on loopback."""
+
+    @pytest.fixture
+    def settings(self) -> IngestionSettings:
+        """Collector settings on free loopback ports."""
+        return IngestionSettings(
+            bind_address="127.0.0.1",
+            netflow_port=free_udp_port("127.0.0.1"),
+            sflow_port=free_udp_port("127.0.0.1"),
+            batch_timeout_ms=100,
+        )
+
+    async def test_generate(self, settings: IngestionSettings):
+        """Test synthetic traffic is delivered and measured."""
+        router = MemoryRouter()
+        source = SyntheticSource("netflow_v5", exporters=2, records_per_packet=10)
+
+        result = await run_bench(source, settings, router, rate=200, count=40)
+
+        assert result.sent == 40
+        assert result.received == 40
+        assert result.flows_routed == 400
+        assert result.drop_rate == 0.0
+        assert result.stages["parse"].count == 40
+        assert result.as_dict()["flows_per_second"] > 0
+
+    async def test_replay(self, settings: IngestionSettings, tmp_path: Path):
+        """Test captured datagrams are replayed to the matching listener."""
+        v5 = next(StreamGenerator("netflow_v5", records_per_packet=3).datagrams())[1]
+        sflow = next(StreamGenerator("sflow", records_per_packet=2).datagrams())[1]
+        path = tmp_path / "flows.pcap"
+        write_pcap(path, [(1.0, udp_frame(v5)), (1.01, udp_frame(sflow, dst_port=6343))])
+
+        result = await run_bench(CaptureSource(paths=(path,), loops=2), settings, MemoryRouter())
+
+        assert result.sent == 4
+        assert result.flows_parsed == 10
+        assert result.parse_errors == 0
@@ -0,0 +1,372 @@
+"""Unit tests for pre-storage flow aggregation in the collector."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from ipaddress import IPv4Address
+
+import numpy as np
+import pytest
+
+from flowlens.ingestion.aggregation import (
+    FlowAggregationStage,
+    normalize_direction,
+    window_starts,
+)
+from flowlens.ingestion.parsers.base import FlowRecord
+from flowlens.ingestion.parsers.batch import FlowBatch, datetime_to_us, unpack_ips
+from flowlens.resolution.aggregator import (
+    COLLECTOR_SAMPLE_FIELD,
+    AggregationKey,
+    FlowAggregator,
+    normalize_flow_direction,
+)
+
+BASE_TIME = datetime(2024, 1, 1, 12, 0, 30, tzinfo=timezone.utc)
+
+
+def make_record(**overrides) -> FlowRecord:
+    """Create a client-to-server flow record."""
+    fields = {
+        "timestamp": BASE_TIME,
+        "src_ip": IPv4Address("192.168.1.10"),
+        "dst_ip": IPv4Address("10.0.0.5"),
+        "src_port": 54321,
+        "dst_port": 443,
+        "protocol": 6,
+        "bytes_count": 1000,
+        "packets_count": 10,
+        "exporter_ip": IPv4Address("10.0.0.1"),
+        "flow_source": "netflow_v9",
+    }
+    fields.update(overrides)
+    return FlowRecord(**fields)
+
+
+class FakeClock:
+    """Manually advanced wall clock."""
+
+    def __init__(self, now: datetime) -> None:
+        self.now = now.timestamp()
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class RecordingWriter:
+    """Window writer that records what it was given."""
+
+    def __init__(self) -> None:
+        self.windows: list[tuple[datetime, datetime, dict]] = []
+        self.fail = False
+
+    async def __call__(self, window_start, window_end, buckets) -> None:
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        self.windows.append((window_start, window_end, dict(buckets)))
+
+
+@pytest.fixture
+def aggregator() -> FlowAggregator:
+    """Aggregator with 5-minute windows."""
+    aggregator = FlowAggregator()
+    aggregator._window_size_minutes = 5
+    return aggregator
+
+
+@pytest.fixture
+def writer() -> RecordingWriter:
+    """Recording window writer."""
+    return RecordingWriter()
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """Clock set just after the first test flow."""
+    return FakeClock(BASE_TIME)
+
+
+@pytest.fixture
+def stage(aggregator, writer, clock) -> FlowAggregationStage:
+    """Aggregate-only stage with an injected writer and clock."""
+    return FlowAggregationStage(
+        aggregator=aggregator,
+        max_buckets=1000,
+        flush_delay_seconds=30,
+        write=writer,
+        clock=clock,
+    )
+
+
+class TestNormalizeDirection:
+    """Test cases for vectorized direction normalization."""
+
+    @pytest.mark.parametrize(
+        ("src_port", "dst_port"),
+        [(54321, 443), (443, 54321), (80, 443), (40000, 50000), (0, 0)],
+    )
+    def test_matches_normalize_flow_direction(self, src_port: int, dst_port: int):
+        """Test the vectorized rule agrees with normalize_flow_direction()."""
+        batch = FlowBatch.from_records([make_record(src_port=src_port, dst_port=dst_port)])
+
+        client_ip, server_ip, service_port = normalize_direction(batch)
+        expected = normalize_flow_direction("192.168.1.10", "10.0.0.5", src_port, dst_port, 6)
+
+        assert str(unpack_ips(client_ip)[0]) == expected[0]
+        assert str(unpack_ips(server_ip)[0]) == expected[1]
+        assert int(service_port[0]) == expected[2]
+
+
+class TestWindowStarts:
+    """Test cases for vectorized window bounds."""
+
+    @pytest.mark.parametrize("window_minutes", [1, 5, 7, 15])
+    def test_matches_get_window_bounds(self, aggregator: FlowAggregator, window_minutes: int):
+        """Test window starts agree with FlowAggregator.get_window_bounds()."""
+        aggregator._window_size_minutes = window_minutes
+        times = [BASE_TIME + timedelta(seconds=s) for s in range(0, 7200, 137)]
+
+        starts = window_starts(np.array([datetime_to_us(t) for t in times]), window_minutes)
+
+        for t, start in zip(times, starts.tolist(), strict=True):
+            expected, _ = aggregator.get_window_bounds(t)
+            assert start == datetime_to_us(expected)
+
+
+class TestFlowAggregationStage:
+    """Test cases for FlowAggregationStage."""
+
+    def test_groups_flows_by_key(self, stage: FlowAggregationStage):
+        """Test flows and their responses fold into one bucket."""
+        batch = FlowBatch.from_records([
+            make_record(bytes_count=100, packets_count=1),
+            make_record(bytes_count=300, packets_count=3, src_port=54322),
+            # Response direction of the same service
+            make_record(
+                src_ip=IPv4Address("10.0.0.5"),
+                dst_ip=IPv4Address("192.168.1.10"),
+                src_port=443,
+                dst_port=54321,
+                bytes_count=200,
+                packets_count=2,
+            ),
+            make_record(dst_port=22, bytes_count=50),
+        ])
+
+        stored = stage.add(batch)
+
+        assert len(stored) == 0
+        assert stage.bucket_count == 2
+
+        (buckets,) = stage._windows.values()
+        bucket = buckets[AggregationKey("192.168.1.10", "10.0.0.5", 443, 6)]
+        assert bucket.bytes_total == 600
+        assert bucket.packets_total == 6
+        assert bucket.flows_count == 3
+        assert bucket.bytes_min == 100
+        assert bucket.bytes_max == 300
+        assert bucket.exporter_ip == "10.0.0.1"
+
+    def test_accumulates_across_batches(self, stage: FlowAggregationStage):
+        """Test later batches add to existing buckets."""
+        stage.add(FlowBatch.from_records([make_record(bytes_count=100)]))
+        stage.add(FlowBatch.from_records([make_record(bytes_count=400)]))
+
+        assert stage.bucket_count == 1
+        (buckets,) = stage._windows.values()
+        (bucket,) = buckets.values()
+        assert bucket.bytes_total == 500
+        assert bucket.flows_count == 2
+
+    def test_separates_windows(self, stage: FlowAggregationStage):
+        """Test flows in different windows get different buckets."""
+        stage.add(FlowBatch.from_records([
+            make_record(),
+            make_record(timestamp=BASE_TIME + timedelta(minutes=5)),
+        ]))
+
+        assert stage.bucket_count == 2
+        assert len(stage._windows) == 2
+
+    def test_tracks_gateways(self, stage: FlowAggregationStage):
+        """Test next-hop bytes are tracked per bucket."""
+        stage.add(FlowBatch.from_records([
+            make_record(bytes_count=100, extended_fields={"next_hop": "10.0.0.254"}),
+            make_record(bytes_count=200, extended_fields={"next_hop": "10.0.0.254"}),
+            make_record(bytes_count=50, extended_fields={"next_hop": "0.0.0.0"}),
+        ]))
+
+        (buckets,) = stage._windows.values()
+        (bucket,) = buckets.values()
+        assert bucket.gateway_bytes == {"10.0.0.254": 300}
+
+    def test_samples_raw_flows(self, aggregator, writer, clock):
+        """Test one in N raw flows is returned, tagged with the rate."""
+        stage = FlowAggregationStage(
+            aggregator=aggregator,
+            raw_sample_rate=3,
+            write=writer,
+            clock=clock,
+        )
+
+        records = [make_record(src_port=50000 + i, extended_fields={"vlan": i}) for i in range(7)]
+        first = stage.add(FlowBatch.from_records(records[:4]))
+        second = stage.add(FlowBatch.from_records(records[4:]))
+
+        sampled = first.to_records() + second.to_records()
+        assert [r.src_port for r in sampled] == [50000, 50003, 50006]
+        assert all(r.extended_fields[COLLECTOR_SAMPLE_FIELD] == 3 for r in sampled)
+        assert sampled[1].extended_fields["vlan"] == 3
+
+        # Every flow is still aggregated
+        (buckets,) = stage._windows.values()
+        (bucket,) = buckets.values()
+        assert bucket.flows_count == 7
+
+    @pytest.mark.asyncio
+    async def test_flush_waits_for_window_to_close(self, stage, writer, clock):
+        """Test windows are written once they end plus the flush delay."""
+        stage.add(FlowBatch.from_records([make_record()]))
+
+        # Window ends at 12:05; flush delay is 30 seconds
+        clock.now = datetime(2024, 1, 1, 12, 5, 29, tzinfo=timezone.utc).timestamp()
+        assert await stage.flush() == 0
+        assert writer.windows == []
+
+        clock.now += 1
+        assert await stage.flush() == 1
+
+        (window_start, window_end, buckets) = writer.windows[0]
+        assert window_start == datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+        assert window_end == datetime(2024, 1, 1, 12, 5, tzinfo=timezone.utc)
+        assert len(buckets) == 1
+        assert stage.bucket_count == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_force(self, stage, writer):
+        """Test forced flushes write open windows."""
+        stage.add(FlowBatch.from_records([make_record()]))
+
+        assert await stage.flush(force=True) == 1
+        assert len(writer.windows) == 1
+        assert stage.bucket_count == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_over_capacity(self, aggregator, writer, clock):
+        """Test the oldest windows are written early when over capacity."""
+        stage = FlowAggregationStage(
+            aggregator=aggregator,
+            max_buckets=2,
+            write=writer,
+            clock=clock,
+        )
+        stage.add(FlowBatch.from_records([
+            make_record(dst_port=port, timestamp=BASE_TIME + timedelta(minutes=5 * (port % 2)))
+            for port in (1, 2, 3, 4)
+        ]))
+
+        assert await stage.flush() == 2
+        assert [w[0].minute for w in writer.windows] == [0]
+        assert stage.bucket_count == 2
+
+    @pytest.mark.asyncio
+    async def test_flush_failure_retries(self, stage, writer):
+        """Test failed writes keep the window for the next flush."""
+        stage.add(FlowBatch.from_records([make_record()]))
+
+        writer.fail = True
+        assert await stage.flush(force=True) == 0
+        assert stage.bucket_count == 1
+
+        writer.fail = False
+        assert await stage.flush(force=True) == 1
+
+    @pytest.mark.asyncio
+    async def test_flush_failure_over_capacity_drops(self, aggregator, writer, clock):
+        """Test windows are dropped when writes fail and the stage is full."""
+        stage = FlowAggregationStage(
+            aggregator=aggregator,
+            max_buckets=1,
+            write=writer,
+            clock=clock,
+        )
+        stage.add(FlowBatch.from_records([make_record(dst_port=1), make_record(dst_port=2)]))
+
+        writer.fail = True
+        assert await stage.flush() == 0
+        assert stage.bucket_count == 0
+
+    @pytest.mark.asyncio
+    async def test_flows_added_during_write_kept(self, stage, clock):
+        """Test flows added while their window is written are not lost."""
+        writing = asyncio.Event()
+        release = asyncio.Event()
+        written: list[int] = []
+
+        async def slow_write(window_start, window_end, buckets) -> None:
+            writing.set()
+            await release.wait()
+            written.append(sum(bucket.flows_count for bucket in buckets.values()))
+
+        stage._write = slow_write
+        stage.add(FlowBatch.from_records([make_record()]))
+        clock.now += 600
+
+        flush = asyncio.create_task(stage.flush())
+        await writing.wait()
+        stage.add(FlowBatch.from_records([make_record(bytes_count=5)] * 2))
+        release.set()
+
+        assert await flush == 1
+        assert written == [1]
+
+        # The late flows are held for the next write, which the upsert merges
+        assert stage.bucket_count == 1
+        assert await stage.flush() == 1
+        assert written == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_failed_write_merges_late_flows(self, stage, writer, clock):
+        """Test a window that fails to write is merged with flows added meanwhile."""
+        stage.add(FlowBatch.from_records([make_record()]))
+        clock.now += 600
+
+        async def failing_write(window_start, window_end, buckets) -> None:
+            stage.add(FlowBatch.from_records([make_record()]))
+            raise ConnectionError("database unavailable")
+
+        stage._write = failing_write
+        assert await stage.flush() == 0
+        assert stage.bucket_count == 1
+
+        stage._write = writer
+        assert await stage.flush() == 1
+        ((_, _, buckets),) = writer.windows
+        (bucket,) = buckets.values()
+        assert bucket.flows_count == 2
+
+    @pytest.mark.asyncio
+    async def test_background_writer(self, aggregator, writer, clock):
+        """Test closed windows are written in the background and stop writes the rest."""
+        stage = FlowAggregationStage(
+            aggregator=aggregator,
+            write=writer,
+            clock=clock,
+            flush_interval=0.001,
+        )
+        stage.add(FlowBatch.from_records([make_record()]))
+        clock.now += 600
+        stage.start()
+        try:
+            for _ in range(100):
+                await asyncio.sleep(0.001)
+                if writer.windows:
+                    break
+            assert len(writer.windows) == 1
+
+            later = make_record(timestamp=BASE_TIME + timedelta(minutes=10))
+            stage.add(FlowBatch.from_records([later]))
+        finally:
+            await stage.stop()
+
+        assert len(writer.windows) == 2
+        assert stage.bucket_count == 0
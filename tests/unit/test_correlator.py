@@ -0,0 +1,119 @@
+"""Unit tests for asset correlation."""
+
+import uuid
+from ipaddress import IPv4Address
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from flowlens.common.asset_cache import AssetIdCache
+from flowlens.enrichment.correlator import (
+    _ADVISORY_LOCKS_SQL,
+    _BACKFILL_HOSTNAMES_SQL,
+    _FIND_ASSETS_SQL,
+    AssetCorrelator,
+    _ip_to_advisory_lock_id,
+)
+
+
+def rows(*pairs: tuple[object, uuid.UUID]) -> MagicMock:
+    """Result whose all() returns (ip_address, id) rows."""
+    result = MagicMock()
+    result.all.return_value = list(pairs)
+    return result
+
+
+@pytest.fixture
+def db() -> MagicMock:
+    """Mock database session."""
+    session = MagicMock()
+    session.execute = AsyncMock()
+    session.flush = AsyncMock()
+    return session
+
+
+class TestAssetCorrelator:
+    """Test cases for AssetCorrelator."""
+
+    @pytest.mark.asyncio
+    async def test_correlate_batch_all_found(self, db: MagicMock):
+        """Test existing assets are found with a single query and cached."""
+        existing = {"10.0.0.1": uuid.uuid4(), "10.0.0.2": uuid.uuid4()}
+        db.execute.return_value = rows(*((IPv4Address(ip), i) for ip, i in existing.items()))
+        correlator = AssetCorrelator(cache=AssetIdCache())
+
+        results = await correlator.correlate_batch(db, [("10.0.0.1", None), ("10.0.0.2", "web")])
+
+        assert results == existing
+        db.execute.assert_awaited_once_with(_FIND_ASSETS_SQL, {"ips": ["10.0.0.1", "10.0.0.2"]})
+
+        # Served from the cache afterwards
+        assert await correlator.correlate(db, "10.0.0.2") == existing["10.0.0.2"]
+        assert db.execute.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_correlate_batch_creates_missing(self, db: MagicMock):
+        """Test misses are locked in sorted order and inserted in one statement."""
+        existing_id = uuid.uuid4()
+        created: dict[str, uuid.UUID] = {}
+
+        async def execute(statement, params=None):
+            if statement is _FIND_ASSETS_SQL:
+                return rows(("10.0.0.1", existing_id))
+            if statement is _ADVISORY_LOCKS_SQL:
+                return MagicMock()
+            # Multi-row INSERT ... RETURNING
+            values = statement.compile().params
+            for key, value in values.items():
+                if key.startswith("ip_address"):
+                    created[value] = uuid.uuid4()
+            return rows(*created.items())
+
+        db.execute.side_effect = execute
+        correlator = AssetCorrelator(cache=AssetIdCache())
+
+        results = await correlator.correlate_batch(
+            db, [("10.0.0.9", "db9.example.com"), ("10.0.0.1", None), ("10.0.0.5", None)]
+        )
+
+        statements = [call.args[0] for call in db.execute.await_args_list]
+        assert statements[:3] == [_FIND_ASSETS_SQL, _ADVISORY_LOCKS_SQL, _FIND_ASSETS_SQL]
+        assert len(statements) == 4
+
+        lock_ids = db.execute.await_args_list[1].args[1]["lock_ids"]
+        assert lock_ids == sorted(
+            {_ip_to_advisory_lock_id("10.0.0.5"), _ip_to_advisory_lock_id("10.0.0.9")}
+        )
+
+        assert set(created) == {"10.0.0.5", "10.0.0.9"}
+        assert results == {"10.0.0.1": existing_id, **created}
+        db.flush.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_correlate_batch_unresolved(self, db: MagicMock):
+        """Test an IP that can be neither found nor created raises."""
+        db.execute.return_value = rows()
+        correlator = AssetCorrelator(cache=AssetIdCache())
+
+        with pytest.raises(RuntimeError, match=r"10\.0\.0\.7"):
+            await correlator.correlate_batch(db, [("10.0.0.7", None)])
+
+    @pytest.mark.asyncio
+    async def test_backfill_hostnames(self, db: MagicMock):
+        """Test resolved hostnames are written in one statement."""
+        db.execute.return_value = MagicMock(rowcount=1)
+        correlator = AssetCorrelator(cache=AssetIdCache())
+
+        assert await correlator.backfill_hostnames(db, {}) == 0
+        db.execute.assert_not_awaited()
+
+        long_name = "a" * 300
+        updated = await correlator.backfill_hostnames(
+            db, {"10.0.0.1": "web.example.com", "10.0.0.2": long_name}
+        )
+
+        assert updated == 1
+        db.execute.assert_awaited_once_with(
+            _BACKFILL_HOSTNAMES_SQL,
+            {"ips": ["10.0.0.1", "10.0.0.2"], "hostnames": ["web.example.com", "a" * 255]},
+        )
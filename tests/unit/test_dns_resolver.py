@@ -0,0 +1,136 @@
+"""Unit tests for the background reverse DNS resolver."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from flowlens.common.config import EnrichmentSettings
+from flowlens.enrichment.resolvers.dns import DNSResolver
+
+
+def make_resolver(**settings) -> DNSResolver:
+    """Create a resolver with test settings."""
+    return DNSResolver(
+        EnrichmentSettings(
+            dns_cache_ttl=3600,
+            dns_negative_cache_ttl=900,
+            dns_failure_cache_ttl=60,
+            shared_cache_enabled=False,
+            **settings,
+        )
+    )
+
+
+async def drain(resolver: DNSResolver) -> None:
+    """Let the background task resolve everything queued."""
+    for _ in range(100):
+        await asyncio.sleep(0)
+        if not resolver.cache_stats["pending"] and not resolver.cache_stats["in_flight"]:
+            break
+    await asyncio.sleep(0)
+
+
+class TestDNSResolver:
+    """Test cases for DNSResolver."""
+
+    @pytest.mark.asyncio
+    async def test_lookup_batch_does_not_wait(self):
+        """Test misses return None at once and resolve in the background."""
+        resolver = make_resolver()
+        resolver._do_lookup = AsyncMock(return_value=("db1.example.com", "success"))
+        try:
+            assert await resolver.lookup_batch(["10.0.0.5"]) == {"10.0.0.5": None}
+            resolver._do_lookup.assert_not_awaited()
+
+            await drain(resolver)
+
+            resolver._do_lookup.assert_awaited_once_with("10.0.0.5")
+            assert await resolver.lookup_batch(["10.0.0.5"]) == {"10.0.0.5": "db1.example.com"}
+        finally:
+            await resolver.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_cache_ttl_by_status(self):
+        """Test hostnames, NXDOMAIN and timeouts are cached for different times."""
+        resolver = make_resolver()
+        results = {
+            "10.0.0.1": ("host1", "success"),
+            "10.0.0.2": (None, "nxdomain"),
+            "10.0.0.3": (None, "timeout"),
+        }
+        resolver._do_lookup = AsyncMock(side_effect=lambda ip: results[ip])
+        cache_set = MagicMock(side_effect=resolver._cache.set)
+        resolver._cache.set = cache_set
+
+        for ip in results:
+            await resolver.resolve(ip)
+
+        assert [(call.args, call.kwargs["ttl"]) for call in cache_set.call_args_list] == [
+            (("10.0.0.1", "host1"), 3600),
+            (("10.0.0.2", ""), 900),
+            (("10.0.0.3", ""), 60),
+        ]
+
+        # Negative results are cached, not looked up again
+        assert await resolver.lookup_batch(["10.0.0.2"]) == {"10.0.0.2": None}
+        assert resolver.cache_stats["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_lookups_limited_in_flight(self):
+        """Test no more than dns_max_in_flight lookups run at once."""
+        resolver = make_resolver(dns_max_in_flight=3)
+        running = 0
+        peak = 0
+
+        async def lookup(ip: str) -> tuple[str, str]:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+            return f"host-{ip}", "success"
+
+        resolver._do_lookup = lookup
+        ips = [f"10.0.0.{i}" for i in range(10)]
+        try:
+            await resolver.lookup_batch(ips)
+            for _ in range(100):
+                await asyncio.sleep(0.001)
+                if all((await resolver.lookup_batch(ips)).values()):
+                    break
+
+            hostnames = await resolver.lookup_batch(ips)
+            assert hostnames == {ip: f"host-{ip}" for ip in ips}
+            assert peak == 3
+        finally:
+            await resolver.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_resolved_hostnames_reported(self):
+        """Test hostnames resolved in the background are passed to on_resolved."""
+        on_resolved = AsyncMock()
+        resolver = DNSResolver(EnrichmentSettings(shared_cache_enabled=False), on_resolved=on_resolved)
+        results = {"10.0.0.1": ("web.example.com", "success"), "10.0.0.2": (None, "nxdomain")}
+        resolver._do_lookup = AsyncMock(side_effect=lambda ip: results[ip])
+        try:
+            await resolver.lookup_batch(["10.0.0.1", "10.0.0.2"])
+            await drain(resolver)
+
+            on_resolved.assert_awaited_once_with({"10.0.0.1": "web.example.com"})
+        finally:
+            await resolver.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_queue_bounded(self):
+        """Test IPs beyond dns_queue_size are dropped rather than queued."""
+        resolver = make_resolver(dns_queue_size=100)
+        resolver._do_lookup = AsyncMock(return_value=(None, "nxdomain"))
+        try:
+            await resolver.lookup_batch([f"10.0.{i // 256}.{i % 256}" for i in range(150)])
+
+            stats = resolver.cache_stats
+            assert stats["pending"] == 100
+            assert stats["dropped"] == 50
+        finally:
+            await resolver.cleanup()
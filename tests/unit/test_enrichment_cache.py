@@ -0,0 +1,194 @@
+"""Unit tests for enrichment caches."""
+
+import asyncio
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+
+from flowlens.common.metrics import ENRICHMENT_CACHE_LOOKUPS
+from flowlens.enrichment.cache import LocalCache, SharedStore, SQLiteStore, TieredCache
+
+SECOND = 1_000_000_000
+
+
+class FakeClock:
+    """Manually advanced monotonic nanosecond clock."""
+
+    def __init__(self) -> None:
+        self.now = 0
+
+    def __call__(self) -> int:
+        return self.now
+
+
+class TestLocalCache:
+    """Test cases for LocalCache."""
+
+    def test_get_many_returns_hits_only(self):
+        """Test batch lookups return live entries and skip misses."""
+        cache: LocalCache[str, str] = LocalCache()
+        cache.set_many({"10.0.0.1": "a", "10.0.0.2": ""})
+
+        assert cache.get_many(["10.0.0.1", "10.0.0.2", "10.0.0.3"]) == {
+            "10.0.0.1": "a",
+            "10.0.0.2": "",
+        }
+        assert cache.get("10.0.0.3") is None
+
+        stats = cache.stats
+        assert (stats["hits"], stats["misses"]) == (2, 2)
+
+    def test_evicts_least_recently_used(self):
+        """Test lookups refresh recency and the oldest entry is evicted."""
+        cache: LocalCache[str, int] = LocalCache(max_size=3)
+        cache.set_many({"a": 1, "b": 2, "c": 3})
+
+        cache.get_many(["a"])
+        cache.set("d", 4)
+
+        assert cache.size() == 3
+        assert cache.get_many(["a", "b", "c", "d"]) == {"a": 1, "c": 3, "d": 4}
+
+        # Re-setting an entry refreshes it too
+        cache.set("c", 30)
+        cache.set_many({"e": 5})
+        assert cache.get_many(["a", "c", "d", "e"]) == {"c": 30, "d": 4, "e": 5}
+
+    def test_entries_expire(self):
+        """Test entries expire after their own TTL on the monotonic clock."""
+        clock = FakeClock()
+        cache: LocalCache[str, str] = LocalCache(default_ttl=60, clock=clock)
+        cache.set("default", "x")
+        cache.set_many({"short": "y"}, ttl=5)
+
+        clock.now = 5 * SECOND
+        assert cache.get_many(["default", "short"]) == {"default": "x"}
+        assert cache.size() == 1
+
+        clock.now = 60 * SECOND
+        assert cache.get("default") is None
+        assert cache.size() == 0
+
+    def test_cleanup_expired(self):
+        """Test expired entries are removed without being looked up."""
+        clock = FakeClock()
+        cache: LocalCache[str, int] = LocalCache(default_ttl=10, clock=clock)
+        cache.set_many({"a": 1, "b": 2})
+        cache.set("c", 3, ttl=100)
+
+        clock.now = 10 * SECOND
+        assert cache.cleanup_expired() == 2
+        assert cache.get("c") == 3
+
+    def test_metrics_labelled_by_name(self):
+        """Test lookups are counted under the cache's own name."""
+        hits = ENRICHMENT_CACHE_LOOKUPS.labels(cache="test-metrics", result="hit")
+        misses = ENRICHMENT_CACHE_LOOKUPS.labels(cache="test-metrics", result="miss")
+        before = (hits._value.get(), misses._value.get())
+
+        cache: LocalCache[str, int] = LocalCache(name="test-metrics")
+        cache.set("a", 1)
+        cache.get_many(["a", "b", "c"])
+
+        assert hits._value.get() - before[0] == 1
+        assert misses._value.get() - before[1] == 2
+
+
+@pytest.fixture
+async def stores(tmp_path: Path):
+    """Open SQLite stores on one file, as separate processes would."""
+    opened: list[SQLiteStore] = []
+
+    def open_store() -> SQLiteStore:
+        store = SQLiteStore(tmp_path / "cache.db", "dns")
+        opened.append(store)
+        return store
+
+    yield open_store
+    for store in opened:
+        await store.close()
+
+
+class TestTieredCache:
+    """Test cases for TieredCache."""
+
+    @pytest.mark.asyncio
+    async def test_entries_shared_between_caches(self, stores):
+        """Test one cache's entries are found by another through the store."""
+        first = TieredCache(stores(), name="test-tiered")
+        second = TieredCache(stores(), name="test-tiered")
+
+        first.set("10.0.0.1", "db1.example.com")
+        first.set("10.0.0.2", "", ttl=60)
+        await first.flush()
+
+        found = await second.get_many(["10.0.0.1", "10.0.0.2", "10.0.0.3"])
+        assert found == {"10.0.0.1": "db1.example.com", "10.0.0.2": ""}
+
+        # Promoted into the local cache with the remaining TTL
+        assert second._local.get_many(["10.0.0.1", "10.0.0.2"]) == found
+
+    @pytest.mark.asyncio
+    async def test_writes_behind(self):
+        """Test set() returns at once and the store is written in the background."""
+        store = AsyncMock(spec=SharedStore)
+        store.mget.return_value = {}
+        cache = TieredCache(store, flush_interval=0.01)
+
+        cache.set("10.0.0.1", "host1", ttl=60)
+        cache.set("10.0.0.2", "host2", ttl=60)
+        assert await cache.get("10.0.0.1") == "host1"
+        store.mset.assert_not_awaited()
+
+        await asyncio.sleep(0.05)
+
+        store.mset.assert_awaited_once()
+        entries, hits = store.mset.await_args.args
+        assert sorted(entries) == ["10.0.0.1", "10.0.0.2"]
+        assert dict(hits) == {"10.0.0.1": 1}
+        await cache.close()
+
+    @pytest.mark.asyncio
+    async def test_warm_loads_hottest(self, stores):
+        """Test a new cache preloads the entries looked up most."""
+        first = TieredCache(stores())
+        for ip in ("10.0.0.1", "10.0.0.2", "10.0.0.3"):
+            first.set(ip, f"host-{ip}")
+        for _ in range(3):
+            await first.get_many(["10.0.0.2"])
+        await first.get_many(["10.0.0.3"])
+        await first.close()
+
+        second = TieredCache(stores())
+        assert await second.warm(2) == 2
+        assert second._local.get_many(["10.0.0.1", "10.0.0.2", "10.0.0.3"]) == {
+            "10.0.0.2": "host-10.0.0.2",
+            "10.0.0.3": "host-10.0.0.3",
+        }
+
+    @pytest.mark.asyncio
+    async def test_expired_shared_entries_ignored(self, stores):
+        """Test entries past their shared expiry are not returned or loaded."""
+        stale = TieredCache(stores(), clock=lambda: time.time() - 120)
+        stale.set("10.0.0.1", "old.example.com", ttl=60)
+        await stale.flush()
+
+        cache = TieredCache(stores())
+        assert await cache.get_many(["10.0.0.1"]) == {}
+        assert await cache.warm(10) == 0
+
+    @pytest.mark.asyncio
+    async def test_store_failures_are_misses(self):
+        """Test an unavailable store degrades to the local cache."""
+        store = AsyncMock(spec=SharedStore)
+        store.mget.side_effect = ConnectionError("down")
+        store.mset.side_effect = ConnectionError("down")
+        store.hottest.side_effect = ConnectionError("down")
+        cache = TieredCache(store)
+
+        cache.set("10.0.0.1", "host1")
+        assert await cache.get_many(["10.0.0.1", "10.0.0.2"]) == {"10.0.0.1": "host1"}
+        assert await cache.warm(10) == 0
+        await cache.close()
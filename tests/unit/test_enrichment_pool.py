@@ -0,0 +1,238 @@
+"""Unit tests for the enrichment worker pool."""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+from ipaddress import ip_address
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from flowlens.common.work_queue import ENRICHMENT_SHARDS, QueuedFlows, claim_flows, flow_shards
+from flowlens.enrichment.pool import EnrichmentPool, shards_for_worker
+from flowlens.ingestion.parsers.batch import pack_ips
+
+
+class FakeWorker:
+    """Worker that idles until stopped."""
+
+    def __init__(self, worker_id: int) -> None:
+        self.worker_id = worker_id
+        self.shards: list[int] = []
+        self.cleaned_up = False
+        self.stopped = asyncio.Event()
+        self.stats = {"worker_id": worker_id}
+
+    async def start(self) -> None:
+        await self.stopped.wait()
+
+    async def stop(self) -> None:
+        self.stopped.set()
+
+    def wake(self) -> None:
+        pass
+
+    def set_shards(self, shards: list[int]) -> None:
+        self.shards = list(shards)
+
+    async def cleanup(self) -> None:
+        self.cleaned_up = True
+
+
+@pytest.fixture
+def created() -> list[FakeWorker]:
+    """Workers created by the pool, in creation order."""
+    return []
+
+
+@pytest.fixture
+def pool(created: list[FakeWorker]) -> EnrichmentPool:
+    """Pool of fake workers."""
+
+    def factory(worker_id: int) -> FakeWorker:
+        worker = FakeWorker(worker_id)
+        created.append(worker)
+        return worker
+
+    return EnrichmentPool(factory, 4, check_interval=0.01)
+
+
+def owned_shards(workers: list[FakeWorker]) -> list[int]:
+    """All shards owned by the given workers."""
+    return sorted(shard for worker in workers for shard in worker.shards)
+
+
+class TestFlowShards:
+    """Test cases for enrichment queue sharding."""
+
+    def test_both_directions_share_a_shard(self):
+        """Test a conversation's flows land in one shard whichever side sent them."""
+        src = pack_ips([ip_address(ip) for ip in ("192.168.1.10", "10.0.0.5", "2001:db8::1")])
+        dst = pack_ips([ip_address(ip) for ip in ("10.0.0.5", "192.168.1.10", "192.168.1.10")])
+
+        shards = flow_shards(src, dst)
+        reverse = flow_shards(dst, src)
+
+        assert shards[0] == shards[1]
+        np.testing.assert_array_equal(shards, reverse)
+
+    def test_shards_spread_and_in_range(self):
+        """Test shards cover the whole range for varied addresses."""
+        src = pack_ips([ip_address(f"10.0.{i // 256}.{i % 256}") for i in range(1000)])
+        dst = pack_ips([ip_address("192.168.1.1")] * 1000)
+
+        shards = flow_shards(src, dst)
+
+        assert shards.min() >= 0
+        assert shards.max() < ENRICHMENT_SHARDS
+        assert len(set(shards.tolist())) == ENRICHMENT_SHARDS
+
+    @pytest.mark.parametrize("worker_count", [1, 3, 4, ENRICHMENT_SHARDS])
+    def test_workers_partition_shards(self, worker_count: int):
+        """Test every shard is owned by exactly one worker."""
+        owned = [
+            shard
+            for worker_id in range(worker_count)
+            for shard in shards_for_worker(worker_id, worker_count)
+        ]
+        assert sorted(owned) == list(range(ENRICHMENT_SHARDS))
+
+
+class TestClaimFlows:
+    """Test cases for claiming enrichment queue entries."""
+
+    @staticmethod
+    def queue_db(*sizes: int) -> MagicMock:
+        """Mock session whose claim query returns entries of the given sizes."""
+        queued_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        rows = [
+            SimpleNamespace(
+                id=entry_id,
+                flow_ids=[f"{entry_id}-{i}" for i in range(size)],
+                timestamps=[queued_at] * size,
+                queued_at=queued_at,
+            )
+            for entry_id, size in enumerate(sizes, start=1)
+        ]
+        result = MagicMock()
+        result.all.return_value = rows
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=result)
+        return db
+
+    @pytest.mark.asyncio
+    async def test_claims_whole_entries_within_limit(self):
+        """Test entries that fit are all consumed."""
+        db = self.queue_db(2, 3)
+
+        entries = await claim_flows(db, [0, 1], 5)
+
+        assert [len(entry.flow_ids) for entry in entries] == [2, 3]
+        assert isinstance(entries[0], QueuedFlows)
+        assert db.execute.await_count == 2
+        assert db.execute.await_args.args[1] == {"ids": [1, 2]}
+
+    @pytest.mark.asyncio
+    async def test_entry_crossing_limit_is_split(self):
+        """Test the entry crossing max_flows is trimmed and left queued."""
+        db = self.queue_db(3, 4)
+
+        entries = await claim_flows(db, [0], 5)
+
+        assert [entry.flow_ids for entry in entries] == [
+            ["1-0", "1-1", "1-2"],
+            ["2-0", "2-1"],
+        ]
+        trim, delete = (call.args[1] for call in db.execute.await_args_list[1:])
+        assert trim == {"id": 2, "count": 2}
+        assert delete == {"ids": [1]}
+
+
+class TestEnrichmentPool:
+    """Test cases for EnrichmentPool."""
+
+    @pytest.mark.asyncio
+    async def test_start_assigns_shards(self, pool: EnrichmentPool, created: list[FakeWorker]):
+        """Test each started worker owns its share of the shards."""
+        await pool.start()
+        try:
+            assert [worker.worker_id for worker in created] == [0, 1, 2, 3]
+            assert owned_shards(created) == list(range(ENRICHMENT_SHARDS))
+            assert created[1].shards == shards_for_worker(1, 4)
+        finally:
+            await pool.stop()
+
+        assert all(worker.cleaned_up for worker in created)
+
+    @pytest.mark.asyncio
+    async def test_resize(self, pool: EnrichmentPool, created: list[FakeWorker]):
+        """Test shrinking retires workers and growing starts new ones."""
+        await pool.start()
+        try:
+            pool.resize(2)
+            active = created[:2]
+            assert owned_shards(active) == list(range(ENRICHMENT_SHARDS))
+            assert created[2].shards == []
+            assert created[3].shards == []
+
+            # Retired workers are stopped and cleaned up by the monitor
+            await asyncio.sleep(0.05)
+            assert created[2].cleaned_up and created[3].cleaned_up
+            assert not created[0].cleaned_up
+
+            pool.resize(3)
+            assert [worker.worker_id for worker in created[4:]] == [2]
+            assert owned_shards([*active, created[4]]) == list(range(ENRICHMENT_SHARDS))
+            assert pool.stats["worker_count"] == 3
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_exited_worker_restarted(self, pool: EnrichmentPool, created: list[FakeWorker]):
+        """Test a worker that exits unexpectedly is replaced."""
+        await pool.start()
+        try:
+            created[1].stopped.set()
+            await asyncio.sleep(0.05)
+
+            assert created[1].cleaned_up
+            assert [worker.worker_id for worker in created[4:]] == [1]
+            assert created[4].shards == shards_for_worker(1, 4)
+            assert pool.stats["restarts"] == 1
+        finally:
+            await pool.stop()
+
+    def test_resize_notification(self, pool: EnrichmentPool):
+        """Test resize requests arrive as notifications and are clamped."""
+        pool.handle_notification("not json")
+        pool.handle_notification(json.dumps({"workers": 2}))
+        assert pool.worker_count == 4
+
+        pool.handle_notification(json.dumps({"worker_count": 2}))
+        assert pool.worker_count == 2
+
+        pool.handle_notification(json.dumps({"worker_count": 1000}))
+        assert pool.worker_count == ENRICHMENT_SHARDS
+
+    def test_subscribe(self, pool: EnrichmentPool):
+        """Test the pool listens for new flows and resize requests."""
+        listener = MagicMock()
+        pool.subscribe(listener)
+
+        channels = [call.args[0] for call in listener.subscribe.call_args_list]
+        assert channels == ["flowlens_flows_ready", "flowlens_enrichment_pool"]
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_stuck_workers():
+    """Test workers that do not finish in time are cancelled."""
+    worker = FakeWorker(0)
+    worker.stop = AsyncMock()
+    pool = EnrichmentPool(lambda _: worker, 1, check_interval=0.01)
+
+    await pool.start()
+    await pool.stop(timeout=0.01)
+
+    assert worker.cleaned_up
@@ -0,0 +1,196 @@
+"""Unit tests for the polling enrichment worker."""
+
+import json
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from flowlens.common.asset_cache import AssetIdCache
+from flowlens.common.work_queue import QueuedFlows
+from flowlens.enrichment.worker import BULK_ENRICH_SQL, QUEUED_FLOWS_SQL, EnrichmentWorker
+
+
+def make_flow(src_ip: str, dst_ip: str, extended: dict | None = None) -> SimpleNamespace:
+    """Create a selected flow_records row."""
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        timestamp=datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc),
+        src_ip=src_ip,
+        dst_ip=dst_ip,
+        dst_port=443,
+        protocol=6,
+        extended_fields=extended,
+    )
+
+
+@pytest.fixture
+def session() -> MagicMock:
+    """Mock database session."""
+    nested = MagicMock()
+    nested.__aenter__ = AsyncMock()
+    nested.__aexit__ = AsyncMock(return_value=False)
+
+    session = MagicMock()
+    session.execute = AsyncMock()
+    session.begin_nested.return_value = nested
+    session.commit = AsyncMock()
+    return session
+
+
+@pytest.fixture(autouse=True)
+def asset_cache():
+    """Give each worker a fresh IP -> asset ID cache."""
+    cache = AssetIdCache()
+    with patch("flowlens.enrichment.correlator.get_asset_cache", return_value=cache):
+        yield cache
+
+
+@pytest.fixture
+def get_session(session: MagicMock):
+    """Patch get_session to hand out the mock session."""
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=session)
+    context.__aexit__ = AsyncMock(return_value=False)
+
+    with patch("flowlens.enrichment.worker.get_session", return_value=context):
+        yield
+
+
+def claim(*flows: SimpleNamespace) -> AsyncMock:
+    """Patch claim_flows to hand out one queue entry holding the flows."""
+    entry = QueuedFlows(
+        [f.id for f in flows],
+        [f.timestamp for f in flows],
+        datetime.now(timezone.utc),
+    )
+    return patch(
+        "flowlens.enrichment.worker.claim_flows",
+        AsyncMock(side_effect=[[entry], []]),
+    )
+
+
+class TestEnrichmentWorker:
+    """Test cases for EnrichmentWorker."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("get_session")
+    async def test_batch_written_in_one_update(self, session: MagicMock):
+        """Test enriched flows are written with a single set-based UPDATE."""
+        flows = [
+            make_flow("192.168.1.10", "10.0.0.5", {"vlan": 10}),
+            make_flow("192.168.1.11", "10.0.0.6"),
+            make_flow("192.168.1.12", "10.0.0.7"),
+        ]
+        selected = MagicMock()
+        selected.all.return_value = flows
+        session.execute.side_effect = [selected, MagicMock(), MagicMock(), MagicMock()]
+
+        worker = EnrichmentWorker()
+        worker._dns_resolver.lookup_batch = AsyncMock(return_value={"10.0.0.5": "db1"})
+        asset_ids = {
+            ip: uuid.uuid4()
+            for ip in ("192.168.1.10", "10.0.0.5", "192.168.1.11", "10.0.0.6", "192.168.1.12")
+        }
+        # 10.0.0.7 failed correlation, so the last flow stays unenriched
+        worker._correlate_ips = AsyncMock(return_value=asset_ids)
+
+        with claim(*flows):
+            assert await worker._process_batch_internal() == 3
+
+        # Select claimed flows, UPDATE, queue windows, notify aggregation
+        assert session.execute.await_count == 4
+        statement, params = session.execute.await_args_list[0].args
+        assert statement is QUEUED_FLOWS_SQL
+        assert params["ids"] == [flow.id for flow in flows]
+
+        statement, params = session.execute.await_args_list[1].args
+        assert statement is BULK_ENRICH_SQL
+        assert params["ids"] == [flows[0].id, flows[1].id]
+        assert params["timestamps"] == [flows[0].timestamp, flows[1].timestamp]
+        assert session.execute.await_args_list[2].args[1] == {
+            "timestamps": [flows[0].timestamp, flows[1].timestamp]
+        }
+
+        extended = json.loads(params["extended_fields"][0])
+        assert extended["vlan"] == 10
+        assert extended["enrichment"]["dst_hostname"] == "db1"
+        assert extended["enrichment"]["dst_asset_id"] == str(asset_ids["10.0.0.5"])
+        assert extended["enrichment"]["service_name"] == "https"
+        session.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("get_session")
+    async def test_no_update_when_all_flows_fail(self, session: MagicMock):
+        """Test a batch with no enrichable flows skips the UPDATE."""
+        flow = make_flow("192.168.1.10", "10.0.0.5")
+        selected = MagicMock()
+        selected.all.return_value = [flow]
+        session.execute.side_effect = [selected]
+
+        worker = EnrichmentWorker()
+        worker._dns_resolver.lookup_batch = AsyncMock(return_value={})
+        worker._correlate_ips = AsyncMock(return_value={})
+
+        with claim(flow):
+            assert await worker._process_batch_internal() == 1
+        assert session.execute.await_count == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("get_session")
+    async def test_already_enriched_entries_skipped(self, session: MagicMock):
+        """Test queue entries with no unenriched flows left are consumed."""
+        flows = [make_flow("192.168.1.10", "10.0.0.5"), make_flow("192.168.1.11", "10.0.0.6")]
+        empty = MagicMock()
+        empty.all.return_value = []
+        session.execute.side_effect = [empty, empty]
+
+        worker = EnrichmentWorker()
+        queued_at = datetime.now(timezone.utc)
+        entries = [[QueuedFlows([flow.id], [flow.timestamp], queued_at)] for flow in flows]
+
+        with patch(
+            "flowlens.enrichment.worker.claim_flows", AsyncMock(side_effect=[*entries, []])
+        ) as claim_flows:
+            assert await worker._process_batch_internal() == 0
+
+        assert claim_flows.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_correlate_ips(self, session: MagicMock, asset_cache: AssetIdCache):
+        """Test uncached IPs are correlated together in sorted order."""
+        worker = EnrichmentWorker()
+        cached_id = uuid.uuid4()
+        asset_cache.set("10.0.0.1", cached_id)
+        batch_ids = {"10.0.0.2": uuid.uuid4(), "10.0.0.3": uuid.uuid4()}
+        worker._correlator.correlate_batch = AsyncMock(return_value=batch_ids)
+
+        asset_ids = await worker._correlate_ips(
+            session, {"10.0.0.3", "10.0.0.1", "10.0.0.2"}, {"10.0.0.2": "web"}
+        )
+
+        worker._correlator.correlate_batch.assert_awaited_once_with(
+            session, [("10.0.0.2", "web"), ("10.0.0.3", None)]
+        )
+        assert session.begin_nested.call_count == 1
+        assert asset_ids == {"10.0.0.1": cached_id, **batch_ids}
+
+    @pytest.mark.asyncio
+    async def test_correlate_ips_falls_back_per_ip(self, session: MagicMock):
+        """Test a failed batch is retried per IP, isolating the bad one."""
+        worker = EnrichmentWorker()
+        worker._correlator.correlate_batch = AsyncMock(side_effect=RuntimeError("batch failed"))
+
+        async def correlate(db, ip, hostname=None):
+            if ip == "10.0.0.3":
+                raise RuntimeError("insert failed")
+            return uuid.uuid5(uuid.NAMESPACE_URL, ip)
+
+        worker._correlator.correlate = correlate
+
+        asset_ids = await worker._correlate_ips(session, {"10.0.0.2", "10.0.0.3", "10.0.0.4"}, {})
+
+        assert session.begin_nested.call_count == 4
+        assert set(asset_ids) == {"10.0.0.2", "10.0.0.4"}
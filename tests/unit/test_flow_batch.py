@@ -0,0 +1,174 @@
+"""Unit tests for columnar flow batches."""
+
+import uuid
+from datetime import datetime, timezone
+from ipaddress import IPv4Address, IPv6Address
+
+import numpy as np
+import pytest
+
+from flowlens.ingestion.parsers.base import FlowRecord
+from flowlens.ingestion.parsers.batch import (
+    NULL,
+    FlowBatch,
+    decode_batch,
+    encode_batch,
+    pack_ips,
+    unpack_ips,
+)
+
+
+def make_record(**overrides) -> FlowRecord:
+    """Create a flow record with sensible defaults."""
+    fields = {
+        "timestamp": datetime(2024, 1, 1, 12, 0, 0, 250, tzinfo=timezone.utc),
+        "src_ip": IPv4Address("192.168.1.10"),
+        "dst_ip": IPv4Address("10.0.0.5"),
+        "src_port": 54321,
+        "dst_port": 443,
+        "protocol": 6,
+        "bytes_count": 1500,
+        "packets_count": 3,
+        "exporter_ip": IPv4Address("10.0.0.1"),
+        "flow_source": "netflow_v5",
+    }
+    fields.update(overrides)
+    return FlowRecord(**fields)
+
+
+class TestIPColumns:
+    """Test cases for packed IP columns."""
+
+    def test_round_trip(self):
+        """Test IPv4 and IPv6 addresses survive packing."""
+        addresses = [
+            IPv4Address("0.0.0.0"),
+            IPv4Address("203.0.113.7"),
+            IPv6Address("2001:db8::1"),
+            IPv6Address("::"),
+        ]
+        packed = pack_ips(addresses)
+
+        assert packed.shape == (4, 16)
+        assert unpack_ips(packed) == addresses
+
+    def test_empty(self):
+        """Test empty columns."""
+        assert unpack_ips(pack_ips([])) == []
+
+
+class TestFlowBatch:
+    """Test cases for FlowBatch."""
+
+    def test_round_trip(self):
+        """Test records convert to columns and back unchanged."""
+        records = [
+            make_record(
+                flow_start=datetime(2024, 1, 1, 11, 59, 0, tzinfo=timezone.utc),
+                flow_end=datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc),
+                flow_duration_ms=60000,
+                tcp_flags=0x12,
+                exporter_id=3,
+                sampling_rate=100,
+                input_interface=1,
+                output_interface=2,
+                tos=8,
+                extended_fields={"next_hop": "10.0.0.254"},
+            ),
+            make_record(
+                src_ip=IPv6Address("2001:db8::1"),
+                dst_ip=IPv6Address("2001:db8::2"),
+                protocol=17,
+                flow_source="sflow",
+            ),
+        ]
+
+        batch = FlowBatch.from_records(records)
+
+        assert len(batch) == 2
+        assert batch.tcp_flags[1] == NULL
+        assert batch.to_records() == records
+
+    def test_naive_timestamps_are_utc(self):
+        """Test naive datetimes are read as UTC."""
+        batch = FlowBatch.from_records([make_record(timestamp=datetime(2024, 1, 1))])
+        record = batch.to_records()[0]
+
+        assert record.timestamp == datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def test_concat_and_take(self):
+        """Test batches can be joined and sliced."""
+        first = FlowBatch.from_records([make_record(src_port=1), make_record(src_port=2)])
+        second = FlowBatch.from_records([make_record(src_port=3)])
+
+        batch = FlowBatch.concat([first, FlowBatch.empty(), second])
+
+        assert batch.src_port.tolist() == [1, 2, 3]
+        assert batch.take(slice(1, None)).src_port.tolist() == [2, 3]
+        assert len(FlowBatch.concat([])) == 0
+
+    def test_record_ids(self):
+        """Test record ids are assigned once and follow rows through take and concat."""
+        batch = FlowBatch.from_records([make_record(src_port=i) for i in range(3)])
+        assert batch.record_id is None
+
+        with_ids = batch.with_record_ids()
+        assert with_ids.with_record_ids() is with_ids
+        ids = [uuid.UUID(bytes=row.tobytes()) for row in with_ids.record_id]
+        assert len(set(ids)) == 3
+        assert all(record_id.version == 4 for record_id in ids)
+
+        rejoined = FlowBatch.concat([with_ids.take(slice(0, 1)), with_ids.take(slice(1, None))])
+        assert (rejoined.record_id == with_ids.record_id).all()
+        assert FlowBatch.concat([with_ids, batch]).record_id is None
+
+    def test_validate_drops_invalid_rows(self):
+        """Test vectorised validation applies FlowRecord's rules."""
+        batch = FlowBatch.from_records([make_record(src_port=i) for i in range(4)])
+        batch.src_port = np.array([1, 70000, 3, 4])
+        batch.protocol = np.array([6, 6, 6, 300])
+        batch.bytes_count = np.array([1, 1, -1, 1])
+
+        assert batch.valid_mask().tolist() == [True, False, False, False]
+        assert batch.validate().src_port.tolist() == [1]
+
+    def test_validate_keeps_valid_batch(self):
+        """Test fully valid batches are returned as-is."""
+        batch = FlowBatch.from_records([make_record()])
+        assert batch.validate() is batch
+
+
+class TestBatchEncoding:
+    """Test cases for encode_batch/decode_batch."""
+
+    def test_round_trip(self):
+        """Test every column survives encoding."""
+        records = [
+            make_record(tcp_flags=0x18, extended_fields={"vlan": 10}),
+            make_record(src_ip=IPv6Address("2001:db8::1"), flow_source="sflow"),
+        ]
+
+        decoded = decode_batch(encode_batch(FlowBatch.from_records(records)))
+
+        assert decoded.to_records() == records
+
+    def test_round_trip_record_ids(self):
+        """Test record ids survive encoding."""
+        batch = FlowBatch.from_records([make_record(), make_record()]).with_record_ids()
+
+        decoded = decode_batch(encode_batch(batch))
+
+        assert (decoded.record_id == batch.record_id).all()
+        assert decoded.to_records() == batch.to_records()
+
+    def test_empty_batch(self):
+        """Test an empty batch round-trips."""
+        assert len(decode_batch(encode_batch(FlowBatch.empty()))) == 0
+
+    def test_unknown_version_rejected(self):
+        """Test payloads from an unknown format version are refused."""
+        payload = bytearray(encode_batch(FlowBatch.from_records([make_record()])))
+        payload[0] = 99
+
+        with pytest.raises(ValueError, match="version"):
+            decode_batch(bytes(payload))
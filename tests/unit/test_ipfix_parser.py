@@ -0,0 +1,154 @@
+"""Unit tests for IPFIX parser."""
+
+import struct
+from ipaddress import IPv4Address
+
+import pytest
+
+from flowlens.ingestion.parsers.ipfix import (
+    IE_DESTINATION_IPV4_ADDRESS,
+    IE_DESTINATION_TRANSPORT_PORT,
+    IE_FLOW_END_MILLISECONDS,
+    IE_FLOW_START_MILLISECONDS,
+    IE_OCTET_DELTA_COUNT,
+    IE_PACKET_DELTA_COUNT,
+    IE_PROTOCOL_IDENTIFIER,
+    IE_SOURCE_IPV4_ADDRESS,
+    IE_SOURCE_TRANSPORT_PORT,
+    IPFIXParser,
+)
+
+DOMAIN_ID = 3
+EXPORT_TIME = 1_700_000_000
+
+# Template fields as element ID, length and enterprise number
+TEMPLATE = [
+    (IE_SOURCE_IPV4_ADDRESS, 4, None),
+    (IE_DESTINATION_IPV4_ADDRESS, 4, None),
+    (IE_SOURCE_TRANSPORT_PORT, 2, None),
+    (IE_DESTINATION_TRANSPORT_PORT, 2, None),
+    (IE_PROTOCOL_IDENTIFIER, 1, None),
+    (100, 4, 9),  # Vendor-specific, skipped
+    (IE_OCTET_DELTA_COUNT, 8, None),
+    (IE_PACKET_DELTA_COUNT, 8, None),
+    (IE_FLOW_START_MILLISECONDS, 8, None),
+    (IE_FLOW_END_MILLISECONDS, 8, None),
+]
+
+
+def message(*sets: bytes) -> bytes:
+    """Build an IPFIX message."""
+    body = b"".join(sets)
+    return struct.pack("!HHIII", 10, 16 + len(body), EXPORT_TIME, 1, DOMAIN_ID) + body
+
+
+def template_set(template_id: int, fields: list[tuple[int, int, int | None]]) -> bytes:
+    """Build a template set."""
+    body = struct.pack("!HH", template_id, len(fields))
+    for element_id, length, enterprise in fields:
+        if enterprise is None:
+            body += struct.pack("!HH", element_id, length)
+        else:
+            body += struct.pack("!HHI", element_id | 0x8000, length, enterprise)
+    return struct.pack("!HH", 2, len(body) + 4) + body
+
+
+def data_set(template_id: int, records: list[bytes]) -> bytes:
+    """Build a data set."""
+    body = b"".join(records)
+    return struct.pack("!HH", template_id, len(body) + 4) + body
+
+
+def record(i: int) -> bytes:
+    """Build a record for TEMPLATE."""
+    start_ms = EXPORT_TIME * 1000 - 10_000
+    return (
+        IPv4Address("172.16.0.1").packed
+        + IPv4Address(f"172.16.1.{i}").packed
+        + struct.pack("!HHB", 40000 + i, 8080, 6)
+        + b"\xff" * 4
+        + struct.pack("!QQQQ", 100 * i, i, start_ms, start_ms + 2000)
+    )
+
+
+class TestIPFIXParser:
+    """Test cases for IPFIX parser."""
+
+    @pytest.fixture
+    def parser(self) -> IPFIXParser:
+        """Create parser instance."""
+        return IPFIXParser()
+
+    @pytest.fixture
+    def exporter_ip(self) -> IPv4Address:
+        """Sample exporter IP."""
+        return IPv4Address("10.0.0.1")
+
+    def test_protocol_name(self, parser: IPFIXParser):
+        """Test protocol name property."""
+        assert parser.protocol_name == "ipfix"
+
+    def test_template_then_data(self, parser: IPFIXParser, exporter_ip: IPv4Address):
+        """Test template and data in the same message."""
+        packet = message(template_set(256, TEMPLATE), data_set(256, [record(1), record(2)]))
+
+        records = parser.parse(packet, exporter_ip)
+
+        assert len(records) == 2
+        rec = records[1]
+        assert rec.src_ip == IPv4Address("172.16.0.1")
+        assert rec.dst_ip == IPv4Address("172.16.1.2")
+        assert rec.src_port == 40002
+        assert rec.dst_port == 8080
+        assert rec.bytes_count == 200
+        assert rec.packets_count == 2
+        assert rec.flow_end.timestamp() == EXPORT_TIME - 8
+        assert rec.exporter_id == DOMAIN_ID
+        assert rec.flow_source == "ipfix"
+
+    def test_data_without_template(self, parser: IPFIXParser, exporter_ip: IPv4Address):
+        """Test data sets are skipped until the template arrives."""
+        assert parser.parse(message(data_set(256, [record(1)])), exporter_ip) == []
+
+    def test_fixed_template_has_decoder(self, parser: IPFIXParser, exporter_ip: IPv4Address):
+        """Test fixed-length templates are compiled when cached."""
+        parser.parse(message(template_set(256, TEMPLATE)), exporter_ip)
+
+        template = parser.template_cache.get(str(exporter_ip), DOMAIN_ID, 256)
+        assert template is not None
+        assert template.decoder is not None
+        assert template.decoder.record_length == template.record_length
+
+    def test_variable_length_template(self, parser: IPFIXParser, exporter_ip: IPv4Address):
+        """Test templates with variable-length fields are still decoded."""
+        fields = [
+            (IE_SOURCE_IPV4_ADDRESS, 4, None),
+            (IE_DESTINATION_IPV4_ADDRESS, 4, None),
+            (200, 65535, 9),  # Vendor-specific variable-length string
+            (IE_PROTOCOL_IDENTIFIER, 1, None),
+        ]
+        rec = (
+            IPv4Address("172.16.0.1").packed
+            + IPv4Address("172.16.0.2").packed
+            + b"\x03abc"
+            + b"\x11"
+        )
+
+        records = parser.parse(message(template_set(256, fields), data_set(256, [rec])), exporter_ip)
+
+        assert parser.template_cache.get(str(exporter_ip), DOMAIN_ID, 256).decoder is None
+        assert len(records) == 1
+        assert records[0].dst_ip == IPv4Address("172.16.0.2")
+        assert records[0].protocol == 17
+
+    def test_data_replayed_when_template_arrives(
+        self,
+        parser: IPFIXParser,
+        exporter_ip: IPv4Address,
+    ):
+        """Test buffered data sets are decoded once their template is received."""
+        assert parser.parse(message(data_set(256, [record(1), record(2)])), exporter_ip) == []
+
+        records = parser.parse(message(template_set(256, TEMPLATE)), exporter_ip)
+
+        assert [r.dst_ip for r in records] == [IPv4Address("172.16.1.1"), IPv4Address("172.16.1.2")]
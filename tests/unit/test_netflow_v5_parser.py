@@ -126,3 +126,45 @@ class TestNetFlowV5Parser:
         assert records[0].dst_port == 80
         assert records[1].src_ip == IPv4Address("192.168.1.2")
         assert records[1].dst_port == 443
+
+    def test_parse_batch_matches_parse(
+        self,
+        parser: NetFlowV5Parser,
+        exporter_ip: IPv4Address,
+    ):
+        """Test columnar decoding produces the same flows as parse()."""
+        import struct
+
+        header = struct.pack(
+            "!HHIIIIBBH",
+            5, 3, 1_000_000, 1_700_000_000, 500_000_000, 42, 0, 7, 0x4064,
+        )
+
+        def make_record(i: int, protocol: int, first: int, last: int) -> bytes:
+            return struct.pack(
+                "!IIIHHIIIIHHBBBBHHBBH",
+                0xC0A80100 + i, 0x0A000000 + i, 0x0A0000FE, 1, 2,
+                10 * i, 1500 * i, first, last,
+                40000 + i, 53, 0, 0x12, protocol, 8, 64512, 65000, 24, 16, 0,
+            )
+
+        packet = header + b"".join([
+            make_record(1, 6, 900_000, 999_000),
+            make_record(2, 17, 990_000, 995_000),
+            make_record(3, 6, 1_000_500, 999_000),  # first after sys_uptime
+        ])
+
+        batch = parser.parse_batch(packet, exporter_ip)
+
+        assert len(batch) == 3
+        assert batch.to_records() == parser.parse(packet, exporter_ip)
+
+    def test_parse_batch_truncated(
+        self,
+        parser: NetFlowV5Parser,
+        exporter_ip: IPv4Address,
+        sample_netflow_v5_packet: bytes,
+    ):
+        """Test columnar decoding rejects truncated packets."""
+        with pytest.raises(ValueError, match="packet truncated"):
+            parser.parse_batch(sample_netflow_v5_packet[:-1], exporter_ip)
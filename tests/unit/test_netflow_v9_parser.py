@@ -0,0 +1,216 @@
+"""Unit tests for NetFlow v9 parser."""
+
+import struct
+from ipaddress import IPv4Address, IPv6Address
+
+import pytest
+
+from flowlens.ingestion.parsers.netflow_v9 import (
+    NF9_FIELD_FIRST_SWITCHED,
+    NF9_FIELD_IN_BYTES,
+    NF9_FIELD_IN_PKTS,
+    NF9_FIELD_IPV4_DST_ADDR,
+    NF9_FIELD_IPV4_NEXT_HOP,
+    NF9_FIELD_IPV4_SRC_ADDR,
+    NF9_FIELD_IPV6_DST_ADDR,
+    NF9_FIELD_IPV6_SRC_ADDR,
+    NF9_FIELD_L4_DST_PORT,
+    NF9_FIELD_L4_SRC_PORT,
+    NF9_FIELD_LAST_SWITCHED,
+    NF9_FIELD_PROTOCOL,
+    NF9_FIELD_SRC_AS,
+    NF9_FIELD_TCP_FLAGS,
+    NetFlowV9Parser,
+    Template,
+    TemplateField,
+)
+
+SOURCE_ID = 7
+SYS_UPTIME = 100_000
+UNIX_SECS = 1_700_000_000
+
+IPV4_TEMPLATE = [
+    (NF9_FIELD_IPV4_SRC_ADDR, 4),
+    (NF9_FIELD_IPV4_DST_ADDR, 4),
+    (NF9_FIELD_L4_SRC_PORT, 2),
+    (NF9_FIELD_L4_DST_PORT, 2),
+    (NF9_FIELD_PROTOCOL, 1),
+    (NF9_FIELD_TCP_FLAGS, 1),
+    (NF9_FIELD_IN_BYTES, 4),
+    (NF9_FIELD_IN_PKTS, 4),
+    (NF9_FIELD_FIRST_SWITCHED, 4),
+    (NF9_FIELD_LAST_SWITCHED, 4),
+    (NF9_FIELD_IPV4_NEXT_HOP, 4),
+    (NF9_FIELD_SRC_AS, 3),  # Odd length, kept as raw bytes
+]
+
+
+def header(count: int) -> bytes:
+    """Build a NetFlow v9 packet header."""
+    return struct.pack("!HHIIII", 9, count, SYS_UPTIME, UNIX_SECS, 1, SOURCE_ID)
+
+
+def template_flowset(template_id: int, fields: list[tuple[int, int]]) -> bytes:
+    """Build a template flowset."""
+    body = struct.pack("!HH", template_id, len(fields))
+    body += b"".join(struct.pack("!HH", t, n) for t, n in fields)
+    return struct.pack("!HH", 0, len(body) + 4) + body
+
+
+def data_flowset(template_id: int, records: list[bytes], padding: int = 0) -> bytes:
+    """Build a data flowset."""
+    body = b"".join(records) + bytes(padding)
+    return struct.pack("!HH", template_id, len(body) + 4) + body
+
+
+def ipv4_record(i: int) -> bytes:
+    """Build a record for IPV4_TEMPLATE."""
+    return (
+        IPv4Address("192.168.1.1").packed
+        + IPv4Address(f"10.0.0.{i}").packed
+        + struct.pack("!HHBBIIII", 50000 + i, 443, 6, 0x18, 1000 * i, i, 90_000, 95_000)
+        + IPv4Address("10.0.0.254").packed
+        + b"\x00\x01\x02"
+    )
+
+
+class TestNetFlowV9Parser:
+    """Test cases for NetFlow v9 parser."""
+
+    @pytest.fixture
+    def parser(self) -> NetFlowV9Parser:
+        """Create parser instance."""
+        return NetFlowV9Parser()
+
+    @pytest.fixture
+    def exporter_ip(self) -> IPv4Address:
+        """Sample exporter IP."""
+        return IPv4Address("10.0.0.1")
+
+    def test_protocol_name(self, parser: NetFlowV9Parser):
+        """Test protocol name property."""
+        assert parser.protocol_name == "netflow_v9"
+
+    def test_template_then_data(self, parser: NetFlowV9Parser, exporter_ip: IPv4Address):
+        """Test template and data in the same packet."""
+        packet = header(2) + template_flowset(256, IPV4_TEMPLATE) + data_flowset(
+            256, [ipv4_record(i) for i in range(1, 4)]
+        )
+
+        records = parser.parse(packet, exporter_ip)
+
+        assert len(records) == 3
+        record = records[1]
+        assert record.src_ip == IPv4Address("192.168.1.1")
+        assert record.dst_ip == IPv4Address("10.0.0.2")
+        assert record.src_port == 50002
+        assert record.dst_port == 443
+        assert record.protocol == 6
+        assert record.tcp_flags == 0x18
+        assert record.bytes_count == 2000
+        assert record.packets_count == 2
+        assert record.flow_duration_ms == 5000
+        assert record.flow_end.timestamp() == UNIX_SECS - 5
+        assert record.exporter_id == SOURCE_ID
+        assert record.extended_fields["next_hop"] == "10.0.0.254"
+        assert record.extended_fields["src_as"] == b"\x00\x01\x02"
+        assert record.flow_source == "netflow_v9"
+
+    def test_data_without_template(self, parser: NetFlowV9Parser, exporter_ip: IPv4Address):
+        """Test data flowsets are skipped until the template arrives."""
+        packet = header(1) + data_flowset(256, [ipv4_record(1)])
+        assert parser.parse(packet, exporter_ip) == []
+
+    def test_template_cached_across_packets(
+        self,
+        parser: NetFlowV9Parser,
+        exporter_ip: IPv4Address,
+    ):
+        """Test data is decoded with a template from an earlier packet."""
+        parser.parse(header(1) + template_flowset(300, IPV4_TEMPLATE), exporter_ip)
+        records = parser.parse(header(1) + data_flowset(300, [ipv4_record(9)]), exporter_ip)
+
+        assert len(records) == 1
+        assert records[0].dst_ip == IPv4Address("10.0.0.9")
+
+    def test_padding_ignored(self, parser: NetFlowV9Parser, exporter_ip: IPv4Address):
+        """Test flowset padding shorter than a record is ignored."""
+        packet = header(2) + template_flowset(256, IPV4_TEMPLATE) + data_flowset(
+            256, [ipv4_record(1), ipv4_record(2)], padding=3
+        )
+        assert len(parser.parse(packet, exporter_ip)) == 2
+
+    def test_ipv6_record(self, parser: NetFlowV9Parser, exporter_ip: IPv4Address):
+        """Test IPv6 addresses are decoded."""
+        fields = [
+            (NF9_FIELD_IPV6_SRC_ADDR, 16),
+            (NF9_FIELD_IPV6_DST_ADDR, 16),
+            (NF9_FIELD_L4_SRC_PORT, 2),
+            (NF9_FIELD_L4_DST_PORT, 2),
+            (NF9_FIELD_PROTOCOL, 1),
+        ]
+        record = (
+            IPv6Address("2001:db8::1").packed
+            + IPv6Address("2001:db8::2").packed
+            + struct.pack("!HHB", 40000, 53, 17)
+        )
+        packet = header(2) + template_flowset(256, fields) + data_flowset(256, [record])
+
+        records = parser.parse(packet, exporter_ip)
+
+        assert len(records) == 1
+        assert records[0].src_ip == IPv6Address("2001:db8::1")
+        assert records[0].dst_ip == IPv6Address("2001:db8::2")
+        assert records[0].tcp_flags is None
+
+    def test_record_without_addresses_skipped(
+        self,
+        parser: NetFlowV9Parser,
+        exporter_ip: IPv4Address,
+    ):
+        """Test records missing source/destination addresses are skipped."""
+        fields = [(NF9_FIELD_L4_SRC_PORT, 2), (NF9_FIELD_L4_DST_PORT, 2)]
+        packet = header(2) + template_flowset(256, fields) + data_flowset(
+            256, [struct.pack("!HH", 1, 2)]
+        )
+        assert parser.parse(packet, exporter_ip) == []
+
+
+class TestTemplateDecoder:
+    """Test cases for compiled template decoders."""
+
+    def test_record_length(self):
+        """Test decoder size matches the template record length."""
+        template = Template(
+            template_id=256,
+            source_id=0,
+            fields=[TemplateField(t, n) for t, n in IPV4_TEMPLATE],
+        )
+        assert template.decoder.record_length == template.record_length
+
+    def test_wrong_length_address_is_none(self):
+        """Test address fields with unexpected lengths decode to None."""
+        template = Template(
+            template_id=256,
+            source_id=0,
+            fields=[TemplateField(NF9_FIELD_IPV4_SRC_ADDR, 2), TemplateField(NF9_FIELD_PROTOCOL, 1)],
+        )
+        fields = template.decoder.decode(b"\x0a\x00\x06")
+        assert fields == {NF9_FIELD_IPV4_SRC_ADDR: None, NF9_FIELD_PROTOCOL: 6}
+
+
+class TestPendingFlowsets:
+    """Test cases for data flowsets that arrive before their template."""
+
+    def test_data_replayed_when_template_arrives(self):
+        """Test buffered data is decoded once its template is received."""
+        parser = NetFlowV9Parser()
+        exporter_ip = IPv4Address("10.0.0.1")
+
+        assert parser.parse(header(1) + data_flowset(256, [ipv4_record(1)]), exporter_ip) == []
+
+        records = parser.parse(header(1) + template_flowset(256, IPV4_TEMPLATE), exporter_ip)
+
+        assert len(records) == 1
+        assert records[0].dst_ip == IPv4Address("10.0.0.1")
+        assert parser.parse(header(1) + template_flowset(256, IPV4_TEMPLATE), exporter_ip) == []
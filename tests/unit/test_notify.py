@@ -0,0 +1,58 @@
+"""Unit tests for LISTEN/NOTIFY support."""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from flowlens.common.notify import NotificationListener, WorkSignal
+
+
+class TestNotificationListener:
+    """Test cases for NotificationListener."""
+
+    def test_dispatch_to_channel_subscribers(self):
+        """Test payloads reach every subscriber of the notified channel only."""
+        listener = NotificationListener()
+        first, second, other = MagicMock(), MagicMock(), MagicMock()
+        listener.subscribe("flows", first)
+        listener.subscribe("flows", second)
+        listener.subscribe("windows", other)
+
+        listener.dispatch("flows", "payload")
+
+        first.assert_called_once_with("payload")
+        second.assert_called_once_with("payload")
+        other.assert_not_called()
+
+    def test_failing_subscriber_isolated(self):
+        """Test one subscriber raising does not stop the others."""
+        listener = NotificationListener()
+        after = MagicMock()
+        listener.subscribe("flows", MagicMock(side_effect=RuntimeError("boom")))
+        listener.subscribe("flows", after)
+
+        listener.dispatch("flows", "")
+
+        after.assert_called_once_with("")
+
+
+class TestWorkSignal:
+    """Test cases for WorkSignal."""
+
+    @pytest.mark.asyncio
+    async def test_wait_times_out(self):
+        """Test waiting without new work times out."""
+        assert await WorkSignal().wait(0.01) is False
+
+    @pytest.mark.asyncio
+    async def test_set_wakes_waiter(self):
+        """Test set() wakes a waiting worker, once."""
+        signal = WorkSignal()
+        waiter = asyncio.create_task(signal.wait(5))
+        await asyncio.sleep(0)
+
+        signal.set("payload")
+
+        assert await waiter is True
+        assert await signal.wait(0.01) is False
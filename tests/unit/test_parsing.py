@@ -0,0 +1,153 @@
+"""Unit tests for the packet parsing stage and parse pool."""
+
+import asyncio
+import itertools
+import socket
+from collections.abc import Iterator
+from ipaddress import IPv4Address
+from pathlib import Path
+
+import pytest
+
+from flowlens.common.config import IngestionSettings
+from flowlens.ingestion.bench.generator import StreamGenerator
+from flowlens.ingestion.parsers.templates import write_template_snapshot
+from flowlens.ingestion.parsing import ParsePool, create_parsers, parse_packet
+from flowlens.ingestion.router import MemoryRouter
+from flowlens.ingestion.server import FlowCollector
+
+
+def v9_packets(exporters: int, count: int, records: int = 4) -> list[tuple[bytes, str, str]]:
+    """NetFlow v9 packets from several exporters, templates first."""
+    generator = StreamGenerator("netflow_v9", exporters=exporters, records_per_packet=records)
+    return [
+        (data, f"10.1.0.{exporter + 1}", "netflow")
+        for exporter, data in itertools.islice(generator.datagrams(), count)
+    ]
+
+
+@pytest.fixture(scope="module")
+def pool() -> Iterator[ParsePool]:
+    """Two-worker parse pool shared by the tests in this module."""
+    parse_pool = ParsePool(2, IngestionSettings())
+    parse_pool.start()
+    yield parse_pool
+    parse_pool.close()
+
+
+class TestParsePacket:
+    """Test cases for version dispatch."""
+
+    def test_dispatch_by_version(self, sample_netflow_v5_packet: bytes):
+        """Test NetFlow packets go to the parser for their version."""
+        parsers, _ = create_parsers(IngestionSettings())
+
+        name, batch = parse_packet(parsers, sample_netflow_v5_packet, "10.0.0.1", "netflow")
+
+        assert name == "netflow_v5"
+        assert len(batch) > 0
+
+    @pytest.mark.parametrize(
+        ("data", "message"),
+        [(b"\x00", "too short"), (b"\x00\x07" + bytes(22), "Unsupported flow version: 7")],
+    )
+    def test_rejected(self, data: bytes, message: str):
+        """Test short packets and unknown versions are rejected."""
+        parsers, _ = create_parsers(IngestionSettings())
+
+        with pytest.raises(ValueError, match=message):
+            parse_packet(parsers, data, "10.0.0.1", "netflow")
+
+
+class TestParsePool:
+    """Test cases for parsing in worker processes."""
+
+    async def test_templates_stay_with_exporter(self, pool: ParsePool):
+        """Test data parsed in later calls finds templates from earlier ones."""
+        packets = v9_packets(exporters=4, count=24)
+        assert len({pool.worker_for(ip) for _, ip, _ in packets}) == 2
+
+        # Each exporter's template packet goes in the first call
+        batches = []
+        for chunk in (packets[:8], packets[8:16], packets[16:]):
+            batch, parsed, errors = await pool.parse([(p, 1) for p in chunk])
+            assert parsed == {"netflow_v9": len(batch)}
+            assert errors == {}
+            batches.append(batch)
+
+        parsers, _ = create_parsers(IngestionSettings())
+        inline = [parse_packet(parsers, data, ip, protocol)[1] for data, ip, protocol in packets]
+        assert [len(b) for b in batches] == [
+            sum(len(b) for b in inline[:8]),
+            sum(len(b) for b in inline[8:16]),
+            sum(len(b) for b in inline[16:]),
+        ]
+        assert len(batches[2]) == 8 * 4
+        exporters = {str(IPv4Address(int(ip))) for ip in batches[2].exporter_ip}
+        assert exporters == {f"10.1.0.{i}" for i in range(1, 5)}
+
+    async def test_sampling_and_errors(self, pool: ParsePool, sample_netflow_v5_packet: bytes):
+        """Test sample factors scale sampling rates and failures are counted."""
+        packet = (sample_netflow_v5_packet, "10.2.0.1", "netflow")
+
+        batch, parsed, errors = await pool.parse([
+            (packet, 1),
+            (packet, 10),
+            ((b"\x00\x07" + bytes(22), "10.2.0.1", "netflow"), 1),
+        ])
+
+        per_packet = parsed["netflow_v5"] // 2
+        assert batch.sampling_rate[per_packet] == batch.sampling_rate[0] * 10
+        assert errors == {("netflow", "ValueError"): 1}
+
+    async def test_snapshot_restores_templates(self, pool: ParsePool, tmp_path: Path):
+        """Test worker templates are snapshotted and loaded by a new pool."""
+        packets = v9_packets(exporters=3, count=12)
+        await pool.parse([(p, 1) for p in packets[:6]])
+
+        snapshot = await pool.snapshot()
+        path = tmp_path / "templates.json"
+        write_template_snapshot(path, snapshot)
+
+        restarted = ParsePool(3, IngestionSettings())
+        restarted.start([path])
+        try:
+            batch, _, errors = await restarted.parse([(p, 1) for p in packets[6:]])
+        finally:
+            restarted.close()
+
+        assert len(snapshot["stores"]["netflow_v9"]) >= 3
+        assert len(batch) == 6 * 4
+        assert errors == {}
+
+
+class TestCollectorParseWorkers:
+    """Test cases for FlowCollector with parse workers."""
+
+    async def test_end_to_end(self, unused_udp_port_factory, sample_netflow_v5_packet: bytes):
+        """Test packets are parsed in the pool and routed."""
+        settings = IngestionSettings(
+            bind_address="127.0.0.1",
+            netflow_port=unused_udp_port_factory(),
+            sflow_port=unused_udp_port_factory(),
+            batch_timeout_ms=100,
+            parse_workers=1,
+        )
+        router = MemoryRouter()
+        collector = FlowCollector(settings, router=router)
+        await collector.start()
+
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sender.sendto(sample_netflow_v5_packet, ("127.0.0.1", settings.netflow_port))
+            # Allow for worker process start-up
+            deadline = asyncio.get_running_loop().time() + 30
+            while not router.records and asyncio.get_running_loop().time() < deadline:
+                await asyncio.sleep(0.05)
+            records = router.records
+        finally:
+            sender.close()
+            await collector.stop()
+
+        assert len(records) > 0
+        assert str(records[0].exporter_ip) == "127.0.0.1"
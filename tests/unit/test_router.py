@@ -0,0 +1,514 @@
+"""Unit tests for flow routers."""
+
+import asyncio
+from datetime import datetime, timezone
+from ipaddress import IPv4Address, IPv6Address
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from flowlens.common.stream import FileLog
+from flowlens.common.work_queue import flow_shards
+from flowlens.ingestion.parsers.base import FlowRecord
+from flowlens.ingestion.parsers.batch import FlowBatch, decode_batch
+from flowlens.ingestion.router import (
+    FLOW_RECORD_COLUMNS,
+    AdaptiveRouter,
+    MemoryRouter,
+    PostgreSQLRouter,
+    StreamRouter,
+    batch_to_rows,
+    record_to_row,
+)
+from flowlens.ingestion.spool import FlowSpool, SpoolDrainer
+
+
+def make_record(**overrides) -> FlowRecord:
+    """Create a flow record with sensible defaults."""
+    fields = {
+        "timestamp": datetime(2024, 1, 1, 12, 0, 0),
+        "src_ip": IPv4Address("192.168.1.10"),
+        "dst_ip": IPv4Address("10.0.0.5"),
+        "src_port": 54321,
+        "dst_port": 443,
+        "protocol": 6,
+        "bytes_count": 1500,
+        "packets_count": 3,
+        "exporter_ip": IPv4Address("10.0.0.1"),
+        "flow_source": "netflow_v5",
+    }
+    fields.update(overrides)
+    return FlowRecord(**fields)
+
+
+class TestRecordToRow:
+    """Test cases for record_to_row."""
+
+    def test_row_matches_columns(self):
+        """Test row has one value per COPY column."""
+        row = record_to_row(make_record())
+        assert len(row) == len(FLOW_RECORD_COLUMNS)
+
+    def test_row_values(self):
+        """Test row values are in column order."""
+        record = make_record(extended_fields={"next_hop": "10.0.0.254"})
+        row = dict(zip(FLOW_RECORD_COLUMNS, record_to_row(record), strict=True))
+
+        assert row["src_ip"] == IPv4Address("192.168.1.10")
+        assert row["dst_port"] == 443
+        assert row["flow_source"] == "netflow_v5"
+        assert row["extended_fields"] == '{"next_hop": "10.0.0.254"}'
+
+    def test_empty_extended_fields(self):
+        """Test empty extended fields are stored as NULL."""
+        row = dict(zip(FLOW_RECORD_COLUMNS, record_to_row(make_record()), strict=True))
+        assert row["extended_fields"] is None
+
+    def test_unique_ids(self):
+        """Test each row gets a new id."""
+        record = make_record()
+        assert record_to_row(record)[0] != record_to_row(record)[0]
+
+
+class TestPostgreSQLRouter:
+    """Test cases for PostgreSQLRouter."""
+
+    @pytest.fixture
+    def driver_conn(self) -> MagicMock:
+        """Mock asyncpg connection."""
+        conn = MagicMock()
+        conn.copy_records_to_table = AsyncMock()
+        conn.execute = AsyncMock()
+        conn.executemany = AsyncMock()
+        return conn
+
+    @pytest.fixture
+    def engine(self, driver_conn: MagicMock) -> MagicMock:
+        """Mock engine handing out the asyncpg connection."""
+        raw_conn = MagicMock()
+        raw_conn.driver_connection = driver_conn
+
+        sa_conn = MagicMock()
+        sa_conn.get_raw_connection = AsyncMock(return_value=raw_conn)
+
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(return_value=sa_conn)
+        context.__aexit__ = AsyncMock(return_value=False)
+
+        engine = MagicMock()
+        engine.connect.return_value = context
+        return engine
+
+    @pytest.mark.asyncio
+    async def test_route_buffers_below_batch_size(self, engine: MagicMock, driver_conn: MagicMock):
+        """Test records are buffered until batch size is reached."""
+        router = PostgreSQLRouter(batch_size=10)
+
+        with patch("flowlens.ingestion.router.get_engine", return_value=engine):
+            stored = await router.route([make_record() for _ in range(5)])
+
+        assert stored == 0
+        driver_conn.copy_records_to_table.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_route_copies_full_batches(self, engine: MagicMock, driver_conn: MagicMock):
+        """Test full batches are written with binary COPY."""
+        router = PostgreSQLRouter(batch_size=10)
+
+        with patch("flowlens.ingestion.router.get_engine", return_value=engine):
+            stored = await router.route([make_record() for _ in range(25)])
+
+        assert stored == 20
+        assert driver_conn.copy_records_to_table.await_count == 2
+
+        args, kwargs = driver_conn.copy_records_to_table.call_args
+        assert args == ("flow_records",)
+        assert kwargs["columns"] == FLOW_RECORD_COLUMNS
+        assert len(kwargs["records"]) == 10
+
+    @pytest.mark.asyncio
+    async def test_copied_batch_queued_for_enrichment(self, engine: MagicMock, driver_conn: MagicMock):
+        """Test each copied batch is queued for enrichment in the same transaction."""
+        router = PostgreSQLRouter(batch_size=10)
+
+        with patch("flowlens.ingestion.router.get_engine", return_value=engine):
+            await router.route([make_record() for _ in range(10)])
+
+        driver_conn.transaction.assert_called_once()
+        _, kwargs = driver_conn.copy_records_to_table.call_args
+        sql, entries = driver_conn.executemany.await_args.args
+        assert "enrichment_queue" in sql
+        queued = {
+            (flow_id, timestamp)
+            for _, ids, timestamps in entries
+            for flow_id, timestamp in zip(ids, timestamps, strict=True)
+        }
+        assert queued == {(row[0], row[1]) for row in kwargs["records"]}
+        (notify,) = driver_conn.execute.await_args_list
+        assert "pg_notify" in notify.args[0]
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_remainder(self, engine: MagicMock, driver_conn: MagicMock):
+        """Test flush writes partially filled buffer."""
+        router = PostgreSQLRouter(batch_size=10)
+
+        with patch("flowlens.ingestion.router.get_engine", return_value=engine):
+            await router.route([make_record() for _ in range(3)])
+            await router.flush()
+
+        _, kwargs = driver_conn.copy_records_to_table.call_args
+        assert len(kwargs["records"]) == 3
+
+    @pytest.mark.asyncio
+    async def test_copy_failure_raises(self, engine: MagicMock, driver_conn: MagicMock):
+        """Test COPY errors propagate to the caller."""
+        driver_conn.copy_records_to_table.side_effect = RuntimeError("connection lost")
+        router = PostgreSQLRouter(batch_size=1)
+
+        with (
+            patch("flowlens.ingestion.router.get_engine", return_value=engine),
+            pytest.raises(RuntimeError, match="connection lost"),
+        ):
+            await router.route([make_record()])
+
+    @pytest.mark.asyncio
+    async def test_copy_failure_spools(
+        self, tmp_path, engine: MagicMock, driver_conn: MagicMock
+    ):
+        """Test a failed write is spooled and later batches bypass the database."""
+        driver_conn.copy_records_to_table.side_effect = RuntimeError("connection lost")
+        spool = FlowSpool(tmp_path / "spool", segment_bytes=1024 * 1024)
+        spool.open()
+        router = PostgreSQLRouter(batch_size=1, spool=spool, write_timeout=1.0)
+
+        with patch("flowlens.ingestion.router.get_engine", return_value=engine):
+            assert await router.route([make_record()]) == 1
+            assert router.spooling
+            assert await router.route([make_record()]) == 1
+
+        assert driver_conn.copy_records_to_table.await_count == 1
+        assert spool.stats.entries == 2
+        spool.close()
+
+    @pytest.mark.asyncio
+    async def test_slow_write_spools(
+        self, tmp_path, engine: MagicMock, driver_conn: MagicMock
+    ):
+        """Test a write exceeding the timeout is spooled."""
+        async def stall(*args, **kwargs):
+            await asyncio.sleep(10)
+
+        driver_conn.copy_records_to_table.side_effect = stall
+        spool = FlowSpool(tmp_path / "spool", segment_bytes=1024 * 1024)
+        spool.open()
+        router = PostgreSQLRouter(batch_size=1, spool=spool, write_timeout=0.01)
+
+        with patch("flowlens.ingestion.router.get_engine", return_value=engine):
+            assert await router.route([make_record()]) == 1
+
+        assert spool.stats.flows == 1
+        spool.close()
+
+    @pytest.mark.asyncio
+    async def test_replay_resumes_direct_writes(
+        self, tmp_path, engine: MagicMock, driver_conn: MagicMock
+    ):
+        """Test a successful replay switches the router back to the database."""
+        driver_conn.copy_records_to_table.side_effect = [RuntimeError("connection lost"), None, None]
+        spool = FlowSpool(tmp_path / "spool", segment_bytes=1024 * 1024)
+        spool.open()
+        router = PostgreSQLRouter(batch_size=1, spool=spool)
+        drainer = SpoolDrainer(spool, router.replay_batch)
+
+        with patch("flowlens.ingestion.router.get_engine", return_value=engine):
+            await router.route([make_record()])
+            assert await drainer.drain_once() == 1
+            assert not router.spooling
+
+            await router.route([make_record()])
+
+        assert driver_conn.copy_records_to_table.await_count == 3
+        assert spool.empty
+        spool.close()
+
+    @pytest.mark.asyncio
+    async def test_replay_after_late_commit(
+        self, tmp_path, engine: MagicMock, driver_conn: MagicMock
+    ):
+        """Test a spooled batch that the timed-out write committed is not stored twice."""
+        class UniqueViolationError(Exception):
+            sqlstate = "23505"
+
+        driver_conn.copy_records_to_table.side_effect = [
+            RuntimeError("timed out"),
+            UniqueViolationError("duplicate key value violates unique constraint"),
+        ]
+        spool = FlowSpool(tmp_path / "spool", segment_bytes=1024 * 1024)
+        spool.open()
+        router = PostgreSQLRouter(batch_size=1, spool=spool)
+        drainer = SpoolDrainer(spool, router.replay_batch)
+
+        with patch("flowlens.ingestion.router.get_engine", return_value=engine):
+            await router.route([make_record()])
+            assert await drainer.drain_once() == 1
+
+        # The replay reused the row ids of the first attempt
+        first, replay = driver_conn.copy_records_to_table.call_args_list
+        assert replay.kwargs["records"] == first.kwargs["records"]
+        assert not router.spooling
+        assert spool.empty
+        spool.close()
+
+
+class TestMemoryRouter:
+    """Test cases for MemoryRouter."""
+
+    @pytest.mark.asyncio
+    async def test_route_stores_records(self):
+        """Test records are kept in memory."""
+        router = MemoryRouter()
+        stored = await router.route([make_record(), make_record()])
+
+        assert stored == 2
+        assert len(router.records) == 2
+
+
+class TestBatchToRows:
+    """Test cases for batch_to_rows."""
+
+    def test_matches_record_to_row(self):
+        """Test columnar rows match per-record rows apart from the id."""
+        records = [
+            make_record(
+                timestamp=datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc),
+                tcp_flags=0x18,
+                exporter_id=5,
+                extended_fields={"next_hop": "10.0.0.254"},
+            ),
+            make_record(
+                timestamp=datetime(2024, 1, 1, 12, 0, 1, tzinfo=timezone.utc),
+                src_ip=IPv6Address("2001:db8::1"),
+                dst_ip=IPv6Address("2001:db8::2"),
+            ),
+        ]
+
+        rows = batch_to_rows(FlowBatch.from_records(records))
+
+        assert [row[1:] for row in rows] == [record_to_row(r)[1:] for r in records]
+
+
+class TestPostgreSQLRouterBatches:
+    """Test cases for routing columnar batches."""
+
+    @pytest.mark.asyncio
+    async def test_route_batch_buffers_across_batches(self):
+        """Test small batches are combined into full COPY batches."""
+        router = PostgreSQLRouter(batch_size=4)
+        written: list[int] = []
+
+        async def insert(batch: FlowBatch) -> int:
+            written.append(len(batch))
+            return len(batch)
+
+        with patch.object(router, "_insert_batch", side_effect=insert):
+            stored = 0
+            for _ in range(3):
+                stored += await router.route_batch(
+                    FlowBatch.from_records([make_record() for _ in range(3)])
+                )
+            await router.flush()
+
+        assert stored == 8
+        assert written == [4, 4, 1]
+
+
+class TestPostgreSQLRouterWriters:
+    """Test cases for the concurrent writer pipeline."""
+
+    @pytest.mark.asyncio
+    async def test_route_returns_while_writes_run(self):
+        """Test routing does not wait for writes below the in-flight limit."""
+        router = PostgreSQLRouter(batch_size=2, writers=2, max_in_flight=4)
+        release = asyncio.Event()
+        active: list[int] = []
+        peak = 0
+
+        async def insert(batch: FlowBatch) -> int:
+            nonlocal peak
+            active.append(len(batch))
+            peak = max(peak, len(active))
+            await release.wait()
+            active.pop()
+            return len(batch)
+
+        with patch.object(router, "_insert_batch", side_effect=insert):
+            submitted = await router.route([make_record() for _ in range(6)])
+            await asyncio.sleep(0)
+            assert submitted == 6
+            assert router.in_flight == 3
+
+            release.set()
+            await router.flush()
+            await router.close()
+
+        assert peak == 2
+        assert router.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_in_flight_limit_blocks_routing(self):
+        """Test routing waits once max_in_flight batches are outstanding."""
+        router = PostgreSQLRouter(batch_size=1, writers=1, max_in_flight=2)
+        release = asyncio.Event()
+
+        async def insert(batch: FlowBatch) -> int:
+            await release.wait()
+            return len(batch)
+
+        with patch.object(router, "_insert_batch", side_effect=insert):
+            await router.route([make_record(), make_record()])
+            blocked = asyncio.create_task(router.route([make_record()]))
+            await asyncio.sleep(0.01)
+            assert not blocked.done()
+
+            release.set()
+            assert await blocked == 1
+            await router.close()
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_remainder_and_waits(self):
+        """Test flush submits the partial buffer and waits for all writes."""
+        router = PostgreSQLRouter(batch_size=10, writers=2)
+        written: list[int] = []
+
+        async def insert(batch: FlowBatch) -> int:
+            await asyncio.sleep(0.01)
+            written.append(len(batch))
+            return len(batch)
+
+        with patch.object(router, "_insert_batch", side_effect=insert):
+            await router.route([make_record() for _ in range(13)])
+            await router.flush()
+
+            assert sorted(written) == [3, 10]
+            await router.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_write_does_not_stop_writers(self):
+        """Test a writer keeps going after a failed write."""
+        router = PostgreSQLRouter(batch_size=1, writers=1)
+        written: list[int] = []
+
+        async def insert(batch: FlowBatch) -> int:
+            if not written:
+                written.append(0)
+                raise RuntimeError("connection lost")
+            written.append(len(batch))
+            return len(batch)
+
+        with patch.object(router, "_insert_batch", side_effect=insert):
+            await router.route([make_record(), make_record()])
+            await router.close()
+
+        assert written == [0, 1]
+
+
+class TestStreamRouter:
+    """Test cases for StreamRouter."""
+
+    @pytest.mark.asyncio
+    async def test_publishes_encoded_batches(self, tmp_path):
+        """Test flows are published as fixed-size encoded batches."""
+        log = FileLog(tmp_path)
+        router = StreamRouter(log, "flows", batch_size=4)
+
+        records = [make_record(src_port=i) for i in range(10)]
+        assert await router.route(records) == 8
+        await router.flush()
+
+        consumer = log.consumer("flows", "test")
+        messages = await consumer.poll(10, timeout=0)
+        await consumer.close()
+        await router.close()
+
+        batches = [decode_batch(message) for message in messages]
+        assert [len(batch) for batch in batches] == [4, 4, 2]
+        assert FlowBatch.concat(batches).src_port.tolist() == list(range(10))
+
+    @pytest.mark.asyncio
+    async def test_messages_keyed_by_shard(self):
+        """Test each message holds one shard's flows and is keyed by it."""
+        log = MagicMock()
+        log.publish = AsyncMock()
+        router = StreamRouter(log, "flows", batch_size=40)
+
+        records = [
+            make_record(src_ip=IPv4Address(f"192.168.1.{i % 8}"), src_port=i) for i in range(40)
+        ]
+        assert await router.route(records) == 40
+
+        published = FlowBatch.concat([])
+        for call in log.publish.await_args_list:
+            batch = decode_batch(call.args[1])
+            (shard,) = set(flow_shards(batch.src_ip, batch.dst_ip).tolist())
+            assert call.kwargs["key"] == str(shard).encode()
+            published = FlowBatch.concat([published, batch])
+
+        assert log.publish.await_count > 1
+        assert sorted(published.src_port.tolist()) == list(range(40))
+
+    @pytest.mark.asyncio
+    async def test_batch_size_and_latencies(self, tmp_path):
+        """Test the batch size can change and write durations are recorded."""
+        log = FileLog(tmp_path)
+        router = StreamRouter(log, "flows", batch_size=4)
+        router.set_batch_size(2)
+
+        assert await router.route([make_record(src_port=i) for i in range(5)]) == 4
+        await router.close()
+
+        latencies = router.take_write_latencies()
+        assert len(latencies) == 3
+        assert all(latency >= 0 for latency in latencies)
+        assert router.take_write_latencies() == []
+
+
+class TestAdaptiveRouter:
+    """Test cases for AdaptiveRouter."""
+
+    @pytest.mark.asyncio
+    async def test_zero_threshold_always_streams(self):
+        """Test a zero threshold sends everything to the stream router."""
+        postgres, stream = MemoryRouter(), MemoryRouter()
+        router = AdaptiveRouter(kafka_threshold=0, postgres_router=postgres, kafka_router=stream)
+
+        await router.route([make_record()])
+
+        assert router.using_kafka
+        assert len(stream.records) == 1
+        assert postgres.records == []
+
+    @pytest.mark.asyncio
+    async def test_switches_above_threshold(self):
+        """Test throughput above the threshold switches to the stream router."""
+        postgres, stream = MemoryRouter(), MemoryRouter()
+        router = AdaptiveRouter(
+            kafka_threshold=1,
+            measurement_window=0.0,
+            postgres_router=postgres,
+            kafka_router=stream,
+        )
+
+        await router.route([make_record() for _ in range(10)])
+
+        assert router.using_kafka
+        assert len(stream.records) == 10
+
+    @pytest.mark.asyncio
+    async def test_without_stream_router_uses_postgres(self):
+        """Test flows stay on PostgreSQL when no stream router is configured."""
+        postgres = MemoryRouter()
+        router = AdaptiveRouter(kafka_threshold=0, postgres_router=postgres)
+
+        await router.route([make_record()])
+
+        assert len(postgres.records) == 1
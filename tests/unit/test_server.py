@@ -0,0 +1,288 @@
+"""Unit tests for the flow collector server."""
+
+import asyncio
+import socket
+from ipaddress import IPv4Address
+from operator import itemgetter
+
+import pytest
+
+from flowlens.common.config import IngestionSettings
+from flowlens.common.metrics import FLOWS_RECEIVED
+from flowlens.ingestion.backpressure import FairBackpressureQueue
+from flowlens.ingestion.parsers.netflow_v5 import NetFlowV5Parser
+from flowlens.ingestion.parsers.netflow_v9 import Template, TemplateField
+from flowlens.ingestion.receiver import BatchReceiver, create_udp_socket
+from flowlens.ingestion.router import MemoryRouter
+from flowlens.ingestion.server import FlowCollector, FlowProtocol
+
+
+@pytest.fixture
+def queue() -> FairBackpressureQueue[tuple[bytes, str, str]]:
+    """Create packet queue."""
+    return FairBackpressureQueue(
+        IngestionSettings(
+            queue_max_size=10000,
+            sample_threshold=5000,
+            drop_threshold=8000,
+        ),
+        key=itemgetter(1),
+    )
+
+
+class TestFlowProtocol:
+    """Test cases for FlowProtocol."""
+
+    def test_datagram_enqueued(self, queue: FairBackpressureQueue[tuple[bytes, str, str]]):
+        """Test datagrams are enqueued synchronously."""
+        protocol = FlowProtocol(queue, "netflow")
+        protocol.datagram_received(b"\x00\x05", ("10.0.0.1", 2055))
+
+        assert queue.size == 1
+        assert queue.get_nowait() == (b"\x00\x05", "10.0.0.1", "netflow")
+
+    def test_flush_metrics(self, queue: FairBackpressureQueue[tuple[bytes, str, str]]):
+        """Test per-exporter counts are published on flush."""
+        protocol = FlowProtocol(queue, "netflow")
+        counter = FLOWS_RECEIVED.labels(protocol="netflow", exporter="10.9.9.9")
+        before = counter._value.get()
+
+        for _ in range(3):
+            protocol.datagram_received(b"\x00\x05", ("10.9.9.9", 2055))
+
+        # Nothing is published until flush
+        assert counter._value.get() == before
+
+        protocol.flush_metrics()
+        assert counter._value.get() == before + 3
+
+        protocol.flush_metrics()
+        assert counter._value.get() == before + 3
+
+
+async def wait_for(condition, timeout: float = 2.0) -> None:
+    """Yield to the event loop until condition() is true."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise TimeoutError("condition not met")
+        await asyncio.sleep(0.01)
+
+
+class TestBatchReceiver:
+    """Test cases for BatchReceiver."""
+
+    @pytest.mark.asyncio
+    async def test_receives_batch(
+        self,
+        queue: FairBackpressureQueue[tuple[bytes, str, str]],
+        unused_udp_port: int,
+    ):
+        """Test datagrams are drained into the queue."""
+        receiver = BatchReceiver(
+            create_udp_socket(("127.0.0.1", unused_udp_port)),
+            queue,
+            "netflow",
+            batch_size=4,
+        )
+        receiver.start()
+
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for i in range(10):
+                sender.sendto(bytes([0, i]), ("127.0.0.1", unused_udp_port))
+
+            await wait_for(lambda: queue.size == 10)
+        finally:
+            sender.close()
+            receiver.close()
+
+        items = [queue.get_nowait() for _ in range(10)]
+        assert [data for data, _, _ in items] == [bytes([0, i]) for i in range(10)]
+        assert all(exporter == "127.0.0.1" for _, exporter, _ in items)
+
+    @pytest.mark.asyncio
+    async def test_flush_metrics(
+        self,
+        queue: FairBackpressureQueue[tuple[bytes, str, str]],
+        unused_udp_port: int,
+    ):
+        """Test receive counts are published on flush."""
+        counter = FLOWS_RECEIVED.labels(protocol="sflow", exporter="127.0.0.1")
+        before = counter._value.get()
+
+        receiver = BatchReceiver(
+            create_udp_socket(("127.0.0.1", unused_udp_port)),
+            queue,
+            "sflow",
+        )
+        receiver.start()
+
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for _ in range(3):
+                sender.sendto(b"\x00\x00\x00\x05", ("127.0.0.1", unused_udp_port))
+            await wait_for(lambda: queue.size == 3)
+        finally:
+            sender.close()
+            receiver.close()
+
+        receiver.flush_metrics()
+        assert counter._value.get() == before + 3
+
+
+class TestFlowCollector:
+    """Test cases for FlowCollector."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("receive_mode", ["protocol", "batch"])
+    async def test_end_to_end(
+        self,
+        receive_mode: str,
+        unused_udp_port_factory,
+        sample_netflow_v5_packet: bytes,
+    ):
+        """Test packets are received, parsed and routed in both receive modes."""
+        settings = IngestionSettings(
+            bind_address="127.0.0.1",
+            netflow_port=unused_udp_port_factory(),
+            sflow_port=unused_udp_port_factory(),
+            receive_mode=receive_mode,
+            batch_timeout_ms=100,
+        )
+        router = MemoryRouter()
+        collector = FlowCollector(settings, router=router)
+        await collector.start()
+
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for _ in range(5):
+                sender.sendto(sample_netflow_v5_packet, ("127.0.0.1", settings.netflow_port))
+
+            await wait_for(lambda: len(router.records) == 5)
+        finally:
+            sender.close()
+            await collector.stop()
+
+        assert collector.stats["total_received"] == 5
+
+    @pytest.mark.asyncio
+    async def test_sampled_packets_scale_sampling_rate(
+        self,
+        unused_udp_port_factory,
+        sample_netflow_v5_packet: bytes,
+    ):
+        """Test flows from sampled-in packets record the sampling factor."""
+        settings = IngestionSettings(
+            bind_address="127.0.0.1",
+            netflow_port=unused_udp_port_factory(),
+            sflow_port=unused_udp_port_factory(),
+            batch_timeout_ms=100,
+        )
+        router = MemoryRouter()
+        collector = FlowCollector(settings, router=router)
+
+        packet = (sample_netflow_v5_packet, "10.0.0.1", "netflow")
+        collector._queue.put_nowait(packet)
+        collector._queue.put_nowait(packet)
+        # Second packet was admitted while its exporter was sampled 1 in 10
+        collector._queue._exporters["10.0.0.1"].items[1] = (packet, 10)
+
+        await collector.start()
+        try:
+            await wait_for(lambda: len(router.records) == 2)
+            records = router.records
+        finally:
+            await collector.stop()
+
+        assert records[1].sampling_rate == records[0].sampling_rate * 10
+
+    def test_adaptive_backpressure_applied(self):
+        """Test adaptive decisions reach the queue, router and stats."""
+        settings = IngestionSettings(
+            adaptive_backpressure=True,
+            adaptive_target_latency_seconds=0.1,
+            batch_size=1000,
+        )
+        router = MemoryRouter()
+        router.take_write_latencies = lambda: [0.5, 0.5]
+        batch_sizes: list[int] = []
+        router.set_batch_size = batch_sizes.append
+        collector = FlowCollector(settings, router=router)
+
+        # Not due until the adjustment interval has passed
+        collector._interval_flows = 5000
+        collector._adjust_backpressure()
+        assert collector.stats["batch_size"] == 1000
+
+        collector._interval_start -= settings.adaptive_interval_seconds
+        collector._adjust_backpressure()
+        stats = collector.stats
+
+        # Slow writes tighten thresholds and shrink batches
+        assert stats["sample_threshold"] < settings.sample_threshold
+        assert stats["drop_threshold"] < settings.drop_threshold
+        assert stats["batch_size"] == 800
+        assert batch_sizes == [800]
+        assert stats["adaptive_write_latency_seconds"] == pytest.approx(0.5)
+        assert stats["adaptive_throughput"] > 0
+
+    @pytest.mark.asyncio
+    async def test_template_snapshot_survives_restart(self, tmp_path, unused_udp_port_factory):
+        """Test templates are saved on stop and reloaded on start."""
+        settings = IngestionSettings(
+            bind_address="127.0.0.1",
+            netflow_port=unused_udp_port_factory(),
+            sflow_port=unused_udp_port_factory(),
+            template_snapshot_path=tmp_path / "templates.json",
+        )
+        template = Template(template_id=256, source_id=1, fields=[TemplateField(8, 4)])
+
+        collector = FlowCollector(settings, router=MemoryRouter())
+        collector._template_stores["netflow_v9"].set("10.0.0.1", 1, template)
+        await collector.start()
+        await collector.stop()
+
+        assert (tmp_path / "templates.json").is_file()
+
+        # A worker loads the single-process snapshot and writes its own
+        restarted = FlowCollector(settings, router=MemoryRouter(), worker_id=2)
+        await restarted.start()
+        try:
+            loaded = restarted._template_stores["netflow_v9"].get("10.0.0.1", 1, 256)
+        finally:
+            await restarted.stop()
+
+        assert loaded is not None
+        assert loaded.fields == template.fields
+        assert (tmp_path / "templates.json.2").is_file()
+
+    @pytest.mark.asyncio
+    async def test_spool_reported_in_stats(
+        self,
+        tmp_path,
+        unused_udp_port_factory,
+        sample_netflow_v5_packet: bytes,
+    ):
+        """Test the default router spools to a per-worker directory."""
+        settings = IngestionSettings(
+            bind_address="127.0.0.1",
+            netflow_port=unused_udp_port_factory(),
+            sflow_port=unused_udp_port_factory(),
+            spool_path=tmp_path / "spool",
+        )
+        collector = FlowCollector(settings, worker_id=1)
+        await collector.start()
+        try:
+            await collector._spool_drainer.stop()
+            collector._spool.append(
+                NetFlowV5Parser().parse_batch(sample_netflow_v5_packet, IPv4Address("10.0.0.1"))
+            )
+            stats = collector.stats
+        finally:
+            await collector.stop()
+
+        assert stats["spool_flows"] == 1
+        assert stats["spool_bytes"] == settings.spool_segment_bytes
+        assert stats["spool_oldest_age_seconds"] >= 0
+        assert (tmp_path / "spool" / "1").is_dir()
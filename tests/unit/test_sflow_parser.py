@@ -0,0 +1,267 @@
+"""Unit tests for sFlow parser."""
+
+import struct
+from ipaddress import IPv4Address, IPv6Address
+
+import pytest
+
+from flowlens.ingestion.parsers.sflow import (
+    FLOW_RECORD_EXTENDED_SWITCH,
+    FLOW_RECORD_IPV4,
+    FLOW_RECORD_IPV6,
+    FLOW_RECORD_RAW_PACKET,
+    SAMPLE_FORMAT_COUNTER,
+    SAMPLE_FORMAT_EXPANDED_FLOW,
+    SAMPLE_FORMAT_FLOW,
+    SFlowParser,
+)
+
+SAMPLING_RATE = 512
+
+
+def datagram(samples: list[bytes], agent: IPv4Address | IPv6Address = IPv4Address("10.1.1.1")) -> bytes:
+    """Build an sFlow v5 datagram."""
+    agent_type = 1 if agent.version == 4 else 2
+    return (
+        struct.pack("!II", 5, agent_type)
+        + agent.packed
+        + struct.pack("!IIII", 0, 42, 123_456, len(samples))
+        + b"".join(samples)
+    )
+
+
+def sample(fmt: int, body: bytes) -> bytes:
+    """Wrap a sample body in its format/length header."""
+    return struct.pack("!II", fmt, len(body)) + body
+
+
+def flow_sample(records: list[bytes]) -> bytes:
+    """Build a flow sample."""
+    body = struct.pack("!8I", 1, 3, SAMPLING_RATE, 10_000, 2, 11, 12, len(records))
+    return sample(SAMPLE_FORMAT_FLOW, body + b"".join(records))
+
+
+def expanded_flow_sample(records: list[bytes]) -> bytes:
+    """Build an expanded flow sample."""
+    body = struct.pack("!11I", 1, 0, 7, SAMPLING_RATE, 10_000, 0, 0, 1001, 0, 1002, len(records))
+    return sample(SAMPLE_FORMAT_EXPANDED_FLOW, body + b"".join(records))
+
+
+def record(fmt: int, body: bytes) -> bytes:
+    """Wrap a flow record body, padded to 4 bytes."""
+    padding = bytes(-len(body) % 4)
+    return struct.pack("!II", fmt, len(body)) + body + padding
+
+
+def raw_packet_record(packet: bytes, frame_length: int = 1514) -> bytes:
+    """Build a raw packet header record."""
+    return record(
+        FLOW_RECORD_RAW_PACKET,
+        struct.pack("!IIII", 1, frame_length, 4, len(packet)) + packet,
+    )
+
+
+def ethernet(ether_type: int, payload: bytes, vlan: int | None = None) -> bytes:
+    """Build an Ethernet frame, optionally 802.1Q tagged."""
+    frame = bytes(6) + bytes(6)
+    if vlan is not None:
+        frame += struct.pack("!HH", 0x8100, vlan)
+    return frame + struct.pack("!H", ether_type) + payload
+
+
+def ipv4_tcp(src: str, dst: str, src_port: int, dst_port: int, flags: int = 0x18) -> bytes:
+    """Build an IPv4 header followed by a TCP header."""
+    ip = struct.pack(
+        "!BBHHHBBH4s4s",
+        0x45, 0x10, 60, 0, 0, 64, 6, 0,
+        IPv4Address(src).packed, IPv4Address(dst).packed,
+    )
+    tcp = struct.pack("!HHIIBBHHH", src_port, dst_port, 0, 0, 0x50, flags, 0, 0, 0)
+    return ip + tcp
+
+
+def ipv6_udp(src: str, dst: str, src_port: int, dst_port: int) -> bytes:
+    """Build an IPv6 header followed by a UDP header."""
+    ip = struct.pack("!IHBB", (6 << 28) | (0x20 << 20), 8, 17, 64)
+    ip += IPv6Address(src).packed + IPv6Address(dst).packed
+    return ip + struct.pack("!HHHH", src_port, dst_port, 8, 0)
+
+
+class TestSFlowParser:
+    """Test cases for sFlow parser."""
+
+    @pytest.fixture
+    def parser(self) -> SFlowParser:
+        """Create parser instance."""
+        return SFlowParser()
+
+    @pytest.fixture
+    def exporter_ip(self) -> IPv4Address:
+        """Exporter address."""
+        return IPv4Address("192.0.2.1")
+
+    def test_protocol_name(self, parser: SFlowParser):
+        """Test protocol name."""
+        assert parser.protocol_name == "sflow"
+
+    def test_raw_ipv4_tcp(self, parser: SFlowParser, exporter_ip: IPv4Address):
+        """Test a raw Ethernet/IPv4/TCP header is decoded."""
+        packet = ethernet(0x0800, ipv4_tcp("192.168.1.10", "10.0.0.5", 50000, 443))
+        records = parser.parse(datagram([flow_sample([raw_packet_record(packet)])]), exporter_ip)
+
+        assert len(records) == 1
+        r = records[0]
+        assert r.src_ip == IPv4Address("192.168.1.10")
+        assert r.dst_ip == IPv4Address("10.0.0.5")
+        assert (r.src_port, r.dst_port, r.protocol) == (50000, 443, 6)
+        assert r.tcp_flags == 0x18
+        assert r.tos == 0x10
+        assert r.bytes_count == 1514 * SAMPLING_RATE
+        assert r.packets_count == SAMPLING_RATE
+        assert r.sampling_rate == SAMPLING_RATE
+        assert (r.exporter_id, r.input_interface, r.output_interface) == (3, 11, 12)
+        assert r.exporter_ip == exporter_ip
+        assert r.flow_source == "sflow"
+        assert r.extended_fields == {
+            "agent": "10.1.1.1",
+            "sequence_number": 42,
+            "sample_pool": 10_000,
+            "drops": 2,
+        }
+
+    def test_raw_vlan_tagged(self, parser: SFlowParser, exporter_ip: IPv4Address):
+        """Test 802.1Q tagged frames are decoded."""
+        packet = ethernet(0x0800, ipv4_tcp("192.168.1.10", "10.0.0.5", 50000, 22), vlan=100)
+        records = parser.parse(datagram([flow_sample([raw_packet_record(packet)])]), exporter_ip)
+
+        assert [(r.dst_ip, r.dst_port) for r in records] == [(IPv4Address("10.0.0.5"), 22)]
+
+    def test_raw_ipv6_udp(self, parser: SFlowParser, exporter_ip: IPv4Address):
+        """Test a raw Ethernet/IPv6/UDP header is decoded."""
+        packet = ethernet(0x86DD, ipv6_udp("2001:db8::1", "2001:db8::2", 5353, 53))
+        records = parser.parse(datagram([flow_sample([raw_packet_record(packet)])]), exporter_ip)
+
+        assert len(records) == 1
+        r = records[0]
+        assert (r.src_ip, r.dst_ip) == (IPv6Address("2001:db8::1"), IPv6Address("2001:db8::2"))
+        assert (r.src_port, r.dst_port, r.protocol) == (5353, 53, 17)
+        assert r.tcp_flags is None
+        assert r.tos == 0x20
+
+    def test_raw_non_ip_ignored(self, parser: SFlowParser, exporter_ip: IPv4Address):
+        """Test non-IP frames produce no records."""
+        packet = ethernet(0x0806, bytes(28))
+        records = parser.parse(datagram([flow_sample([raw_packet_record(packet)])]), exporter_ip)
+
+        assert records == []
+
+    def test_decoded_ipv4_record(self, parser: SFlowParser, exporter_ip: IPv4Address):
+        """Test sampled IPv4 records are decoded."""
+        body = struct.pack(
+            "!8I", 1000, 6,
+            int(IPv4Address("172.16.0.1")), int(IPv4Address("172.16.0.2")),
+            40000, 80, 0x02, 8,
+        )
+        records = parser.parse(
+            datagram([flow_sample([record(FLOW_RECORD_IPV4, body)])]), exporter_ip
+        )
+
+        assert len(records) == 1
+        r = records[0]
+        assert (str(r.src_ip), str(r.dst_ip)) == ("172.16.0.1", "172.16.0.2")
+        assert (r.src_port, r.dst_port, r.tcp_flags, r.tos) == (40000, 80, 0x02, 8)
+        assert r.bytes_count == 1000 * SAMPLING_RATE
+        assert r.extended_fields == {"agent": "10.1.1.1", "sequence_number": 42}
+
+    def test_decoded_ipv6_record(self, parser: SFlowParser, exporter_ip: IPv4Address):
+        """Test sampled IPv6 records are decoded."""
+        body = (
+            struct.pack("!II", 1200, 17)
+            + IPv6Address("2001:db8::a").packed
+            + IPv6Address("2001:db8::b").packed
+            + struct.pack("!IIII", 4000, 4001, 0, 3)
+        )
+        records = parser.parse(
+            datagram([flow_sample([record(FLOW_RECORD_IPV6, body)])]), exporter_ip
+        )
+
+        assert len(records) == 1
+        r = records[0]
+        assert r.dst_ip == IPv6Address("2001:db8::b")
+        assert (r.src_port, r.dst_port, r.protocol, r.tos) == (4000, 4001, 17, 3)
+
+    def test_expanded_flow_sample(self, parser: SFlowParser, exporter_ip: IPv4Address):
+        """Test expanded samples use 32-bit interface values."""
+        packet = ethernet(0x0800, ipv4_tcp("192.168.1.10", "10.0.0.5", 50000, 443))
+        records = parser.parse(
+            datagram([expanded_flow_sample([raw_packet_record(packet)])]), exporter_ip
+        )
+
+        assert len(records) == 1
+        assert (records[0].input_interface, records[0].output_interface) == (1001, 1002)
+        assert records[0].exporter_id == 7
+
+    def test_multiple_samples_and_records(self, parser: SFlowParser, exporter_ip: IPv4Address):
+        """Test records are read across samples, skipping unknown types."""
+        packet = ethernet(0x0800, ipv4_tcp("192.168.1.10", "10.0.0.5", 50000, 443))
+        # Odd-length packet header exercises record padding
+        odd_packet = ethernet(0x0800, ipv4_tcp("192.168.1.11", "10.0.0.6", 50001, 8443)) + b"\x00"
+        records = parser.parse(
+            datagram([
+                flow_sample([
+                    record(FLOW_RECORD_EXTENDED_SWITCH, bytes(16)),
+                    raw_packet_record(odd_packet),
+                    raw_packet_record(packet),
+                ]),
+                sample(SAMPLE_FORMAT_COUNTER, bytes(24)),
+                flow_sample([raw_packet_record(packet)]),
+            ]),
+            exporter_ip,
+        )
+
+        assert [r.dst_port for r in records] == [8443, 443, 443]
+
+    def test_ipv6_agent(self, parser: SFlowParser, exporter_ip: IPv4Address):
+        """Test IPv6 agent addresses are parsed."""
+        packet = ethernet(0x0800, ipv4_tcp("192.168.1.10", "10.0.0.5", 50000, 443))
+        records = parser.parse(
+            datagram([flow_sample([raw_packet_record(packet)])], agent=IPv6Address("2001:db8::99")),
+            exporter_ip,
+        )
+
+        assert records[0].extended_fields["agent"] == "2001:db8::99"
+
+    def test_truncated_sample(self, parser: SFlowParser, exporter_ip: IPv4Address):
+        """Test a truncated trailing sample yields no partial records."""
+        packet = ethernet(0x0800, ipv4_tcp("192.168.1.10", "10.0.0.5", 50000, 443))
+        full = datagram([flow_sample([raw_packet_record(packet)])] * 2)
+
+        records = parser.parse(full[:-40], exporter_ip)
+
+        assert len(records) == 1
+
+    def test_invalid_version(self, parser: SFlowParser, exporter_ip: IPv4Address):
+        """Test non-v5 datagrams are rejected."""
+        data = bytearray(datagram([]))
+        data[3] = 4
+
+        with pytest.raises(ValueError, match="invalid version"):
+            parser.parse(bytes(data), exporter_ip)
+
+    def test_invalid_agent_type(self, parser: SFlowParser, exporter_ip: IPv4Address):
+        """Test unknown agent address types are rejected."""
+        data = bytearray(datagram([]))
+        data[7] = 9
+
+        with pytest.raises(ValueError, match="agent address type"):
+            parser.parse(bytes(data), exporter_ip)
+
+    def test_parse_batch(self, parser: SFlowParser, exporter_ip: IPv4Address):
+        """Test batch parsing matches record parsing."""
+        packet = ethernet(0x0800, ipv4_tcp("192.168.1.10", "10.0.0.5", 50000, 443))
+        data = datagram([flow_sample([raw_packet_record(packet)] * 3)])
+
+        batch = parser.parse_batch(data, exporter_ip)
+
+        assert len(batch) == 3
+        assert batch.dst_port.tolist() == [443, 443, 443]
@@ -0,0 +1,274 @@
+"""Unit tests for the ingestion write-ahead spool."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from ipaddress import IPv4Address, IPv6Address
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+
+from flowlens.ingestion.parsers.base import FlowRecord
+from flowlens.ingestion.parsers.batch import FlowBatch
+from flowlens.ingestion.spool import FlowSpool, SpoolDrainer, SpoolFullError
+
+
+def make_batch(count: int = 3, start_port: int = 1000) -> FlowBatch:
+    """Create a batch of distinct flows."""
+    return FlowBatch.from_records([
+        FlowRecord(
+            timestamp=datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc) + timedelta(seconds=i),
+            src_ip=IPv4Address("192.168.1.10") if i % 2 else IPv6Address("2001:db8::1"),
+            dst_ip=IPv4Address("10.0.0.5"),
+            src_port=start_port + i,
+            dst_port=443,
+            protocol=6,
+            bytes_count=1500,
+            packets_count=3,
+            exporter_ip=IPv4Address("10.0.0.1"),
+            tcp_flags=0x18 if i % 2 else None,
+            flow_source="netflow_v9",
+            extended_fields={"vlan": i} if i % 2 else {},
+        )
+        for i in range(count)
+    ])
+
+
+def assert_batches_equal(actual: FlowBatch, expected: FlowBatch) -> None:
+    """Compare two batches column by column."""
+    assert actual.to_records() == expected.to_records()
+
+
+class FakeClock:
+    """Manually advanced wall clock."""
+
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def spool(tmp_path: Path) -> FlowSpool:
+    """Open a spool with small segments."""
+    spool = FlowSpool(tmp_path / "spool", segment_bytes=4096, max_bytes=64 * 1024)
+    spool.open()
+    yield spool
+    spool.close()
+
+
+class TestFlowSpool:
+    """Test cases for FlowSpool."""
+
+    def test_append_and_replay_in_order(self, spool: FlowSpool):
+        """Test entries are read back oldest first."""
+        first, second = make_batch(2, 1000), make_batch(3, 2000)
+        spool.append(first)
+        spool.append(second)
+
+        assert spool.stats.flows == 5
+
+        entry = spool.peek()
+        assert_batches_equal(spool.read(entry), first)
+        spool.ack(entry)
+
+        entry = spool.peek()
+        assert_batches_equal(spool.read(entry), second)
+        spool.ack(entry)
+
+        assert spool.empty
+        assert spool.stats.flows == 0
+
+    def test_ack_out_of_order_rejected(self, spool: FlowSpool):
+        """Test only the oldest entry can be acknowledged."""
+        spool.append(make_batch(1, 1000))
+        spool.append(make_batch(1, 2000))
+        first = spool.peek()
+        spool.ack(first)
+
+        with pytest.raises(ValueError):
+            spool.ack(first)
+
+    def test_rotates_and_deletes_replayed_segments(self, spool: FlowSpool, tmp_path: Path):
+        """Test full segments are rotated and removed once replayed."""
+        for i in range(20):
+            spool.append(make_batch(3, i * 10))
+
+        segments = list((tmp_path / "spool").glob("*.seg"))
+        assert len(segments) > 1
+
+        while (entry := spool.peek()) is not None:
+            spool.ack(entry)
+
+        # Only the segment still open for writing remains
+        assert len(list((tmp_path / "spool").glob("*.seg"))) == 1
+        assert spool.stats.segments == 1
+
+    def test_oversized_batch_gets_own_segment(self, spool: FlowSpool):
+        """Test a batch larger than a segment is still spooled."""
+        batch = make_batch(100)
+        spool.append(batch)
+
+        assert_batches_equal(spool.read(spool.peek()), batch)
+        assert spool.stats.bytes > 4096
+
+    def test_full_spool_rejects(self, tmp_path: Path):
+        """Test appends fail once the size limit is reached."""
+        spool = FlowSpool(tmp_path / "spool", segment_bytes=4096, max_bytes=8192)
+        spool.open()
+
+        with pytest.raises(SpoolFullError):
+            for i in range(100):
+                spool.append(make_batch(3, i * 10))
+
+        assert spool.stats.bytes <= 8192
+        spool.close()
+
+    def test_reopen_resumes_after_replayed_entries(self, tmp_path: Path):
+        """Test a restarted spool only replays unacknowledged entries."""
+        spool = FlowSpool(tmp_path / "spool", segment_bytes=4096)
+        spool.open()
+        spool.append(make_batch(2, 1000))
+        spool.append(make_batch(3, 2000))
+        spool.ack(spool.peek())
+        spool.close()
+
+        reopened = FlowSpool(tmp_path / "spool", segment_bytes=4096)
+        reopened.open()
+
+        assert reopened.stats.entries == 1
+        assert reopened.stats.flows == 3
+        assert_batches_equal(reopened.read(reopened.peek()), make_batch(3, 2000))
+
+        # New appends go to a fresh segment after the existing ones
+        reopened.append(make_batch(1, 3000))
+        reopened.ack(reopened.peek())
+        assert_batches_equal(reopened.read(reopened.peek()), make_batch(1, 3000))
+        reopened.close()
+
+    def test_reopen_truncates_corrupt_entry(self, tmp_path: Path):
+        """Test a torn write ends the segment at the damaged entry."""
+        spool = FlowSpool(tmp_path / "spool", segment_bytes=4096)
+        spool.open()
+        spool.append(make_batch(2, 1000))
+        spool.append(make_batch(3, 2000))
+        first = spool.peek()
+        spool.close()
+
+        # Flip the first payload byte of the second entry (20-byte headers)
+        (path,) = (tmp_path / "spool").glob("*.seg")
+        data = bytearray(path.read_bytes())
+        data[first.offset + 20 + first.length + 20] ^= 0xFF
+        path.write_bytes(bytes(data))
+
+        reopened = FlowSpool(tmp_path / "spool", segment_bytes=4096)
+        reopened.open()
+
+        assert reopened.stats.entries == 1
+        assert_batches_equal(reopened.read(reopened.peek()), make_batch(2, 1000))
+        reopened.close()
+
+    def test_oldest_age(self, tmp_path: Path):
+        """Test stats report when the oldest entry was written."""
+        clock = FakeClock()
+        spool = FlowSpool(tmp_path / "spool", segment_bytes=4096, clock=clock)
+        spool.open()
+
+        assert spool.stats.oldest_written_at is None
+
+        spool.append(make_batch(1))
+        clock.now += 30
+        spool.append(make_batch(1))
+
+        assert spool.stats.oldest_written_at == clock.now - 30
+        spool.close()
+
+
+class TestSpoolDrainer:
+    """Test cases for SpoolDrainer."""
+
+    @pytest.mark.asyncio
+    async def test_drains_all_entries(self, spool: FlowSpool):
+        """Test every spooled batch is written and acknowledged."""
+        spool.append(make_batch(2, 1000))
+        spool.append(make_batch(3, 2000))
+        write = AsyncMock()
+
+        drainer = SpoolDrainer(spool, write)
+        assert await drainer.drain_once() == 5
+
+        assert write.await_count == 2
+        assert spool.empty
+        assert drainer.replayed == 5
+
+    @pytest.mark.asyncio
+    async def test_replay_rate(self, spool: FlowSpool):
+        """Test the replay rate covers recent replays and reading it is stable."""
+        clock = FakeClock()
+        drainer = SpoolDrainer(spool, AsyncMock(), clock=clock)
+
+        spool.append(make_batch(20, 1000))
+        await drainer.drain_once()
+        clock.now += 5
+        spool.append(make_batch(30, 2000))
+        await drainer.drain_once()
+
+        assert drainer.replay_rate == drainer.replay_rate == 5.0
+
+        clock.now += 6
+        assert drainer.replay_rate == 3.0
+
+        clock.now += 5
+        assert drainer.replay_rate == 0.0
+
+    @pytest.mark.asyncio
+    async def test_failed_write_keeps_entry(self, spool: FlowSpool):
+        """Test a failed write stops draining and keeps the entry for retry."""
+        spool.append(make_batch(2, 1000))
+        spool.append(make_batch(3, 2000))
+        write = AsyncMock(side_effect=[None, ConnectionError("db down"), None])
+
+        drainer = SpoolDrainer(spool, write)
+        assert await drainer.drain_once() == 2
+        assert spool.stats.flows == 3
+
+        assert await drainer.drain_once() == 3
+        assert spool.empty
+
+    @pytest.mark.asyncio
+    async def test_discards_corrupt_entry(self, spool: FlowSpool):
+        """Test an entry failing its checksum is skipped."""
+        spool.append(make_batch(2, 1000))
+        spool.append(make_batch(3, 2000))
+
+        first = spool.peek()
+        segment_map = spool._segments[first.segment].map
+        payload_start = first.offset + 20
+        segment_map[payload_start] ^= 0xFF
+
+        write = AsyncMock()
+        drainer = SpoolDrainer(spool, write)
+
+        assert await drainer.drain_once() == 3
+        assert write.await_count == 1
+        assert spool.empty
+
+    @pytest.mark.asyncio
+    async def test_background_loop(self, spool: FlowSpool):
+        """Test the background task drains new entries."""
+        write = AsyncMock()
+        drainer = SpoolDrainer(spool, write, interval=0.01)
+        drainer.start()
+
+        spool.append(make_batch(4))
+        for _ in range(100):
+            if spool.empty:
+                break
+            await asyncio.sleep(0.01)
+
+        await drainer.stop()
+        assert spool.empty
+        assert np.array_equal(write.await_args.args[0].src_port, make_batch(4).src_port)
+
@@ -0,0 +1,153 @@
+"""Unit tests for the flow stream log."""
+
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from flowlens.common.config import KafkaSettings
+from flowlens.common.stream import FileLog, KafkaLog, create_flow_log
+
+
+class TestFileLog:
+    """Test cases for FileLog."""
+
+    @pytest.mark.asyncio
+    async def test_publish_and_consume(self, file_log: FileLog):
+        """Test messages are consumed in publish order."""
+        for value in (b"one", b"two", b"three"):
+            await file_log.publish("flows", value)
+        await file_log.flush()
+
+        consumer = file_log.consumer("flows", "enrichment")
+        assert await consumer.poll(2, timeout=0) == [b"one", b"two"]
+        assert await consumer.poll(10, timeout=0) == [b"three"]
+        assert await consumer.poll(10, timeout=0) == []
+        await consumer.close()
+
+    @pytest.mark.asyncio
+    async def test_poll_missing_topic(self, file_log: FileLog):
+        """Test polling a topic nothing was published to."""
+        consumer = file_log.consumer("flows", "enrichment")
+        assert await consumer.poll(10, timeout=0.01) == []
+        await consumer.close()
+
+    @pytest.mark.asyncio
+    async def test_uncommitted_messages_redelivered(self, file_log: FileLog):
+        """Test a new consumer resumes from the group's committed offset."""
+        for value in (b"one", b"two", b"three"):
+            await file_log.publish("flows", value)
+        await file_log.flush()
+
+        consumer = file_log.consumer("flows", "enrichment")
+        await consumer.poll(1, timeout=0)
+        await consumer.commit()
+        await consumer.poll(1, timeout=0)
+        await consumer.close()
+
+        resumed = file_log.consumer("flows", "enrichment")
+        assert await resumed.poll(10, timeout=0) == [b"two", b"three"]
+        await resumed.close()
+
+        # Other groups have their own offsets
+        other = file_log.consumer("flows", "audit")
+        assert len(await other.poll(10, timeout=0)) == 3
+        await other.close()
+
+    @pytest.mark.asyncio
+    async def test_seek_to_committed(self, file_log: FileLog):
+        """Test uncommitted messages are polled again after a rewind."""
+        for value in (b"one", b"two", b"three"):
+            await file_log.publish("flows", value)
+        await file_log.flush()
+
+        consumer = file_log.consumer("flows", "enrichment")
+        await consumer.poll(1, timeout=0)
+        await consumer.commit()
+        assert await consumer.poll(10, timeout=0) == [b"two", b"three"]
+
+        await consumer.seek_to_committed()
+        assert await consumer.poll(10, timeout=0) == [b"two", b"three"]
+        await consumer.close()
+
+    @pytest.mark.asyncio
+    async def test_partial_message_not_consumed(self, file_log: FileLog):
+        """Test a message still being written is left for the next poll."""
+        await file_log.publish("flows", b"complete")
+        await file_log.flush()
+
+        with file_log.topic_path("flows").open("ab") as f:
+            f.write(b"\x00\x00\x00\x10\x00")
+
+        consumer = file_log.consumer("flows", "enrichment")
+        assert await consumer.poll(10, timeout=0) == [b"complete"]
+        assert await consumer.poll(10, timeout=0) == []
+        await consumer.close()
+
+    @pytest.mark.asyncio
+    async def test_corrupt_message_skipped(self, file_log: FileLog):
+        """Test messages failing their checksum are skipped."""
+        await file_log.publish("flows", b"damaged")
+        await file_log.publish("flows", b"intact")
+        await file_log.close()
+
+        path = file_log.topic_path("flows")
+        data = bytearray(path.read_bytes())
+        data[8] ^= 0xFF
+        path.write_bytes(bytes(data))
+
+        consumer = file_log.consumer("flows", "enrichment")
+        assert await consumer.poll(10, timeout=0) == [b"intact"]
+        await consumer.close()
+
+
+class TestKafkaLog:
+    """Test cases for KafkaLog."""
+
+    @pytest.mark.asyncio
+    async def test_publish_uses_producer(self):
+        """Test messages are sent with the configured producer settings."""
+        producer = MagicMock()
+        producer.start = AsyncMock()
+        producer.send = AsyncMock()
+        producer_class = MagicMock(return_value=producer)
+
+        with patch.dict("sys.modules", {"aiokafka": MagicMock(AIOKafkaProducer=producer_class)}):
+            log = KafkaLog(KafkaSettings(compression="none", linger_ms=5))
+            await log.publish("flows", b"payload")
+
+        assert producer_class.call_args.kwargs["compression_type"] is None
+        assert producer_class.call_args.kwargs["linger_ms"] == 5
+        producer.send.assert_awaited_once_with("flows", value=b"payload", key=None)
+
+    @pytest.mark.asyncio
+    async def test_seek_to_committed(self):
+        """Test assigned partitions are rewound to their committed offsets."""
+        consumer = MagicMock()
+        consumer.start = AsyncMock()
+        consumer.assignment.return_value = ["flows-0", "flows-1"]
+        consumer.committed = AsyncMock(side_effect=[42, None])
+        consumer.seek_to_beginning = AsyncMock()
+        consumer_class = MagicMock(return_value=consumer)
+
+        with patch.dict("sys.modules", {"aiokafka": MagicMock(AIOKafkaConsumer=consumer_class)}):
+            log = KafkaLog(KafkaSettings(auto_offset_reset="earliest"))
+            log_consumer = log.consumer("flows", "enrichment")
+            await log_consumer._get_consumer()
+            await log_consumer.seek_to_committed()
+
+        consumer.seek.assert_called_once_with("flows-0", 42)
+        consumer.seek_to_beginning.assert_awaited_once_with("flows-1")
+
+
+class TestCreateFlowLog:
+    """Test cases for create_flow_log."""
+
+    def test_file_backend(self, tmp_path: Path):
+        """Test the file backend is selected from settings."""
+        settings = KafkaSettings(backend="file", file_log_path=tmp_path)
+        assert isinstance(create_flow_log(settings), FileLog)
+
+    def test_kafka_backend(self):
+        """Test Kafka is the default backend."""
+        assert isinstance(create_flow_log(KafkaSettings()), KafkaLog)
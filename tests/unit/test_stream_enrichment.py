@@ -0,0 +1,182 @@
+"""Unit tests for the stream-fed enrichment worker."""
+
+from datetime import datetime, timezone
+from ipaddress import IPv4Address
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from flowlens.common.stream import FileLog
+from flowlens.enrichment.stream import STREAM_RECORD_COLUMNS, StreamEnrichmentWorker
+from flowlens.ingestion.parsers.base import FlowRecord
+from flowlens.ingestion.parsers.batch import FlowBatch, encode_batch
+
+
+def make_batch(count: int) -> FlowBatch:
+    """Create a batch of flows."""
+    return FlowBatch.from_records([
+        FlowRecord(
+            timestamp=datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc),
+            src_ip=IPv4Address("192.168.1.10"),
+            dst_ip=IPv4Address("10.0.0.5"),
+            src_port=50000 + i,
+            dst_port=443,
+            protocol=6,
+            bytes_count=1500,
+            packets_count=3,
+            exporter_ip=IPv4Address("10.0.0.1"),
+            flow_source="netflow_v9",
+            extended_fields={"vlan": 10},
+        )
+        for i in range(count)
+    ])
+
+
+@pytest.fixture
+def session() -> MagicMock:
+    """Mock database session with a raw asyncpg connection."""
+    driver_conn = MagicMock()
+    driver_conn.copy_records_to_table = AsyncMock()
+    driver_conn.execute = AsyncMock()
+    driver_conn.executemany = AsyncMock()
+
+    raw_conn = MagicMock()
+    raw_conn.driver_connection = driver_conn
+
+    sa_conn = MagicMock()
+    sa_conn.get_raw_connection = AsyncMock(return_value=raw_conn)
+
+    nested = MagicMock()
+    nested.__aenter__ = AsyncMock()
+    nested.__aexit__ = AsyncMock(return_value=False)
+
+    session = MagicMock()
+    session.connection = AsyncMock(return_value=sa_conn)
+    session.execute = AsyncMock()
+    session.begin_nested.return_value = nested
+    session.commit = AsyncMock()
+    session.driver_conn = driver_conn
+    return session
+
+
+@pytest.fixture
+def get_session(session: MagicMock):
+    """Patch get_session to hand out the mock session."""
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=session)
+    context.__aexit__ = AsyncMock(return_value=False)
+
+    with patch("flowlens.enrichment.stream.get_session", return_value=context):
+        yield
+
+
+class TestStreamEnrichmentWorker:
+    """Test cases for StreamEnrichmentWorker."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("get_session")
+    async def test_stores_enriched_flows(self, file_log: FileLog, session: MagicMock):
+        """Test streamed flows are enriched, copied, and the offset committed."""
+        await file_log.publish("flows", encode_batch(make_batch(3)))
+        await file_log.flush()
+
+        worker = StreamEnrichmentWorker(file_log.consumer("flows", "enrichment"))
+        worker._dns_resolver.lookup_batch = AsyncMock(return_value={})
+        worker._correlate_ips = AsyncMock(return_value={})
+        worker._build_enrichment = MagicMock(return_value={"service_name": "https"})
+
+        try:
+            assert await worker._process_batch_internal() == 3
+        finally:
+            await worker._consumer.close()
+
+        _, kwargs = session.driver_conn.copy_records_to_table.call_args
+        assert kwargs["columns"] == STREAM_RECORD_COLUMNS
+        row = dict(zip(STREAM_RECORD_COLUMNS, kwargs["records"][0], strict=True))
+        assert row["is_enriched"] is True
+        assert row["extended_fields"] == '{"vlan": 10, "enrichment": {"service_name": "https"}}'
+        session.commit.assert_awaited_once()
+
+        # Queued for aggregation, nothing left for enrichment to retry
+        queued = session.execute.await_args_list[0].args[1]
+        assert queued == {"timestamps": [row["timestamp"]] * 3}
+        session.driver_conn.execute.assert_not_awaited()
+
+        # Committed, so a new consumer in the group sees nothing
+        resumed = file_log.consumer("flows", "enrichment")
+        assert await resumed.poll(10, timeout=0) == []
+        await resumed.close()
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("get_session")
+    async def test_failed_enrichment_stored_unenriched(
+        self, file_log: FileLog, session: MagicMock
+    ):
+        """Test flows that fail enrichment are kept for the polling path."""
+        await file_log.publish("flows", encode_batch(make_batch(1)))
+        await file_log.flush()
+
+        worker = StreamEnrichmentWorker(file_log.consumer("flows", "enrichment"))
+        worker._dns_resolver.lookup_batch = AsyncMock(return_value={})
+        worker._correlate_ips = AsyncMock(return_value={})
+        worker._build_enrichment = MagicMock(side_effect=KeyError("10.0.0.5"))
+
+        try:
+            assert await worker._process_batch_internal() == 1
+        finally:
+            await worker._consumer.close()
+
+        _, kwargs = session.driver_conn.copy_records_to_table.call_args
+        row = dict(zip(STREAM_RECORD_COLUMNS, kwargs["records"][0], strict=True))
+        assert row["is_enriched"] is False
+        assert row["extended_fields"] == '{"vlan": 10}'
+
+        # Queued for the polling path to retry
+        (entry,) = session.driver_conn.executemany.await_args.args[1]
+        assert entry[1:] == ([row["id"]], [row["timestamp"]])
+        session.execute.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("get_session")
+    async def test_failed_store_redelivers(self, file_log: FileLog, session: MagicMock):
+        """Test messages are polled again after the database write fails."""
+        await file_log.publish("flows", encode_batch(make_batch(2)))
+        await file_log.flush()
+
+        worker = StreamEnrichmentWorker(file_log.consumer("flows", "enrichment"))
+        worker._dns_resolver.lookup_batch = AsyncMock(return_value={})
+        worker._correlate_ips = AsyncMock(return_value={})
+        worker._build_enrichment = MagicMock(return_value={"service_name": "https"})
+        session.driver_conn.copy_records_to_table.side_effect = [
+            ConnectionError("db down"),
+            None,
+        ]
+
+        try:
+            with pytest.raises(ConnectionError):
+                await worker._process_batch_internal()
+            assert await worker._process_batch_internal() == 2
+        finally:
+            await worker._consumer.close()
+
+        first, second = session.driver_conn.copy_records_to_table.call_args_list
+        assert len(second.kwargs["records"]) == 2
+        assert [row[1:] for row in second.kwargs["records"]] == [
+            row[1:] for row in first.kwargs["records"]
+        ]
+
+    @pytest.mark.asyncio
+    async def test_idle_stream_polls_database(self, file_log: FileLog):
+        """Test the worker falls back to the enrichment queue when the stream is empty."""
+        worker = StreamEnrichmentWorker(file_log.consumer("flows", "enrichment"))
+
+        with patch(
+            "flowlens.enrichment.worker.EnrichmentWorker._process_batch_internal",
+            AsyncMock(return_value=7),
+        ) as poll:
+            try:
+                assert await worker._process_batch_internal() == 7
+            finally:
+                await worker._consumer.close()
+
+        poll.assert_awaited_once()
@@ -0,0 +1,110 @@
+"""Unit tests for multi-process collector supervision."""
+
+import pytest
+
+from flowlens.common.config import IngestionSettings
+from flowlens.ingestion.router import MemoryRouter
+from flowlens.ingestion.server import FlowCollector
+from flowlens.ingestion.supervisor import aggregate_stats
+
+
+def worker_stats(**overrides) -> dict:
+    """Create a FlowCollector.stats dict."""
+    stats = {
+        "running": True,
+        "queue_size": 100,
+        "queue_max_size": 1000,
+        "queue_utilization": 10.0,
+        "backpressure_state": "normal",
+        "total_received": 500,
+        "total_sampled": 0,
+        "total_dropped": 0,
+    }
+    stats.update(overrides)
+    return stats
+
+
+class TestAggregateStats:
+    """Test cases for aggregate_stats."""
+
+    def test_empty(self):
+        """Test aggregation with no reports yet."""
+        stats = aggregate_stats({})
+
+        assert stats["running"] is False
+        assert stats["total_received"] == 0
+        assert stats["queue_utilization"] == 0.0
+        assert stats["workers"] == {}
+
+    def test_sums_counters(self):
+        """Test counters are summed across workers."""
+        stats = aggregate_stats({
+            0: worker_stats(total_received=100, total_dropped=5),
+            1: worker_stats(total_received=250, total_dropped=10),
+        })
+
+        assert stats["running"] is True
+        assert stats["total_received"] == 350
+        assert stats["total_dropped"] == 15
+        assert stats["queue_max_size"] == 2000
+
+    def test_recomputes_utilization(self):
+        """Test utilization is derived from summed queue sizes."""
+        stats = aggregate_stats({
+            0: worker_stats(queue_size=100),
+            1: worker_stats(queue_size=300),
+        })
+
+        assert stats["queue_utilization"] == pytest.approx(20.0)
+
+    def test_reports_worst_state(self):
+        """Test most severe backpressure state wins."""
+        stats = aggregate_stats({
+            0: worker_stats(backpressure_state="normal"),
+            1: worker_stats(backpressure_state="dropping"),
+            2: worker_stats(backpressure_state="sampling"),
+        })
+
+        assert stats["backpressure_state"] == "dropping"
+
+    def test_reports_oldest_spooled_batch(self):
+        """Test spool depth is summed and the oldest age wins."""
+        stats = aggregate_stats({
+            0: worker_stats(spool_flows=100, spool_oldest_age_seconds=5.0),
+            1: worker_stats(spool_flows=50, spool_oldest_age_seconds=42.0),
+        })
+
+        assert stats["spool_flows"] == 150
+        assert stats["spool_oldest_age_seconds"] == 42.0
+
+    def test_not_running_if_any_worker_stopped(self):
+        """Test running is False when a worker reports stopped."""
+        stats = aggregate_stats({
+            0: worker_stats(),
+            1: worker_stats(running=False),
+        })
+
+        assert stats["running"] is False
+
+
+class TestReusePort:
+    """Test collectors can share listener ports."""
+
+    @pytest.mark.asyncio
+    async def test_collectors_share_ports(self, unused_udp_port_factory):
+        """Test two collectors bind the same ports with SO_REUSEPORT."""
+        settings = IngestionSettings(
+            bind_address="127.0.0.1",
+            netflow_port=unused_udp_port_factory(),
+            sflow_port=unused_udp_port_factory(),
+            worker_processes=2,
+        )
+
+        collectors = [FlowCollector(settings, router=MemoryRouter()) for _ in range(2)]
+        try:
+            for collector in collectors:
+                await collector.start()
+            assert all(collector.stats["running"] for collector in collectors)
+        finally:
+            for collector in collectors:
+                await collector.stop()
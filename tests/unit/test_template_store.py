@@ -0,0 +1,236 @@
+"""Unit tests for the NetFlow v9/IPFIX template store, pending buffer and snapshots."""
+
+from dataclasses import dataclass, field
+
+import pytest
+
+from flowlens.common.metrics import TEMPLATE_EVICTIONS, TEMPLATES_CACHED
+from flowlens.ingestion.parsers.ipfix import IPFIXField, IPFIXTemplate, IPFIXTemplateCache
+from flowlens.ingestion.parsers.netflow_v9 import Template, TemplateCache, TemplateField
+from flowlens.ingestion.parsers.templates import (
+    PendingFlowsets,
+    TemplateStore,
+    load_template_snapshot,
+    snapshot_templates,
+    write_template_snapshot,
+)
+
+
+@dataclass
+class FakeTemplate:
+    """Minimal template."""
+
+    template_id: int
+    fields: list = field(default_factory=list)
+
+
+class FakeTemplateStore(TemplateStore[FakeTemplate]):
+    """Store of minimal templates."""
+
+    def encode_template(self, template: FakeTemplate) -> int:
+        return template.template_id
+
+    def decode_template(self, domain_id: int, data: int) -> FakeTemplate:  # noqa: ARG002
+        return FakeTemplate(data)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def cached_gauge(protocol: str, exporter: str) -> float | None:
+    """Read the per-exporter template gauge."""
+    for metric in TEMPLATES_CACHED.collect():
+        for sample in metric.samples:
+            if sample.labels == {"protocol": protocol, "exporter": exporter}:
+                return sample.value
+    return None
+
+
+class TestTemplateStore:
+    """Test cases for TemplateStore."""
+
+    @pytest.fixture
+    def clock(self) -> FakeClock:
+        """Fake clock."""
+        return FakeClock()
+
+    @pytest.fixture
+    def store(self, clock: FakeClock) -> TemplateStore[FakeTemplate]:
+        """Small template store."""
+        return FakeTemplateStore("test", ttl_seconds=60, max_templates=3, clock=clock)
+
+    def test_snapshot_hooks_required(self):
+        """Test a store without snapshot encoding cannot be created."""
+
+        class IncompleteStore(TemplateStore[FakeTemplate]):
+            def encode_template(self, template: FakeTemplate) -> int:
+                return template.template_id
+
+        with pytest.raises(TypeError):
+            IncompleteStore("test")  # type: ignore[abstract]
+
+    def test_get_set(self, store: TemplateStore[FakeTemplate]):
+        """Test templates are stored per exporter, domain and ID."""
+        template = FakeTemplate(256)
+        store.set("10.0.0.1", 1, template)
+
+        assert store.get("10.0.0.1", 1, 256) is template
+        assert store.get("10.0.0.1", 2, 256) is None
+        assert store.get("10.0.0.2", 1, 256) is None
+
+    def test_expiry(self, store: TemplateStore[FakeTemplate], clock: FakeClock):
+        """Test templates expire after the TTL."""
+        store.set("10.0.0.1", 1, FakeTemplate(256))
+
+        clock.now += 60
+        assert store.get("10.0.0.1", 1, 256) is not None
+
+        clock.now += 1
+        assert store.get("10.0.0.1", 1, 256) is None
+        assert store.size == 0
+
+    def test_refresh_restarts_ttl(self, store: TemplateStore[FakeTemplate], clock: FakeClock):
+        """Test re-sent templates replace the old entry with a new TTL."""
+        store.set("10.0.0.1", 1, FakeTemplate(256))
+        clock.now += 50
+        replacement = FakeTemplate(256)
+        store.set("10.0.0.1", 1, replacement)
+        clock.now += 50
+
+        assert store.get("10.0.0.1", 1, 256) is replacement
+        assert store.size == 1
+
+    def test_evicts_least_recently_used(self, store: TemplateStore[FakeTemplate]):
+        """Test the least recently used template is evicted at capacity."""
+        before = TEMPLATE_EVICTIONS.labels(protocol="test", reason="capacity")._value.get()
+        for template_id in (256, 257, 258):
+            store.set("10.0.0.1", 1, FakeTemplate(template_id))
+
+        # Touch 256 so 257 becomes the least recently used
+        store.get("10.0.0.1", 1, 256)
+        store.set("10.0.0.1", 1, FakeTemplate(259))
+
+        assert store.size == 3
+        assert store.get("10.0.0.1", 1, 257) is None
+        assert store.get("10.0.0.1", 1, 256) is not None
+        assert TEMPLATE_EVICTIONS.labels(protocol="test", reason="capacity")._value.get() == before + 1
+
+    def test_exporter_counts(self, store: TemplateStore[FakeTemplate], clock: FakeClock):
+        """Test per-exporter counts and gauges track inserts and removals."""
+        store.set("10.0.0.1", 1, FakeTemplate(256))
+        store.set("10.0.0.1", 1, FakeTemplate(257))
+        store.set("10.0.0.2", 1, FakeTemplate(256))
+
+        assert store.exporter_counts == {"10.0.0.1": 2, "10.0.0.2": 1}
+        assert cached_gauge("test", "10.0.0.1") == 2
+
+        clock.now += 61
+        store.get("10.0.0.2", 1, 256)
+
+        assert store.exporter_counts == {"10.0.0.1": 2}
+        assert cached_gauge("test", "10.0.0.2") is None
+
+        store.clear()
+        assert store.exporter_counts == {}
+        assert cached_gauge("test", "10.0.0.1") is None
+
+
+class TestPendingFlowsets:
+    """Test cases for PendingFlowsets."""
+
+    @pytest.fixture
+    def clock(self) -> FakeClock:
+        """Fake clock."""
+        return FakeClock()
+
+    @pytest.fixture
+    def pending(self, clock: FakeClock) -> PendingFlowsets:
+        """Small pending buffer."""
+        return PendingFlowsets("test", max_per_exporter=2, max_age_seconds=30, clock=clock)
+
+    def test_pop_matching_template(self, pending: PendingFlowsets):
+        """Test only data sets for the arrived template are returned."""
+        pending.add("10.0.0.1", 1, 256, b"a", "h1")
+        pending.add("10.0.0.1", 1, 257, b"b", "h2")
+
+        assert pending.pop("10.0.0.1", 1, 256) == [(b"a", "h1")]
+        assert pending.pop("10.0.0.1", 1, 256) == []
+        assert pending.size == 1
+
+    def test_bounded_per_exporter(self, pending: PendingFlowsets):
+        """Test the oldest data set is dropped when an exporter's buffer is full."""
+        for data in (b"1", b"2", b"3"):
+            pending.add("10.0.0.1", 1, 256, data, None)
+        pending.add("10.0.0.2", 1, 256, b"x", None)
+
+        assert [data for data, _ in pending.pop("10.0.0.1", 1, 256)] == [b"2", b"3"]
+        assert pending.pop("10.0.0.2", 1, 256) == [(b"x", None)]
+
+    def test_expired_not_replayed(self, pending: PendingFlowsets, clock: FakeClock):
+        """Test data sets older than max age are discarded."""
+        pending.add("10.0.0.1", 1, 256, b"old", None)
+        clock.now += 31
+        pending.add("10.0.0.1", 1, 256, b"new", None)
+
+        assert pending.pop("10.0.0.1", 1, 256) == [(b"new", None)]
+
+    def test_disabled(self, clock: FakeClock):
+        """Test a zero-size buffer holds nothing."""
+        pending = PendingFlowsets("test", max_per_exporter=0, clock=clock)
+        pending.add("10.0.0.1", 1, 256, b"a", None)
+
+        assert pending.size == 0
+
+
+class TestTemplateSnapshot:
+    """Test cases for template snapshot files."""
+
+    def test_round_trip(self, tmp_path):
+        """Test v9 and IPFIX templates survive a snapshot."""
+        v9 = TemplateCache()
+        v9.set("10.0.0.1", 1, Template(256, 1, [TemplateField(8, 4), TemplateField(12, 4)]))
+        ipfix = IPFIXTemplateCache()
+        ipfix.set("10.0.0.2", 3, IPFIXTemplate(300, 3, [IPFIXField(8, 4), IPFIXField(100, 2, 9)]))
+
+        path = tmp_path / "templates.json"
+        write_template_snapshot(path, snapshot_templates({"netflow_v9": v9, "ipfix": ipfix}))
+
+        restored_v9 = TemplateCache()
+        restored_ipfix = IPFIXTemplateCache()
+        loaded = load_template_snapshot(path, {"netflow_v9": restored_v9, "ipfix": restored_ipfix})
+
+        assert loaded == 2
+        assert restored_v9.get("10.0.0.1", 1, 256).fields == [TemplateField(8, 4), TemplateField(12, 4)]
+        restored = restored_ipfix.get("10.0.0.2", 3, 300)
+        assert restored.fields == [IPFIXField(8, 4), IPFIXField(100, 2, 9)]
+        assert restored.decoder is not None
+
+    def test_remaining_ttl(self):
+        """Test loaded templates keep only their remaining TTL."""
+        clock = FakeClock()
+        store = TemplateCache(ttl_seconds=100)
+        store.set("10.0.0.1", 1, Template(256, 1, [TemplateField(8, 4)]))
+        entries = store.dump()
+
+        restored = TemplateCache(ttl_seconds=100)
+        restored._clock = clock
+        assert restored.load(entries, elapsed=150) == 0
+        assert restored.load(entries, elapsed=60) == 1
+
+        clock.now += 41
+        assert restored.get("10.0.0.1", 1, 256) is None
+
+    def test_unknown_version(self, tmp_path):
+        """Test snapshots from another format version are rejected."""
+        path = tmp_path / "templates.json"
+        path.write_text('{"version": 99}')
+
+        with pytest.raises(ValueError, match="version"):
+            load_template_snapshot(path, {})